@@ -2,12 +2,14 @@
 Universal RAG System - Flask Application
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
 from pathlib import Path
 import logging
 import os
 import redis
 import sqlite3
+import threading
+import time
 
 from core import DatabaseManager, LLMService
 from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity, get_jwt
@@ -16,6 +18,15 @@ from core.chat_manager import ChatManager
 from core.analytics import Analytics
 from core.duplicate_detector import DuplicateDetector
 from core.category_manager import CategoryManager
+from core.classification_cache import ClassificationCache
+from core.ollama_scheduler import INTERACTIVE, OllamaBusy
+from core.answer_cache import AnswerCache, CorpusVersion
+from core.single_flight import SingleFlight, flight_key
+from core.chat_stream import FullFileAnswer, LatencyTracker, response_events, stream_chat
+from core.permissions import clear_permission_cache
+from core.index_versions import target_spec, version_summary
+from core.ingest_writer import IngestClient
+from core.query_filters import FILTER_FIELDS, QueryFilterError, filters_cache_key, parse_query_filters
 from middleware.auth import require_manager, require_permission, get_current_user
 from config import Config
 
@@ -43,8 +54,13 @@ SORTED_DIR = DATA_DIR / "sorted"
 SORTED_DIR = DATA_DIR / "sorted"
 
 # Initialize services
-db_manager = DatabaseManager(DB_DIR)
+db_manager = DatabaseManager(DB_DIR, read_only=Config.INGEST_WRITER_ENABLED)
 llm_service = LLMService(model='llama3.2')
+# Language profiles load in the background instead of on the first ambiguous query
+threading.Thread(target=llm_service.language_detector.warm_up, name="langdetect-warmup", daemon=True).start()
+if Config.OLLAMA_WARMUP:
+    # Load the chat model (and its cached system prompt) before the first request pays for it
+    threading.Thread(target=llm_service.warm_up, name="ollama-warmup", daemon=True).start()
 classifier = DocumentClassifier()
 chat_manager = ChatManager(DATA_DIR)
 
@@ -53,6 +69,17 @@ redis_client = redis.Redis.from_url(Config.CELERY_BROKER_URL, decode_responses=T
 analytics = Analytics(redis_client, SORTED_DIR)
 duplicate_detector = DuplicateDetector(redis_client)
 category_manager = CategoryManager(redis_client)
+corpus_version_counter = CorpusVersion(redis_client)
+# Writes go through the ingest writer when it owns the store
+db_writer = IngestClient.from_config(redis_client) if Config.INGEST_WRITER_ENABLED else db_manager
+answer_cache = AnswerCache(
+    threshold=Config.ANSWER_CACHE_SIMILARITY,
+    ttl=Config.ANSWER_CACHE_TTL,
+    negative_ttl=Config.ANSWER_CACHE_NEGATIVE_TTL,
+    max_entries_per_role=Config.ANSWER_CACHE_MAX_PER_ROLE
+)
+chat_latency = LatencyTracker(window=Config.LATENCY_WINDOW)
+single_flight = SingleFlight(redis_client)
 
 # Initialize JWT
 app.config['JWT_SECRET_KEY'] = Config.JWT_SECRET_KEY
@@ -173,6 +200,16 @@ def get_roles():
         logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+def _invalidate_role_access():
+    """Forget everything computed under the old role permissions
+    
+    Cached answers and in-flight keys are scoped by role name and corpus
+    version, so bumping the shared version drops them on every replica.
+    """
+    clear_permission_cache()
+    answer_cache.clear()
+    corpus_version_counter.bump()
+
 @app.route('/api/admin/roles', methods=['POST'])
 @require_permission('admin.dashboard')
 def create_role():
@@ -188,6 +225,7 @@ def create_role():
         
         success = auth_manager.create_role(name, permissions, file_permissions)
         if success:
+            _invalidate_role_access()
             return jsonify({'status': 'success', 'message': 'Role created'})
         return jsonify({'error': 'Role already exists or creation failed'}), 400
     except Exception as e:
@@ -212,6 +250,7 @@ def update_role(role_id):
         )
         
         if success:
+            _invalidate_role_access()
             return jsonify({'status': 'success', 'message': msg})
         return jsonify({'error': msg}), 400
     except Exception as e:
@@ -225,6 +264,7 @@ def delete_role(role_id):
     """Delete a role (Admin only)"""
     success, msg = auth_manager.delete_role(role_id)
     if success:
+        _invalidate_role_access()
         return jsonify({'status': 'success', 'message': msg})
     return jsonify({'error': msg}), 400
 
@@ -349,6 +389,28 @@ def get_all_chats_admin():
         
     return jsonify(flattened_chats)
 
+@app.route('/api/admin/index', methods=['GET'])
+@require_permission('admin.dashboard')
+def index_versions_status():
+    """Index versions with re-embedding progress and throughput (admin only)"""
+    summary = version_summary(db_manager.registry)
+    summary['serving'] = db_manager.collection_name
+    summary['chunks'] = db_manager.get_count()
+    return jsonify(summary)
+
+@app.route('/api/admin/index/reindex', methods=['POST'])
+@require_permission('admin.dashboard')
+def start_reindex():
+    """Re-embed into a shadow version with the configured model/chunking (admin only)"""
+    building = [v for v in db_manager.registry.list_versions() if v['status'] == 'building']
+    if building and building[0]['updated_at'] and time.time() - building[0]['updated_at'] < 300:
+        return jsonify({'error': f"Version '{building[0]['name']}' is already being built"}), 409
+    from worker import reindex_task
+    data = request.get_json(silent=True) or {}
+    task = reindex_task.delay(keep_old=bool(data.get('keep_old', False)))
+    logger.info(f"Re-index queued (task {task.id})")
+    return jsonify({'status': 'queued', 'task_id': task.id, 'target': target_spec()}), 202
+
 @app.route('/api/chats/<chat_id>/messages', methods=['GET'])
 @jwt_required()
 def get_messages(chat_id):
@@ -368,10 +430,96 @@ def update_title(chat_id):
 
 
 
+def _save_chat_turn(chat_id, query, response):
+    """Append the question and answer to the chat history"""
+    if not chat_id:
+        return
+    messages = chat_manager.get_messages(chat_id)
+    messages.append({
+        "sender": "user", 
+        "text": query, 
+        "timestamp": __import__('datetime').datetime.now().isoformat()
+    })
+    messages.append({
+        "sender": "assistant", 
+        "text": response['answer'], 
+        "cited_files": response['cited_files'],
+        "confidence_score": response['confidence_score'],
+        "source_snippets": response['source_snippets'],
+        "timestamp": __import__('datetime').datetime.now().isoformat()
+    })
+    chat_manager.save_messages(chat_id, messages)
+    
+    # Auto-update title if it's the first message and title is currently generic
+    if len(messages) <= 2:
+         # Simple heuristic: first few words of query
+         new_title = (query[:30] + '...') if len(query) > 30 else query
+         chat_manager.update_title(chat_id, new_title)
+
+
+def _event_stream(events, on_complete, started, keep_chars=None):
+    """SSE response: sources first, then tokens, then the final answer frame"""
+    return Response(
+        stream_with_context(stream_chat(events, on_complete, latency=chat_latency, started=started,
+                                        keep_chars=keep_chars)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _chat_reply(response, chat_id, query, started, stream):
+    """Persist a complete response and return it as JSON or as a one-shot stream"""
+    if stream:
+        return _event_stream(response_events(response), lambda final: _save_chat_turn(chat_id, query, final),
+                             started)
+    _save_chat_turn(chat_id, query, response)
+    # Blocking answers reach the user all at once, so the first token arrives with the last
+    elapsed = time.time() - started
+    chat_latency.record('chat_ttft', elapsed)
+    chat_latency.record('chat_total', elapsed)
+    return jsonify(response)
+
+
+def _full_file_reply(full_file, chat_id, query, started, stream):
+    """Send a retrieved file piece by piece; chat history keeps its capped copy"""
+    def save(final):
+        # Also on disconnect: whatever was sent so far, capped
+        _save_chat_turn(chat_id, query, full_file.response())
+    
+    if stream:
+        return _event_stream(full_file.events(), save, started, keep_chars=Config.FULL_FILE_HISTORY_CHARS)
+    
+    def body():
+        first = True
+        for piece in full_file.json_chunks():
+            if first:
+                chat_latency.record('chat_ttft', time.time() - started)
+                first = False
+            yield piece
+        chat_latency.record('chat_total', time.time() - started)
+        save(None)
+    
+    return Response(stream_with_context(body()), mimetype='application/json')
+
+
+def _busy_reply(e):
+    """503 with Retry-After when the Ollama scheduler turns a chat away"""
+    logger.warning(f"Chat not admitted: {e}")
+    reply = jsonify({'error': 'busy', 'message': str(e), 'retry_after': round(e.retry_after)})
+    reply.headers['Retry-After'] = str(int(e.retry_after + 0.5))
+    return reply, 503
+
+
 @app.route('/chat', methods=['POST'])
 @jwt_required()
 def chat():
-    """Handle chat queries with role-based access control"""
+    """Handle chat queries with role-based access control
+    
+    With {"stream": true} (or Accept: text/event-stream) the answer is sent as
+    Server-Sent Events: a 'sources' frame, 'token' frames as Ollama generates,
+    then a 'done' frame with the same fields as the JSON reply plus timings.
+    """
+    started = time.time()
     try:
         data = request.get_json(silent=True)
         if data and 'message' in data:
@@ -382,10 +530,18 @@ def chat():
         
         query = str(data.get('query', '')).strip()
         chat_id = data.get('chat_id')
+        stream = bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
         
         if not query:
             return jsonify({'error': 'Empty query'}), 400
         
+        # Optional metadata filters (domain, category, file_ext, uploaded_by, date_from/date_to)
+        try:
+            filters = parse_query_filters(data.get('filters'))
+        except QueryFilterError as e:
+            return jsonify({'error': str(e)}), 400
+        cache_scope = filters_cache_key(filters)
+        
         # RBAC: Extract user role from JWT claims
         claims = get_jwt()
         user_role = claims.get('role', None)  # Get role from JWT
@@ -404,113 +560,165 @@ def chat():
         # If filename detected AND asking for it, try full file retrieval
         if filename_matches and asking_for_file:
             for detected_filename in filename_matches:
-                full_content = db_manager.get_full_file(detected_filename)
-                if full_content:
+                # Streamed from the store; only the preview is read before the reply starts
+                try:
+                    pieces = db_manager.iter_full_file(detected_filename)
+                    full_file = pieces is not None and FullFileAnswer(
+                        detected_filename, pieces, preview_chars=Config.FULL_FILE_PREVIEW_CHARS,
+                        history_chars=Config.FULL_FILE_HISTORY_CHARS)
+                except Exception as e:
+                    logger.error(f"Error retrieving full file '{detected_filename}': {e}")
+                    full_file = None
+                if full_file:
                     logger.debug(f"📄 Full file retrieval triggered for: {detected_filename}")
+                    return _full_file_reply(full_file, chat_id, query, started, stream)
+        
+        # SEMANTIC ANSWER CACHE: near-duplicate questions from the same role reuse
+        # the stored answer until the corpus changes
+        corpus_version = corpus_version_counter.get()
+        query_embedding = db_manager.embed_query(query)
+        response = answer_cache.lookup(query_embedding, user_role, corpus_version, scope=cache_scope)
+        
+        if response:
+            response['cached'] = True
+        else:
+            # SINGLE-FLIGHT: identical questions already in flight (any thread or replica)
+            # wait for that answer instead of running retrieval and generation again
+            flight, response = single_flight.join(flight_key(query, user_role, corpus_version, cache_scope))
+            if response:
+                response['coalesced'] = True
+                return _chat_reply(response, chat_id, query, started, stream)
+            
+            try:
+                # Turn the request away before retrieval when the Ollama queue is already full
+                if llm_service.scheduler:
+                    llm_service.scheduler.precheck(INTERACTIVE)
+                
+                # NORMAL RAG FLOW with RBAC: Pass user_role to query
+                # Hybrid (BM25 + vector) candidates for Re-ranking (CrossEncoder will filter to Top 5)
+                # With adaptive depth the deeper pool is fetched; LLMService picks how much of it to rerank
+                n_candidates = Config.RERANK_MAX_DEPTH if llm_service.rerank_policy else Config.RERANK_CANDIDATES
+                chunks, rbac_filtered = db_manager.query(query, n_results=n_candidates,
+                                                         user_role=user_role, filters=filters)
+                
+                if not chunks:
+                    # Check if it was RBAC that blocked access vs. no results found
+                    if rbac_filtered:
+                        response = {
+                            'answer': '🔒 **Access Denied**: You do not have permission to access documents related to this query. Please contact your administrator if you believe this is an error.',
+                            'cited_files': [],
+                            'confidence_score': 0,
+                            'source_snippets': [],
+                            'detected_language': 'en'
+                        }
+                    else:
+                        response = {
+                            'answer': 'No relevant documents found.',
+                            'cited_files': [],
+                            'confidence_score': 0,
+                            'source_snippets': [],
+                            'detected_language': 'en'
+                        }
+                    # Negative results are cached with the shorter negative TTL
+                    answer_cache.store(query_embedding, user_role, corpus_version, response, scope=cache_scope)
+                else:
+                    if stream:
+                        def finish(final):
+                            # Only cache grounded answers - "no info" replies may stem from an Ollama error
+                            if final['cited_files'] and not final.get('interrupted'):
+                                answer_cache.store(query_embedding, user_role, corpus_version,
+                                                   {k: v for k, v in final.items() if k != 'timings'},
+                                                   scope=cache_scope)
+                            _save_chat_turn(chat_id, query, final)
+                        
+                        events = llm_service.stream_response(query, chunks, expand=db_manager.expand_to_parents)
+                        return _event_stream(flight.events(events), finish, started)
                     
-                    # Create snippet for UI buttons (first 500 chars as preview)
-                    preview = full_content[:500] + "..." if len(full_content) > 500 else full_content
-                    
+                    answer, cited_files, confidence_score, source_snippets, detected_lang = llm_service.generate_response(
+                        query, chunks, expand=db_manager.expand_to_parents)
                     response = {
-                        'answer': f"Here is the complete content of **{detected_filename}**:\n\n```\n{full_content}\n```",
-                        'cited_files': [detected_filename],
-                        'confidence_score': 1.0,
-                        'source_snippets': [{
-                            'filename': detected_filename,
-                            'text': preview,
-                            'category': 'Full File'
-                        }],
-                        'detected_language': 'en',
-                        'full_file_retrieval': True
+                        'answer': answer,
+                        'cited_files': cited_files,
+                        'confidence_score': confidence_score,
+                        'source_snippets': source_snippets,
+                        'detected_language': detected_lang
                     }
-                    
-                    # Save to chat history
-                    if chat_id:
-                        messages = chat_manager.get_messages(chat_id)
-                        messages.append({
-                            "sender": "user", 
-                            "text": query, 
-                            "timestamp": __import__('datetime').datetime.now().isoformat()
-                        })
-                        messages.append({
-                            "sender": "assistant", 
-                            "text": response['answer'], 
-                            "cited_files": response['cited_files'],
-                            "confidence_score": response['confidence_score'],
-                            "source_snippets": response['source_snippets'],
-                            "timestamp": __import__('datetime').datetime.now().isoformat()
-                        })
-                        chat_manager.save_messages(chat_id, messages)
-                        
-                        if len(messages) <= 2:
-                            new_title = (query[:30] + '...') if len(query) > 30 else query
-                            chat_manager.update_title(chat_id, new_title)
-                    
-                    return jsonify(response)
-        
-        # NORMAL RAG FLOW with RBAC: Pass user_role to query
-        # V6: Increase to 25 for Re-ranking (CrossEncoder will filter to Top 5)
-        chunks, rbac_filtered = db_manager.query(query, n_results=25, user_role=user_role)
-        
-        if not chunks:
-            # Check if it was RBAC that blocked access vs. no results found
-            if rbac_filtered:
-                response = {
-                    'answer': '🔒 **Access Denied**: You do not have permission to access documents related to this query. Please contact your administrator if you believe this is an error.',
-                    'cited_files': [],
-                    'confidence_score': 0,
-                    'source_snippets': [],
-                    'detected_language': 'en'
-                }
-            else:
-                response = {
-                    'answer': 'No relevant documents found.',
-                    'cited_files': [],
-                    'confidence_score': 0,
-                    'source_snippets': [],
-                    'detected_language': 'en'
-                }
-        else:
-            answer, cited_files, confidence_score, source_snippets, detected_lang = llm_service.generate_response(query, chunks)
-            response = {
-                'answer': answer,
-                'cited_files': cited_files,
-                'confidence_score': confidence_score,
-                'source_snippets': source_snippets,
-                'detected_language': detected_lang
-            }
-            
-        # Save to chat history if chat_id provided
-        if chat_id:
-            messages = chat_manager.get_messages(chat_id)
-            messages.append({
-                "sender": "user", 
-                "text": query, 
-                "timestamp": __import__('datetime').datetime.now().isoformat()
-            })
-            messages.append({
-                "sender": "assistant", 
-                "text": response['answer'], 
-                "cited_files": response['cited_files'],
-                "confidence_score": response['confidence_score'],
-                "source_snippets": response['source_snippets'],
-                "timestamp": __import__('datetime').datetime.now().isoformat()
-            })
-            chat_manager.save_messages(chat_id, messages)
+                    # Only cache grounded answers - "no info" replies may stem from an Ollama error
+                    if cited_files:
+                        answer_cache.store(query_embedding, user_role, corpus_version, response, scope=cache_scope)
+            except BaseException:
+                flight.fail()  # Waiting duplicates compute their own answer
+                raise
+            flight.complete(response)
             
-            # Auto-update title if it's the first message and title is currently generic
-            if len(messages) <= 2:
-                 # Simple heuristic: first few words of query
-                 new_title = (query[:30] + '...') if len(query) > 30 else query
-                 chat_manager.update_title(chat_id, new_title)
-        
-        return jsonify(response)
+        return _chat_reply(response, chat_id, query, started, stream)
         
+    except OllamaBusy as e:
+        return _busy_reply(e)
     except Exception as e:
         logger.error(f"Error: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/search', methods=['GET', 'POST'])
+@jwt_required()
+def search():
+    """Retrieve matching chunks (no LLM answer) with RBAC and metadata filters
+    
+    POST body: {"query": "...", "filters": {...}, "n_results": 10}
+    GET params: query, n_results and any filter field (list fields may repeat)
+    """
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            raw_filters = data.get('filters')
+        else:
+            data = request.args
+            raw_filters = {}
+            for field in FILTER_FIELDS:
+                values = request.args.getlist(field)
+                if values:
+                    raw_filters[field] = values if field not in ('date_from', 'date_to') else values[0]
+        
+        query = str(data.get('query', '')).strip()
+        if not query:
+            return jsonify({'error': 'Empty query'}), 400
+        
+        try:
+            n_results = int(data.get('n_results', 10))
+        except (TypeError, ValueError):
+            return jsonify({'error': "'n_results' must be an integer"}), 400
+        if not 1 <= n_results <= 50:
+            return jsonify({'error': "'n_results' must be between 1 and 50"}), 400
+        
+        try:
+            filters = parse_query_filters(raw_filters)
+        except QueryFilterError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        user_role = get_jwt().get('role', None)
+        chunks, rbac_filtered = db_manager.query(query, n_results=n_results, user_role=user_role, filters=filters)
+        
+        return jsonify({
+            'query': query,
+            'filters': filters,
+            'count': len(chunks),
+            'rbac_filtered': rbac_filtered,
+            'results': [{
+                'chunk_id': chunk['chunk_id'],
+                'filename': chunk['filename'],
+                'category': chunk['category'],
+                'filepath': chunk['filepath'],
+                'similarity': round(chunk['similarity'], 4),
+                'text': chunk['text'][:500]
+            } for chunk in chunks]
+        })
+        
+    except Exception as e:
+        logger.error(f"Search error: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/classify', methods=['POST'])
 def classify():
     """Classify given text/filename into Domain/Category with confidence.
@@ -610,7 +818,20 @@ def status():
             'database_count': doc_count,
             'sorted_files': sorted_files,
             'categories': categories,
-            'ollama_available': llm_service.check_availability()
+            'ollama_available': llm_service.check_availability(),
+            'embedding_cache': db_manager.embedding_cache.stats(),
+            'answer_cache': answer_cache.stats(),
+            'chat_latency': chat_latency.summary(),
+            'rerank_batching': llm_service.rerank_batcher.stats() if llm_service.rerank_batcher else None,
+            'rerank_cache': llm_service.rerank_cache.stats() if llm_service.rerank_cache else None,
+            'reranker_backend': type(llm_service.reranker).__name__ if llm_service.reranker else None,
+            'rerank_policy': llm_service.rerank_policy.stats() if llm_service.rerank_policy else None,
+            'model_latency': llm_service.model_latency.summary(),
+            'language_detection': llm_service.language_detector.stats(),
+            'classification_cache': ClassificationCache.stats(redis_client),
+            'ollama_endpoints': llm_service.client.stats(),
+            'ollama_scheduler': llm_service.scheduler.stats() if llm_service.scheduler else None,
+            'single_flight': single_flight.stats()
         })
         
     except Exception as e:
@@ -1117,7 +1338,10 @@ def delete_file(filepath):
         if is_incoming:
             deleted_chunks = 0  # Files in incoming aren't indexed yet
         else:
-            deleted_chunks = db_manager.delete_by_filepath(str(full_path))
+            llm_service.invalidate_rerank_scores(db_manager.file_index.chunk_ids_for(str(full_path)))
+            deleted_chunks = db_writer.delete_by_filepath(str(full_path))
+            if deleted_chunks:
+                corpus_version_counter.bump()
         
         # Remove from user_uploads tracking table
         conn = sqlite3.connect(DATA_DIR / 'users.db')
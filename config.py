@@ -23,8 +23,136 @@ class Config:
     CHUNK_SIZE_SMALL = 2000  # For files < 1MB
     CHUNK_SIZE_MEDIUM = 2500  # For files 1-10MB
     CHUNK_SIZE_LARGE = 3000  # For files > 10MB
+    CHUNK_OVERLAP = 150  # Characters shared by consecutive chunks
     TOP_K_RETRIEVAL = 10
     
+    # Small-to-big Retrieval (child passages are searched, their parent section goes to the LLM)
+    ENABLE_PARENT_RETRIEVAL = True
+    CHILD_CHUNK_SIZE = 400  # Characters per embedded child passage
+    CHILD_CHUNK_OVERLAP = 50
+    
+    # Retrieval Settings
+    ENABLE_HYBRID_SEARCH = True  # Fuse BM25 keyword hits with vector hits
+    RRF_K = 60  # Reciprocal-rank fusion constant
+    RERANK_CANDIDATES = 10  # Candidate pool handed to the CrossEncoder (after MMR)
+    
+    # Reranker Micro-batching (concurrent requests share one CrossEncoder forward pass)
+    ENABLE_RERANK_BATCHING = True
+    RERANK_BATCH_MAX_PAIRS = 32  # Pairs per batched predict (CrossEncoder.predict batch_size)
+    RERANK_BATCH_WAIT_MS = 5  # Longest a request waits for others to join its batch
+    RERANK_CACHE_SIZE = 50000  # Cached (query, chunk) scores; 0 disables the cache
+    
+    # Adaptive Rerank Depth (RERANK_CANDIDATES is the default depth; cosine distances)
+    ENABLE_ADAPTIVE_RERANK = True
+    RERANK_MAX_DEPTH = 25  # Candidates retrieved, and reranked when many hits are near-tied
+    RERANK_SKIP_MARGIN = 0.15  # Skip reranking when the top hit leads the runner-up by this much...
+    RERANK_SKIP_MAX_DISTANCE = 0.5  # ...and is itself at most this far from the query
+    RERANK_AMBIGUITY_BAND = 0.05  # Hits within this distance of the top hit count as tied
+    
+    # MMR Diversification (drops near-duplicate overlapping chunks before reranking)
+    ENABLE_MMR = True
+    MMR_FETCH_K = 30  # Candidates retrieved before MMR selection (at least)
+    MMR_FETCH_FACTOR = 2  # ...and at least this many times the number of results asked for
+    MMR_DIVERSITY = 0.3  # 0 = pure relevance order, 1 = pure novelty
+    MMR_PER_FILE_CAP = 3  # Max chunks from one file in the selected pool
+    
+    # Domain Sharding (one ChromaDB collection per domain; migrate with scripts/migrate_to_domain_shards.py)
+    ENABLE_DOMAIN_SHARDING = __import__("os").environ.get("ENABLE_DOMAIN_SHARDING", "false").lower() == "true"
+    SHARD_QUERY_WORKERS = 8  # Parallel shard queries per request
+    
+    # Vector Backend: "chroma" (HNSW), "numpy" (exact, memory-mapped) or "auto" (numpy below the threshold)
+    VECTOR_BACKEND = __import__("os").environ.get("VECTOR_BACKEND", "chroma")
+    VECTOR_STORE_DTYPE = __import__("os").environ.get("VECTOR_STORE_DTYPE", "float32")  # float32, float16 or int8
+    VECTOR_RESCORE_CANDIDATES = 100  # Quantized stores rescore this many hits at float32
+    VECTOR_EXACT_SEARCH_MAX_CHUNKS = 50000  # Brute-force cosine stays fast up to roughly this size
+    
+    # Embedding Model and Index Versions (a change is re-embedded in the background, see /admin)
+    EMBEDDING_MODEL = __import__("os").environ.get("EMBEDDING_MODEL", "default")  # "default" = bundled all-MiniLM-L6-v2
+    VERSION_REFRESH_SECONDS = 5  # How often readers check for a swapped-in version
+    INDEX_VERSION_GRACE_SECONDS = 30  # Wait after a swap before the old version is deleted
+    REINDEX_BATCH_FILES = 20  # Files re-embedded per batch
+    
+    # Inference Backend for the reranker and embedder: "pytorch", "onnx" or "onnx-int8" (CPU, quantized)
+    INFERENCE_BACKEND = __import__("os").environ.get("INFERENCE_BACKEND", "pytorch")
+    ONNX_MODEL_DIR = DATA_DIR / "onnx_models"  # Exported/quantized models, shared by all processes
+    ONNX_THREADS = int(__import__("os").environ.get("ONNX_THREADS", "0"))  # Intra-op threads per session, 0 = all cores
+    
+    # Query Embedding Cache
+    EMBEDDING_CACHE_SIZE = 2048  # In-process LRU entries (~1.5KB each for MiniLM)
+    EMBEDDING_CACHE_REDIS_URL = __import__("os").environ.get("EMBEDDING_CACHE_REDIS_URL")  # Optional shared tier
+    EMBEDDING_CACHE_TTL = 86400  # Seconds
+    
+    # Semantic Answer Cache (invalidated by the corpus version counter)
+    ANSWER_CACHE_SIMILARITY = 0.92  # Cosine similarity for a near-duplicate question
+    ANSWER_CACHE_TTL = 3600  # Seconds for grounded answers
+    ANSWER_CACHE_NEGATIVE_TTL = 300  # Seconds for "No relevant documents" results
+    ANSWER_CACHE_MAX_PER_ROLE = 256
+    
+    # Single-flight /chat (identical concurrent questions share one retrieval + generation)
+    ENABLE_SINGLE_FLIGHT = True
+    SINGLE_FLIGHT_WAIT = 90  # Seconds a duplicate waits for the first request's answer before computing its own
+    SINGLE_FLIGHT_LOCK_TTL = 120  # Seconds; the lock of a crashed replica expires after this
+    SINGLE_FLIGHT_RESULT_TTL = 15  # Seconds the shared answer stays readable for replicas still waiting
+    
+    # Context Packing (token budget of the Ollama window: documents + prompt + answer <= num_ctx)
+    ENABLE_CONTEXT_PACKING = True
+    CONTEXT_WINDOW_TOKENS = 4096  # num_ctx sent to Ollama
+    CONTEXT_RESERVED_ANSWER_TOKENS = 768  # Kept free for the answer while packing documents
+    CONTEXT_MAX_ANSWER_TOKENS = 1024  # num_predict ceiling; lowered when the prompt leaves less room
+    CONTEXT_MIN_ANSWER_TOKENS = 256
+    CONTEXT_MAX_CHUNK_TOKENS = 600  # Longer chunks keep only their most query-relevant sentences
+    CONTEXT_MIN_CHUNK_TOKENS = 48  # Chunks are not squeezed into less room than this
+    CONTEXT_SAFETY_TOKENS = 128  # Spare tokens while counts are estimated (no CONTEXT_TOKENIZER)
+    CONTEXT_TOKENIZER = __import__("os").environ.get("CONTEXT_TOKENIZER", "")  # Chat model's tokenizer.json
+    
+    # Classification Cache (file SHA256 + classifier version + custom-category version)
+    ENABLE_CLASSIFICATION_CACHE = True
+    CLASSIFICATION_CACHE_TTL = 90 * 86400  # Seconds; entries of retired versions expire on their own
+    
+    # Ollama Model Residency (warm-up at startup, keep_alive renewed by every request)
+    OLLAMA_WARMUP = __import__("os").environ.get("OLLAMA_WARMUP", "true").lower() == "true"
+    OLLAMA_KEEP_ALIVE = __import__("os").environ.get("OLLAMA_KEEP_ALIVE", "30m")  # "30m", "2h", seconds, or -1 = never unload
+    OLLAMA_COLD_LOAD_MS = 500  # A request whose model load took this long counts as a cold start
+    
+    # Ollama Endpoints (comma-separated OLLAMA_HOSTS; calls go to the healthy host with the fewest in flight)
+    OLLAMA_HOSTS = [h.strip() for h in __import__("os").environ.get(
+        "OLLAMA_HOSTS", __import__("os").environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")).split(",") if h.strip()]
+    OLLAMA_REQUEST_TIMEOUT = 300  # Seconds per call (for streams: between chunks)
+    OLLAMA_POOL_CONNECTIONS = 8  # Kept-alive HTTP connections per host
+    OLLAMA_BREAKER_FAILURES = 3  # Consecutive failures that take a host out of rotation
+    OLLAMA_BREAKER_COOLDOWN = 30  # Seconds before a failing host gets a trial request
+    OLLAMA_HEALTH_INTERVAL = 15  # Seconds between background health probes (0 = off)
+    
+    # Ollama Admission Control (web app and workers share one Redis-backed scheduler)
+    ENABLE_OLLAMA_SCHEDULER = __import__("os").environ.get("ENABLE_OLLAMA_SCHEDULER", "true").lower() == "true"
+    OLLAMA_MAX_CONCURRENCY = int(__import__("os").environ.get("OLLAMA_MAX_CONCURRENCY", "2"))  # Sum of OLLAMA_NUM_PARALLEL over hosts
+    OLLAMA_BACKGROUND_SLOTS = 1  # Slots classification calls may hold; the rest stay free for /chat
+    OLLAMA_INTERACTIVE_TIMEOUT = 15  # Seconds a /chat generation waits for a slot before "busy"
+    OLLAMA_BACKGROUND_TIMEOUT = 300  # Seconds a classification call waits (then falls back to rules)
+    OLLAMA_INTERACTIVE_MAX_QUEUED = 8  # Further /chat requests are turned away at once
+    OLLAMA_BACKGROUND_MAX_QUEUED = 1000
+    OLLAMA_SLOT_LEASE = 600  # Seconds; slots of crashed callers free themselves after this
+    
+    # Query Language Detection (script/stopword rules first, seeded langdetect for the rest)
+    LANGUAGE_CACHE_SIZE = 4096  # Cached query -> language results
+    LANGUAGE_DETECT_SEED = 0  # Makes langdetect deterministic
+    
+    # Chat Latency (time-to-first-token and total, reported on /status)
+    LATENCY_WINDOW = 500  # Most recent requests kept per metric
+    
+    # Full-file Answers ("show me report.pdf" streams the file; chat history keeps the start)
+    FULL_FILE_PREVIEW_CHARS = 500  # Snippet shown on the source button
+    FULL_FILE_HISTORY_CHARS = 20000  # Characters of a retrieved file saved in chat history
+    
+    # Ingest Writer (one process writes the vector store; others queue adds/deletes and refuse direct writes.
+    # The refusal is an application-level guard: every process still opens the store files read-write)
+    INGEST_WRITER_ENABLED = __import__("os").environ.get("INGEST_WRITER", "false").lower() == "true"
+    INGEST_QUEUE_KEY = "ingest:ops"
+    INGEST_COMMIT_WINDOW = 0.2  # Seconds to keep collecting operations after the first arrives
+    INGEST_IDLE_FLUSH = 0.02  # Commit early when no operation arrived for this long
+    INGEST_MAX_BATCH_CHUNKS = 2000  # Commit early once this many chunks are pending
+    INGEST_ACK_TIMEOUT = 300  # Seconds a sender waits for its acknowledgement
+    
     # Sorting Settings
     DATE_FORMAT = "%Y-%m"  # YYYY-MM format for time-based folders
     ENABLE_TIME_BASED_SORTING = True
@@ -47,6 +175,12 @@ class Config:
     REDIS_ANALYTICS_CACHE = "analytics:stats"
     REDIS_LANGUAGE_STATS = "stats:languages"
     REDIS_FILE_METADATA = "file_metadata"
+    REDIS_CORPUS_VERSION = "corpus:version"
+    REDIS_CUSTOM_CATEGORIES_VERSION = "categories:version"
+    REDIS_CLASSIFICATION_CACHE = "classification"
+    REDIS_CLASSIFICATION_STATS = "stats:classification"
+    REDIS_OLLAMA_SCHEDULER = "ollama:scheduler"
+    REDIS_SINGLE_FLIGHT = "chat:inflight"
     
     # Manager Configuration (Simple role-based access)
     MANAGERS = ["admin", "manager"]  # Add manager usernames/emails here
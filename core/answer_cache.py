@@ -0,0 +1,159 @@
+"""
+Answer Cache Module
+Semantic cache of /chat answers keyed by query-embedding similarity,
+user role and corpus version
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import redis
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusVersion:
+    """Monotonic counter bumped whenever chunks are added or deleted"""
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis = redis_client
+
+    def get(self) -> Optional[int]:
+        """Current corpus version (None if Redis is unavailable)"""
+        try:
+            return int(self.redis.get(Config.REDIS_CORPUS_VERSION) or 0)
+        except Exception as e:
+            logger.warning(f"Could not read corpus version: {e}")
+            return None
+
+    def bump(self) -> Optional[int]:
+        """Invalidate cached answers after the corpus changed"""
+        try:
+            return int(self.redis.incr(Config.REDIS_CORPUS_VERSION))
+        except Exception as e:
+            logger.warning(f"Could not bump corpus version: {e}")
+            return None
+
+
+class _Bucket:
+    """Cached answers for one (role, filter scope, corpus version)"""
+
+    def __init__(self, dim: int):
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.responses = []
+        self.expires_at = []
+        self.last_used = []
+
+
+class AnswerCache:
+    """In-process semantic answer cache
+
+    A lookup hits when a previously answered query for the same role, filter
+    scope and corpus version has cosine similarity >= threshold and has not
+    expired.
+    """
+
+    def __init__(self, threshold: float = 0.92, ttl: int = 3600, negative_ttl: int = 300,
+                 max_entries_per_role: int = 256):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries_per_role = max_entries_per_role
+        self._buckets: Dict[tuple, _Bucket] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop_stale_versions(self, corpus_version: int) -> None:
+        """Buckets from older corpus versions can never hit again"""
+        for key in [k for k in self._buckets if k[-1] != corpus_version]:
+            del self._buckets[key]
+
+    def lookup(self, query_embedding, role: Optional[str], corpus_version: Optional[int],
+               scope: str = '') -> Optional[dict]:
+        """Return a cached response for a semantically equivalent query, if any
+        
+        scope separates answers computed under different metadata filters.
+        """
+        if corpus_version is None:
+            return None
+
+        query_vector = self._normalize(query_embedding)
+        now = time.time()
+        with self._lock:
+            self._drop_stale_versions(corpus_version)
+            bucket = self._buckets.get((role, scope, corpus_version))
+            if bucket is None or not bucket.responses:
+                self.misses += 1
+                return None
+
+            scores = bucket.vectors @ query_vector
+            scores[np.asarray(bucket.expires_at) <= now] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            bucket.last_used[best] = now
+            response = bucket.responses[best]
+            if response.get('cited_files'):
+                self.hits += 1
+            else:
+                self.negative_hits += 1
+            logger.debug(f"Answer cache hit (similarity={scores[best]:.3f}, role={role})")
+            return dict(response)
+
+    def store(self, query_embedding, role: Optional[str], corpus_version: Optional[int], response: dict,
+              scope: str = '') -> None:
+        """Cache a response; answers without cited files use the negative TTL"""
+        if corpus_version is None:
+            return
+
+        query_vector = self._normalize(query_embedding)
+        negative = not response.get('cited_files')
+        now = time.time()
+        expires_at = now + (self.negative_ttl if negative else self.ttl)
+
+        with self._lock:
+            self._drop_stale_versions(corpus_version)
+            bucket = self._buckets.setdefault((role, scope, corpus_version), _Bucket(query_vector.shape[0]))
+
+            if len(bucket.responses) >= self.max_entries_per_role:
+                # Evict the least recently used entry
+                oldest = int(np.argmin(bucket.last_used))
+                bucket.vectors = np.delete(bucket.vectors, oldest, axis=0)
+                for values in (bucket.responses, bucket.expires_at, bucket.last_used):
+                    del values[oldest]
+
+            bucket.vectors = np.vstack([bucket.vectors, query_vector[np.newaxis, :]])
+            bucket.responses.append(dict(response))
+            bucket.expires_at.append(expires_at)
+            bucket.last_used.append(now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "entries": sum(len(b.responses) for b in self._buckets.values()),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0
+            }
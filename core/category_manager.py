@@ -30,6 +30,14 @@ class CategoryManager:
             logger.error(f"Error loading custom categories for {domain}: {e}")
             return {}
     
+    def version(self) -> int:
+        """Counter bumped on every custom category change (0 if Redis is unavailable)"""
+        try:
+            return int(self.redis.get(Config.REDIS_CUSTOM_CATEGORIES_VERSION) or 0)
+        except Exception as e:
+            logger.warning(f"Could not read custom category version: {e}")
+            return 0
+    
     def add_category(self, domain: str, category_name: str, keywords: List[str]) -> bool:
         """Add a new custom category to a domain"""
         try:
@@ -42,6 +50,7 @@ class CategoryManager:
             # Save back to Redis
             key = f"{Config.REDIS_CUSTOM_CATEGORIES}:{domain}"
             self.redis.set(key, json.dumps(categories))
+            self.redis.incr(Config.REDIS_CUSTOM_CATEGORIES_VERSION)  # Cached classifications are stale
             
             logger.info(f"Added custom category '{category_name}' to domain '{domain}'")
             return True
@@ -63,6 +72,7 @@ class CategoryManager:
                 
                 key = f"{Config.REDIS_CUSTOM_CATEGORIES}:{domain}"
                 self.redis.set(key, json.dumps(categories))
+                self.redis.incr(Config.REDIS_CUSTOM_CATEGORIES_VERSION)
                 
                 logger.info(f"Deleted custom category '{category_name}' from domain '{domain}'")
                 return True
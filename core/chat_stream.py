@@ -0,0 +1,195 @@
+"""
+Chat Stream Module
+Server-Sent Events framing for streamed /chat answers and a rolling
+latency tracker (time-to-first-token is the headline chat metric)
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (event name, payload) pairs produced by LLMService.stream_response
+ChatEvent = Tuple[str, dict]
+
+
+def sse_event(event: str, data: dict) -> str:
+    """One Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def response_events(response: dict) -> Iterator[ChatEvent]:
+    """Replay an already complete response (cache hit, full file, no results) as a stream"""
+    yield 'sources', {'source_snippets': response.get('source_snippets', []),
+                      'detected_language': response.get('detected_language', 'en')}
+    yield 'token', {'text': response['answer']}
+    yield 'done', response
+
+
+class FullFileAnswer:
+    """A retrieved file sent piece by piece instead of as one string
+
+    Only the first preview_chars are read up front (for the source snippet);
+    the rest is passed through as it is read from the store. The response
+    saved to chat history keeps the first history_chars characters and is
+    flagged truncated when the file was longer.
+    """
+
+    def __init__(self, filename: str, pieces: Iterable[str], preview_chars: int = 500,
+                 history_chars: int = 20000):
+        self.filename = filename
+        self.history_chars = history_chars
+        self._pieces = iter(pieces)
+        self._head = []
+        size = 0
+        for piece in self._pieces:
+            self._head.append(piece)
+            size += len(piece)
+            if size > preview_chars:
+                break
+        head = ''.join(self._head)
+        self.preview = head[:preview_chars] + "..." if size > preview_chars else head
+        self.total_chars = 0
+        self._history = []
+        self._history_size = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.preview)
+
+    def _answer_pieces(self) -> Iterator[str]:
+        """The answer text in pieces, keeping the capped copy for chat history on the way"""
+        yield self._record(f"Here is the complete content of **{self.filename}**:\n\n```\n")
+        head, self._head = self._head, []
+        for piece in head:
+            yield self._record(piece)
+        for piece in self._pieces:
+            yield self._record(piece)
+        yield "\n```"
+
+    def _record(self, text: str) -> str:
+        self.total_chars += len(text)
+        room = self.history_chars - self._history_size
+        if room > 0:
+            self._history.append(text[:room])
+            self._history_size += min(len(text), room)
+        return text
+
+    def response(self) -> dict:
+        """Chat reply with the (capped) answer; complete once the pieces have been sent"""
+        answer = ''.join(self._history)
+        truncated = self.total_chars > self._history_size
+        if truncated:
+            answer += f"\n```\n\n*(truncated: {self.total_chars:,} characters in total)*"
+        else:
+            answer += "\n```"
+        return {
+            'answer': answer,
+            'cited_files': [self.filename],
+            'confidence_score': 1.0,
+            'source_snippets': [{'filename': self.filename, 'text': self.preview, 'category': 'Full File'}],
+            'detected_language': 'en',
+            'full_file_retrieval': True,
+            'truncated': truncated
+        }
+
+    def events(self) -> Iterator[ChatEvent]:
+        """sources, one token event per piece, then done with the capped response"""
+        yield 'sources', {'source_snippets': [{'filename': self.filename, 'text': self.preview,
+                                               'category': 'Full File'}],
+                          'detected_language': 'en'}
+        for text in self._answer_pieces():
+            yield 'token', {'text': text}
+        yield 'done', self.response()
+
+    def json_chunks(self) -> Iterator[str]:
+        """The JSON reply (full answer) encoded piece by piece"""
+        yield '{"answer": "'
+        for text in self._answer_pieces():
+            yield json.dumps(text, ensure_ascii=False)[1:-1]
+        rest = {k: v for k, v in self.response().items() if k not in ('answer', 'truncated')}
+        yield '", ' + json.dumps(rest, ensure_ascii=False)[1:]
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies per metric (thread-safe)"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, metric: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(metric, deque(maxlen=self.window)).append(seconds)
+
+    def summary(self) -> Dict[str, dict]:
+        """count, p50, p95 and last value in milliseconds for every metric"""
+        with self._lock:
+            samples = {metric: list(values) for metric, values in self._samples.items()}
+        result = {}
+        for metric, values in samples.items():
+            ordered = sorted(values)
+            result[metric] = {
+                'count': len(values),
+                'p50_ms': round(ordered[int(0.50 * (len(ordered) - 1))] * 1000, 1),
+                'p95_ms': round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 1),
+                'last_ms': round(values[-1] * 1000, 1),
+            }
+        return result
+
+
+def stream_chat(events: Iterable[ChatEvent], on_complete: Callable[[dict], None],
+                latency: Optional[LatencyTracker] = None, started: Optional[float] = None,
+                keep_chars: Optional[int] = None) -> Iterator[str]:
+    """Turn chat events into SSE frames, timing the first token
+
+    The final 'done' frame carries the authoritative answer (with the
+    confidence/sources footer) plus timings. on_complete receives that final
+    response once the stream ends; if the client disconnects first it gets
+    the partial answer flagged as interrupted (at most keep_chars of it).
+    """
+    started = started or time.time()
+    first_token_at = None
+    parts = []
+    kept = 0
+    final = None
+    try:
+        for event, data in events:
+            if event == 'token':
+                if first_token_at is None:
+                    first_token_at = time.time()
+                    if latency:
+                        latency.record('chat_ttft', first_token_at - started)
+                if keep_chars is None or kept < keep_chars:
+                    parts.append(data['text'])
+                    kept += len(data['text'])
+            elif event == 'done':
+                total = time.time() - started
+                if latency:
+                    latency.record('chat_total', total)
+                final = dict(data)
+                final['timings'] = {
+                    'ttft_ms': round(((first_token_at or time.time()) - started) * 1000, 1),
+                    'total_ms': round(total * 1000, 1),
+                }
+                data = final
+            yield sse_event(event, data)
+    except GeneratorExit:
+        logger.info(f"Chat stream closed by client after {len(parts)} tokens")
+        if final is None and parts:
+            final = {'answer': ''.join(parts), 'cited_files': [], 'confidence_score': 0,
+                     'source_snippets': [], 'interrupted': True}
+        raise
+    except Exception as e:
+        logger.error(f"Chat stream failed: {e}", exc_info=True)
+        yield sse_event('error', {'error': str(e)})
+    finally:
+        if final is not None:
+            try:
+                on_complete(final)
+            except Exception as e:
+                logger.error(f"Saving streamed chat failed: {e}")
@@ -0,0 +1,112 @@
+"""
+Classification Cache Module
+Persistent domain/category results keyed by file content (SHA256), so
+re-uploads and overwrites of known content skip both the keyword classifier
+and its Ollama fallback
+"""
+
+import hashlib
+import json
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+import redis
+
+from config import Config
+from core.category_manager import CategoryManager
+from core.classifier import DocumentClassifier
+
+logger = logging.getLogger(__name__)
+
+
+def classifier_version(model: str, llm_threshold: float) -> str:
+    """Rules version + keyword table digest + fallback model and threshold"""
+    tables = json.dumps([DocumentClassifier.DOMAIN_KEYWORDS, DocumentClassifier.CATEGORY_KEYWORDS_BY_DOMAIN],
+                        sort_keys=True)
+    digest = hashlib.sha256(tables.encode()).hexdigest()[:12]
+    return f"v{DocumentClassifier.VERSION}-{digest}-{model}-{llm_threshold}"
+
+
+class ClassificationCache:
+    """Classification results in Redis, shared by all workers
+
+    Entries live in one hash per (classifier version, custom-category
+    version, content SHA256) with a field per lowercased filename, because
+    guardrail rules and the extension also look at the name. Changing the
+    keyword tables, the fallback model or any custom category changes the
+    key, so stale results are never read; they expire after the TTL.
+    Hits, misses and how misses were classified are counted in Redis.
+    """
+
+    def __init__(self, redis_client: redis.Redis, model: str, llm_threshold: float, ttl: int = None):
+        self.redis = redis_client
+        self.version = classifier_version(model, llm_threshold)
+        self.llm_threshold = llm_threshold
+        self.ttl = Config.CLASSIFICATION_CACHE_TTL if ttl is None else ttl
+        self.categories = CategoryManager(redis_client)
+
+    def _key(self, file_hash: str) -> str:
+        return f"{Config.REDIS_CLASSIFICATION_CACHE}:{self.version}:{self.categories.version()}:{file_hash}"
+
+    def get(self, file_hash: Optional[str], filename: str) -> Optional[Dict]:
+        if not file_hash:
+            return None
+        try:
+            data = self.redis.hget(self._key(file_hash), filename.lower())
+            return json.loads(data) if data else None
+        except Exception as e:
+            logger.warning(f"Could not read cached classification: {e}")
+            return None
+
+    def put(self, file_hash: Optional[str], filename: str, result: Dict) -> bool:
+        """Store a result; rule-based results the LLM should have corrected are skipped"""
+        if not file_hash:
+            return False
+        if result.get('method') != 'llm' and result.get('confidence', 0) < self.llm_threshold:
+            return False  # Fallback failed (e.g. Ollama down): classify again next time
+        try:
+            key = self._key(file_hash)
+            pipe = self.redis.pipeline()
+            pipe.hset(key, filename.lower(), json.dumps(result))
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Could not cache classification: {e}")
+            return False
+
+    def classify(self, classify_fn: Callable[[str, str], Dict], text: str, filename: str,
+                 file_hash: Optional[str]) -> Tuple[Dict, str]:
+        """Cached result or classify_fn(text, filename); returns (result, 'cache' | 'rules' | 'llm')"""
+        cached = self.get(file_hash, filename)
+        if cached is not None:
+            self._count('hits')
+            logger.info(f"Classification cache hit for {filename}: {cached['domain']}/{cached['category']}")
+            return cached, 'cache'
+        result = classify_fn(text, filename)
+        method = result.get('method', 'rules')
+        self._count('misses', method)
+        self.put(file_hash, filename, result)
+        return result, method
+
+    def _count(self, *fields: str) -> None:
+        try:
+            pipe = self.redis.pipeline()
+            for field in fields:
+                pipe.hincrby(Config.REDIS_CLASSIFICATION_STATS, field, 1)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not update classification stats: {e}")
+
+    @staticmethod
+    def stats(redis_client: redis.Redis) -> Dict:
+        """Counters from all workers: hits, misses and misses answered by rules / the LLM"""
+        try:
+            raw = redis_client.hgetall(Config.REDIS_CLASSIFICATION_STATS)
+        except Exception as e:
+            logger.warning(f"Could not read classification stats: {e}")
+            return {}
+        counts = {field: int(raw.get(field, 0)) for field in ('hits', 'misses', 'rules', 'llm')}
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 4) if lookups else 0.0
+        return counts
@@ -9,6 +9,8 @@ logger = logging.getLogger(__name__)
 class DocumentClassifier:
     """Handles hierarchical document classification with scaled keyword system"""
     
+    VERSION = 6  # Bump when the classification rules change (invalidates cached classifications)
+    
     # Domain-level keywords (Expanded for V5/V6)
     DOMAIN_KEYWORDS = {
         "Technology": {
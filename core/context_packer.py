@@ -0,0 +1,191 @@
+"""
+Context Packer Module
+Fits the reranked chunks into the Ollama context window: counts tokens,
+drops text repeated across chunks (chunk overlap, shared parent sections),
+packs chunks by reranker score until the budget left after the reserved
+answer tokens is used, and trims long chunks to their most query-relevant
+sentences.
+"""
+
+import logging
+import math
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?।])\s+|\n+')
+TOKEN_PIECES = re.compile(r'\d{1,3}|[^\W\d_]+|[^\w\s]')
+QUERY_TERMS = re.compile(r'\w+')
+STOPWORDS = frozenset(
+    "the a an and or of to in on for is are was were be by with what which who whom how why when where "
+    "does do did can could should would will from that this these those about into than then there their "
+    "it its as at if not no your you me my our we they them tell give list explain describe".split()
+)
+
+
+class TokenCounter:
+    """Token counts for prompt budgeting
+
+    Uses the chat model's own tokenizer when Config.CONTEXT_TOKENIZER points
+    at a tokenizer.json (or a Hugging Face id already cached locally).
+    Without one, counts are a deliberately high estimate (short words and
+    punctuation are one token each, long words one per 6 bytes, digits in
+    groups of three) and callers keep CONTEXT_SAFETY_TOKENS spare.
+    """
+
+    def __init__(self, tokenizer: str = None):
+        self.tokenizer = None
+        tokenizer = Config.CONTEXT_TOKENIZER if tokenizer is None else tokenizer
+        if tokenizer:
+            try:
+                from tokenizers import Tokenizer
+                if Path(tokenizer).is_file():
+                    self.tokenizer = Tokenizer.from_file(str(tokenizer))
+                else:
+                    self.tokenizer = Tokenizer.from_pretrained(tokenizer)
+                logger.info(f"Context packing counts tokens with {tokenizer}")
+            except Exception as e:
+                logger.warning(f"Tokenizer {tokenizer} unavailable ({e}); estimating token counts")
+
+    @property
+    def exact(self) -> bool:
+        return self.tokenizer is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return sum(math.ceil(len(piece.encode('utf-8')) / 6) for piece in TOKEN_PIECES.findall(text))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_SPLIT.split(text) if s and s.strip()]
+
+
+def query_terms(query: str) -> set:
+    return {t for t in QUERY_TERMS.findall(query.lower()) if len(t) > 2 and t not in STOPWORDS}
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+class ContextPacker:
+    """Token-budgeted, de-duplicated context for one prompt"""
+
+    def __init__(self, counter: TokenCounter = None, num_ctx: int = None, reserve_answer: int = None,
+                 max_chunk_tokens: int = None, min_chunk_tokens: int = None):
+        self.counter = counter or TokenCounter()
+        self.num_ctx = num_ctx or Config.CONTEXT_WINDOW_TOKENS
+        self.reserve_answer = reserve_answer or Config.CONTEXT_RESERVED_ANSWER_TOKENS
+        self.max_chunk_tokens = max_chunk_tokens or Config.CONTEXT_MAX_CHUNK_TOKENS
+        self.min_chunk_tokens = min_chunk_tokens or Config.CONTEXT_MIN_CHUNK_TOKENS
+        self.safety = 0 if self.counter.exact else Config.CONTEXT_SAFETY_TOKENS
+
+    def budget(self, prompt_overhead: int) -> int:
+        """Tokens left for documents once the prompt frame and the answer are accounted for"""
+        return max(0, self.num_ctx - prompt_overhead - self.reserve_answer - self.safety)
+
+    def pack(self, query: str, chunks: List[dict], budget: int,
+             source_tokens: Optional[Callable[[int, dict], int]] = None) -> Tuple[List[dict], Dict]:
+        """Chunks (copies, best first) whose 'text' fits the budget, plus packing stats
+
+        Chunks are taken in reranker order ('relevance_score' when present,
+        otherwise as given). Sentences already packed from a better chunk are
+        dropped; a chunk longer than max_chunk_tokens, or than what is left
+        of the budget, keeps only its most query-relevant sentences (in their
+        original order). source_tokens(i, chunk) is the per-chunk header cost.
+        """
+        terms = query_terms(query)
+        if any('relevance_score' in c for c in chunks):
+            chunks = sorted(chunks, key=lambda c: c.get('relevance_score', float('-inf')), reverse=True)
+
+        packed, seen = [], []
+        stats = {'chunks_in': len(chunks), 'tokens_in': 0, 'tokens_packed': 0,
+                 'duplicate_sentences': 0, 'trimmed_chunks': 0, 'dropped_chunks': 0}
+        remaining = budget
+        for chunk in chunks:
+            stats['tokens_in'] += self.counter.count(chunk['text'])
+            header = source_tokens(len(packed) + 1, chunk) if source_tokens else 0
+            allowance = min(self.max_chunk_tokens, remaining - header)
+            if allowance < self.min_chunk_tokens:
+                stats['dropped_chunks'] += 1
+                continue
+
+            seen_text = ' '.join(seen)
+            original = split_sentences(chunk['text'])
+            sentences = []
+            for sentence in original:
+                normalized = _normalize(sentence)
+                if len(normalized) >= 12 and normalized in seen_text:
+                    stats['duplicate_sentences'] += 1
+                else:
+                    sentences.append(sentence)
+            if not sentences:
+                stats['dropped_chunks'] += 1
+                continue
+
+            kept, tokens = self._select(sentences, terms, chunk.get('matched_text', ''), allowance)
+            if not kept:
+                stats['dropped_chunks'] += 1
+                continue
+            if len(kept) < len(sentences):
+                stats['trimmed_chunks'] += 1
+
+            seen.extend(_normalize(s) for s in kept)
+            # Untouched chunks keep their line breaks (lists, tables)
+            packed.append(dict(chunk, text=chunk['text'] if kept == original else ' '.join(kept)))
+            remaining -= tokens + header
+            stats['tokens_packed'] += tokens
+
+        stats['chunks_packed'] = len(packed)
+        return packed, stats
+
+    def _select(self, sentences: List[str], terms: set, matched_text: str, allowance: int) -> Tuple[List[str], int]:
+        counts = [self.counter.count(s) + 1 for s in sentences]  # +1 for the joining space
+        if sum(counts) <= allowance:
+            return sentences, sum(counts)
+
+        matched = _normalize(matched_text)
+
+        def relevance(i):
+            words = set(QUERY_TERMS.findall(sentences[i].lower()))
+            score = len(terms & words)
+            if matched and _normalize(sentences[i]) in matched:
+                score += 1  # part of the passage that actually matched the query
+            return (score, -i)
+
+        picked, used = [], 0
+        for i in sorted(range(len(sentences)), key=relevance, reverse=True):
+            if used + counts[i] <= allowance:
+                picked.append(i)
+                used += counts[i]
+        if not picked:
+            # Not one sentence fits (e.g. unpunctuated text): cut the most relevant one
+            best = max(range(len(sentences)), key=relevance)
+            cut = self._truncate(sentences[best], allowance - 1)
+            return ([cut], self.counter.count(cut) + 1) if cut else ([], 0)
+        picked.sort()
+        return [sentences[i] for i in picked], used
+
+    def _truncate(self, text: str, allowance: int) -> str:
+        """Longest word prefix of text within allowance tokens"""
+        words = text.split()
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.counter.count(' '.join(words[:middle])) <= allowance:
+                low = middle
+            else:
+                high = middle - 1
+        return ' '.join(words[:low])
+
+    def answer_tokens(self, prompt_tokens: int) -> int:
+        """num_predict for a prompt of this size: what the window has left, up to the configured cap"""
+        available = self.num_ctx - prompt_tokens - self.safety
+        return max(Config.CONTEXT_MIN_ANSWER_TOKENS, min(Config.CONTEXT_MAX_ANSWER_TOKENS, available))
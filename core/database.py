@@ -1,205 +1,653 @@
-"""ChromaDB database management"""
-import chromadb
-from chromadb.config import Settings
+"""Vector database management"""
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 import logging
+import re
+import threading
+import time
+import numpy as np
 
+from config import Config
 from models.document import DocumentChunk
+from core.embedding_cache import EmbeddingCache
+from core.diversity import mmr_select
+from core.file_index import FileIndex
+from core.index_versions import IndexRegistry, make_embedding_function
+from core.lexical_index import LexicalIndex
+from core.parent_store import ParentStore
+from core.permissions import build_role_filter, get_role_allowed_domains
+from core.query_filters import build_filter_clause, combine_where
+from core.vector_store import VectorBackend, VectorCollection, create_backend
+from utils import TextUtils
 
 logger = logging.getLogger(__name__)
 
 
 class DatabaseManager:
-    """Manages ChromaDB operations"""
+    """Manages chunk storage and retrieval on top of a vector backend"""
     
-    def __init__(self, db_path: Path):
+    # Cosine distance cut-off for a chunk to count as relevant
+    MAX_DISTANCE = 1.3
+    
+    # Files whose extracted text is the raw file content (served straight from disk)
+    PLAIN_TEXT_EXTENSIONS = {'.txt', '.md', '.log', '.rst', '.tex', '.bib', '.html', '.css', '.xml',
+                             '.yaml', '.yml', '.sql', '.py', '.js', '.java', '.cpp', '.c', '.h',
+                             '.cs', '.rb', '.go'}
+    
+    # Chunks fetched per round-trip during full-file reassembly
+    REASSEMBLY_BATCH_SIZE = 50
+    
+    # Domain shards are named documents__<domain>
+    COLLECTION_NAME = "documents"
+    SHARD_SEPARATOR = "__"
+    SHARD_REFRESH_SECONDS = 10
+    
+    def __init__(self, db_path: Path, hybrid_search: bool = None, embedding_function=None,
+                 sharded: bool = None, backend: VectorBackend = None, index_version: str = None,
+                 read_only: bool = False):
+        """
+        Args:
+            index_version: Pin to one index version (None = follow the active one across swaps)
+            read_only: Refuse writes (readers when the ingest writer owns the store).
+                This is an application-level guard only: the write methods raise
+                PermissionError, but the backend (e.g. Chroma's PersistentClient)
+                and the sidecar sqlite files are still opened read-write, so
+                nothing below this class stops another writer.
+        """
         self.db_path = Path(db_path)
         self.db_path.mkdir(parents=True, exist_ok=True)
         
-        self.client = chromadb.PersistentClient(
-            path=str(self.db_path),
-            settings=Settings(anonymized_telemetry=False)
-        )
+        # Chunks are embedded here, so any backend only stores and searches vectors
+        self.backend = backend or create_backend(Config.VECTOR_BACKEND, self.db_path)
+        
+        # Versions tag collections with the embedding model and chunking they were built with
+        self.registry = IndexRegistry(self.db_path / "index_versions.db")
+        self.pinned = index_version is not None
+        self.read_only = read_only
+        if self.pinned:
+            version = self.registry.get(index_version)
+        else:
+            # Collections that predate the registry hold vectors of the old pipeline
+            version = self.registry.ensure_active(has_legacy_data=bool(self.backend.list_collection_names()))
+        if version is None:
+            raise ValueError(f"Unknown index version: {index_version}")
+        self._embedding_override = embedding_function
+        
+        # One collection per domain: queries only search the shards a role may read
+        self.sharded = Config.ENABLE_DOMAIN_SHARDING if sharded is None else sharded
+        self._shards: Dict[str, VectorCollection] = {}
+        self._shards_refreshed_at = 0.0
+        self._shard_lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._query_pool = ThreadPoolExecutor(max_workers=Config.SHARD_QUERY_WORKERS) if self.sharded else None
+        
+        if hybrid_search is None:
+            hybrid_search = Config.ENABLE_HYBRID_SEARCH
+        self.hybrid_search = hybrid_search
+        self._open_version(version)
+        
+        mode = f"sharded ({len(self._shards)} domains)" if self.sharded else "single collection"
+        logger.info(f"Database initialized ({mode}, version '{self.collection_name}'). "
+                    f"Total documents: {self.get_count()}")
+    
+    # --- Index versions ---
+    
+    def _open_version(self, version: dict) -> None:
+        """Point collections, embedding model and sidecar indexes at one index version"""
+        self._version_checked_at = time.time()
+        self.version = version
+        self.collection_name = version['name']
+        self.version_dir = self.registry.version_dir(self.collection_name)
+        self.version_dir.mkdir(parents=True, exist_ok=True)
+        
+        self.embedding_function = self._embedding_override or make_embedding_function(version['embedding_model'])
         
-        self.collection = self.client.get_or_create_collection(
-            name="documents",
-            metadata={"hnsw:space": "cosine"}
+        # Query vectors are cached so repeated questions skip the embedding model
+        self.embedding_cache = EmbeddingCache(
+            max_entries=Config.EMBEDDING_CACHE_SIZE,
+            redis_url=Config.EMBEDDING_CACHE_REDIS_URL,
+            redis_ttl=Config.EMBEDDING_CACHE_TTL,
+            namespace=getattr(self.embedding_function, 'MODEL_NAME', version['embedding_model'])
         )
         
-        logger.info(f"Database initialized. Total documents: {self.collection.count()}")
+        with self._shard_lock:
+            self._shards = {}
+        if self.sharded:
+            self.collection = None
+            self._refresh_shards(force=True)
+        else:
+            self.collection = self._open_collection(self.collection_name)
+        
+        # BM25 keyword index fused with vector results (exact ids, function names, error codes)
+        self.lexical_index = LexicalIndex(self.version_dir / "lexical_index.db") if self.hybrid_search else None
+        
+        # filename -> (filepath, ordered chunk ids) for full-file retrieval
+        self.file_index = FileIndex(self.version_dir / "file_index.db")
+        if not self.read_only and self.file_index.count() == 0 and self.get_count() > 0:
+            self._backfill_file_index()
+        
+        # parent_id -> section text for small-to-big retrieval
+        self.parent_store = ParentStore(self.version_dir / "parent_store.db")
+    
+    def _follow_active_version(self) -> None:
+        """Switch to a newly activated version (checked at most every VERSION_REFRESH_SECONDS)"""
+        if self.pinned or time.time() - self._version_checked_at < Config.VERSION_REFRESH_SECONDS:
+            return
+        with self._version_lock:
+            self._version_checked_at = time.time()
+            active = self.registry.active()
+            if active and active['name'] != self.collection_name:
+                logger.info(f"Index version swapped: '{self.collection_name}' -> '{active['name']}'")
+                self._open_version(active)
+    
+    def _check_writable(self) -> None:
+        """Application-level single-writer guard (the store itself is not opened read-only)"""
+        if self.read_only:
+            raise PermissionError("DatabaseManager is read-only; submit writes through the ingest writer")
+    
+    # --- Collection routing ---
+    
+    def _open_collection(self, name: str) -> VectorCollection:
+        return self.backend.get_or_create_collection(name)
+    
+    @classmethod
+    def shard_name(cls, domain: str, base: str = None) -> str:
+        """Collection name for a domain (Chroma allows 3-63 chars of [a-zA-Z0-9_-])"""
+        slug = re.sub(r'[^a-z0-9]+', '_', (domain or 'unknown').lower()).strip('_') or 'unknown'
+        return f"{base or cls.COLLECTION_NAME}{cls.SHARD_SEPARATOR}{slug}"[:63]
+    
+    def _refresh_shards(self, force: bool = False) -> None:
+        """Pick up shards created by other processes (e.g. the worker)"""
+        if not force and time.time() - self._shards_refreshed_at < self.SHARD_REFRESH_SECONDS:
+            return
+        prefix = self.collection_name + self.SHARD_SEPARATOR
+        with self._shard_lock:
+            for name in self.backend.list_collection_names():
+                if name.startswith(prefix) and name not in self._shards:
+                    self._shards[name] = self._open_collection(name)
+            self._shards_refreshed_at = time.time()
+    
+    def _collection_for_domain(self, domain: str):
+        """Collection that stores chunks of a domain"""
+        self._follow_active_version()
+        if not self.sharded:
+            return self.collection
+        name = self.shard_name(domain, self.collection_name)
+        with self._shard_lock:
+            if name not in self._shards:
+                self._shards[name] = self._open_collection(name)
+            return self._shards[name]
+    
+    def _collections(self, domains: Optional[List[str]] = None) -> list:
+        """Collections to read: every shard, or only those for the given domains"""
+        self._follow_active_version()
+        if not self.sharded:
+            return [self.collection]
+        self._refresh_shards()
+        if domains is None:
+            return list(self._shards.values())
+        names = {self.shard_name(d, self.collection_name) for d in domains}
+        return [c for name, c in self._shards.items() if name in names]
+    
+    def iter_batches(self, batch_size: int = 1000, include: List[str] = None) -> Iterator[dict]:
+        """Page through every stored chunk (ids plus the requested fields)"""
+        include = include or ['metadatas']
+        for collection in self._collections():
+            total = collection.count()
+            for offset in range(0, total, batch_size):
+                yield collection.get(limit=batch_size, offset=offset, include=include)
+    
+    def _get_by_ids(self, chunk_ids: List[str], include: List[str]) -> dict:
+        """Fetch chunks by id from whichever collections hold them"""
+        found = {'ids': [], 'documents': [], 'metadatas': [], 'embeddings': []}
+        remaining = list(chunk_ids)
+        for collection in self._collections():
+            if not remaining:
+                break
+            results = collection.get(ids=remaining, include=include)
+            for i, chunk_id in enumerate(results['ids']):
+                found['ids'].append(chunk_id)
+                for field in ('documents', 'metadatas', 'embeddings'):
+                    if results.get(field) is not None:
+                        found[field].append(results[field][i])
+            got = set(results['ids'])
+            remaining = [c for c in remaining if c not in got]
+        return found
+    
+    def _vector_search(self, query_embedding: np.ndarray, n_results: int, where: Optional[dict],
+                       domains: Optional[List[str]] = None, with_embeddings: bool = False) -> List[tuple]:
+        """Nearest chunks as (id, document, metadata, distance, embedding), best first
+        
+        embedding is None unless with_embeddings is set. In sharded mode the
+        query fans out to the permitted shards in parallel and the per-shard
+        hits are merged by distance.
+        """
+        collections = self._collections(domains)
+        embedding = [query_embedding.tolist()]
+        include = ['metadatas', 'documents', 'distances'] + (['embeddings'] if with_embeddings else [])
+        
+        def search(collection) -> List[tuple]:
+            count = collection.count()
+            if count == 0:
+                return []
+            results = collection.query(
+                query_embeddings=embedding,
+                n_results=min(n_results, count),
+                where=where,
+                include=include
+            )
+            if not results or not results['ids'] or not results['ids'][0]:
+                return []
+            size = len(results['ids'][0])
+            metadatas = results['metadatas'][0] if results.get('metadatas') else [{}] * size
+            embeddings = results['embeddings'][0] if results.get('embeddings') is not None else [None] * size
+            return list(zip(results['ids'][0], results['documents'][0], metadatas, results['distances'][0],
+                            embeddings))
+        
+        if len(collections) <= 1 or self._query_pool is None:
+            hits = [hit for collection in collections for hit in search(collection)]
+        else:
+            hits = [hit for shard_hits in self._query_pool.map(search, collections) for hit in shard_hits]
+        
+        hits.sort(key=lambda hit: hit[3])
+        return hits[:n_results]
+    
+    # --- Writes ---
     
     def add_chunks(self, chunks: List[DocumentChunk]) -> None:
         """Add document chunks to database"""
+        self._check_writable()
         if not chunks:
             return
         
-        ids = [chunk.chunk_id for chunk in chunks]
-        documents = [chunk.text for chunk in chunks]
-        metadatas = [chunk.to_metadata() for chunk in chunks]
+        # Route each chunk to its domain shard (a single group when not sharded)
+        groups: Dict[int, tuple] = {}
+        for chunk in chunks:
+            collection = self._collection_for_domain(chunk.domain)
+            groups.setdefault(id(collection), (collection, []))[1].append(chunk)
         
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+        for collection, group in groups.values():
+            documents = [chunk.text for chunk in group]
+            collection.add(
+                embeddings=np.asarray(self.embedding_function(documents), dtype=np.float32).tolist(),
+                documents=documents,
+                metadatas=[chunk.to_metadata() for chunk in group],
+                ids=[chunk.chunk_id for chunk in group]
+            )
+        
+        self.file_index.add_chunks(chunks)
+        if self.lexical_index:
+            self.lexical_index.add_chunks(chunks)
+        parents = self.parent_store.add_chunks(chunks)
         
-        logger.info(f"Added {len(chunks)} chunks to database")
+        if parents:
+            logger.info(f"Added {len(chunks)} chunks ({parents} parent sections) to database")
+        else:
+            logger.info(f"Added {len(chunks)} chunks to database")
+    
+    def _backfill_file_index(self, batch_size: int = 1000) -> None:
+        """Build the filename index from chunks stored before it existed"""
+        logger.info(f"Backfilling file index from {self.get_count()} chunks...")
+        for batch in self.iter_batches(batch_size, include=['metadatas']):
+            self.file_index.add(batch['ids'], batch['metadatas'])
     
-    def query(self, query_text: str, n_results: int = 5, user_role: str = None):
+    def query(self, query_text: str, n_results: int = 5, user_role: str = None, filters: dict = None,
+              diversify: bool = None):
         """Query database for relevant chunks with role-based access control
         
+        RBAC and any metadata filters are pushed down into the vector search
+        as one `where` clause, so restricted roles get up to n_results
+        permitted hits from one query. With hybrid search enabled, BM25
+        keyword hits are fused in with reciprocal-rank fusion. With MMR
+        enabled, n_results are picked from a deeper pool so near-duplicate
+        overlapping chunks do not crowd out other evidence.
+        
         Args:
             query_text: The search query
             n_results: Number of results to return
             user_role: User's role for access control filtering (None = no filtering)
+            filters: Validated filters from query_filters.parse_query_filters
+            diversify: Apply MMR selection (None = Config.ENABLE_MMR)
             
         Returns:
             Tuple of (chunks: List[dict], rbac_filtered: bool)
             rbac_filtered=True means documents existed but were blocked by permissions
         """
-        if self.collection.count() == 0:
-            return [], False
-        
         try:
-            # Import permissions module
-            from core.permissions import check_file_access
+            # Settle on one version up front so the query is embedded with that version's model
+            self._follow_active_version()
+            role_where = build_role_filter(user_role) if user_role else None
+            if role_where is not None:
+                logger.debug(f"RBAC filter for role={user_role}: {role_where}")
+            filter_where = build_filter_clause(filters) if filters else None
+            where = combine_where(role_where, filter_where)
             
-            # Get more results for better context coverage
-            search_count = min(n_results * 4, self.collection.count())
+            # Sharded stores skip the shards of domains the role cannot read (or were filtered out)
+            domains = None
+            if self.sharded:
+                domains = get_role_allowed_domains(user_role) if user_role else None
+                if filters and filters.get('domain'):
+                    domains = [d for d in filters['domain'] if domains is None or d in domains]
             
-            results = self.collection.query(
-                query_texts=[query_text],
-                n_results=search_count
-            )
+            diversify = Config.ENABLE_MMR if diversify is None else diversify
+            # MMR needs a pool well beyond n_results to have anything to choose between
+            fetch_k = max(Config.MMR_FETCH_K, Config.MMR_FETCH_FACTOR * n_results) if diversify else n_results
+            
+            query_embedding = self.embed_query(query_text)
+            hits = self._vector_search(query_embedding, fetch_k, where, domains, with_embeddings=diversify)
             
             chunks = []
-            rbac_blocked_count = 0  # Track how many were blocked by RBAC
+            embeddings = {}
+            for chunk_id, doc, metadata, distance, embedding in hits:
+                # More aggressive filtering: distance < 1.3 for better recall
+                if distance < self.MAX_DISTANCE:
+                    chunks.append(self._make_chunk(chunk_id, doc, metadata or {}, distance))
+                    if embedding is not None:
+                        embeddings[chunk_id] = embedding
             
-            if results and results['documents'] and len(results['documents']) > 0:
-                # Improved similarity filtering with better thresholds
-                for i, doc in enumerate(results['documents'][0]):
-                    metadata = results['metadatas'][0][i] if results.get('metadatas') and results['metadatas'][0] else {}
-                    distance = results['distances'][0][i] if results.get('distances') and results['distances'][0] else 0
-                    
-                    # More aggressive filtering: distance < 1.3 for better recall
-                    if distance < 1.3:
-                        # RBAC FILTERING: Check file access if role provided
-                        if user_role:
-                            file_domain = metadata.get('domain', 'Unknown')
-                            file_category = metadata.get('category', None)
-                            
-                            logger.debug(f"RBAC check: role={user_role}, domain={file_domain}, category={file_category}, file={metadata.get('filename')}")
-                            
-                            # Skip if user doesn't have permission
-                            has_access = check_file_access(user_role, file_domain, file_category)
-                            
-                            if not has_access:
-                                logger.debug(f"Access denied for {user_role} to {file_domain}/{file_category}")
-                                rbac_blocked_count += 1
-                                continue
-                        
-                        similarity = 1.0 - (distance / 2.0)
-                        chunks.append({
-                            'text': doc,
-                            'filename': metadata.get('filename', 'Unknown'),
-                            'category': metadata.get('category', 'Uncategorized'),
-                            'filepath': metadata.get('filepath', ''),
-                            'similarity': similarity,
-                            'distance': distance
-                        })
+            if self.lexical_index:
+                lexical_hits = self.lexical_index.search(query_text, n_results=fetch_k, where=where)
+                chunks = self._fuse_rankings(chunks, lexical_hits)
             
-            # Sort by similarity (best first) and return top n_results
-            chunks.sort(key=lambda x: x['similarity'], reverse=True)
+            if diversify and len(chunks) > 1:
+                chunks = self._diversify(query_embedding, chunks, embeddings, n_results)
             
-            # Return tuple: (chunks, was_rbac_filtered)
-            # rbac_filtered = True if we had results but RBAC blocked them all
-            rbac_filtered = (rbac_blocked_count > 0 and len(chunks) == 0)
+            # rbac_filtered = True if relevant documents exist but RBAC hid all of them.
+            # Only costs an extra (single-hit) probe when the filtered query came back empty.
+            rbac_filtered = False
+            if not chunks and role_where is not None:
+                rbac_filtered = self._has_relevant_match(query_embedding, filter_where)
             
             return chunks[:n_results], rbac_filtered
             
         except Exception as e:
             logger.error(f"Error querying database: {e}")
             return [], False
+    
+    def _diversify(self, query_embedding: np.ndarray, chunks: List[dict], embeddings: Dict[str, list],
+                   k: int) -> List[dict]:
+        """MMR selection with a per-file cap over the ranked candidates"""
+        missing = [c['chunk_id'] for c in chunks if embeddings.get(c['chunk_id']) is None]
+        if missing:
+            # Keyword-only hits: reuse their stored vectors
+            stored = self._get_by_ids(missing, include=['embeddings'])
+            embeddings.update(zip(stored['ids'], stored['embeddings']))
+        if any(embeddings.get(c['chunk_id']) is None for c in chunks):
+            return chunks[:k]
+        
+        if 'rrf_score' in chunks[0]:
+            # Relevance follows the fused ranking so exact keyword hits keep their weight
+            scores = np.asarray([c['rrf_score'] for c in chunks], dtype=np.float32)
+            spread = scores.max() - scores.min()
+            relevance = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+        else:
+            relevance = np.asarray([1.0 - c['distance'] for c in chunks], dtype=np.float32)
+        
+        picks = mmr_select(
+            query_embedding,
+            [embeddings[c['chunk_id']] for c in chunks],
+            k,
+            diversity=Config.MMR_DIVERSITY,
+            relevance=relevance,
+            groups=[c['filepath'] for c in chunks],
+            per_group_cap=Config.MMR_PER_FILE_CAP
+        )
+        return [chunks[i] for i in picks]
+    
+    @staticmethod
+    def _make_chunk(chunk_id: str, text: str, metadata: dict, distance: float) -> dict:
+        """Build the chunk dict handed to the LLM layer"""
+        return {
+            'chunk_id': chunk_id,
+            'text': text,
+            'filename': metadata.get('filename', 'Unknown'),
+            'category': metadata.get('category', 'Uncategorized'),
+            'filepath': metadata.get('filepath', ''),
+            'parent_id': metadata.get('parent_id', ''),
+            'similarity': 1.0 - (distance / 2.0),
+            'distance': distance
+        }
+    
+    def expand_to_parents(self, chunks: List[dict]) -> List[dict]:
+        """Swap child passages for their parent sections (small-to-big)
+        
+        Meant for the final top-k only: the child that matched is kept as
+        'matched_text', and siblings sharing a parent collapse into the
+        first (best-ranked) one so a section is never sent twice.
+        """
+        parent_ids = list({c['parent_id'] for c in chunks if c.get('parent_id')})
+        if not parent_ids:
+            return chunks
+        try:
+            parents = self.parent_store.get_many(parent_ids)
+        except Exception as e:
+            logger.error(f"Parent lookup failed, using child passages: {e}")
+            return chunks
+        
+        expanded = []
+        seen = set()
+        for chunk in chunks:
+            parent_id = chunk.get('parent_id')
+            if not parent_id or parent_id not in parents:
+                expanded.append(chunk)
+                continue
+            if parent_id in seen:
+                continue
+            seen.add(parent_id)
+            expanded.append({**chunk, 'text': parents[parent_id], 'matched_text': chunk['text']})
+        return expanded
+    
+    def _fuse_rankings(self, vector_chunks: List[dict], lexical_hits: List[dict]) -> List[dict]:
+        """Merge vector and BM25 rankings with reciprocal-rank fusion
+        
+        score(d) = sum over rankings of 1 / (RRF_K + rank(d))
+        """
+        k = Config.RRF_K
+        fused = {}
+        for rank, chunk in enumerate(vector_chunks, 1):
+            chunk['rrf_score'] = 1.0 / (k + rank)
+            fused[chunk['chunk_id']] = chunk
+        
+        # Keyword-only hits have no vector distance; rank them no closer than the
+        # weakest vector hit so confidence scoring is not inflated
+        fallback_distance = max((c['distance'] for c in vector_chunks), default=self.MAX_DISTANCE)
+        for rank, hit in enumerate(lexical_hits, 1):
+            chunk = fused.get(hit['chunk_id'])
+            if chunk is None:
+                chunk = self._make_chunk(hit['chunk_id'], hit['text'], hit['metadata'], fallback_distance)
+                chunk['rrf_score'] = 0.0
+                fused[hit['chunk_id']] = chunk
+            chunk['rrf_score'] += 1.0 / (k + rank)
+            chunk['bm25_score'] = hit['score']
+        
+        return sorted(fused.values(), key=lambda c: c['rrf_score'], reverse=True)
+    
+    def embed_query(self, query_text: str) -> np.ndarray:
+        """Embed a query through the normalized-query LRU cache"""
+        return self.embedding_cache.get_or_compute(
+            query_text,
+            lambda text: self.embedding_function([text])[0]
+        )
+    
+    def _has_relevant_match(self, query_embedding: np.ndarray, where: Optional[dict] = None) -> bool:
+        """Check whether any chunk (ignoring RBAC, honouring user filters) is within the relevance threshold"""
+        try:
+            probe = self._vector_search(query_embedding, 1, where=where)
+            return bool(probe) and probe[0][3] < self.MAX_DISTANCE
+        except Exception as e:
+            logger.debug(f"RBAC probe failed: {e}")
+            return False
 
     
+    def _delete_where(self, where: dict) -> int:
+        """Delete matching chunks from every collection"""
+        deleted_count = 0
+        for collection in self._collections():
+            results = collection.get(where=where, include=[])
+            if results and results.get('ids'):
+                collection.delete(ids=results['ids'])
+                deleted_count += len(results['ids'])
+        return deleted_count
+    
     def delete_by_hash(self, file_hash: str) -> int:
         """Delete all chunks for a given file hash"""
+        self._check_writable()
         try:
-            results = self.collection.get(where={"file_hash": file_hash})
-            if results and results.get('ids'):
-                self.collection.delete(ids=results['ids'])
-                deleted_count = len(results['ids'])
+            deleted_count = self._delete_where({"file_hash": file_hash})
+            # Purged even when no vectors matched, so rows left by an earlier partial delete go too
+            self.file_index.delete_by_hash(file_hash)
+            if self.lexical_index:
+                self.lexical_index.delete_by_hash(file_hash)
+            self.parent_store.delete_by_hash(file_hash)
+            if deleted_count:
                 logger.info(f"Deleted {deleted_count} chunks for file hash {file_hash}")
-                return deleted_count
-            return 0
+            return deleted_count
         except Exception as e:
             logger.error(f"Error deleting chunks: {e}")
             return 0
 
     def delete_by_filepath(self, filepath: str) -> int:
         """Delete all chunks associated with a specific filepath"""
+        self._check_writable()
         try:
-            results = self.collection.get(where={"filepath": filepath})
-            if results and results.get('ids'):
-                self.collection.delete(ids=results['ids'])
-                deleted_count = len(results['ids'])
+            deleted_count = self._delete_where({"filepath": filepath})
+            # Purged even when no vectors matched, so rows left by an earlier partial delete go too
+            self.file_index.delete_by_filepath(filepath)
+            if self.lexical_index:
+                self.lexical_index.delete_by_filepath(filepath)
+            self.parent_store.delete_by_filepath(filepath)
+            if deleted_count:
                 logger.info(f"Deleted {deleted_count} chunks for filepath {filepath}")
-                return deleted_count
-            return 0
+            return deleted_count
         except Exception as e:
             logger.error(f"Error deleting by filepath: {e}")
             return 0
 
+    def delete_by_ids(self, chunk_ids: List[str]) -> int:
+        """Delete chunks by id"""
+        self._check_writable()
+        if not chunk_ids:
+            return 0
+        try:
+            chunk_ids = list(dict.fromkeys(chunk_ids))
+            found = self._get_by_ids(chunk_ids, include=['metadatas'])
+            parent_ids = sorted({m['parent_id'] for m in found['metadatas'] if m and m.get('parent_id')})
+            for collection in self._collections():
+                collection.delete(ids=chunk_ids)
+            self.file_index.delete_by_ids(chunk_ids)
+            if self.lexical_index:
+                self.lexical_index.delete_by_ids(chunk_ids)
+            # Sections whose last child is gone would otherwise still be reassembled
+            self.parent_store.delete_by_ids(self._childless_parents(parent_ids))
+            logger.info(f"Deleted {len(found['ids'])} chunks by id")
+            return len(found['ids'])
+        except Exception as e:
+            logger.error(f"Error deleting chunks by id: {e}")
+            return 0
+
+    def _childless_parents(self, parent_ids: List[str]) -> List[str]:
+        """Parents no stored chunk points to any more"""
+        return [
+            parent_id for parent_id in parent_ids
+            if not any(collection.get(where={"parent_id": parent_id}, limit=1, include=[]).get('ids')
+                       for collection in self._collections())
+        ]
+
     def has_filepath(self, filepath: str) -> bool:
         """Check if any chunks exist for the given filepath"""
         try:
-            results = self.collection.get(where={"filepath": filepath}, limit=1)
-            return bool(results and results.get('ids'))
+            return any(
+                collection.get(where={"filepath": filepath}, limit=1, include=[]).get('ids')
+                for collection in self._collections()
+            )
         except Exception:
             return False
     
     def get_count(self) -> int:
         """Get total document count"""
-        return self.collection.count()
+        return sum(collection.count() for collection in self._collections())
     
-    def get_full_file(self, filename: str) -> Optional[str]:
-        """Retrieve ALL chunks for a specific filename and reassemble into full content
+    def iter_full_file(self, filename: str) -> Optional[Iterator[str]]:
+        """Stream the full content of a file by name
+        
+        Plain-text files are read straight from their sorted location; other
+        files are rebuilt from their parent sections (or, for files ingested
+        without parents, their chunks fetched in batches) in order, with the
+        chunking overlap stripped at every boundary.
         
         Args:
             filename: Name of the file to retrieve (e.g., 'my_script.py')
             
         Returns:
-            Full file content as string, or None if file not found
+            Iterator over content pieces, or None if file not found
         """
+        entry = self.file_index.lookup(filename)
+        if not entry:
+            logger.info(f"No chunks found for filename: {filename}")
+            return None
+        
+        filepath, chunk_ids = entry
+        path = Path(filepath)
+        if path.suffix.lower() in self.PLAIN_TEXT_EXTENSIONS and path.is_file():
+            return self._iter_disk_file(path)
+        if self.parent_store.has_file(filepath):
+            return self._iter_parents(filepath)
+        return self._iter_chunks(chunk_ids)
+    
+    @staticmethod
+    def _iter_disk_file(path: Path, block_size: int = 64 * 1024) -> Iterator[str]:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for block in iter(lambda: f.read(block_size), ''):
+                yield block
+    
+    def _iter_parents(self, filepath: str) -> Iterator[str]:
+        previous = ''
+        for text in self.parent_store.iter_file(filepath):
+            yield TextUtils.merge_overlap(previous, text, Config.CHUNK_OVERLAP)
+            previous = text
+    
+    def _iter_chunks(self, chunk_ids: List[str]) -> Iterator[str]:
+        previous = ''
+        for start in range(0, len(chunk_ids), self.REASSEMBLY_BATCH_SIZE):
+            batch_ids = chunk_ids[start:start + self.REASSEMBLY_BATCH_SIZE]
+            results = self._get_by_ids(batch_ids, include=['documents'])
+            texts = dict(zip(results['ids'], results['documents']))
+            for chunk_id in batch_ids:
+                text = texts.get(chunk_id)
+                if text is None:
+                    continue
+                yield TextUtils.merge_overlap(previous, text, Config.CHUNK_OVERLAP)
+                previous = text
+    
+    def read_file_text(self, filepath: str) -> Optional[str]:
+        """Stored text of a file by its sorted path (used to re-chunk during re-indexing)"""
+        path = Path(filepath)
+        if path.suffix.lower() in self.PLAIN_TEXT_EXTENSIONS and path.is_file():
+            return ''.join(self._iter_disk_file(path))
+        if self.parent_store.has_file(filepath):
+            return ''.join(self._iter_parents(filepath))
+        chunk_ids = self.file_index.chunk_ids_for(filepath)
+        return ''.join(self._iter_chunks(chunk_ids)) if chunk_ids else None
+    
+    def file_metadata(self, filepath: str) -> Optional[dict]:
+        """Metadata stored with the first chunk of a file"""
+        chunk_ids = self.file_index.chunk_ids_for(filepath)[:1]
+        if not chunk_ids:
+            return None
+        found = self._get_by_ids(chunk_ids, include=['metadatas'])
+        return (found['metadatas'][0] or {}) if found['metadatas'] else None
+    
+    def get_full_file(self, filename: str) -> Optional[str]:
+        """Retrieve the full content of a file as one string (see iter_full_file)"""
         try:
-            # Query for all chunks with exact filename match
-            results = self.collection.get(
-                where={"filename": filename},
-                include=['documents', 'metadatas']
-            )
-            
-            if not results or not results.get('documents'):
-                logger.info(f"No chunks found for filename: {filename}")
+            pieces = self.iter_full_file(filename)
+            if pieces is None:
                 return None
-            
-            # Extract chunks with their indices
-            chunks_data = []
-            for i, doc in enumerate(results['documents']):
-                metadata = results['metadatas'][i] if results.get('metadatas') else {}
-                chunk_index = metadata.get('chunk_index', 0)
-                chunks_data.append((chunk_index, doc))
-            
-            # Sort by chunk_index to maintain original order
-            chunks_data.sort(key=lambda x: x[0])
-            
-            # Reassemble full content
-            full_content = '\n'.join(chunk[1] for chunk in chunks_data)
-            
-            logger.info(f"Retrieved full file '{filename}' with {len(chunks_data)} chunks")
-            return full_content
+            full_content = ''.join(pieces)
+            logger.info(f"Retrieved full file '{filename}' ({len(full_content)} chars)")
+            return full_content or None
             
         except Exception as e:
             logger.error(f"Error retrieving full file '{filename}': {e}")
             return None
-
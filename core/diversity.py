@@ -0,0 +1,74 @@
+"""
+Diversity Module
+Maximal marginal relevance (MMR) selection so overlapping chunks from one
+file do not crowd out other evidence before reranking
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def mmr_select(query_embedding, embeddings, k: int, diversity: float = 0.3,
+               relevance: Optional[Sequence[float]] = None, groups: Optional[Sequence[str]] = None,
+               per_group_cap: Optional[int] = None) -> List[int]:
+    """
+    Pick k items that are relevant to the query but not to each other
+
+    Each step takes argmax of (1 - diversity) * relevance - diversity * max
+    cosine similarity to the items already picked. All similarities come from
+    one matrix product, so the greedy loop is O(k * n).
+
+    Args:
+        query_embedding: Query vector
+        embeddings: Candidate vectors, shape (n, dim)
+        k: Number of items to select
+        diversity: 0 keeps the relevance order, 1 only maximizes novelty
+        relevance: Optional relevance per candidate (defaults to cosine similarity to the query)
+        groups: Optional group per candidate (e.g. filepath) for per_group_cap
+        per_group_cap: Maximum items selected from one group
+
+    Returns:
+        Selected candidate indices, in selection order
+    """
+    embeddings = _normalize(np.asarray(embeddings, dtype=np.float32))
+    n = len(embeddings)
+    if n == 0 or k <= 0:
+        return []
+
+    if relevance is None:
+        query_vector = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        relevance = embeddings @ query_vector
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    similarity = embeddings @ embeddings.T
+    max_similarity = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+
+    group_ids = None
+    if groups is not None and per_group_cap:
+        _, group_ids = np.unique(np.asarray(groups, dtype=object).astype(str), return_inverse=True)
+        group_counts = np.zeros(group_ids.max() + 1, dtype=np.int64)
+
+    selected = []
+    while len(selected) < k and available.any():
+        scores = (1.0 - diversity) * relevance - diversity * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[best])
+
+        if group_ids is not None:
+            group = group_ids[best]
+            group_counts[group] += 1
+            if group_counts[group] >= per_group_cap:
+                available[group_ids == group] = False
+
+    return selected
@@ -0,0 +1,151 @@
+"""
+Embedding Cache Module
+Bounded LRU cache for query embeddings with an optional shared Redis tier
+"""
+
+import hashlib
+import logging
+import re
+import string
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from utils.spell_corrector import correct_query
+
+logger = logging.getLogger(__name__)
+
+
+# File names, paths, codes and versions are matched literally, never spell-corrected
+_IDENTIFIER = re.compile(r'[._/\\\d]')
+
+
+def embedding_text(query: str) -> str:
+    """Text that gets embedded: the query as typed, lowercased with whitespace collapsed"""
+    return re.sub(r'\s+', ' ', query or '').strip().lower()
+
+
+@lru_cache(maxsize=4096)
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups: spell-correct plain words, lowercase, collapse whitespace"""
+    words = []
+    for word in (query or '').split():
+        if _IDENTIFIER.search(word.strip(string.punctuation)):
+            words.append(word)
+        else:
+            words.append(correct_query(word)[0])
+    return embedding_text(' '.join(words))
+
+
+class EmbeddingCache:
+    """Caches query vectors in-process (shared by all threads) and optionally in Redis"""
+
+    def __init__(self, max_entries: int = 2048, redis_url: Optional[str] = None,
+                 redis_ttl: int = 86400, namespace: str = "default"):
+        self.max_entries = max_entries
+        self.redis_ttl = redis_ttl
+        self.namespace = namespace
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_bytes = 0
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+        self.redis = None
+        if redis_url:
+            try:
+                import redis
+                # Raw bytes: vectors are stored as packed float32
+                self.redis = redis.Redis.from_url(redis_url, decode_responses=False)
+            except Exception as e:
+                logger.warning(f"Embedding cache Redis tier disabled: {e}")
+
+    def _redis_key(self, normalized: str) -> str:
+        digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+        return f"emb:{self.namespace}:{digest}"
+
+    def _store_local(self, normalized: str, vector: np.ndarray) -> None:
+        with self._lock:
+            previous = self._entries.pop(normalized, None)
+            if previous is not None:
+                self._memory_bytes -= previous.nbytes + len(normalized)
+            self._entries[normalized] = vector
+            self._memory_bytes += vector.nbytes + len(normalized)
+            while len(self._entries) > self.max_entries:
+                old_key, old_vector = self._entries.popitem(last=False)
+                self._memory_bytes -= old_vector.nbytes + len(old_key)
+
+    def get(self, normalized: str) -> Optional[np.ndarray]:
+        """Look up a normalized query (local LRU first, then Redis)"""
+        with self._lock:
+            vector = self._entries.get(normalized)
+            if vector is not None:
+                self._entries.move_to_end(normalized)
+                self.hits += 1
+                return vector
+
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self._redis_key(normalized))
+                if raw:
+                    vector = np.frombuffer(raw, dtype=np.float32)
+                    self._store_local(normalized, vector)
+                    with self._lock:
+                        self.redis_hits += 1
+                    return vector
+            except Exception as e:
+                logger.debug(f"Embedding cache Redis read failed: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, normalized: str, vector) -> np.ndarray:
+        """Store a vector for a normalized query"""
+        vector = np.asarray(vector, dtype=np.float32)
+        self._store_local(normalized, vector)
+        if self.redis is not None:
+            try:
+                self.redis.setex(self._redis_key(normalized), self.redis_ttl, vector.tobytes())
+            except Exception as e:
+                logger.debug(f"Embedding cache Redis write failed: {e}")
+        return vector
+
+    def get_or_compute(self, query: str, embed_fn: Callable[[str], list]) -> np.ndarray:
+        """Return the cached vector for a query, embedding it on a miss
+        
+        The key is the exact text that gets embedded (case and whitespace
+        normalized), so a hit always returns the vector the uncached path
+        would have computed.
+        """
+        text = embedding_text(query)
+        vector = self.get(text)
+        if vector is None:
+            vector = self.put(text, embed_fn(text))
+        return vector
+
+    def clear(self) -> None:
+        """Drop all local entries (Redis entries expire on their own)"""
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit rate and memory use"""
+        with self._lock:
+            lookups = self.hits + self.redis_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+                "memory_bytes": self._memory_bytes,
+                "redis_enabled": self.redis is not None
+            }
@@ -0,0 +1,148 @@
+"""
+File Index Module
+Sidecar index from filename to (filepath, ordered chunk ids), maintained at
+ingest and delete so full-file retrieval never scans the vector store
+"""
+
+import logging
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from models.document import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+
+class FileIndex:
+    """Maps filenames to the chunks stored for them"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for database connections"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS file_chunks (
+                    chunk_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL COLLATE NOCASE,
+                    filepath TEXT NOT NULL,
+                    file_hash TEXT,
+                    chunk_index INTEGER NOT NULL,
+                    indexed_at REAL DEFAULT (julianday('now'))
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_chunks_name ON file_chunks (filename)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_chunks_path ON file_chunks (filepath, chunk_index)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_chunks_hash ON file_chunks (file_hash)")
+            conn.commit()
+
+    def add_chunks(self, chunks: List[DocumentChunk]) -> None:
+        """Record chunk ids for their files"""
+        self.add(
+            ids=[chunk.chunk_id for chunk in chunks],
+            metadatas=[chunk.to_metadata() for chunk in chunks]
+        )
+
+    def add(self, ids: List[str], metadatas: List[dict]) -> None:
+        """Record raw (id, metadata) pairs, mirroring collection.add"""
+        if not ids:
+            return
+        rows = []
+        for chunk_id, meta in zip(ids, metadatas):
+            meta = meta or {}
+            rows.append((
+                chunk_id,
+                meta.get('filename', ''),
+                meta.get('filepath', ''),
+                meta.get('file_hash'),
+                int(meta.get('chunk_index', 0))
+            ))
+        with self._get_connection() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO file_chunks (chunk_id, filename, filepath, file_hash, chunk_index)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+
+    def _delete(self, condition: str, params: list) -> int:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute(f"DELETE FROM file_chunks WHERE {condition}", params)
+                conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"File index delete failed: {e}")
+            return 0
+
+    def delete_by_hash(self, file_hash: str) -> int:
+        return self._delete("file_hash = ?", [file_hash])
+
+    def delete_by_filepath(self, filepath: str) -> int:
+        return self._delete("filepath = ?", [filepath])
+
+    def delete_by_ids(self, chunk_ids: List[str]) -> int:
+        if not chunk_ids:
+            return 0
+        return self._delete("chunk_id IN ({})".format(', '.join('?' for _ in chunk_ids)), list(chunk_ids))
+
+    def lookup(self, filename: str) -> Optional[Tuple[str, List[str]]]:
+        """Find a file by name (case-insensitive)
+
+        When several sorted copies share a name, the most recently indexed one wins.
+
+        Returns:
+            (filepath, chunk ids ordered by chunk_index) or None
+        """
+        with self._get_connection() as conn:
+            row = conn.execute('''
+                SELECT filepath FROM file_chunks
+                WHERE filename = ?
+                ORDER BY indexed_at DESC
+                LIMIT 1
+            ''', (filename,)).fetchone()
+            if not row:
+                return None
+            filepath = row[0]
+            chunk_ids = [r[0] for r in conn.execute(
+                "SELECT chunk_id FROM file_chunks WHERE filepath = ? ORDER BY chunk_index",
+                (filepath,)
+            )]
+        return filepath, chunk_ids
+
+    def chunk_ids_for(self, filepath: str) -> List[str]:
+        """Chunk ids of a file ordered by chunk_index"""
+        with self._get_connection() as conn:
+            return [r[0] for r in conn.execute(
+                "SELECT chunk_id FROM file_chunks WHERE filepath = ? ORDER BY chunk_index",
+                (filepath,)
+            )]
+
+    def list_files(self) -> Dict[str, str]:
+        """filepath -> file_hash for every indexed file"""
+        with self._get_connection() as conn:
+            return {path: file_hash or '' for path, file_hash in conn.execute(
+                "SELECT filepath, MAX(file_hash) FROM file_chunks GROUP BY filepath"
+            )}
+
+    def list_filepaths(self) -> List[str]:
+        """All indexed filepaths"""
+        with self._get_connection() as conn:
+            return [r[0] for r in conn.execute("SELECT DISTINCT filepath FROM file_chunks")]
+
+    def count(self) -> int:
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM file_chunks").fetchone()[0]
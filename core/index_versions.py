@@ -0,0 +1,402 @@
+"""
+Index Versions Module
+Every collection is tagged with the embedding model and chunking parameters it
+was built with. A model or chunking change re-embeds into a shadow version in
+the background while the active one keeps serving, then swaps atomically.
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from chromadb.utils import embedding_functions
+
+from config import Config
+from core.onnx_models import (BACKEND_ONNX, BACKEND_ONNX_INT8, BACKEND_PYTORCH, DEFAULT_EMBEDDER,
+                              OnnxEmbeddingFunction)
+from models.document import Document, DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+# Name of the collection built before versions were tracked
+LEGACY_VERSION = "documents"
+
+# How the pipeline chunked files before versions were tracked (no parent/child passages)
+LEGACY_CHUNKING_PARAMS = {
+    'chunk_sizes': [2000, 2500, 3000],
+    'chunk_overlap': 150,
+    'parent_retrieval': False,
+    'child_chunk_size': None,
+    'child_chunk_overlap': None,
+}
+
+# Sidecar indexes stored next to each version's vectors
+SIDECAR_FILES = ("file_index.db", "lexical_index.db", "parent_store.db")
+
+
+class IndexVersionError(RuntimeError):
+    """Raised when a re-index cannot start or finish"""
+
+
+def chunking_params() -> dict:
+    """Every setting that changes how files are cut into chunks"""
+    return {
+        'chunk_sizes': [Config.CHUNK_SIZE_SMALL, Config.CHUNK_SIZE_MEDIUM, Config.CHUNK_SIZE_LARGE],
+        'chunk_overlap': Config.CHUNK_OVERLAP,
+        'parent_retrieval': Config.ENABLE_PARENT_RETRIEVAL,
+        'child_chunk_size': Config.CHILD_CHUNK_SIZE,
+        'child_chunk_overlap': Config.CHILD_CHUNK_OVERLAP,
+    }
+
+
+def chunking_version(params: dict = None) -> str:
+    """Short stable tag for a set of chunking parameters"""
+    payload = json.dumps(params or chunking_params(), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+
+def embedding_model_id(model_name: str = None, backend: str = None) -> str:
+    """Model name plus '@<backend>' when ONNX Runtime changes the vectors it produces
+
+    Chroma's 'default' model already runs as fp32 ONNX, so only int8 changes it.
+    """
+    model_name = model_name or Config.EMBEDDING_MODEL
+    backend = backend or Config.INFERENCE_BACKEND
+    if backend == BACKEND_PYTORCH or (backend == BACKEND_ONNX and model_name == DEFAULT_EMBEDDER):
+        return model_name
+    return f"{model_name}@{backend}"
+
+
+def target_spec() -> dict:
+    """Embedding model and chunking the configuration asks for"""
+    return {'embedding_model': embedding_model_id(), 'chunking': chunking_version()}
+
+
+def make_embedding_function(model_id: str):
+    """'default' is Chroma's bundled all-MiniLM-L6-v2 (ONNX); anything else is a sentence-transformers model
+
+    An '@onnx' / '@onnx-int8' suffix (see embedding_model_id) runs the model
+    through ONNX Runtime, falling back to the unconverted model if it cannot be exported.
+    """
+    model_name, _, backend = (model_id or DEFAULT_EMBEDDER).partition('@')
+    if backend in (BACKEND_ONNX, BACKEND_ONNX_INT8):
+        try:
+            return OnnxEmbeddingFunction(model_name, quantized=backend == BACKEND_ONNX_INT8)
+        except Exception as e:
+            logger.warning(f"ONNX embedder for {model_name} unavailable ({e}); using the unconverted model")
+    if model_name == DEFAULT_EMBEDDER:
+        return embedding_functions.DefaultEmbeddingFunction()
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+
+
+class IndexRegistry:
+    """Tracks index versions and which one is active
+
+    The active pointer is a single sqlite row, so switching it is atomic for
+    every process that opens the same database directory.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.root = self.db_path.parent
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for database connections"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS index_versions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL,
+                    embedding_model TEXT NOT NULL,
+                    chunking TEXT NOT NULL,
+                    chunking_params TEXT,
+                    status TEXT NOT NULL,
+                    phase TEXT DEFAULT '',
+                    files_total INTEGER DEFAULT 0,
+                    files_done INTEGER DEFAULT 0,
+                    chunks_done INTEGER DEFAULT 0,
+                    error TEXT DEFAULT '',
+                    created_at TEXT,
+                    started_at REAL,
+                    updated_at REAL,
+                    activated_at TEXT
+                )
+            ''')
+            conn.commit()
+
+    def version_dir(self, name: str) -> Path:
+        """Directory holding a version's sidecar indexes"""
+        if name == LEGACY_VERSION:
+            return self.root
+        return self.root / "versions" / name
+
+    def ensure_active(self, has_legacy_data: bool = True) -> dict:
+        """Active version, registering the pre-existing collection on first use
+
+        Data stored before versions were tracked was embedded with the bundled
+        model and the old chunking, so it is registered with that spec and
+        shows as stale until re-embedded. A store with no data yet
+        (has_legacy_data=False) starts out on the configured spec.
+        """
+        active = self.active()
+        if active:
+            return active
+        if has_legacy_data:
+            params = LEGACY_CHUNKING_PARAMS
+            spec = {'embedding_model': DEFAULT_EMBEDDER, 'chunking': chunking_version(params)}
+        else:
+            params, spec = chunking_params(), target_spec()
+        with self._get_connection() as conn:
+            conn.execute('''
+                INSERT OR IGNORE INTO index_versions
+                    (name, embedding_model, chunking, chunking_params, status, phase, created_at, activated_at)
+                VALUES (?, ?, ?, ?, 'active', 'done', ?, ?)
+            ''', (LEGACY_VERSION, spec['embedding_model'], spec['chunking'], json.dumps(params),
+                  datetime.now().isoformat(), datetime.now().isoformat()))
+            conn.commit()
+        return self.active()
+
+    def active(self) -> Optional[dict]:
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT * FROM index_versions WHERE status = 'active' LIMIT 1").fetchone()
+        return dict(row) if row else None
+
+    def get(self, name: str) -> Optional[dict]:
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT * FROM index_versions WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def list_versions(self) -> List[dict]:
+        """All versions, newest first, with throughput for builds"""
+        with self._get_connection() as conn:
+            rows = [dict(r) for r in conn.execute("SELECT * FROM index_versions ORDER BY id DESC")]
+        for row in rows:
+            elapsed = (row['updated_at'] or 0) - (row['started_at'] or 0)
+            row['chunks_per_second'] = round(row['chunks_done'] / elapsed, 1) if elapsed > 0 else 0.0
+            row['chunking_params'] = json.loads(row['chunking_params']) if row['chunking_params'] else None
+        return rows
+
+    def start_build(self, spec: dict) -> dict:
+        """Shadow version for spec; an interrupted build of the same spec is resumed"""
+        with self._get_connection() as conn:
+            building = conn.execute("SELECT * FROM index_versions WHERE status = 'building'").fetchone()
+            if building:
+                if (building['embedding_model'], building['chunking']) != (spec['embedding_model'], spec['chunking']):
+                    raise IndexVersionError(f"Version '{building['name']}' is already being built")
+                return dict(building)
+            cursor = conn.execute('''
+                INSERT INTO index_versions
+                    (name, embedding_model, chunking, chunking_params, status, phase, created_at, started_at, updated_at)
+                VALUES (?, ?, ?, ?, 'building', 'queued', ?, ?, ?)
+            ''', (f"pending_{time.time_ns()}", spec['embedding_model'], spec['chunking'],
+                  json.dumps(chunking_params()), datetime.now().isoformat(), time.time(), time.time()))
+            name = f"{LEGACY_VERSION}_v{cursor.lastrowid}"
+            conn.execute("UPDATE index_versions SET name = ? WHERE id = ?", (name, cursor.lastrowid))
+            conn.commit()
+        return self.get(name)
+
+    def update_progress(self, name: str, **fields) -> None:
+        """Record build progress (phase, files_total, files_done, chunks_done, error)"""
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{key} = ?" for key in fields)
+        with self._get_connection() as conn:
+            conn.execute(f"UPDATE index_versions SET {assignments} WHERE name = ?", [*fields.values(), name])
+            conn.commit()
+
+    def set_status(self, name: str, status: str, phase: str = None, error: str = None) -> None:
+        fields = {'status': status}
+        if phase is not None:
+            fields['phase'] = phase
+        if error is not None:
+            fields['error'] = error
+        self.update_progress(name, **fields)
+
+    def activate(self, name: str) -> Optional[str]:
+        """Make a built version active in one transaction; returns the version it replaced"""
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            previous = conn.execute("SELECT name FROM index_versions WHERE status = 'active'").fetchone()
+            conn.execute("UPDATE index_versions SET status = 'retired' WHERE status = 'active'")
+            conn.execute('''
+                UPDATE index_versions SET status = 'active', phase = 'swapped', activated_at = ?, updated_at = ?
+                WHERE name = ?
+            ''', (datetime.now().isoformat(), time.time(), name))
+            conn.commit()
+        return previous['name'] if previous else None
+
+
+class ReindexJob:
+    """Re-embed every file of the active version into a shadow version, then swap
+
+    Files are re-chunked from their stored text (parent sections, chunks, or
+    the plain-text file on disk) and embedded with the target model in
+    batches. The source keeps serving and ingesting meanwhile; catch-up
+    passes diff the two file indexes by (filepath, file_hash) until the
+    shadow has caught up, and only then is the active pointer moved. After
+    a grace period (so other processes notice the swap) a last pass copies
+    files that were still written to the old version, and it is deleted.
+    """
+
+    MAX_CATCH_UP_ROUNDS = 5
+
+    def __init__(self, source, target, registry: IndexRegistry, chunker: Callable[[Document], List[DocumentChunk]],
+                 batch_files: int = None, grace_seconds: float = None, keep_old: bool = False):
+        """
+        Args:
+            source: DatabaseManager pinned to the active version
+            target: DatabaseManager pinned to the shadow version (embedding with the new model)
+            registry: Shared IndexRegistry
+            chunker: Turns a rebuilt Document into chunks (e.g. FileProcessor.create_chunks)
+            batch_files: Files embedded per add_chunks call
+            grace_seconds: Wait between swap and garbage collection
+            keep_old: Leave the retired version on disk
+        """
+        self.source = source
+        self.target = target
+        self.registry = registry
+        self.chunker = chunker
+        self.batch_files = batch_files or Config.REINDEX_BATCH_FILES
+        self.grace_seconds = Config.INDEX_VERSION_GRACE_SECONDS if grace_seconds is None else grace_seconds
+        self.keep_old = keep_old
+        self.name = target.collection_name
+        self.files_done = 0
+        self.chunks_done = 0
+
+    def run(self) -> dict:
+        try:
+            self.registry.update_progress(self.name, phase='copying', started_at=time.time())
+            for round_number in range(self.MAX_CATCH_UP_ROUNDS):
+                pending, removed = self._diff()
+                if not pending and not removed:
+                    break
+                if round_number:
+                    self.registry.update_progress(self.name, phase=f'catch-up {round_number}')
+                self._remove(removed)
+                self._copy(pending)
+            else:
+                raise IndexVersionError("Source kept changing; shadow did not catch up")
+
+            previous = self.registry.activate(self.name)
+            logger.info(f"Index version '{self.name}' active (replaced '{previous}')")
+
+            if previous and self.grace_seconds:
+                time.sleep(self.grace_seconds)
+            # Writers that had not noticed the swap yet still wrote to the old version
+            pending, _ = self._diff()
+            self._copy(pending)
+
+            if previous and not self.keep_old:
+                self.registry.update_progress(self.name, phase='cleanup')
+                self._drop_version(previous)
+                self.registry.set_status(previous, 'deleted')
+
+            self.registry.update_progress(self.name, phase='done')
+            return {'version': self.name, 'replaced': previous, 'files': self.files_done, 'chunks': self.chunks_done}
+        except Exception as e:
+            logger.error(f"Re-index into '{self.name}' failed: {e}")
+            if (self.registry.get(self.name) or {}).get('status') == 'building':
+                self.registry.set_status(self.name, 'failed', phase='failed', error=str(e))
+            raise
+
+    def _diff(self):
+        """(filepaths to (re)build, filepaths to drop) for the shadow"""
+        source_files = self.source.file_index.list_files()
+        target_files = self.target.file_index.list_files()
+        pending = [path for path, file_hash in source_files.items() if target_files.get(path) != file_hash]
+        removed = [path for path in target_files if path not in source_files]
+        self.registry.update_progress(self.name, files_total=len(source_files), files_done=len(source_files) - len(pending))
+        return pending, removed
+
+    def _remove(self, filepaths: List[str]) -> None:
+        for filepath in filepaths:
+            self.target.delete_by_filepath(filepath)
+
+    def _copy(self, filepaths: List[str]) -> None:
+        batch = []
+        done = self.registry.get(self.name)['files_done']
+        for i, filepath in enumerate(filepaths, 1):
+            chunks = self._rechunk(filepath)
+            if chunks:
+                batch.extend(chunks)
+            if batch and (i % self.batch_files == 0 or i == len(filepaths)):
+                self.target.add_chunks(batch)
+                self.chunks_done += len(batch)
+                batch = []
+            if i % self.batch_files == 0 or i == len(filepaths):
+                self.files_done = done + i
+                self.registry.update_progress(self.name, files_done=self.files_done, chunks_done=self.chunks_done)
+
+    def _rechunk(self, filepath: str) -> List[DocumentChunk]:
+        """Chunks for one file under the target chunking parameters"""
+        metadata = self.source.file_metadata(filepath)
+        text = self.source.read_file_text(filepath)
+        if metadata is None or not text:
+            logger.warning(f"Re-index skipped {filepath}: no stored text")
+            return []
+        # Stale copies from an earlier round or a modified file are replaced
+        self.target.delete_by_filepath(filepath)
+
+        path = Path(filepath)
+        document = Document(
+            filename=metadata.get('filename', path.name),
+            filepath=path,
+            file_hash=metadata.get('file_hash', ''),
+            domain=metadata.get('domain', 'Unknown'),
+            category=metadata.get('category', 'Uncategorized'),
+            text_content=text,
+            file_type=path.suffix.lower(),
+            size_bytes=path.stat().st_size if path.is_file() else len(text.encode('utf-8')),
+            created_at=datetime.now(),
+            file_ext=metadata.get('file_ext', ''),
+            date_folder=metadata.get('date_folder', ''),
+            uploaded_by=metadata.get('uploaded_by', '')
+        )
+        return self.chunker(document)
+
+    def _drop_version(self, name: str) -> None:
+        """Delete a retired version's collections and sidecar indexes"""
+        backend = self.target.backend
+        prefix = name + self.target.SHARD_SEPARATOR
+        for collection_name in backend.list_collection_names():
+            if collection_name == name or collection_name.startswith(prefix):
+                backend.delete_collection(collection_name)
+
+        directory = self.registry.version_dir(name)
+        if directory == self.registry.root:
+            for filename in SIDECAR_FILES:
+                for suffix in ('', '-wal', '-shm'):
+                    (directory / f"{filename}{suffix}").unlink(missing_ok=True)
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+        logger.info(f"Dropped retired index version '{name}'")
+
+
+def version_summary(registry: IndexRegistry) -> Dict:
+    """Payload for the admin dashboard"""
+    active = registry.ensure_active()
+    spec = target_spec()
+    return {
+        'active': active['name'],
+        'target': {**spec, 'chunking_params': chunking_params()},
+        'stale': (active['embedding_model'], active['chunking']) != (spec['embedding_model'], spec['chunking']),
+        'versions': registry.list_versions()
+    }
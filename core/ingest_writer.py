@@ -0,0 +1,361 @@
+"""
+Ingest Writer Module
+Single writer for the vector store. Workers, the watcher and the web app
+submit add/delete operations over a queue; the writer coalesces everything
+that arrives within a short commit window into one batched write and
+acknowledges each operation back to its sender. Re-indexing also runs
+inside the writer process, so no other process writes to the store. This
+is enforced only at the application level (DatabaseManager(read_only=True)
+refuses writes); the other processes still open the store files read-write.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional
+
+from config import Config
+from models.document import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+OP_ADD = 'add'
+OP_DELETE_FILEPATH = 'delete_filepath'
+OP_DELETE_HASH = 'delete_hash'
+OP_DELETE_IDS = 'delete_ids'
+OP_REINDEX = 'reindex'
+
+
+class IngestWriteError(RuntimeError):
+    """Raised when the writer rejects or never acknowledges an operation"""
+
+
+class LocalWriteQueue:
+    """In-process queue (single-process deployments, tests, benchmarks)"""
+
+    def __init__(self):
+        self._ops = queue.Queue()
+        self._acks: Dict[str, queue.Queue] = {}
+        self._lock = threading.Lock()
+
+    def _ack_slot(self, op_id: str) -> queue.Queue:
+        with self._lock:
+            return self._acks.setdefault(op_id, queue.Queue(maxsize=1))
+
+    def push(self, op: dict) -> None:
+        self._ack_slot(op['id'])
+        self._ops.put(op)
+
+    def pop(self, timeout: float) -> Optional[dict]:
+        try:
+            return self._ops.get(timeout=max(timeout, 0.0)) if timeout > 0 else self._ops.get_nowait()
+        except queue.Empty:
+            return None
+
+    def pop_many(self, limit: int) -> List[dict]:
+        """Whatever is queued right now, without waiting"""
+        ops = []
+        while len(ops) < limit:
+            op = self.pop(0)
+            if op is None:
+                break
+            ops.append(op)
+        return ops
+
+    def ack(self, op_id: str, result: dict) -> None:
+        self._ack_slot(op_id).put(result)
+
+    def ack_many(self, results: Dict[str, dict]) -> None:
+        for op_id, result in results.items():
+            self.ack(op_id, result)
+
+    def wait_ack(self, op_id: str, timeout: float) -> Optional[dict]:
+        try:
+            return self._ack_slot(op_id).get(timeout=timeout)
+        except queue.Empty:
+            return None
+        finally:
+            with self._lock:
+                self._acks.pop(op_id, None)
+
+    def __len__(self):
+        return self._ops.qsize()
+
+
+class RedisWriteQueue:
+    """Operations on a Redis list; each acknowledgement goes to its own short-lived list"""
+
+    def __init__(self, redis_client, key: str = None, ack_ttl: int = None):
+        self.redis = redis_client
+        self.key = key or Config.INGEST_QUEUE_KEY
+        self.ack_ttl = ack_ttl or Config.INGEST_ACK_TIMEOUT
+
+    def _ack_key(self, op_id: str) -> str:
+        return f"{self.key}:ack:{op_id}"
+
+    def push(self, op: dict) -> None:
+        self.redis.rpush(self.key, json.dumps(op))
+
+    def pop(self, timeout: float) -> Optional[dict]:
+        if timeout >= 0.01:
+            item = self.redis.blpop([self.key], timeout=timeout)
+            raw = item[1] if item else None
+        else:
+            raw = self.redis.lpop(self.key)
+        return json.loads(raw) if raw else None
+
+    def pop_many(self, limit: int) -> List[dict]:
+        """Whatever is queued right now, in one round-trip"""
+        raw = self.redis.lpop(self.key, limit)
+        return [json.loads(item) for item in raw or []]
+
+    def ack(self, op_id: str, result: dict) -> None:
+        self.ack_many({op_id: result})
+
+    def ack_many(self, results: Dict[str, dict]) -> None:
+        """Acknowledge a whole commit in one pipeline"""
+        pipe = self.redis.pipeline(transaction=False)
+        for op_id, result in results.items():
+            ack_key = self._ack_key(op_id)
+            pipe.rpush(ack_key, json.dumps(result))
+            pipe.expire(ack_key, self.ack_ttl)
+        pipe.execute()
+
+    def wait_ack(self, op_id: str, timeout: float) -> Optional[dict]:
+        item = self.redis.blpop([self._ack_key(op_id)], timeout=timeout)
+        return json.loads(item[1]) if item else None
+
+    def __len__(self):
+        return self.redis.llen(self.key)
+
+
+def encode_chunks(chunks: List[DocumentChunk]) -> dict:
+    """JSON-ready payload; parent sections are sent once, not once per child"""
+    encoded, parents = [], {}
+    for chunk in chunks:
+        data = asdict(chunk)
+        parent_text = data.pop('parent_text')
+        if chunk.parent_id:
+            parents[chunk.parent_id] = parent_text
+        encoded.append(data)
+    return {'chunks': encoded, 'parents': parents}
+
+
+def decode_chunks(op: dict) -> List[DocumentChunk]:
+    parents = op.get('parents', {})
+    return [DocumentChunk(**data, parent_text=parents.get(data.get('parent_id'), ''))
+            for data in op['chunks']]
+
+
+class IngestClient:
+    """Drop-in for DatabaseManager's write methods that goes through the writer"""
+
+    def __init__(self, write_queue, timeout: float = None):
+        self.queue = write_queue
+        self.timeout = timeout or Config.INGEST_ACK_TIMEOUT
+
+    @classmethod
+    def from_config(cls, redis_client=None) -> 'IngestClient':
+        if redis_client is None:
+            import redis
+            redis_client = redis.Redis.from_url(Config.CELERY_BROKER_URL, decode_responses=True)
+        return cls(RedisWriteQueue(redis_client))
+
+    def _submit(self, op: dict, wait: bool = True) -> Optional[dict]:
+        op['id'] = uuid.uuid4().hex
+        op['submitted_at'] = time.time()
+        self.queue.push(op)
+        if not wait:
+            return None
+        result = self.queue.wait_ack(op['id'], self.timeout)
+        if result is None:
+            raise IngestWriteError(f"No acknowledgement for {op['op']} within {self.timeout}s")
+        if not result.get('ok'):
+            raise IngestWriteError(result.get('error', 'write failed'))
+        return result
+
+    def add_chunks(self, chunks: List[DocumentChunk], wait: bool = True) -> Optional[dict]:
+        """Queue chunks for the next group commit; returns the acknowledgement"""
+        if not chunks:
+            return None
+        return self._submit({'op': OP_ADD, **encode_chunks(chunks)}, wait)
+
+    def _delete(self, op: dict) -> int:
+        try:
+            return self._submit(op)['count']
+        except Exception as e:
+            logger.error(f"Queued {op['op']} failed: {e}")
+            return 0
+
+    def delete_by_filepath(self, filepath: str) -> int:
+        return self._delete({'op': OP_DELETE_FILEPATH, 'filepath': filepath})
+
+    def delete_by_hash(self, file_hash: str) -> int:
+        return self._delete({'op': OP_DELETE_HASH, 'file_hash': file_hash})
+
+    def delete_by_ids(self, chunk_ids: List[str]) -> int:
+        return self._delete({'op': OP_DELETE_IDS, 'ids': list(chunk_ids)})
+
+    def reindex(self, keep_old: bool = False) -> dict:
+        """Ask the writer to re-embed into a shadow version; returns once the job has started"""
+        return self._submit({'op': OP_REINDEX, 'keep_old': bool(keep_old)})
+
+
+class IngestWriter:
+    """Owns the vector store and applies queued operations in group commits
+
+    After the first operation arrives the writer keeps collecting for up to
+    commit_window seconds (or max_batch_chunks chunks), committing early once
+    nothing new has arrived for idle_flush seconds. Consecutive adds are
+    merged into one add_chunks call, so embedding and the store write run
+    on one large batch; deletes are applied in arrival order between them.
+    A re-index request starts reindexer(keep_old) on a background thread of
+    this process, sharing the store while queued writes keep being applied.
+    """
+
+    # Operations drained from the queue per round-trip
+    MAX_OPS_PER_POP = 256
+
+    def __init__(self, db_manager, write_queue, commit_window: float = None, max_batch_chunks: int = None,
+                 idle_flush: float = None, reindexer: Callable[[bool], dict] = None):
+        self.db = db_manager
+        self.reindexer = reindexer
+        self._reindex_thread: Optional[threading.Thread] = None
+        self.queue = write_queue
+        self.commit_window = Config.INGEST_COMMIT_WINDOW if commit_window is None else commit_window
+        self.idle_flush = Config.INGEST_IDLE_FLUSH if idle_flush is None else idle_flush
+        self.max_batch_chunks = max_batch_chunks or Config.INGEST_MAX_BATCH_CHUNKS
+        self.stats = {'ops': 0, 'chunks': 0, 'commits': 0, 'errors': 0, 'commit_seconds': 0.0}
+
+    def run_forever(self, stop_event: threading.Event = None) -> None:
+        logger.info(f"Ingest writer started (window={self.commit_window * 1000:.0f}ms, "
+                    f"max batch={self.max_batch_chunks} chunks)")
+        while stop_event is None or not stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Ingest writer loop error: {e}", exc_info=True)
+                time.sleep(1)
+
+    def run_once(self, block_timeout: float = 1.0) -> int:
+        """Collect and commit one batch; returns the number of operations applied"""
+        ops = self._collect(block_timeout)
+        if ops:
+            self._commit(ops)
+        return len(ops)
+
+    def _collect(self, block_timeout: float) -> List[dict]:
+        first = self.queue.pop(block_timeout)
+        if first is None:
+            return []
+        ops = [first]
+        deadline = time.time() + self.commit_window
+        # Keep collecting until the window closes, the batch is full, or senders go quiet
+        while True:
+            ops.extend(self.queue.pop_many(self.MAX_OPS_PER_POP))
+            if sum(len(op.get('chunks', ())) for op in ops) >= self.max_batch_chunks:
+                break
+            remaining = deadline - time.time()
+            op = self.queue.pop(min(remaining, self.idle_flush)) if remaining > 0 else None
+            if op is None:
+                break
+            ops.append(op)
+        return ops
+
+    def _commit(self, ops: List[dict]) -> None:
+        start = time.time()
+        results: Dict[str, dict] = {}
+        pending_adds: List[dict] = []
+        for op in ops:
+            if op['op'] == OP_ADD:
+                pending_adds.append(op)
+                continue
+            self._flush_adds(pending_adds, results)
+            pending_adds = []
+            if op['op'] == OP_REINDEX:
+                self._start_reindex(op, results)
+            else:
+                self._apply_delete(op, results)
+        self._flush_adds(pending_adds, results)
+        self.queue.ack_many(results)
+
+        elapsed = time.time() - start
+        self.stats['ops'] += len(ops)
+        self.stats['commits'] += 1
+        self.stats['commit_seconds'] += elapsed
+        logger.info(f"Group commit: {len(ops)} ops in {elapsed * 1000:.0f}ms")
+
+    def _flush_adds(self, ops: List[dict], results: Dict[str, dict]) -> None:
+        if not ops:
+            return
+        # Later copies of a chunk id win, as they would with separate writes
+        merged: Dict[str, DocumentChunk] = {}
+        decoded = []
+        for op in ops:
+            try:
+                chunks = decode_chunks(op)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Rejected malformed add: {e}")
+                results[op['id']] = {'ok': False, 'error': f"malformed add: {e}"}
+                continue
+            decoded.append(op)
+            for chunk in chunks:
+                merged[chunk.chunk_id] = chunk
+        ops = decoded
+        if not ops:
+            return
+        try:
+            self.db.add_chunks(list(merged.values()))
+            self.stats['chunks'] += len(merged)
+            for op in ops:
+                results[op['id']] = {'ok': True, 'count': len(op['chunks']), 'batch_chunks': len(merged)}
+        except Exception as e:
+            if len(ops) == 1:
+                self.stats['errors'] += 1
+                logger.error(f"Add of {len(merged)} chunks failed: {e}")
+                results[ops[0]['id']] = {'ok': False, 'error': str(e)}
+                return
+            # Retry one by one so a bad operation does not fail its neighbours
+            logger.warning(f"Group add failed ({e}); retrying {len(ops)} operations individually")
+            for op in ops:
+                self._flush_adds([op], results)
+
+    def _apply_delete(self, op: dict, results: Dict[str, dict]) -> None:
+        try:
+            if op['op'] == OP_DELETE_FILEPATH:
+                count = self.db.delete_by_filepath(op['filepath'])
+            elif op['op'] == OP_DELETE_HASH:
+                count = self.db.delete_by_hash(op['file_hash'])
+            elif op['op'] == OP_DELETE_IDS:
+                count = self.db.delete_by_ids(op['ids'])
+            else:
+                raise ValueError(f"Unknown operation: {op['op']}")
+            results[op['id']] = {'ok': True, 'count': count}
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"{op['op']} failed: {e}")
+            results[op['id']] = {'ok': False, 'error': str(e)}
+
+    def _start_reindex(self, op: dict, results: Dict[str, dict]) -> None:
+        if self.reindexer is None:
+            results[op['id']] = {'ok': False, 'error': "this writer does not run re-index jobs"}
+            return
+        if self._reindex_thread is not None and self._reindex_thread.is_alive():
+            results[op['id']] = {'ok': False, 'error': "a re-index is already running in the writer"}
+            return
+
+        def run():
+            try:
+                self.reindexer(op.get('keep_old', False))
+            except Exception as e:
+                logger.error(f"Re-index in the ingest writer failed: {e}", exc_info=True)
+
+        self._reindex_thread = threading.Thread(target=run, name="ingest-reindex", daemon=True)
+        self._reindex_thread.start()
+        logger.info(f"Re-index started in the ingest writer (keep_old={op.get('keep_old', False)})")
+        results[op['id']] = {'ok': True, 'started': True}
@@ -0,0 +1,183 @@
+"""
+Lexical Index Module
+Persistent BM25 inverted index (SQLite FTS5) over document chunks.
+
+Complements embedding search for exact identifiers such as invoice numbers,
+function names and error codes.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.metadata_filter import where_to_sql
+from models.document import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+# Keep snake_case identifiers as single tokens; hyphenated ids (INV-2024-001)
+# are matched as phrases by quoting each query term
+_TOKENIZER = "unicode61 tokenchars '_'"
+_QUERY_TERM = re.compile(r"[\w][\w\-./:#]*[\w]|\w", re.UNICODE)
+
+
+class LexicalIndex:
+    """Keyword index with BM25 ranking, kept in sync with the vector store"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for database connections"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        """Create chunk and FTS tables"""
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS chunks (
+                    rowid INTEGER PRIMARY KEY,
+                    chunk_id TEXT UNIQUE NOT NULL,
+                    file_hash TEXT,
+                    filepath TEXT,
+                    metadata TEXT NOT NULL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_hash ON chunks (file_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_filepath ON chunks (filepath)")
+            conn.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts
+                USING fts5(text, tokenize="{_TOKENIZER}")
+            ''')
+            conn.commit()
+
+    def add_chunks(self, chunks: List[DocumentChunk]) -> None:
+        """Index chunks (re-indexing any chunk_id that already exists)"""
+        self.add(
+            ids=[chunk.chunk_id for chunk in chunks],
+            documents=[chunk.text for chunk in chunks],
+            metadatas=[chunk.to_metadata() for chunk in chunks]
+        )
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[dict]) -> None:
+        """Index raw (id, text, metadata) triples, mirroring collection.add"""
+        if not ids:
+            return
+
+        with self._get_connection() as conn:
+            self._delete_where(conn, "chunk_id IN ({})".format(', '.join('?' for _ in ids)), list(ids))
+            for chunk_id, text, metadata in zip(ids, documents, metadatas):
+                metadata = metadata or {}
+                cursor = conn.execute(
+                    "INSERT INTO chunks (chunk_id, file_hash, filepath, metadata) VALUES (?, ?, ?, ?)",
+                    (chunk_id, metadata.get('file_hash'), metadata.get('filepath'), json.dumps(metadata))
+                )
+                conn.execute(
+                    "INSERT INTO chunks_fts (rowid, text) VALUES (?, ?)",
+                    (cursor.lastrowid, text or '')
+                )
+            conn.commit()
+
+        logger.debug(f"Lexical index: added {len(ids)} chunks")
+
+    def _delete_where(self, conn, condition: str, params: list) -> int:
+        """Delete chunk rows (and their FTS entries) matching a condition"""
+        rowids = [row[0] for row in conn.execute(f"SELECT rowid FROM chunks WHERE {condition}", params)]
+        if not rowids:
+            return 0
+        placeholders = ', '.join('?' for _ in rowids)
+        conn.execute(f"DELETE FROM chunks_fts WHERE rowid IN ({placeholders})", rowids)
+        conn.execute(f"DELETE FROM chunks WHERE rowid IN ({placeholders})", rowids)
+        return len(rowids)
+
+    def _delete(self, condition: str, params: list) -> int:
+        try:
+            with self._get_connection() as conn:
+                deleted = self._delete_where(conn, condition, params)
+                conn.commit()
+                return deleted
+        except Exception as e:
+            logger.error(f"Lexical index delete failed: {e}")
+            return 0
+
+    def delete_by_hash(self, file_hash: str) -> int:
+        """Remove all chunks of a file hash"""
+        return self._delete("file_hash = ?", [file_hash])
+
+    def delete_by_filepath(self, filepath: str) -> int:
+        """Remove all chunks stored for a filepath"""
+        return self._delete("filepath = ?", [filepath])
+
+    def delete_by_ids(self, chunk_ids: List[str]) -> int:
+        """Remove chunks by id"""
+        if not chunk_ids:
+            return 0
+        return self._delete("chunk_id IN ({})".format(', '.join('?' for _ in chunk_ids)), list(chunk_ids))
+
+    def count(self) -> int:
+        """Number of indexed chunks"""
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    @staticmethod
+    def build_match_query(query_text: str) -> Optional[str]:
+        """Turn free text into an FTS5 OR-query of quoted terms"""
+        terms = []
+        for term in _QUERY_TERM.findall(query_text or ''):
+            if len(term) < 2 or term.lower() in terms:
+                continue
+            terms.append(term.lower())
+        if not terms:
+            return None
+        return ' OR '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+    def search(self, query_text: str, n_results: int = 10, where: dict = None) -> List[Dict]:
+        """BM25 keyword search
+
+        Args:
+            query_text: Free-text query
+            n_results: Maximum hits to return
+            where: Optional ChromaDB-style metadata filter (e.g. the RBAC role filter)
+
+        Returns:
+            List of dicts with chunk_id, text, metadata and bm25 score (higher is better)
+        """
+        match_query = self.build_match_query(query_text)
+        if not match_query:
+            return []
+
+        where_sql, where_params = where_to_sql(where, 'c.metadata')
+        sql = f'''
+            SELECT c.chunk_id, c.metadata, chunks_fts.text AS text, bm25(chunks_fts) AS rank
+            FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid
+            WHERE chunks_fts MATCH ? AND {where_sql}
+            ORDER BY rank
+            LIMIT ?
+        '''
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute(sql, [match_query, *where_params, n_results]).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Lexical search failed: {e}")
+            return []
+
+        # FTS5 bm25() is negative; flip it so larger means more relevant
+        return [{
+            'chunk_id': row['chunk_id'],
+            'text': row['text'],
+            'metadata': json.loads(row['metadata']),
+            'score': -row['rank']
+        } for row in rows]
@@ -1,29 +1,64 @@
 """LLM service using Ollama for response generation and semantic operations"""
-import ollama
 import logging
-import re
-from typing import Tuple, List, Dict, Optional
-from sentence_transformers import CrossEncoder
+import time
+from contextlib import nullcontext
+from typing import Callable, Iterator, Tuple, List, Dict, Optional
+from core.chat_stream import response_events
 from core.classifier import DocumentClassifier
-from langdetect import detect, LangDetectException
+from core.context_packer import ContextPacker
+from core.model_warmup import ModelLatency, keep_alive_value
+from core.ollama_pool import OllamaPool
+from core.ollama_scheduler import BACKGROUND, INTERACTIVE, OllamaBusy, OllamaScheduler
+from core.onnx_models import load_reranker
+from core.rerank_batcher import RerankBatcher
+from core.rerank_cache import RerankScoreCache, query_fingerprint
+from core.rerank_policy import SKIP, AdaptiveRerankPolicy
+from config import Config
+from utils.language_detector import LanguageDetector
 
 logger = logging.getLogger(__name__)
 
 
 class LLMService:
     """Handles LLM operations for query generation, response generation, and semantic operations"""
+
+    # Ollama sampling options shared by the blocking and streaming paths
+    GENERATION_OPTIONS = {
+        "temperature": 0.3,
+        "top_p": 0.9,
+        "top_k": 40,
+        "num_predict": Config.CONTEXT_MAX_ANSWER_TOKENS,
+        "num_ctx": Config.CONTEXT_WINDOW_TOKENS,
+        "repeat_penalty": 1.1,
+        "num_thread": 8,
+    }
+    # Rule-based results below this confidence are re-classified by the LLM
+    CLASSIFY_LLM_THRESHOLD = 0.45
     
     def __init__(self, model: str = "llama3.2"):
         self.model = model
         self.classifier = DocumentClassifier()
         try:
             logger.info("Loading CrossEncoder model for re-ranking...")
-            self.reranker = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2', max_length=512)
+            self.reranker = load_reranker('cross-encoder/ms-marco-MiniLM-L-6-v2')
             logger.info("CrossEncoder loaded successfully.")
             # self.reranker = None
         except Exception as e:
             logger.error(f"Failed to load CrossEncoder: {e}")
             self.reranker = None
+        self.rerank_cache = RerankScoreCache(Config.RERANK_CACHE_SIZE) if self.reranker and Config.RERANK_CACHE_SIZE else None
+        # Concurrent requests share batched forward passes instead of each calling predict
+        self.rerank_batcher = RerankBatcher(self.reranker) if self.reranker and Config.ENABLE_RERANK_BATCHING else None
+        self.rerank_policy = AdaptiveRerankPolicy() if self.reranker and Config.ENABLE_ADAPTIVE_RERANK else None
+        self.context_packer = ContextPacker() if Config.ENABLE_CONTEXT_PACKING else None
+        # Every request renews keep_alive, so the model stays loaded between chats
+        self.keep_alive = keep_alive_value()
+        self.model_latency = ModelLatency()
+        # Pooled connections to every configured Ollama host, least-outstanding routing
+        self.client = OllamaPool.from_config()
+        # Chat and worker classification calls share Ollama through one admission queue
+        self.scheduler = OllamaScheduler.from_config() if Config.ENABLE_OLLAMA_SCHEDULER else None
+        self.language_detector = LanguageDetector(Config.LANGUAGE_CACHE_SIZE, Config.LANGUAGE_DETECT_SEED)
         
         # Language-specific system prompts
         self.language_prompts = {
@@ -36,15 +71,15 @@ class LLMService:
         
         logger.info(f"LLM Service initialized with model: {model}")
 
+    def _ollama_slot(self, priority: str):
+        """Scheduler slot held for one Ollama call (no-op when admission control is off)"""
+        return self.scheduler.slot(priority) if self.scheduler else nullcontext()
+    
     def detect_query_language(self, query: str) -> str:
         """Detect the language of the query"""
-        try:
-            lang = detect(query)
-            logger.info(f"Detected language: {lang} for query: '{query[:50]}...'")
-            return lang
-        except LangDetectException:
-            logger.warning(f"Could not detect language for query: '{query[:50]}...', defaulting to English")
-            return 'en'
+        lang, method, seconds = self.language_detector.detect_timed(query)
+        logger.info(f"Detected language: {lang} ({method}, {seconds * 1000:.2f}ms) for query: '{query[:50]}...'")
+        return lang
     
     def get_system_prompt_for_language(self, lang: str) -> str:
         """Get language-specific system prompt"""
@@ -56,17 +91,17 @@ class LLMService:
         Delegates to DocumentClassifier for optimized classification.
         """
         # Step 1: Rule-based classification
-        result = self.classifier.classify_hierarchical(text, filename)
+        result = dict(self.classifier.classify_hierarchical(text, filename), method='rules')
         
         # Step 2: LLM Fallback if confidence is low
         # Threshold: 0.4 implies weak keyword matching
-        if result['confidence'] < 0.45:
+        if result['confidence'] < self.CLASSIFY_LLM_THRESHOLD:
             logger.info(f"Low classification confidence ({result['confidence']}). specific fallback to LLM.")
             try:
                 llm_result = self._classify_with_llm(text, filename)
                 if llm_result:
                     logger.info(f"LLM Re-classification: {llm_result['domain']}/{llm_result['category']}")
-                    return llm_result
+                    return dict(llm_result, method='llm')
             except Exception as e:
                 logger.error(f"LLM classification failed: {e}")
         
@@ -90,12 +125,15 @@ Return JSON format ONLY:
 }}
 """
         try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                stream=False,
-                options={"temperature": 0.1, "json": True} # Force JSON mode
-            )
+            with self._ollama_slot(BACKGROUND):
+                response = self.client.generate(
+                    model=self.model,
+                    prompt=prompt,
+                    stream=False,
+                    # Same num_ctx as chat: a different context size makes Ollama reload the model
+                    options={"temperature": 0.1, "json": True, "num_ctx": Config.CONTEXT_WINDOW_TOKENS}, # Force JSON mode
+                    keep_alive=self.keep_alive
+                )
             
             import json
             data = json.loads(response['response'])
@@ -107,6 +145,9 @@ Return JSON format ONLY:
                 "domain_score": 80,
                 "category_score": 80
             }
+        except OllamaBusy as e:
+            logger.warning(f"LLM classification skipped: {e}")
+            return None
         except Exception as e:
             logger.warning(f"LLM classification parsing failed: {e}")
             return None
@@ -138,13 +179,39 @@ Return JSON format ONLY:
         """Re-rank chunks using Cross-Encoder"""
         if not self.reranker or not chunks:
             return chunks[:top_k]
+        
+        # Skip the CrossEncoder for a clear winner, look deeper when the top hits are near-tied
+        decision = self.rerank_policy.decide(chunks, top_k) if self.rerank_policy else None
+        if decision is not None:
+            if decision.action == SKIP:
+                self.rerank_policy.record(decision, 0.0, 0)
+                return chunks[:top_k]
+            chunks = chunks[:decision.depth]
+        started = time.perf_counter()
             
         try:
-            # Create pairs of (query, document_text)
-            pairs = [[query, chunk['text']] for chunk in chunks]
+            # Scores cached for this query and chunk text are reused; only misses go to the model
+            if self.rerank_cache is not None and all(chunk.get('chunk_id') for chunk in chunks):
+                fingerprint = query_fingerprint(query)
+                scores, digests = self.rerank_cache.lookup(fingerprint, chunks)
+            else:
+                fingerprint, scores, digests = None, [None] * len(chunks), []
+            misses = [i for i, score in enumerate(scores) if score is None]
             
-            # Predict scores
-            scores = self.reranker.predict(pairs)
+            if misses:
+                # Create pairs of (query, document_text)
+                pairs = [[query, chunks[i]['text']] for i in misses]
+                
+                # Predict scores
+                predicted = (self.rerank_batcher or self.reranker).predict(pairs)
+                for i, score in zip(misses, predicted):
+                    scores[i] = float(score)
+                if fingerprint:
+                    self.rerank_cache.store(fingerprint, [chunks[i]['chunk_id'] for i in misses],
+                                            [digests[i] for i in misses], [scores[i] for i in misses])
+            logger.info(f"Re-ranking {len(chunks)} chunks: {len(chunks) - len(misses)} cached, {len(misses)} scored")
+            if decision is not None:
+                self.rerank_policy.record(decision, (time.perf_counter() - started) * 1000, len(misses))
             
             # Attach scores to chunks
             for i, chunk in enumerate(chunks):
@@ -160,10 +227,21 @@ Return JSON format ONLY:
             logger.error(f"Re-ranking failed: {e}")
             return chunks[:top_k]
     
-    def generate_response(self, query: str, context_chunks: List[dict]) -> Tuple[str, List[str], float, List[dict], str]:
-        """Generate response STRICTLY from documents only - no external knowledge
+    def invalidate_rerank_scores(self, chunk_ids: List[str] = None, file_hash: str = None) -> int:
+        """Forget cached rerank scores of deleted or re-ingested chunks"""
+        if self.rerank_cache is None:
+            return 0
+        removed = self.rerank_cache.invalidate_chunks(chunk_ids or [])
+        if file_hash:
+            removed += self.rerank_cache.invalidate_document(file_hash)
+        return removed
+    
+    def _prepare_generation(self, query: str, context_chunks: List[dict],
+                            expand: Optional[Callable[[List[dict]], List[dict]]] = None) -> Dict:
+        """Language detection, reranking, snippets and prompt for one answer
         
-        Returns: (answer, cited_files, confidence_score, source_snippets, detected_language)
+        Returns a dict with 'answer' already set when there is nothing to send
+        to the LLM (no documents found).
         """
         
         # Detect query language
@@ -177,15 +255,8 @@ Return JSON format ONLY:
                 'es': "No tengo esta información en sus documentos. Por favor, suba documentos relevantes o haga preguntas sobre los documentos que ha proporcionado.",
                 'fr': "Je n'ai pas cette information dans vos documents. Veuillez télécharger des documents pertinents ou poser des questions sur les documents que vous avez fournis."
             }
-            return no_info_messages.get(detected_lang, no_info_messages['en']), [], 0, [], detected_lang
-        
-        # Relevance filter: prefer chunks containing query keywords
-        keywords = [w.strip().lower() for w in re.split(r"[^A-Za-z0-9]+", query) if len(w.strip()) > 2]
-        def relevance(c):
-            text = c.get('text', '').lower()
-            hits = sum(1 for k in keywords if k and k in text)
-            sim = float(c.get('similarity', 0) or 0)
-            return hits * 2 + sim
+            return {'answer': no_info_messages.get(detected_lang, no_info_messages['en']),
+                    'detected_language': detected_lang}
         
         # Re-rank deeper pool of chunks (using CrossEncoder)
         context_chunks = self._rerank_chunks(query, context_chunks, top_k=5)
@@ -214,20 +285,37 @@ Return JSON format ONLY:
             # Given the instruction, the most faithful and syntactically correct interpretation is to remove the `else` block
             # as `context_chunks` is already updated by the list comprehension.
                 
+            # Small-to-big: only the final top-k are expanded to their parent sections
+            if expand:
+                context_chunks = expand(context_chunks)
+            
             logger.info(f"Top 5 Filenames (Filtered): {[c.get('filename') for c in context_chunks]}")
             for i, c in enumerate(context_chunks):
                 logger.info(f"Chunk {i+1} ({c['filename']}): {c['text'][:100]}...")
-            
+        
+        system_prompt = self._system_prompt(detected_lang)
+        options = self.GENERATION_OPTIONS
+        if self.context_packer and context_chunks:
+            # Pack documents into what the window leaves after the prompt frame and the answer
+            packer = self.context_packer
+            overhead = packer.counter.count(system_prompt) + packer.counter.count(self._render_prompt("", query))
+            context_chunks, packing = packer.pack(
+                query, context_chunks, packer.budget(overhead),
+                source_tokens=lambda i, chunk: packer.counter.count(self._source_header(i, chunk)) + 2
+            )
+        
         confidence_score = self._calculate_confidence(query, context_chunks)
         confidence_level = self._get_confidence_level(confidence_score)
         
         source_snippets = []
         for i, chunk in enumerate(context_chunks, 1):
+            # Show the passage that matched, not the whole expanded section
+            snippet_text = chunk.get('matched_text', chunk['text'])
             snippet = {
                 'id': i,
                 'filename': chunk['filename'],
                 'category': chunk.get('category', 'Unknown'),
-                'text': chunk['text'][:300] + '...' if len(chunk['text']) > 300 else chunk['text'],
+                'text': snippet_text[:300] + '...' if len(snippet_text) > 300 else snippet_text,
                 'similarity': chunk.get('similarity', 0),
                 'relevance_pct': int(chunk.get('similarity', 0) * 100)
             }
@@ -235,20 +323,44 @@ Return JSON format ONLY:
         
         context_parts = []
         for i, chunk in enumerate(context_chunks, 1):
-            source_info = f"[Source {i}: {chunk['filename']}]"
-            context_parts.append(f"{source_info}\n{chunk['text']}\n")
+            context_parts.append(f"{self._source_header(i, chunk)}\n{chunk['text']}\n")
         
         context_text = "\n".join(context_parts)
+        full_prompt = self._render_prompt(context_text, query)
         
-        # STRICT DOCUMENT-ONLY PROMPT - No external knowledge allowed
-        # If query asks for definition, require a direct definition first
-        needs_definition = any(x in query.lower() for x in ["what is", "define", "definition of", "meaning of"]) 
-        definition_preamble = "" if not needs_definition else "Provide a concise 1-2 line definition FIRST, then details."
+        if self.context_packer and context_chunks:
+            # The answer gets whatever the window has left (never more than the configured cap)
+            prompt_tokens = packer.counter.count(system_prompt) + packer.counter.count(full_prompt)
+            options = dict(self.GENERATION_OPTIONS, num_predict=packer.answer_tokens(prompt_tokens))
+            logger.info(f"Context packed: {packing['chunks_packed']}/{packing['chunks_in']} chunks, "
+                        f"{packing['tokens_packed']}/{packing['tokens_in']} document tokens "
+                        f"({packing['duplicate_sentences']} duplicate sentences, {packing['trimmed_chunks']} trimmed), "
+                        f"prompt={prompt_tokens} num_predict={options['num_predict']}"
+                        f"{'' if packer.counter.exact else ' (estimated)'}")
         
-        # Get language-specific system prompt
-        system_prompt_base = self.get_system_prompt_for_language(detected_lang)
-
-        full_prompt = f"""{system_prompt_base}
+        return {
+            'system': system_prompt,
+            'prompt': full_prompt,
+            'options': options,
+            'chunks': context_chunks,
+            'confidence_score': confidence_score,
+            'confidence_level': confidence_level,
+            'source_snippets': source_snippets,
+            'detected_language': detected_lang
+        }
+    
+    @staticmethod
+    def _source_header(i: int, chunk: dict) -> str:
+        return f"[Source {i}: {chunk['filename']}]"
+    
+    def _system_prompt(self, lang: str) -> str:
+        """Static instructions, sent as Ollama's system prompt
+        
+        Identical for every request in a language, so it stays a cached prefix
+        in Ollama and only the documents and the question are prefilled.
+        """
+        # STRICT DOCUMENT-ONLY PROMPT - No external knowledge allowed
+        return f"""{self.get_system_prompt_for_language(lang)}
 
 CRITICAL RULES:
 1. ONLY answer using information from the documents below.
@@ -258,82 +370,172 @@ CRITICAL RULES:
 5. **DO NOT** apologize or be conversational. Just provide the answer or the refusal.
 6. Always cite which document the information comes from.
 7. Provide detailed, comprehensive answers. ELABORATE on the 'why' and 'how'.
-8. Include all types, categories, characteristics, and details mentioned in the documents.
-
-Documents:
+8. Include all types, categories, characteristics, and details mentioned in the documents."""
+    
+    @staticmethod
+    def _render_prompt(context_text: str, query: str) -> str:
+        """Per-request part of the prompt: the packed documents and the question"""
+        return f"""Documents:
 {context_text}
 
 Question: {query}
 
 Answer ONLY based on the documents above. If information is not in documents, say "I don't have this information in the provided documents." Do NOT add external context."""
+
+    def _finish_answer(self, answer: str, prepared: Dict) -> Tuple[str, List[str], float, List[dict], str]:
+        """Detect refusals and append the confidence/sources footer"""
+        answer = answer.strip()
+        detected_lang = prepared['detected_language']
+        
+        # Check if LLM says information is not in documents
+        no_info_phrases = [
+            "don't have this information",
+            "not in the provided documents",
+            "not in the documents",
+            "cannot find this information",
+            "no information about",
+            "not mentioned in the documents",
+            "not available in the documents"
+        ]
+        
+        is_no_info = any(phrase in answer.lower() for phrase in no_info_phrases)
+        
+        # FIX: If answer is long (>100 chars) and contains "no info" phrase, it's likely a hallucinated suffix.
+        # We should valid the answer if it has substance.
+        # UPDATE: Removing length check. If it says "no info", it is no info.
+        if is_no_info and len(answer) > 100:
+           logger.warning(f"Detected 'no info' phrase but answer length is {len(answer)}. Treating as valid.")
+           is_no_info = False
+        
+        if is_no_info:
+            # Don't add sources/confidence if information not found
+            return answer, [], 0, [], detected_lang
+        
+        cited_files = list(set([chunk['filename'] for chunk in prepared['chunks']]))
+        
+        if cited_files:
+            answer += f"\n\n📊 Confidence: {prepared['confidence_level']} ({prepared['confidence_score']}%)"
+            answer += f"\n📄 Sources: {', '.join(cited_files)}"
+        
+        return answer, cited_files, prepared['confidence_score'], prepared['source_snippets'], detected_lang
+
+    def _generation_error(self, e: Exception) -> Tuple[str, List[str], float, List[dict], str]:
+        error_msg = str(e).lower()
+        
+        # Check if it's an Ollama connection error
+        if "connection" in error_msg or "ollama" in error_msg or "failed" in error_msg:
+            logger.warning(f"Ollama unavailable: {e}")
+            # Return message asking to start Ollama
+            return "I cannot answer right now because Ollama is not running. Please start Ollama to get AI-powered answers from your documents.", [], 0, [], 'en'
+        
+        else:
+            logger.error(f"Error generating response: {e}")
+            return f"Error: Unable to generate response. {str(e)}", [], 0, [], 'en'
+
+    def generate_response(self, query: str, context_chunks: List[dict],
+                          expand: Optional[Callable[[List[dict]], List[dict]]] = None) -> Tuple[str, List[str], float, List[dict], str]:
+        """Generate response STRICTLY from documents only - no external knowledge
+        
+        Args:
+            expand: Optional hook applied to the final (reranked, filtered) chunks,
+                e.g. DatabaseManager.expand_to_parents for small-to-big retrieval
+        
+        Returns: (answer, cited_files, confidence_score, source_snippets, detected_language)
+        """
+        prepared = self._prepare_generation(query, context_chunks, expand)
+        if 'answer' in prepared:
+            return prepared['answer'], [], 0, [], prepared['detected_language']
         
         try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=full_prompt,
-                stream=False,
-                options={
-                    "temperature": 0.3,
-                    "top_p": 0.9,
-                    "top_k": 40,
-                    "num_predict": 1024,
-                    "num_ctx": 4096,
-                    "repeat_penalty": 1.1,
-                    "num_thread": 8,
-                }
-            )
-            
-            answer = response['response'].strip()
-            
-            # Check if LLM says information is not in documents
-            no_info_phrases = [
-                "don't have this information",
-                "not in the provided documents",
-                "not in the documents",
-                "cannot find this information",
-                "no information about",
-                "not mentioned in the documents",
-                "not available in the documents"
-            ]
-            
-            is_no_info = any(phrase in answer.lower() for phrase in no_info_phrases)
-            
-            # FIX: If answer is long (>100 chars) and contains "no info" phrase, it's likely a hallucinated suffix.
-            # We should valid the answer if it has substance.
-            # UPDATE: Removing length check. If it says "no info", it is no info.
-            if is_no_info and len(answer) > 100:
-               logger.warning(f"Detected 'no info' phrase but answer length is {len(answer)}. Treating as valid.")
-               is_no_info = False
-            
-            if is_no_info:
-                # Don't add sources/confidence if information not found
-                return answer, [], 0, [], detected_lang
-            
-            cited_files = list(set([chunk['filename'] for chunk in context_chunks]))
-            
-            if cited_files:
-                answer += f"\n\n📊 Confidence: {confidence_level} ({confidence_score}%)"
-                answer += f"\n📄 Sources: {', '.join(cited_files)}"
-            
-            return answer, cited_files, confidence_score, source_snippets, detected_lang
+            with self._ollama_slot(INTERACTIVE):
+                started = time.perf_counter()
+                response = self.client.generate(
+                    model=self.model,
+                    system=prepared['system'],
+                    prompt=prepared['prompt'],
+                    stream=False,
+                    options=prepared['options'],
+                    keep_alive=self.keep_alive
+                )
+            self.model_latency.record(response, time.perf_counter() - started)
+            return self._finish_answer(response['response'], prepared)
             
+        except OllamaBusy:
+            raise  # /chat answers 503 instead of a made-up reply
         except Exception as e:
-            error_msg = str(e).lower()
-            
-            # Check if it's an Ollama connection error
-            if "connection" in error_msg or "ollama" in error_msg or "failed" in error_msg:
-                logger.warning(f"Ollama unavailable: {e}")
-                # Return message asking to start Ollama
-                return "I cannot answer right now because Ollama is not running. Please start Ollama to get AI-powered answers from your documents.", [], 0, [], 'en'
+            return self._generation_error(e)
+
+    def stream_response(self, query: str, context_chunks: List[dict],
+                        expand: Optional[Callable[[List[dict]], List[dict]]] = None) -> Iterator[Tuple[str, dict]]:
+        """Streaming variant of generate_response
+        
+        Yields ('sources', {...}) as soon as the context is reranked, then
+        ('token', {'text': ...}) for every piece Ollama produces, then
+        ('done', response) with the same fields /chat returns.
+        """
+        prepared = self._prepare_generation(query, context_chunks, expand)
+        if 'answer' in prepared:
+            yield from response_events({'answer': prepared['answer'], 'cited_files': [], 'confidence_score': 0,
+                                        'source_snippets': [], 'detected_language': prepared['detected_language']})
+            return
+        
+        # Waits for a slot before the first frame; OllamaBusy ends the stream with an 'error' event
+        with self._ollama_slot(INTERACTIVE):
+            yield 'sources', {'source_snippets': prepared['source_snippets'],
+                              'detected_language': prepared['detected_language']}
             
-            else:
-                logger.error(f"Error generating response: {e}")
-                return f"Error: Unable to generate response. {str(e)}", [], 0, [], 'en'
+            parts = []
+            try:
+                started = time.perf_counter()
+                for piece in self.client.generate(model=self.model, system=prepared['system'], prompt=prepared['prompt'],
+                                                  stream=True, options=prepared['options'], keep_alive=self.keep_alive):
+                    text = piece['response']
+                    if text:
+                        parts.append(text)
+                        yield 'token', {'text': text}
+                    if piece.get('done'):
+                        # The final piece carries Ollama's load/prefill timings
+                        self.model_latency.record(piece, time.perf_counter() - started)
+                answer, cited_files, confidence_score, source_snippets, detected_lang = \
+                    self._finish_answer(''.join(parts), prepared)
+            except Exception as e:
+                answer, cited_files, confidence_score, source_snippets, detected_lang = self._generation_error(e)
+                if not parts:
+                    yield 'token', {'text': answer}
+        
+        yield 'done', {
+            'answer': answer,
+            'cited_files': cited_files,
+            'confidence_score': confidence_score,
+            'source_snippets': source_snippets,
+            'detected_language': detected_lang
+        }
+    
+    def warm_up(self, lang: str = 'en') -> bool:
+        """Load the model and prefill the static system prompt before the first chat
+        
+        Uses the chat options (a different num_ctx would reload the model) and
+        generates a single token.
+        """
+        started = time.perf_counter()
+        try:
+            with self._ollama_slot(INTERACTIVE):
+                response = self.client.generate(model=self.model, system=self._system_prompt(lang), prompt="Documents:",
+                                                stream=False, options=dict(self.GENERATION_OPTIONS, num_predict=1),
+                                                keep_alive=self.keep_alive)
+            seconds = time.perf_counter() - started
+            self.model_latency.record_warmup(seconds, response)
+            logger.info(f"Ollama model {self.model} warmed up in {seconds:.1f}s (keep_alive={self.keep_alive})")
+            return True
+        except Exception as e:
+            self.model_latency.record_warmup(time.perf_counter() - started, error=str(e))
+            logger.warning(f"Ollama warm-up failed: {e}")
+            return False
     
     def check_availability(self) -> bool:
         """Check if Ollama is available"""
         try:
-            ollama.list()
+            self.client.list()
             return True
         except:
             return False
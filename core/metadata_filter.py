@@ -0,0 +1,77 @@
+"""
+Metadata Filter Module
+Translates ChromaDB-style `where` clauses for stores that are not ChromaDB
+"""
+
+import re
+from typing import Any, List, Tuple
+
+_KEY_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+_COMPARISON_SQL = {
+    '$eq': '=',
+    '$ne': '!=',
+    '$gt': '>',
+    '$gte': '>=',
+    '$lt': '<',
+    '$lte': '<=',
+}
+
+
+def where_to_sql(where: dict, metadata_column: str = 'metadata') -> Tuple[str, List[Any]]:
+    """
+    Compile a ChromaDB where clause into a parameterized SQLite expression
+
+    Metadata is expected as a JSON column; each key is read with json_extract.
+    Supports implicit equality, $eq/$ne/$gt/$gte/$lt/$lte, $in/$nin, $and/$or.
+
+    Args:
+        where: ChromaDB where clause (e.g. {'domain': {'$in': ['Finance']}})
+        metadata_column: Name of the JSON metadata column
+
+    Returns:
+        Tuple of (sql_expression, params)
+    """
+    if not where:
+        return '1', []
+
+    parts = []
+    params = []
+    for key, condition in where.items():
+        if key in ('$and', '$or'):
+            if not isinstance(condition, list) or not condition:
+                raise ValueError(f"{key} expects a non-empty list")
+            sub_sql = []
+            for sub_where in condition:
+                sql, sub_params = where_to_sql(sub_where, metadata_column)
+                sub_sql.append(f"({sql})")
+                params.extend(sub_params)
+            joiner = ' AND ' if key == '$and' else ' OR '
+            parts.append(joiner.join(sub_sql))
+            continue
+
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid metadata key: {key!r}")
+        column = f"json_extract({metadata_column}, '$.{key}')"
+
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+
+        for op, value in condition.items():
+            if op in _COMPARISON_SQL:
+                parts.append(f"{column} {_COMPARISON_SQL[op]} ?")
+                params.append(value)
+            elif op in ('$in', '$nin'):
+                values = list(value)
+                if not values:
+                    # Empty $in matches nothing, empty $nin matches everything
+                    parts.append('0' if op == '$in' else '1')
+                    continue
+                placeholders = ', '.join('?' for _ in values)
+                negate = 'NOT ' if op == '$nin' else ''
+                parts.append(f"{column} {negate}IN ({placeholders})")
+                params.extend(values)
+            else:
+                raise ValueError(f"Unsupported where operator: {op}")
+
+    return ' AND '.join(parts) if parts else '1', params
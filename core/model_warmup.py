@@ -0,0 +1,84 @@
+"""
+Model Warm-up Module
+Keeps the Ollama chat model resident (warm-up at startup, keep_alive on every
+request) and separates cold-start from warm latency using the timings Ollama
+reports with each response.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional, Union
+
+from config import Config
+from core.chat_stream import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+NS_PER_SECOND = 1e9
+
+
+def keep_alive_value(value: str = None) -> Union[int, str]:
+    """Ollama keep_alive: seconds as a number ("-1" = never unload) or a duration such as "30m" """
+    value = str(Config.OLLAMA_KEEP_ALIVE if value is None else value).strip()
+    return int(value) if value.lstrip('-').isdigit() else value
+
+
+class ModelLatency:
+    """Cold vs warm generation latency
+
+    A request counts as cold when Ollama spent at least cold_load_ms loading
+    the model for it (load_duration). prompt_eval_count shows how much of
+    each prompt had to be prefilled: Ollama only evaluates the tokens after
+    the prefix it still holds in its cache from the previous request.
+    """
+
+    def __init__(self, window: int = None, cold_load_ms: float = None):
+        self.cold_load_ms = Config.OLLAMA_COLD_LOAD_MS if cold_load_ms is None else cold_load_ms
+        self.latency = LatencyTracker(window=window or Config.LATENCY_WINDOW)
+        self.warmup: Optional[Dict] = None
+        self.cold_requests = 0
+        self.warm_requests = 0
+        self.prompt_tokens_evaluated = 0
+        self._lock = threading.Lock()
+
+    def record(self, response, seconds: float) -> bool:
+        """Record one finished generation (final Ollama response); returns True if it was cold"""
+        load_seconds = (response.get('load_duration') or 0) / NS_PER_SECOND
+        cold = load_seconds * 1000 >= self.cold_load_ms
+        metric = 'cold' if cold else 'warm'
+        self.latency.record(f"{metric}_total", seconds)
+        if cold:
+            self.latency.record('model_load', load_seconds)
+        if response.get('prompt_eval_duration'):
+            self.latency.record(f"{metric}_prefill", response['prompt_eval_duration'] / NS_PER_SECOND)
+        with self._lock:
+            if cold:
+                self.cold_requests += 1
+            else:
+                self.warm_requests += 1
+            self.prompt_tokens_evaluated += response.get('prompt_eval_count') or 0
+        if cold:
+            logger.warning(f"Cold start: Ollama loaded the model for {load_seconds:.1f}s before answering")
+        return cold
+
+    def record_warmup(self, seconds: float, response=None, error: str = None) -> None:
+        self.warmup = {
+            'ok': error is None,
+            'seconds': round(seconds, 2),
+            'load_seconds': round((response.get('load_duration') or 0) / NS_PER_SECOND, 2) if response else None,
+            'error': error,
+            'at': time.time()
+        }
+
+    def summary(self) -> Dict:
+        with self._lock:
+            requests = self.cold_requests + self.warm_requests
+            return {
+                'keep_alive': keep_alive_value(),
+                'warmup': self.warmup,
+                'cold_requests': self.cold_requests,
+                'warm_requests': self.warm_requests,
+                'avg_prompt_tokens_evaluated': round(self.prompt_tokens_evaluated / requests, 1) if requests else 0.0,
+                'latency': self.latency.summary()
+            }
@@ -0,0 +1,295 @@
+"""
+Ollama Pool Module
+Client layer for one or more Ollama hosts. Each endpoint keeps a pooled,
+kept-alive HTTP client (sync and asyncio); calls are routed to the healthy
+endpoint with the fewest outstanding requests, and an endpoint that keeps
+failing is taken out of rotation by a circuit breaker until a trial request
+or health probe succeeds.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+import httpx
+import ollama
+
+from config import Config
+from core.chat_stream import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'  # In rotation
+OPEN = 'open'  # Failing: skipped until the cooldown has passed
+HALF_OPEN = 'half_open'  # One trial request decides whether it goes back into rotation
+
+
+class OllamaUnavailable(ConnectionError):
+    """Raised when no Ollama endpoint can take the call"""
+
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """Errors that say something about the host (unreachable, timed out, 5xx), not about the request"""
+    if isinstance(error, (ConnectionError, httpx.TransportError)):
+        return True
+    return isinstance(error, ollama.ResponseError) and error.status_code >= 500
+
+
+class Endpoint:
+    """One Ollama host: pooled clients, outstanding requests and breaker state"""
+
+    def __init__(self, host: str, timeout: float, max_connections: int):
+        self.host = host
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = ollama.Client(host=host, timeout=timeout, limits=self.limits)
+        self._async = None  # (event loop, AsyncClient): httpx async clients belong to one loop
+        self.outstanding = 0
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def async_client(self) -> ollama.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._async is None or self._async[0] is not loop:
+            self._async = (loop, ollama.AsyncClient(host=self.host, timeout=self.timeout, limits=self.limits))
+        return self._async[1]
+
+
+class OllamaPool:
+    """Least-outstanding-requests routing with per-endpoint circuit breaking
+
+    generate() and list() mirror the ollama module functions (agenerate()
+    and alist() for asyncio callers), so LLMService can use the pool in
+    their place. A call that fails on an unreachable endpoint before
+    producing output is retried on the next one; errors caused by the
+    request itself are raised unchanged.
+    """
+
+    def __init__(self, hosts: Sequence[str], timeout: float = None, max_connections: int = None,
+                 failure_threshold: int = None, cooldown: float = None, health_interval: float = None):
+        if not hosts:
+            raise ValueError("At least one Ollama host is required")
+        timeout = Config.OLLAMA_REQUEST_TIMEOUT if timeout is None else timeout
+        max_connections = max_connections or Config.OLLAMA_POOL_CONNECTIONS
+        self.endpoints = [Endpoint(host, timeout, max_connections) for host in hosts]
+        self.failure_threshold = failure_threshold or Config.OLLAMA_BREAKER_FAILURES
+        self.cooldown = Config.OLLAMA_BREAKER_COOLDOWN if cooldown is None else cooldown
+        self.health_interval = Config.OLLAMA_HEALTH_INTERVAL if health_interval is None else health_interval
+        self.latency = LatencyTracker(window=Config.LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._turn = 0
+        self._health_thread = None
+
+    @classmethod
+    def from_config(cls) -> 'OllamaPool':
+        pool = cls(Config.OLLAMA_HOSTS)
+        if pool.health_interval > 0:
+            pool.start_health_checks()
+        return pool
+
+    # --- routing and breaker ---------------------------------------------
+
+    def _acquire(self, tried: List[Endpoint]) -> Endpoint:
+        now = time.time()
+        with self._lock:
+            untried = [e for e in self.endpoints if e not in tried]
+            # An open endpoint whose cooldown has passed gets this call as its trial
+            trial = next((e for e in untried if e.state == OPEN and now - e.opened_at >= self.cooldown), None)
+            if trial:
+                trial.state = HALF_OPEN
+                endpoint = trial
+            else:
+                candidates = [e for e in untried if e.state == CLOSED]
+                if not candidates:
+                    down = ', '.join(f"{e.host} ({e.state})" for e in self.endpoints)
+                    raise OllamaUnavailable(f"No Ollama endpoint available: {down}")
+                # Fewest outstanding requests; ties rotate so idle endpoints share the load
+                self._turn += 1
+                endpoint = min(candidates, key=lambda e: (e.outstanding,
+                                                          (self.endpoints.index(e) - self._turn) % len(self.endpoints)))
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _release(self, endpoint: Endpoint, started: float, error: Exception = None) -> None:
+        self.latency.record(endpoint.host, time.perf_counter() - started)
+        with self._lock:
+            endpoint.outstanding -= 1
+        if error is None:
+            self._record_success(endpoint)
+        elif is_endpoint_failure(error):
+            self._record_failure(endpoint, error)
+        elif endpoint.state == HALF_OPEN:
+            self._record_success(endpoint)  # The host answered; the request itself was bad
+
+    def _record_success(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            if endpoint.state != CLOSED:
+                logger.info(f"Ollama endpoint {endpoint.host} is back in rotation")
+            endpoint.state = CLOSED
+            endpoint.consecutive_failures = 0
+
+    def _record_failure(self, endpoint: Endpoint, error: Exception) -> None:
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            endpoint.last_error = str(error)[:200]
+            if endpoint.state == HALF_OPEN or endpoint.consecutive_failures >= self.failure_threshold:
+                if endpoint.state != OPEN:
+                    logger.warning(f"Ollama endpoint {endpoint.host} taken out of rotation for "
+                                   f"{self.cooldown:.0f}s: {error}")
+                endpoint.state = OPEN
+                endpoint.opened_at = time.time()
+
+    def _retry_or_raise(self, endpoint: Endpoint, error: Exception, tried: List[Endpoint]) -> None:
+        if not is_endpoint_failure(error):
+            raise error
+        tried.append(endpoint)
+        if len(tried) >= len(self.endpoints):
+            raise error
+        logger.warning(f"Ollama endpoint {endpoint.host} failed ({error}), retrying on another endpoint")
+
+    # --- sync API --------------------------------------------------------
+
+    def generate(self, **kwargs):
+        if kwargs.get('stream'):
+            return self._stream('generate', kwargs)
+        return self._call('generate', kwargs)
+
+    def list(self):
+        return self._call('list', {})
+
+    def _call(self, method: str, kwargs: dict):
+        tried = []
+        while True:
+            endpoint = self._acquire(tried)
+            started = time.perf_counter()
+            try:
+                response = getattr(endpoint.client, method)(**kwargs)
+            except Exception as e:
+                self._release(endpoint, started, e)
+                self._retry_or_raise(endpoint, e, tried)
+                continue
+            self._release(endpoint, started)
+            return response
+
+    def _stream(self, method: str, kwargs: dict) -> Iterator:
+        tried = []
+        while True:
+            endpoint = self._acquire(tried)
+            started = time.perf_counter()
+            produced = False
+            error = None
+            try:
+                for piece in getattr(endpoint.client, method)(**kwargs):
+                    produced = True
+                    yield piece
+            except Exception as e:
+                error = e
+            finally:
+                # Also reached when the consumer stops early (GeneratorExit): not the endpoint's fault
+                self._release(endpoint, started, error)
+            if error is None:
+                return
+            if produced:
+                raise error  # Part of the answer was already sent
+            self._retry_or_raise(endpoint, error, tried)
+
+    # --- asyncio API -----------------------------------------------------
+
+    async def agenerate(self, **kwargs):
+        if kwargs.get('stream'):
+            return self._astream('generate', kwargs)
+        return await self._acall('generate', kwargs)
+
+    async def alist(self):
+        return await self._acall('list', {})
+
+    async def _acall(self, method: str, kwargs: dict):
+        tried = []
+        while True:
+            endpoint = self._acquire(tried)
+            started = time.perf_counter()
+            try:
+                response = await getattr(endpoint.async_client(), method)(**kwargs)
+            except Exception as e:
+                self._release(endpoint, started, e)
+                self._retry_or_raise(endpoint, e, tried)
+                continue
+            self._release(endpoint, started)
+            return response
+
+    async def _astream(self, method: str, kwargs: dict) -> AsyncIterator:
+        tried = []
+        while True:
+            endpoint = self._acquire(tried)
+            started = time.perf_counter()
+            produced = False
+            error = None
+            try:
+                async for piece in await getattr(endpoint.async_client(), method)(**kwargs):
+                    produced = True
+                    yield piece
+            except Exception as e:
+                error = e
+            finally:
+                self._release(endpoint, started, error)
+            if error is None:
+                return
+            if produced:
+                raise error
+            self._retry_or_raise(endpoint, error, tried)
+
+    # --- health ----------------------------------------------------------
+
+    def check_health(self) -> Dict[str, bool]:
+        """Probe every endpoint (GET /api/ps); a success closes its breaker, a failure counts toward opening it"""
+        results = {}
+        for endpoint in self.endpoints:
+            try:
+                endpoint.client.ps()
+                self._record_success(endpoint)
+                results[endpoint.host] = True
+            except Exception as e:
+                if is_endpoint_failure(e):
+                    self._record_failure(endpoint, e)
+                results[endpoint.host] = False
+        return results
+
+    def start_health_checks(self) -> None:
+        if self._health_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(self.health_interval)
+                try:
+                    self.check_health()
+                except Exception as e:
+                    logger.warning(f"Ollama health check failed: {e}")
+
+        self._health_thread = threading.Thread(target=loop, name="ollama-health", daemon=True)
+        self._health_thread.start()
+
+    def stats(self) -> Dict:
+        latency = self.latency.summary()
+        with self._lock:
+            return {
+                'endpoints': [{
+                    'host': e.host,
+                    'state': e.state,
+                    'outstanding': e.outstanding,
+                    'requests': e.requests,
+                    'failures': e.failures,
+                    'consecutive_failures': e.consecutive_failures,
+                    'last_error': e.last_error,
+                    'latency': latency.get(e.host)
+                } for e in self.endpoints],
+                'available': sum(e.state != OPEN for e in self.endpoints)
+            }
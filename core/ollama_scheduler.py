@@ -0,0 +1,233 @@
+"""
+Ollama Scheduler Module
+Global admission control for Ollama calls. The web app and every worker take
+a slot from a Redis-backed scheduler before generating: a fixed number of
+calls run at once, interactive /chat requests are admitted ahead of
+background classification, and callers that cannot get a slot in time (or
+find the queue full) are turned away with OllamaBusy instead of piling up.
+"""
+
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import redis
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+PRIORITIES = {INTERACTIVE: 0, BACKGROUND: 1}  # Lower is admitted first
+
+# Upper bounds (ms) of the queue-wait histogram buckets
+WAIT_BUCKETS_MS = (5, 25, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+PRIORITY_SPAN = 1e13  # Queue score = priority * span + enqueue time (ms)
+
+
+class OllamaBusy(RuntimeError):
+    """Raised when a call is not admitted (queue full or wait timeout); sent to clients as 503"""
+
+    def __init__(self, priority: str, reason: str, retry_after: float):
+        super().__init__(f"Ollama is busy ({priority} {reason}), retry in {retry_after:.0f}s")
+        self.priority = priority
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class OllamaScheduler:
+    """Distributed, priority-ordered semaphore for Ollama calls
+
+    Redis keys (under prefix):
+      slots:<priority>  sorted set of running calls, scored by lease expiry
+      queue             sorted set of waiting calls, scored by priority then arrival
+      waiting           sorted set of waiting calls, scored by heartbeat expiry
+
+    A waiter is admitted when a slot is free and it is among the first
+    free-slot-count entries of the queue, so a queued interactive call is
+    always served before any background one. Background calls never hold
+    more than background_slots slots, keeping the rest for /chat. Slots
+    of crashed callers expire with their lease, abandoned waiters with their
+    heartbeat. If Redis is unreachable calls run unscheduled.
+    """
+
+    def __init__(self, redis_client: redis.Redis, max_concurrency: int = None, background_slots: int = None,
+                 timeouts: Dict[str, float] = None, max_queued: Dict[str, int] = None, lease: float = None,
+                 poll_interval: float = 0.02, prefix: str = None):
+        self.redis = redis_client
+        self.max_concurrency = max_concurrency or Config.OLLAMA_MAX_CONCURRENCY
+        background_slots = Config.OLLAMA_BACKGROUND_SLOTS if background_slots is None else background_slots
+        self.limits = {INTERACTIVE: self.max_concurrency,
+                       BACKGROUND: max(1, min(background_slots, self.max_concurrency))}
+        self.timeouts = timeouts or {INTERACTIVE: Config.OLLAMA_INTERACTIVE_TIMEOUT,
+                                     BACKGROUND: Config.OLLAMA_BACKGROUND_TIMEOUT}
+        self.max_queued = max_queued or {INTERACTIVE: Config.OLLAMA_INTERACTIVE_MAX_QUEUED,
+                                         BACKGROUND: Config.OLLAMA_BACKGROUND_MAX_QUEUED}
+        self.lease = lease or Config.OLLAMA_SLOT_LEASE
+        self.poll_interval = poll_interval
+        self.heartbeat = max(1.0, poll_interval * 50)
+        self.prefix = prefix or Config.REDIS_OLLAMA_SCHEDULER
+        self.stats_key = f"{self.prefix}:stats"
+        self.queue_key = f"{self.prefix}:queue"
+        self.waiting_key = f"{self.prefix}:waiting"
+
+    @classmethod
+    def from_config(cls, redis_client=None) -> 'OllamaScheduler':
+        if redis_client is None:
+            redis_client = redis.Redis.from_url(Config.CELERY_BROKER_URL, decode_responses=True)
+        return cls(redis_client)
+
+    def _slots_key(self, priority: str) -> str:
+        return f"{self.prefix}:slots:{priority}"
+
+    def _queue_range(self, priority: str):
+        low = PRIORITIES[priority] * PRIORITY_SPAN
+        return low, low + PRIORITY_SPAN - 1
+
+    # --- admission -------------------------------------------------------
+
+    def _reap(self, now: float) -> None:
+        """Drop expired leases and waiters that stopped polling"""
+        for priority in PRIORITIES:
+            self.redis.zremrangebyscore(self._slots_key(priority), '-inf', now)
+        stale = self.redis.zrangebyscore(self.waiting_key, '-inf', now)
+        if stale:
+            self.redis.zrem(self.queue_key, *stale)
+            self.redis.zrem(self.waiting_key, *stale)
+
+    def _try_acquire(self, token: str, priority: str, now: float) -> bool:
+        slot_keys = [self._slots_key(p) for p in PRIORITIES]
+
+        def attempt(pipe) -> bool:
+            running = {p: pipe.zcard(self._slots_key(p)) for p in PRIORITIES}
+            free = self.max_concurrency - sum(running.values())
+            rank = pipe.zrank(self.queue_key, token)
+            if free <= 0 or rank is None or rank >= free or running[priority] >= self.limits[priority]:
+                pipe.unwatch()
+                return False
+            pipe.multi()
+            pipe.zrem(self.queue_key, token)
+            pipe.zrem(self.waiting_key, token)
+            pipe.zadd(self._slots_key(priority), {token: now + self.lease})
+            return True
+
+        return self.redis.transaction(attempt, self.queue_key, *slot_keys, value_from_callable=True)
+
+    def queue_depth(self, priority: str) -> int:
+        return self.redis.zcount(self.queue_key, *self._queue_range(priority))
+
+    def check_admission(self, priority: str = INTERACTIVE) -> None:
+        """Raise OllamaBusy right away if the queue for this priority is full"""
+        if self.queue_depth(priority) >= self.max_queued[priority]:
+            self._record(priority, 'rejected')
+            raise OllamaBusy(priority, "queue full", retry_after=max(1.0, self.timeouts[priority] / 2))
+
+    def precheck(self, priority: str = INTERACTIVE) -> None:
+        """check_admission before doing work for the call (retrieval, reranking); ignores Redis errors"""
+        try:
+            self.check_admission(priority)
+        except redis.RedisError:
+            pass
+
+    def acquire(self, priority: str = INTERACTIVE, timeout: float = None) -> Optional[str]:
+        """Wait for a slot; returns its token (None when running unscheduled) or raises OllamaBusy"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'")
+        timeout = self.timeouts[priority] if timeout is None else timeout
+        token = f"{priority}:{uuid.uuid4().hex}"
+        started = time.time()
+        try:
+            self.check_admission(priority)
+            position = {token: PRIORITIES[priority] * PRIORITY_SPAN + started * 1000}
+            while True:
+                now = time.time()
+                self.redis.zadd(self.waiting_key, {token: now + self.heartbeat})
+                self.redis.zadd(self.queue_key, position, nx=True)  # Back in line if reaped during a stall
+                self._reap(now)
+                if self._try_acquire(token, priority, now):
+                    self._record(priority, 'admitted', wait=now - started)
+                    return token
+                if now - started >= timeout:
+                    self._leave_queue(token)
+                    self._record(priority, 'timeouts', wait=now - started)
+                    logger.warning(f"Ollama {priority} call not admitted within {timeout:.0f}s")
+                    raise OllamaBusy(priority, "wait timeout", retry_after=max(1.0, timeout / 2))
+                time.sleep(self.poll_interval)
+        except redis.RedisError as e:
+            logger.warning(f"Ollama scheduler unavailable, running {priority} call unscheduled: {e}")
+            return None
+        except BaseException:
+            self._leave_queue(token)
+            raise
+
+    def _leave_queue(self, token: str) -> None:
+        try:
+            self.redis.zrem(self.queue_key, token)
+            self.redis.zrem(self.waiting_key, token)
+        except redis.RedisError:
+            pass  # The heartbeat expires on its own
+
+    def release(self, token: Optional[str]) -> None:
+        if token is None:
+            return
+        try:
+            self.redis.zrem(self._slots_key(token.split(':', 1)[0]), token)
+        except redis.RedisError as e:
+            logger.warning(f"Could not release Ollama slot (lease expires on its own): {e}")
+
+    @contextmanager
+    def slot(self, priority: str = INTERACTIVE, timeout: float = None) -> Iterator[Optional[str]]:
+        token = self.acquire(priority, timeout)
+        try:
+            yield token
+        finally:
+            self.release(token)
+
+    # --- metrics ---------------------------------------------------------
+
+    def _record(self, priority: str, outcome: str, wait: float = None) -> None:
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hincrby(self.stats_key, f"{priority}:{outcome}", 1)
+            if wait is not None:
+                wait_ms = wait * 1000
+                bucket = next((str(b) for b in WAIT_BUCKETS_MS if wait_ms <= b), 'inf')
+                pipe.hincrby(self.stats_key, f"{priority}:wait_le_{bucket}", 1)
+                pipe.hincrbyfloat(self.stats_key, f"{priority}:wait_seconds", wait)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not record Ollama scheduler stats: {e}")
+
+    def stats(self) -> Dict:
+        """Queue depth, running calls and queue-wait histograms (all processes)"""
+        try:
+            now = time.time()
+            raw = self.redis.hgetall(self.stats_key)
+            result = {'max_concurrency': self.max_concurrency, 'classes': {}}
+            for priority in PRIORITIES:
+                get = lambda field: raw.get(f"{priority}:{field}", 0)
+                waits = int(get('admitted')) + int(get('timeouts'))
+                cumulative, histogram = 0, {}
+                for bucket in [str(b) for b in WAIT_BUCKETS_MS] + ['inf']:
+                    cumulative += int(get(f"wait_le_{bucket}"))
+                    histogram[f"le_{bucket}ms" if bucket != 'inf' else 'le_inf'] = cumulative
+                result['classes'][priority] = {
+                    'queue_depth': self.queue_depth(priority),
+                    'running': self.redis.zcount(self._slots_key(priority), now, '+inf'),
+                    'slot_limit': self.limits[priority],
+                    'max_queued': self.max_queued[priority],
+                    'timeout_s': self.timeouts[priority],
+                    'admitted': int(get('admitted')),
+                    'rejected': int(get('rejected')),
+                    'timeouts': int(get('timeouts')),
+                    'avg_wait_ms': round(float(get('wait_seconds')) / waits * 1000, 1) if waits else 0.0,
+                    'wait_histogram': histogram
+                }
+            return result
+        except redis.RedisError as e:
+            logger.warning(f"Could not read Ollama scheduler stats: {e}")
+            return {}
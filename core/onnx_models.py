@@ -0,0 +1,287 @@
+"""
+ONNX Models Module
+ONNX Runtime versions of the reranker (CrossEncoder) and the embedding model
+for CPU-only hosts. Models are exported once (optionally int8-quantized) into
+Config.ONNX_MODEL_DIR and reused by every process; callers fall back to the
+PyTorch models when an export is not possible.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+BACKEND_PYTORCH = 'pytorch'
+BACKEND_ONNX = 'onnx'
+BACKEND_ONNX_INT8 = 'onnx-int8'
+BACKENDS = (BACKEND_PYTORCH, BACKEND_ONNX, BACKEND_ONNX_INT8)
+
+RERANKER_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+DEFAULT_EMBEDDER = 'default'  # Chroma's bundled all-MiniLM-L6-v2
+
+MODEL_FILE = 'model.onnx'
+INT8_MODEL_FILE = 'model.int8.onnx'
+PIPELINE_FILE = 'pipeline.json'
+
+
+class OnnxExportError(RuntimeError):
+    """Raised when a model cannot be exported or quantized here"""
+
+
+def model_dir(kind: str, model_name: str) -> Path:
+    """Cache directory of one exported model ('reranker' or 'embedder')"""
+    return Path(Config.ONNX_MODEL_DIR) / f"{kind}--{model_name.strip('/').replace('/', '--')}"
+
+
+def session_options():
+    """CPU tuning: one intra-op pool per session, no busy-wait spinning between runs"""
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = Config.ONNX_THREADS or os.cpu_count() or 1
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # Concurrent callers (waitress threads) would otherwise spin on idle cores
+    options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    return options
+
+
+def quantize_model(fp32_path: Path, int8_path: Path) -> Path:
+    """Dynamic int8 quantization of the weights (activations stay float)"""
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        raise OnnxExportError(f"int8 quantization needs the onnx package: {e}")
+    tmp_path = int8_path.with_suffix('.tmp')
+    quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+    os.replace(tmp_path, int8_path)
+    return int8_path
+
+
+def _publish(tmp_dir: Path, target: Path) -> None:
+    """Move a finished export into place; another process may have won the race"""
+    try:
+        os.replace(tmp_dir, target)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _export_transformer(module, tokenizer, out_dir: Path, input_names: List[str], output_name: str) -> None:
+    import torch
+    dummy = tokenizer([["query", "passage"]], padding=True, truncation=True, return_tensors='pt')
+    args = tuple(dummy[name] for name in input_names)
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes[output_name] = {0: 'batch'}
+    module.eval()
+    with torch.no_grad():
+        torch.onnx.export(module, args, str(out_dir / MODEL_FILE), input_names=input_names,
+                          output_names=[output_name], dynamic_axes=dynamic_axes, opset_version=14,
+                          dynamo=False)
+    tokenizer.save_pretrained(str(out_dir))
+
+
+def _export_cross_encoder(model_name: str, out_dir: Path) -> None:
+    try:
+        import torch
+        from sentence_transformers import CrossEncoder
+    except ImportError as e:
+        raise OnnxExportError(f"exporting {model_name} needs sentence-transformers: {e}")
+
+    cross_encoder = CrossEncoder(model_name, max_length=512)
+    model, tokenizer = cross_encoder.model, cross_encoder.tokenizer
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids')
+                   if name in tokenizer.model_input_names]
+
+    class Logits(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).logits
+
+    _export_transformer(Logits(), tokenizer, out_dir, input_names, 'logits')
+    # CrossEncoder.predict applies this activation; ms-marco models use identity (raw logits)
+    activation = getattr(cross_encoder, 'activation_fn', None) or getattr(cross_encoder, 'default_activation_function', None)
+    (out_dir / PIPELINE_FILE).write_text(json.dumps({
+        'kind': 'reranker',
+        'source': model_name,
+        'max_length': cross_encoder.max_length or 512,
+        'inputs': input_names,
+        'activation': 'sigmoid' if isinstance(activation, torch.nn.Sigmoid) else 'identity',
+    }))
+
+
+def _export_sentence_transformer(model_name: str, out_dir: Path) -> None:
+    try:
+        import torch
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        raise OnnxExportError(f"exporting {model_name} needs sentence-transformers: {e}")
+
+    encoder = SentenceTransformer(model_name, device='cpu')
+    modules = list(encoder)
+    pooling = modules[1] if len(modules) > 1 else None
+    # sentence-transformers 2.x exposes pooling_mode_mean_tokens, newer releases pooling_mode
+    mean_pooling = pooling is not None and (getattr(pooling, 'pooling_mode_mean_tokens', False)
+                                            or getattr(pooling, 'pooling_mode', None) == 'mean')
+    if not mean_pooling:
+        raise OnnxExportError(f"{model_name} does not use mean pooling; only mean-pooled models are exported")
+    transformer = modules[0].auto_model
+    tokenizer = modules[0].tokenizer
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids')
+                   if name in tokenizer.model_input_names]
+
+    class Hidden(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = transformer
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    _export_transformer(Hidden(), tokenizer, out_dir, input_names, 'last_hidden_state')
+    (out_dir / PIPELINE_FILE).write_text(json.dumps({
+        'kind': 'embedder',
+        'source': model_name,
+        'max_length': encoder.max_seq_length,
+        'inputs': input_names,
+        'normalize': any(type(m).__name__ == 'Normalize' for m in modules),
+    }))
+
+
+def _copy_default_embedder(out_dir: Path) -> None:
+    """Chroma's bundled MiniLM already ships as ONNX - reuse it instead of exporting"""
+    from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+    bundled = ONNXMiniLM_L6_V2()
+    bundled._download_model_if_not_exists()
+    source = Path(bundled.DOWNLOAD_PATH) / bundled.EXTRACTED_FOLDER_NAME
+    for name in (MODEL_FILE, 'tokenizer.json', 'config.json'):
+        shutil.copy2(source / name, out_dir / name)
+    (out_dir / PIPELINE_FILE).write_text(json.dumps({
+        'kind': 'embedder',
+        'source': DEFAULT_EMBEDDER,
+        'max_length': 256,
+        'inputs': ['input_ids', 'attention_mask', 'token_type_ids'],
+        'normalize': True,
+    }))
+
+
+def ensure_model(kind: str, model_name: str, quantized: bool) -> Path:
+    """Path of the (exported, optionally quantized) ONNX file, creating it on first use"""
+    target = model_dir(kind, model_name)
+    if not (target / PIPELINE_FILE).exists():
+        logger.info(f"Exporting {kind} {model_name} to ONNX (one-time)...")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=target.parent, prefix=f".{target.name}-"))
+        try:
+            if kind == 'reranker':
+                _export_cross_encoder(model_name, tmp_dir)
+            elif model_name == DEFAULT_EMBEDDER:
+                _copy_default_embedder(tmp_dir)
+            else:
+                _export_sentence_transformer(model_name, tmp_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        _publish(tmp_dir, target)
+
+    if not quantized:
+        return target / MODEL_FILE
+    int8_path = target / INT8_MODEL_FILE
+    if not int8_path.exists():
+        logger.info(f"Quantizing {kind} {model_name} to int8 (one-time)...")
+        quantize_model(target / MODEL_FILE, int8_path)
+    return int8_path
+
+
+class _OnnxTransformer:
+    """Tokenizer + InferenceSession for one exported model"""
+
+    def __init__(self, kind: str, model_name: str, quantized: bool = True):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.quantized = quantized
+        self.path = ensure_model(kind, model_name, quantized)
+        self.pipeline = json.loads((self.path.parent / PIPELINE_FILE).read_text())
+
+        self.tokenizer = Tokenizer.from_file(str(self.path.parent / 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.pipeline['max_length'])
+        # Pad to the longest input of each batch rather than to max_length
+        pad_id = self.tokenizer.token_to_id('[PAD]') or 0
+        self.tokenizer.enable_padding(pad_id=pad_id, pad_token='[PAD]')
+
+        self.session = ort.InferenceSession(str(self.path), sess_options=session_options(),
+                                            providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _run(self, encoded) -> np.ndarray:
+        feed = {
+            'input_ids': np.array([e.ids for e in encoded], dtype=np.int64),
+            'attention_mask': np.array([e.attention_mask for e in encoded], dtype=np.int64),
+            'token_type_ids': np.array([e.type_ids for e in encoded], dtype=np.int64),
+        }
+        return self.session.run(None, {name: value for name, value in feed.items() if name in self.input_names})[0]
+
+
+class OnnxCrossEncoder(_OnnxTransformer):
+    """Drop-in for sentence_transformers.CrossEncoder.predict"""
+
+    def __init__(self, model_name: str = RERANKER_MODEL, quantized: bool = True):
+        super().__init__('reranker', model_name, quantized)
+
+    def predict(self, pairs: Sequence[Sequence[str]], batch_size: int = 32) -> np.ndarray:
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = [tuple(pair) for pair in pairs[start:start + batch_size]]
+            logits = self._run(self.tokenizer.encode_batch(batch))
+            scores.append(logits[:, 0] if logits.ndim == 2 else logits)
+        result = np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+        if self.pipeline.get('activation') == 'sigmoid':
+            result = 1.0 / (1.0 + np.exp(-result))
+        return result
+
+
+class OnnxEmbeddingFunction(_OnnxTransformer):
+    """Chroma embedding function: mean pooling (+ L2 normalization) over the ONNX encoder"""
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDER, quantized: bool = True):
+        super().__init__('embedder', model_name, quantized)
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(input), 32):
+            encoded = self.tokenizer.encode_batch(list(input[start:start + 32]))
+            hidden = self._run(encoded)
+            mask = np.array([e.attention_mask for e in encoded], dtype=np.float32)[:, :, None]
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.pipeline.get('normalize'):
+                norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+                pooled = pooled / np.where(norms == 0, 1e-12, norms)
+            vectors.append(pooled.astype(np.float32))
+        return np.concatenate(vectors).tolist() if vectors else []
+
+
+def load_reranker(model_name: str = RERANKER_MODEL, backend: str = None):
+    """CrossEncoder for the configured backend, falling back to PyTorch"""
+    backend = backend or Config.INFERENCE_BACKEND
+    if backend in (BACKEND_ONNX, BACKEND_ONNX_INT8):
+        try:
+            reranker = OnnxCrossEncoder(model_name, quantized=backend == BACKEND_ONNX_INT8)
+            logger.info(f"Reranker running on ONNX Runtime ({backend}, {reranker.path.name})")
+            return reranker
+        except Exception as e:
+            logger.warning(f"ONNX reranker unavailable ({e}); falling back to PyTorch")
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name, max_length=512)
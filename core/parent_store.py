@@ -0,0 +1,115 @@
+"""
+Parent Store Module
+Parent sections for small-to-big retrieval: small child passages are
+embedded and searched, and the top hits are expanded to their parent text
+"""
+
+import logging
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from models.document import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+
+class ParentStore:
+    """Maps parent ids to section text, keyed by file for deletes and reassembly"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for database connections"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS parents (
+                    parent_id TEXT PRIMARY KEY,
+                    file_hash TEXT,
+                    filepath TEXT NOT NULL,
+                    parent_index INTEGER NOT NULL,
+                    text TEXT NOT NULL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_parents_path ON parents (filepath, parent_index)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_parents_hash ON parents (file_hash)")
+            conn.commit()
+
+    def add_chunks(self, chunks: List[DocumentChunk]) -> int:
+        """Store the parent section of each child chunk (once per parent)"""
+        rows = {}
+        for chunk in chunks:
+            if chunk.parent_id and chunk.parent_id not in rows:
+                rows[chunk.parent_id] = (chunk.parent_id, chunk.document_hash, chunk.filepath,
+                                         chunk.parent_index, chunk.parent_text)
+        if not rows:
+            return 0
+        with self._get_connection() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO parents (parent_id, file_hash, filepath, parent_index, text)
+                VALUES (?, ?, ?, ?, ?)
+            ''', list(rows.values()))
+            conn.commit()
+        return len(rows)
+
+    def get_many(self, parent_ids: List[str]) -> Dict[str, str]:
+        """Parent text by id"""
+        if not parent_ids:
+            return {}
+        placeholders = ', '.join('?' for _ in parent_ids)
+        with self._get_connection() as conn:
+            return dict(conn.execute(
+                f"SELECT parent_id, text FROM parents WHERE parent_id IN ({placeholders})",
+                list(parent_ids)
+            ))
+
+    def iter_file(self, filepath: str) -> Iterator[str]:
+        """Parent sections of a file in document order"""
+        with self._get_connection() as conn:
+            for (text,) in conn.execute(
+                "SELECT text FROM parents WHERE filepath = ? ORDER BY parent_index", (filepath,)
+            ):
+                yield text
+
+    def has_file(self, filepath: str) -> bool:
+        with self._get_connection() as conn:
+            return conn.execute("SELECT 1 FROM parents WHERE filepath = ? LIMIT 1", (filepath,)).fetchone() is not None
+
+    def _delete(self, condition: str, params: list) -> int:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute(f"DELETE FROM parents WHERE {condition}", params)
+                conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Parent store delete failed: {e}")
+            return 0
+
+    def delete_by_hash(self, file_hash: str) -> int:
+        return self._delete("file_hash = ?", [file_hash])
+
+    def delete_by_filepath(self, filepath: str) -> int:
+        return self._delete("filepath = ?", [filepath])
+
+    def delete_by_ids(self, parent_ids: List[str]) -> int:
+        if not parent_ids:
+            return 0
+        placeholders = ', '.join('?' for _ in parent_ids)
+        return self._delete(f"parent_id IN ({placeholders})", list(parent_ids))
+
+    def count(self) -> int:
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM parents").fetchone()[0]
@@ -3,8 +3,10 @@ Role-Based File Access Control (RBAC)
 Maps roles to allowed file domains and categories
 """
 
+import copy
 import logging
 from functools import lru_cache
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -143,8 +145,89 @@ def check_file_access(user_role: str, file_domain: str, file_category: str = Non
     return True
 
 
+# Matches no chunk: used for unknown roles or roles whose rules allow nothing
+ROLE_FILTER_DENY_ALL = {'domain': '__rbac_deny_all__'}
+
+
+@lru_cache(maxsize=32)
+def _compile_role_filter(user_role: str) -> Optional[dict]:
+    """Compile a role's file permissions into a ChromaDB where clause (cached per role)"""
+    role_config = get_role_file_permissions(user_role)
+    
+    if not role_config:
+        return ROLE_FILTER_DENY_ALL
+    
+    # Admin wildcard - no filter needed
+    if role_config.get('allowed_domains') == '*':
+        return None
+    
+    allowed_domains = list(role_config.get('allowed_domains') or [])
+    if not allowed_domains:
+        return ROLE_FILTER_DENY_ALL
+    
+    clauses = [{'domain': {'$in': allowed_domains}}]
+    
+    denied_categories = list(role_config.get('denied_categories') or [])
+    allowed_categories = role_config.get('allowed_categories')
+    
+    if allowed_categories and allowed_categories != '*':
+        # An allow-list subsumes the deny-list: keep only categories that are not denied
+        categories = [c for c in allowed_categories if c not in denied_categories]
+        if not categories:
+            return ROLE_FILTER_DENY_ALL
+        clauses.append({'category': {'$in': categories}})
+    elif denied_categories:
+        clauses.append({'category': {'$nin': denied_categories}})
+    
+    if len(clauses) == 1:
+        return clauses[0]
+    return {'$and': clauses}
+
+
+def build_role_filter(user_role: str) -> Optional[dict]:
+    """
+    Build a ChromaDB `where` clause equivalent to check_file_access for a role
+    
+    Lets the vector store return only permitted chunks instead of over-fetching
+    and filtering each hit in Python.
+    
+    Args:
+        user_role: User's role name (e.g., 'Nurse', 'HR')
+        
+    Returns:
+        Where clause dict, or None if the role can read every file
+    """
+    role_filter = _compile_role_filter(user_role)
+    # Callers may combine the clause with other filters - never hand out the cached dict
+    return copy.deepcopy(role_filter)
+
+
+def clear_permission_cache():
+    """Drop cached role permissions and compiled filters (call after role changes)"""
+    get_role_file_permissions.cache_clear()
+    _compile_role_filter.cache_clear()
+
+
 def get_role_description(user_role: str) -> str:
     """Get human-readable description of role's file access"""
     if user_role in ROLE_FILE_ACCESS:
         return ROLE_FILE_ACCESS[user_role].get('description', 'No description')
     return 'Unknown role'
+
+
+def get_role_allowed_domains(user_role: str) -> Optional[List[str]]:
+    """
+    Domains a role may read, for routing queries to domain shards
+    
+    Args:
+        user_role: User's role name
+        
+    Returns:
+        List of domain names ([] for unknown roles), or None if the role can read every domain
+    """
+    role_config = get_role_file_permissions(user_role)
+    if not role_config:
+        return []
+    if role_config.get('allowed_domains') == '*':
+        return None
+    return list(role_config.get('allowed_domains') or [])
@@ -4,6 +4,7 @@ from typing import List, Optional
 from datetime import datetime
 import logging
 
+from config import Config
 from models.document import Document, DocumentChunk
 from extractors import (
     PDFExtractor, ImageExtractor, AudioExtractor,
@@ -117,23 +118,46 @@ class FileProcessor:
             processed_at=datetime.now()
         )
     
-    def create_chunks(self, document: Document, chunk_size: int = 1200) -> List[DocumentChunk]:
-        """Create chunks from document - optimized size for accuracy and retrieval"""
-        text_chunks = TextUtils.chunk_text(document.text_content, chunk_size)
+    def create_chunks(self, document: Document, chunk_size: int = 1200,
+                      parent_retrieval: bool = None) -> List[DocumentChunk]:
+        """Create chunks from document - optimized size for accuracy and retrieval
+        
+        With parent retrieval enabled, each chunk_size section becomes a parent
+        and is split again into small child passages. Only the children are
+        embedded and searched; each carries its parent's id and text so the
+        final top-k can be expanded to the full section.
+        """
+        if parent_retrieval is None:
+            parent_retrieval = Config.ENABLE_PARENT_RETRIEVAL
+        sections = TextUtils.chunk_text(document.text_content, chunk_size, overlap=Config.CHUNK_OVERLAP)
         
         chunks = []
-        for i, text in enumerate(text_chunks):
-            chunk = DocumentChunk(
-                chunk_id=f"{document.file_hash}_{i}",
-                document_hash=document.file_hash,
-                text=text,
-                chunk_index=i,
-                filename=document.filename,
-                domain=document.domain,  # Pass domain to chunk
-                category=document.category,
-                filepath=str(document.filepath)
-            )
-            chunks.append(chunk)
+        for parent_index, section in enumerate(sections):
+            if parent_retrieval and len(section) > Config.CHILD_CHUNK_SIZE:
+                passages = TextUtils.chunk_text(section, Config.CHILD_CHUNK_SIZE, overlap=Config.CHILD_CHUNK_OVERLAP)
+            else:
+                passages = [section]
+            
+            for text in passages:
+                i = len(chunks)
+                chunk = DocumentChunk(
+                    chunk_id=f"{document.file_hash}_{i}",
+                    document_hash=document.file_hash,
+                    text=text,
+                    chunk_index=i,
+                    filename=document.filename,
+                    domain=document.domain,  # Pass domain to chunk
+                    category=document.category,
+                    filepath=str(document.filepath),
+                    file_ext=document.file_ext,
+                    date_folder=document.date_folder,
+                    uploaded_by=document.uploaded_by
+                )
+                if parent_retrieval:
+                    chunk.parent_id = f"{document.file_hash}_p{parent_index}"
+                    chunk.parent_index = parent_index
+                    chunk.parent_text = section
+                chunks.append(chunk)
         
         return chunks
 
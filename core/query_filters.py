@@ -0,0 +1,124 @@
+"""
+Query Filters Module
+Validates user-supplied metadata filters (domain, category, extension,
+date range, uploader) and compiles them into ChromaDB where clauses
+"""
+
+import json
+import re
+from typing import Dict, List, Optional
+
+# Request keys accepted as filters
+FILTER_FIELDS = ('domain', 'category', 'file_ext', 'uploaded_by', 'date_from', 'date_to')
+
+MAX_FILTER_VALUES = 20
+MAX_FILTER_LENGTH = 100
+
+_MONTH_PATTERN = re.compile(r'^(\d{4})-(0[1-9]|1[0-2])$')
+_EXT_PATTERN = re.compile(r'^[a-z0-9]{1,10}$')
+
+
+class QueryFilterError(ValueError):
+    """Raised for malformed filter parameters (reported to the client as 400)"""
+
+
+def month_number(date_folder: str) -> Optional[int]:
+    """'2024-03' -> 202403 (numeric so Chroma can range-compare it)"""
+    match = _MONTH_PATTERN.match(date_folder or '')
+    if not match:
+        return None
+    return int(match.group(1)) * 100 + int(match.group(2))
+
+
+def _string_values(field: str, value) -> List[str]:
+    values = value if isinstance(value, list) else [value]
+    if not values or len(values) > MAX_FILTER_VALUES:
+        raise QueryFilterError(f"'{field}' takes 1-{MAX_FILTER_VALUES} values")
+    cleaned = []
+    for item in values:
+        if not isinstance(item, str) or not item.strip() or len(item) > MAX_FILTER_LENGTH:
+            raise QueryFilterError(f"Invalid value for '{field}': {item!r}")
+        cleaned.append(item.strip())
+    return cleaned
+
+
+def parse_query_filters(raw: Optional[dict]) -> Dict[str, object]:
+    """
+    Validate and normalize filter parameters from a request
+
+    Args:
+        raw: Dict with any of domain, category, file_ext, uploaded_by (string
+            or list of strings) and date_from / date_to ('YYYY-MM', inclusive)
+
+    Returns:
+        Normalized filters (empty dict if none were given)
+
+    Raises:
+        QueryFilterError: On unknown keys or malformed values
+    """
+    if not raw:
+        return {}
+    if not isinstance(raw, dict):
+        raise QueryFilterError("'filters' must be an object")
+
+    unknown = set(raw) - set(FILTER_FIELDS)
+    if unknown:
+        raise QueryFilterError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+
+    filters = {}
+    for field in ('domain', 'category', 'uploaded_by'):
+        if raw.get(field) not in (None, '', []):
+            filters[field] = _string_values(field, raw[field])
+
+    if raw.get('file_ext') not in (None, '', []):
+        extensions = [ext.lower().lstrip('.') for ext in _string_values('file_ext', raw['file_ext'])]
+        for ext in extensions:
+            if not _EXT_PATTERN.match(ext):
+                raise QueryFilterError(f"Invalid file extension: {ext!r}")
+        filters['file_ext'] = extensions
+
+    for field in ('date_from', 'date_to'):
+        if raw.get(field) not in (None, ''):
+            if not isinstance(raw[field], str) or month_number(raw[field]) is None:
+                raise QueryFilterError(f"'{field}' must be YYYY-MM")
+            filters[field] = raw[field]
+
+    if 'date_from' in filters and 'date_to' in filters and filters['date_from'] > filters['date_to']:
+        raise QueryFilterError("'date_from' is after 'date_to'")
+
+    return filters
+
+
+def build_filter_clause(filters: Dict[str, object]) -> Optional[dict]:
+    """Compile normalized filters into a where clause (None if there are none)"""
+    clauses = []
+    for field in ('domain', 'category', 'file_ext', 'uploaded_by'):
+        if filters.get(field):
+            clauses.append({field: {'$in': list(filters[field])}})
+    if filters.get('date_from'):
+        clauses.append({'date_month': {'$gte': month_number(filters['date_from'])}})
+    if filters.get('date_to'):
+        clauses.append({'date_month': {'$lte': month_number(filters['date_to'])}})
+    return combine_where(*clauses)
+
+
+def combine_where(*clauses: Optional[dict]) -> Optional[dict]:
+    """AND together where clauses, skipping None and flattening nested $and"""
+    flat = []
+    for clause in clauses:
+        if not clause:
+            continue
+        if set(clause) == {'$and'}:
+            flat.extend(clause['$and'])
+        else:
+            flat.append(clause)
+    if not flat:
+        return None
+    if len(flat) == 1:
+        return flat[0]
+    return {'$and': flat}
+
+
+def filters_cache_key(filters: Dict[str, object]) -> str:
+    """Stable string identifying a filter set (for answer caching)"""
+    return json.dumps(filters, sort_keys=True) if filters else ''
@@ -0,0 +1,128 @@
+"""
+Rerank Batcher Module
+Shared CrossEncoder executor for concurrent /chat requests. (query, chunk)
+pairs submitted from different request threads within a few milliseconds
+are scored in one batched predict; each caller gets its own scores back
+through a future.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Sequence
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    __slots__ = ('pairs', 'future')
+
+    def __init__(self, pairs: List[Sequence[str]]):
+        self.pairs = pairs
+        self.future = Future()
+
+
+class RerankBatcher:
+    """Dynamic micro-batching in front of a model with predict(pairs) -> scores
+
+    The first request opens a batch; the batch runs once max_wait_ms has
+    passed since then or max_batch_pairs pairs are pending, whichever comes
+    first. Requests are never split across batches - one that would overflow
+    the current batch starts the next. The model is only ever called from
+    the batcher thread.
+    """
+
+    def __init__(self, model, max_batch_pairs: int = None, max_wait_ms: float = None):
+        self.model = model
+        self.max_batch_pairs = max_batch_pairs or Config.RERANK_BATCH_MAX_PAIRS
+        self.max_wait = (Config.RERANK_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+        self._requests = queue.Queue()
+        self._carry: Optional[_Request] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'batches': 0, 'requests': 0, 'pairs': 0, 'predict_seconds': 0.0}
+
+    def submit(self, pairs: List[Sequence[str]]) -> Future:
+        """Queue pairs for the next batch; the future resolves to a list of floats"""
+        request = _Request(list(pairs))
+        if not request.pairs:
+            request.future.set_result([])
+            return request.future
+        self._ensure_started()
+        self._requests.put(request)
+        return request.future
+
+    def predict(self, pairs: List[Sequence[str]], timeout: float = None) -> List[float]:
+        """Blocking convenience wrapper with the same shape as CrossEncoder.predict"""
+        return self.submit(pairs).result(timeout=timeout)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_batch_requests'] = round(stats['requests'] / stats['batches'], 2) if stats['batches'] else 0
+        stats['avg_batch_pairs'] = round(stats['pairs'] / stats['batches'], 1) if stats['batches'] else 0
+        stats['predict_seconds'] = round(stats['predict_seconds'], 3)
+        return stats
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rerank-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                self._score(batch)
+            except Exception as e:
+                logger.error(f"Rerank batch loop error: {e}", exc_info=True)
+
+    def _collect(self) -> List[_Request]:
+        first = self._carry or self._requests.get()
+        self._carry = None
+        batch, n_pairs = [first], len(first.pairs)
+        deadline = time.time() + self.max_wait
+        while n_pairs < self.max_batch_pairs:
+            remaining = deadline - time.time()
+            try:
+                request = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if n_pairs + len(request.pairs) > self.max_batch_pairs:
+                self._carry = request
+                break
+            batch.append(request)
+            n_pairs += len(request.pairs)
+        return batch
+
+    def _score(self, batch: List[_Request]) -> None:
+        pairs = [pair for request in batch for pair in request.pairs]
+        start = time.time()
+        try:
+            scores = [float(s) for s in self.model.predict(pairs)]
+        except Exception as e:
+            logger.error(f"Batched rerank of {len(pairs)} pairs failed: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        elapsed = time.time() - start
+
+        offset = 0
+        for request in batch:
+            request.future.set_result(scores[offset:offset + len(request.pairs)])
+            offset += len(request.pairs)
+
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['requests'] += len(batch)
+            self._stats['pairs'] += len(pairs)
+            self._stats['predict_seconds'] += elapsed
+        logger.debug(f"Reranked {len(pairs)} pairs for {len(batch)} requests in {elapsed * 1000:.0f}ms")
@@ -0,0 +1,111 @@
+"""
+Rerank Cache Module
+Bounded LRU cache of CrossEncoder scores keyed by the normalized query and
+chunk id, so follow-up and repeated questions only rerank new chunks
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+def query_fingerprint(query: str) -> str:
+    """Stable short hash of the normalized query"""
+    return hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()[:16]
+
+
+def text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class RerankScoreCache:
+    """Thread-safe LRU of (query fingerprint, chunk id) -> score
+
+    Each entry also remembers a digest of the chunk text it was scored
+    against. A chunk re-ingested with different text (by any process) no
+    longer matches and is rescored; deletes made by this process drop their
+    entries right away through invalidate_chunks/invalidate_document.
+    """
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._by_chunk: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, fingerprint: str, chunks: List[dict]) -> Tuple[List[Optional[float]], List[str]]:
+        """Cached score (or None) per chunk, plus the text digests for storing misses"""
+        digests = [text_digest(chunk['text']) for chunk in chunks]
+        scores = []
+        with self._lock:
+            for chunk, digest in zip(chunks, digests):
+                key = (fingerprint, chunk['chunk_id'])
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == digest:
+                    self._entries.move_to_end(key)
+                    scores.append(entry[1])
+                    self.hits += 1
+                else:
+                    scores.append(None)
+                    self.misses += 1
+        return scores, digests
+
+    def store(self, fingerprint: str, chunk_ids: Iterable[str], digests: Iterable[str],
+              scores: Iterable[float]) -> None:
+        with self._lock:
+            for chunk_id, digest, score in zip(chunk_ids, digests, scores):
+                key = (fingerprint, chunk_id)
+                self._entries[key] = (digest, float(score))
+                self._entries.move_to_end(key)
+                self._by_chunk.setdefault(chunk_id, set()).add(fingerprint)
+            while len(self._entries) > self.max_entries:
+                (old_fingerprint, old_chunk_id), _ = self._entries.popitem(last=False)
+                self._forget(old_chunk_id, old_fingerprint)
+
+    def _forget(self, chunk_id: str, fingerprint: str) -> None:
+        fingerprints = self._by_chunk.get(chunk_id)
+        if fingerprints is not None:
+            fingerprints.discard(fingerprint)
+            if not fingerprints:
+                del self._by_chunk[chunk_id]
+
+    def invalidate_chunks(self, chunk_ids: Iterable[str]) -> int:
+        """Drop every cached score for these chunks; returns entries removed"""
+        removed = 0
+        with self._lock:
+            for chunk_id in chunk_ids:
+                for fingerprint in self._by_chunk.pop(chunk_id, ()):
+                    if self._entries.pop((fingerprint, chunk_id), None) is not None:
+                        removed += 1
+        return removed
+
+    def invalidate_document(self, file_hash: str) -> int:
+        """Drop scores for every chunk of a document (chunk ids are '<hash>_<n>')"""
+        prefix = f"{file_hash}_"
+        with self._lock:
+            chunk_ids = [chunk_id for chunk_id in self._by_chunk if chunk_id.startswith(prefix)]
+        return self.invalidate_chunks(chunk_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_chunk.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,123 @@
+"""
+Rerank Policy Module
+Decides per request how many retrieved candidates go to the CrossEncoder:
+none when the top vector hit clearly stands out, the usual depth otherwise,
+and a deeper pool when many candidates are near-tied on distance.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SKIP = 'skip'
+RERANK = 'rerank'
+EXPAND = 'expand'
+
+
+@dataclass
+class RerankDecision:
+    """Outcome of AdaptiveRerankPolicy.decide for one request"""
+    action: str  # SKIP, RERANK or EXPAND
+    depth: int  # Candidates to rerank (0 when skipped)
+    candidates: int  # Candidates retrieved
+    reason: str
+    top_distance: float = 0.0
+    margin: float = 0.0  # Runner-up distance minus top distance
+    tied: int = 0  # Candidates within the ambiguity band of the top hit
+
+
+class AdaptiveRerankPolicy:
+    """Rerank depth from the distance distribution of the retrieved candidates
+
+    Candidates arrive in retrieval order (vector, fused with BM25 and
+    MMR-diversified). Reranking is skipped only when the first candidate is
+    also the closest one, is close in absolute terms and leads the runner-up
+    by a clear margin. Otherwise the first `depth` candidates are reranked,
+    where depth grows with the number of candidates tied with the top hit.
+
+    Each decision is logged with its rerank time and its estimated latency
+    effect against the fixed depth (min_depth pairs every request): negative
+    for skips, positive for expansions. Per-action totals are kept for
+    /status so the thresholds can be tuned.
+    """
+
+    def __init__(self, min_depth: int = None, max_depth: int = None, skip_margin: float = None,
+                 skip_max_distance: float = None, ambiguity_band: float = None):
+        self.min_depth = min_depth or Config.RERANK_CANDIDATES
+        self.max_depth = max(max_depth or Config.RERANK_MAX_DEPTH, self.min_depth)
+        self.skip_margin = Config.RERANK_SKIP_MARGIN if skip_margin is None else skip_margin
+        self.skip_max_distance = Config.RERANK_SKIP_MAX_DISTANCE if skip_max_distance is None else skip_max_distance
+        self.ambiguity_band = Config.RERANK_AMBIGUITY_BAND if ambiguity_band is None else ambiguity_band
+
+        self._lock = threading.Lock()
+        self._actions = {action: {'requests': 0, 'pairs': 0, 'rerank_ms': 0.0} for action in (SKIP, RERANK, EXPAND)}
+        self._pair_ms = None  # Moving average of CrossEncoder time per scored pair
+        self._delta_ms = 0.0
+
+    def decide(self, chunks: List[dict], top_k: int = 5) -> RerankDecision:
+        candidates = len(chunks)
+        if candidates <= 1:
+            return RerankDecision(SKIP, 0, candidates, 'single candidate')
+
+        distances = [chunk.get('distance', 2.0) for chunk in chunks]
+        ordered = sorted(distances)
+        best = ordered[0]
+        margin = ordered[1] - best
+        tied = sum(1 for distance in distances if distance - best <= self.ambiguity_band)
+
+        if distances[0] == best and best <= self.skip_max_distance and margin >= self.skip_margin:
+            return RerankDecision(SKIP, 0, candidates, 'clear top hit', best, margin, tied)
+
+        # Enough depth to order every near-tied candidate and still fill top_k behind them
+        depth = min(candidates, self.max_depth, max(self.min_depth, tied + top_k))
+        if depth > min(candidates, self.min_depth):
+            return RerankDecision(EXPAND, depth, candidates, f"{tied} candidates within "
+                                  f"{self.ambiguity_band} of the top hit", best, margin, tied)
+        return RerankDecision(RERANK, depth, candidates, 'default depth', best, margin, tied)
+
+    def record(self, decision: RerankDecision, rerank_ms: float, scored_pairs: int) -> None:
+        """Log one decision with its rerank time (scored_pairs excludes cache hits)"""
+        with self._lock:
+            if scored_pairs:
+                per_pair = rerank_ms / scored_pairs
+                self._pair_ms = per_pair if self._pair_ms is None else 0.9 * self._pair_ms + 0.1 * per_pair
+            fixed_depth = min(decision.candidates, self.min_depth)
+            delta_ms = (decision.depth - fixed_depth) * (self._pair_ms or 0.0)
+            self._delta_ms += delta_ms
+            totals = self._actions[decision.action]
+            totals['requests'] += 1
+            totals['pairs'] += decision.depth
+            totals['rerank_ms'] += rerank_ms
+        logger.info(f"Rerank policy: {decision.action} depth={decision.depth}/{decision.candidates} "
+                    f"({decision.reason}; top={decision.top_distance:.3f} margin={decision.margin:.3f} "
+                    f"tied={decision.tied}) rerank={rerank_ms:.1f}ms vs_fixed_depth={delta_ms:+.1f}ms")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            requests = sum(totals['requests'] for totals in self._actions.values())
+            return {
+                "requests": requests,
+                "actions": {
+                    action: {
+                        "requests": totals['requests'],
+                        "share": round(totals['requests'] / requests, 4) if requests else 0.0,
+                        "avg_depth": round(totals['pairs'] / totals['requests'], 2) if totals['requests'] else 0.0,
+                        "avg_rerank_ms": round(totals['rerank_ms'] / totals['requests'], 2) if totals['requests'] else 0.0
+                    }
+                    for action, totals in self._actions.items()
+                },
+                "ms_per_pair": round(self._pair_ms, 3) if self._pair_ms is not None else None,
+                "estimated_delta_ms": round(self._delta_ms, 1),  # vs always reranking min_depth
+                "thresholds": {
+                    "min_depth": self.min_depth,
+                    "max_depth": self.max_depth,
+                    "skip_margin": self.skip_margin,
+                    "skip_max_distance": self.skip_max_distance,
+                    "ambiguity_band": self.ambiguity_band
+                }
+            }
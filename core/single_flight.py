@@ -0,0 +1,200 @@
+"""
+Single Flight Module
+Coalesces identical in-flight /chat requests: the first request for a
+(normalized query, role, corpus version, filter scope) runs retrieval,
+reranking and generation, concurrent duplicates wait for its answer -
+across threads through an in-process table, across replicas through a
+Redis lock and a short-lived result key.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import redis
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def flight_key(query: str, role: Optional[str], corpus_version: Optional[int], scope: str = '') -> str:
+    normalized = ' '.join(query.lower().split())
+    raw = json.dumps([normalized, role or '', corpus_version, scope or ''])
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class _Call:
+    """One computation in this process that duplicates can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[dict] = None
+        self.started = time.time()
+
+
+class Flight:
+    """Handle of the request that computes the answer
+
+    complete() hands the result to every waiting duplicate; fail() lets
+    them compute on their own. Both are idempotent, and a detached flight
+    (single-flight disabled, or a duplicate whose leader failed) does nothing.
+    """
+
+    def __init__(self, group: 'SingleFlight' = None, key: str = None, call: _Call = None, token: str = None):
+        self.group = group
+        self.key = key
+        self.call = call
+        self.token = token
+        self.finished = group is None
+
+    def complete(self, result: dict) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        self.group._finish(self.key, self.call, self.token, result)
+
+    def fail(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        self.group._finish(self.key, self.call, self.token, None)
+
+    def events(self, events: Iterable[Tuple[str, dict]]) -> Iterator[Tuple[str, dict]]:
+        """Pass streamed chat events through, sharing the final answer as soon as it is known"""
+        try:
+            for event, data in events:
+                if event == 'done':
+                    self.complete(data)
+                yield event, data
+        finally:
+            self.fail()  # Client went away or generation failed before 'done'
+
+
+class SingleFlight:
+    """In-process plus cross-replica request coalescing
+
+    Duplicates wait up to wait_timeout for the leader; if it fails or takes
+    longer they compute the answer themselves, so coalescing never turns a
+    request into an error. Without Redis only same-process duplicates are
+    coalesced.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, enabled: bool = None, wait_timeout: float = None,
+                 lock_ttl: float = None, result_ttl: float = None, poll_interval: float = 0.05,
+                 prefix: str = None):
+        self.redis = redis_client
+        self.enabled = Config.ENABLE_SINGLE_FLIGHT if enabled is None else enabled
+        self.wait_timeout = Config.SINGLE_FLIGHT_WAIT if wait_timeout is None else wait_timeout
+        self.lock_ttl = lock_ttl or Config.SINGLE_FLIGHT_LOCK_TTL
+        self.result_ttl = result_ttl or Config.SINGLE_FLIGHT_RESULT_TTL
+        self.poll_interval = poll_interval
+        self.prefix = prefix or Config.REDIS_SINGLE_FLIGHT
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._counts = {'leaders': 0, 'shared_local': 0, 'shared_remote': 0, 'fallbacks': 0}
+
+    def join(self, key: str) -> Tuple[Flight, Optional[dict]]:
+        """(flight, None): compute the answer and complete the flight; (detached flight, answer): reuse it"""
+        if not self.enabled:
+            return Flight(), None
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None or time.time() - call.started > self.wait_timeout  # Stale: never finished
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            if call.done.wait(self.wait_timeout) and call.result is not None:
+                self._count('shared_local')
+                return Flight(), dict(call.result)
+            self._count('fallbacks')
+            return Flight(), None
+
+        token = self._acquire_lock(key)
+        if token is None:
+            # Another replica is computing it
+            result = self._wait_remote(key)
+            if result is not None:
+                self._count('shared_remote')
+                self._finish(key, call, None, result)
+                return Flight(), dict(result)
+            self._count('fallbacks')
+            return Flight(self, key, call), None  # Local duplicates still wait for us
+        self._count('leaders')
+        return Flight(self, key, call, token or None), None
+
+    def _acquire_lock(self, key: str) -> Optional[str]:
+        """Lock token if this replica leads, '' without Redis, None if another replica holds the lock"""
+        if self.redis is None:
+            return ''
+        token = uuid.uuid4().hex
+        try:
+            if self.redis.set(f"{self.prefix}:lock:{key}", token, nx=True, px=int(self.lock_ttl * 1000)):
+                return token
+            return None
+        except redis.RedisError as e:
+            logger.warning(f"Single-flight lock unavailable, coalescing within this process only: {e}")
+            return ''
+
+    def _wait_remote(self, key: str) -> Optional[dict]:
+        """Answer published by the replica holding the lock (None if it failed or timed out)"""
+        deadline = time.time() + self.wait_timeout
+        try:
+            while time.time() < deadline:
+                data = self.redis.get(f"{self.prefix}:result:{key}")
+                if data:
+                    return json.loads(data)
+                if not self.redis.exists(f"{self.prefix}:lock:{key}"):
+                    # Released without a result, unless it was published in between
+                    data = self.redis.get(f"{self.prefix}:result:{key}")
+                    return json.loads(data) if data else None
+                time.sleep(self.poll_interval)
+        except redis.RedisError as e:
+            logger.warning(f"Could not wait for coalesced chat answer: {e}")
+        return None
+
+    def _finish(self, key: str, call: Optional[_Call], token: Optional[str], result: Optional[dict]) -> None:
+        if token:
+            self._publish(key, token, result)
+        if call is not None:
+            call.result = result
+            call.done.set()
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+
+    def _publish(self, key: str, token: str, result: Optional[dict]) -> None:
+        """Store the answer for other replicas and release our lock (only if we still own it)"""
+        lock_key = f"{self.prefix}:lock:{key}"
+
+        def release(pipe) -> None:
+            owned = pipe.get(lock_key) == token
+            pipe.multi()
+            if result is not None:
+                pipe.set(f"{self.prefix}:result:{key}", json.dumps(result, default=str), ex=int(self.result_ttl))
+            if owned:
+                pipe.delete(lock_key)
+
+        try:
+            self.redis.transaction(release, lock_key)
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish coalesced chat answer (lock expires on its own): {e}")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            shared = self._counts['shared_local'] + self._counts['shared_remote']
+            total = shared + self._counts['leaders'] + self._counts['fallbacks']
+            return {
+                'enabled': self.enabled,
+                'in_flight': len(self._calls),
+                **self._counts,
+                'coalesced_rate': round(shared / total, 4) if total else 0.0
+            }
@@ -0,0 +1,603 @@
+"""
+Vector Store Module
+Backend interface for chunk storage and nearest-neighbour search, with a
+ChromaDB implementation and an in-process NumPy brute-force implementation
+"""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+from core.metadata_filter import where_to_sql
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GET_INCLUDE = ['metadatas', 'documents']
+DEFAULT_QUERY_INCLUDE = ['metadatas', 'documents', 'distances']
+
+
+class VectorCollection(ABC):
+    """Subset of the ChromaDB collection API used by DatabaseManager
+
+    Embeddings are always supplied by the caller. Distances are cosine
+    distances (1 - cosine similarity) and results use Chroma's dict layout.
+    """
+
+    name: str
+
+    @abstractmethod
+    def add(self, ids: List[str], embeddings: list, documents: List[str] = None,
+            metadatas: List[dict] = None) -> None:
+        """Store chunks"""
+
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings: list, documents: List[str] = None,
+               metadatas: List[dict] = None) -> None:
+        """Store chunks, replacing any with the same id"""
+
+    @abstractmethod
+    def query(self, query_embeddings: list, n_results: int = 10, where: Optional[dict] = None,
+              include: List[str] = None) -> dict:
+        """Nearest chunks per query vector, closest first"""
+
+    @abstractmethod
+    def get(self, ids: List[str] = None, where: Optional[dict] = None, limit: int = None,
+            offset: int = None, include: List[str] = None) -> dict:
+        """Chunks by id and/or metadata filter"""
+
+    @abstractmethod
+    def delete(self, ids: List[str] = None, where: Optional[dict] = None) -> None:
+        """Remove chunks by id and/or metadata filter"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored chunks"""
+
+
+class VectorBackend(ABC):
+    """Creates, lists and drops named collections"""
+
+    @abstractmethod
+    def get_or_create_collection(self, name: str) -> VectorCollection:
+        """Open a collection, creating it if needed"""
+
+    @abstractmethod
+    def list_collection_names(self) -> List[str]:
+        """Names of all existing collections"""
+
+    @abstractmethod
+    def delete_collection(self, name: str) -> None:
+        """Drop a collection and its data"""
+
+    def total_count(self) -> int:
+        """Chunks across all collections"""
+        return sum(self.get_or_create_collection(name).count() for name in self.list_collection_names())
+
+
+class ChromaBackend(VectorBackend):
+    """ChromaDB PersistentClient (HNSW index, scales past what exact search can)"""
+
+    def __init__(self, db_path: Path):
+        import chromadb
+        from chromadb.config import Settings
+        from chromadb.api.models.Collection import Collection
+
+        # Chroma collections already implement the interface
+        VectorCollection.register(Collection)
+
+        self.client = chromadb.PersistentClient(
+            path=str(db_path),
+            settings=Settings(anonymized_telemetry=False)
+        )
+
+    def get_or_create_collection(self, name: str) -> VectorCollection:
+        return self.client.get_or_create_collection(
+            name=name,
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=None
+        )
+
+    def list_collection_names(self) -> List[str]:
+        return [collection.name for collection in self.client.list_collections()]
+
+    def delete_collection(self, name: str) -> None:
+        self.client.delete_collection(name)
+
+
+class _MatrixFile:
+    """Append-only row matrix in a raw file
+
+    Search maps the file read-only, so every process shares the same page
+    cache pages; writes go through a short-lived writable view of the rows.
+    """
+
+    def __init__(self, path: Path, dtype: np.dtype, width: int):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.row_bytes = self.dtype.itemsize * width
+        self._view = None
+        self._mapped = None  # (file_id, size) of the current mapping
+
+    def size(self) -> int:
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def mapped(self, file_id: str) -> Optional[np.memmap]:
+        """Read-only view, remapped if the file was grown or rewritten"""
+        size = self.size()
+        if self._mapped != (file_id, size):
+            rows = size // self.row_bytes
+            self._view = np.memmap(self.path, dtype=self.dtype, mode='r', shape=(rows, self.width)) if rows else None
+            self._mapped = (file_id, size)
+        return self._view
+
+    def ensure_capacity(self, rows: int, growth_rows: int) -> None:
+        capacity = self.size() // self.row_bytes
+        if rows > capacity:
+            with open(self.path, 'ab') as f:
+                f.truncate(max(rows, capacity * 2, growth_rows) * self.row_bytes)
+
+    def write(self, start: int, values: np.ndarray) -> None:
+        view = np.memmap(self.path, dtype=self.dtype, mode='r+', offset=start * self.row_bytes,
+                         shape=(len(values), self.width))
+        view[:] = values.reshape(len(values), self.width)
+        view.flush()
+        del view
+
+    def rewrite(self, values: np.ndarray) -> None:
+        """Replace the file with exactly these rows"""
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+        os.replace(tmp_path, self.path)
+        self._view, self._mapped = None, None
+
+
+class NumpyCollection(VectorCollection):
+    """Exact cosine search over memory-mapped matrices
+
+    Vectors are L2-normalized and appended to a raw scan matrix stored as
+    float32, float16 or int8 (one float32 scale per row). Quantized stores
+    keep a float32 copy that is only touched to rescore the best candidates.
+    Ids, documents and metadata live in a SQLite table keyed by matrix row;
+    deleted rows are dropped from the table and reclaimed by compaction.
+    Other processes see writes through the shared mapping and a generation
+    counter, so the worker can write while the web app reads.
+    """
+
+    GROWTH_ROWS = 1024  # Minimum rows added when the matrix files grow
+    SCORE_BLOCK_ROWS = 8192  # Rows converted to float32 and scored per matrix multiply
+    SCAN_DTYPES = ('float32', 'float16', 'int8')
+
+    def __init__(self, name: str, directory: Path, dtype: str = 'float32', rescore_candidates: int = 100):
+        self.name = name
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.rescore_candidates = rescore_candidates
+        self._db_path = self.directory / "metadata.db"
+        self._lock = threading.RLock()
+
+        self._files: Dict[str, _MatrixFile] = {}
+        self._generation = None
+        self._file_id = None
+        self._rows = np.empty(0, dtype=np.int64)
+        self._filter_cache: Dict[str, np.ndarray] = {}
+
+        if np.dtype(dtype).name not in self.SCAN_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self._init_db(np.dtype(dtype).name)
+
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for database connections"""
+        conn = sqlite3.connect(str(self._db_path), timeout=30, check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self, dtype: str):
+        with self._get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS chunks (
+                    row INTEGER PRIMARY KEY,
+                    chunk_id TEXT UNIQUE NOT NULL,
+                    document TEXT,
+                    metadata TEXT
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            # The dtype is fixed when the store is created
+            conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('dtype', ?)", (dtype,))
+            for key in ('generation', 'next_row', 'file_id'):
+                conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES (?, '0')", (key,))
+            conn.commit()
+            self.dtype = np.dtype(self._get_meta(conn, 'dtype'))
+            if self.dtype.name != dtype:
+                logger.info(f"Vector collection '{self.name}' keeps its stored dtype {self.dtype.name}")
+            self._set_dim(self._get_meta(conn, 'dim'))
+
+    @staticmethod
+    def _get_meta(conn, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn, key: str, value) -> None:
+        conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _bump_generation(self, conn) -> None:
+        self._set_meta(conn, 'generation', int(self._get_meta(conn, 'generation')) + 1)
+
+    # --- Matrix files ---
+
+    @property
+    def quantized(self) -> bool:
+        return self.dtype != np.float32
+
+    def _set_dim(self, dim) -> None:
+        """Open the matrix files once the embedding size is known"""
+        self.dim = int(dim) if dim else None
+        if not self.dim or self._files:
+            return
+        self._files['scan'] = _MatrixFile(self.directory / "vectors.bin", self.dtype, self.dim)
+        if self.quantized:
+            self._files['full'] = _MatrixFile(self.directory / "vectors.f32", np.float32, self.dim)
+        if self.dtype == np.int8:
+            self._files['scale'] = _MatrixFile(self.directory / "scales.bin", np.float32, 1)
+
+    def _encode(self, vectors: np.ndarray) -> Dict[str, np.ndarray]:
+        """Values to append to each matrix file"""
+        if not self.quantized:
+            return {'scan': vectors}
+        encoded = {'full': vectors}
+        if self.dtype == np.int8:
+            # Symmetric per-row scale: the largest component maps to 127
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            encoded['scan'] = np.round(vectors / scales[:, np.newaxis]).astype(np.int8)
+            encoded['scale'] = scales.astype(np.float32)
+        else:
+            encoded['scan'] = vectors.astype(self.dtype)
+        return encoded
+
+    def _refresh(self) -> None:
+        """Reload the row map after writes from this or another process"""
+        with self._get_connection() as conn:
+            generation = self._get_meta(conn, 'generation')
+            if generation == self._generation:
+                return
+            if self.dim is None:
+                self._set_dim(self._get_meta(conn, 'dim'))
+            file_id = self._get_meta(conn, 'file_id')
+            rows = [r[0] for r in conn.execute("SELECT row FROM chunks ORDER BY row")]
+        self._rows = np.asarray(rows, dtype=np.int64)
+        self._filter_cache.clear()
+        self._file_id = file_id
+        self._generation = generation
+
+    def _snapshot(self):
+        """Read-only matrices and live rows as of the latest write"""
+        with self._lock:
+            self._refresh()
+            views = {key: f.mapped(self._file_id) for key, f in self._files.items()}
+            return views, self._rows
+
+    # --- Writes ---
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def upsert(self, ids: List[str], embeddings: list, documents: List[str] = None,
+               metadatas: List[dict] = None) -> None:
+        if not ids:
+            return
+        vectors = self._normalize(embeddings)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+
+        with self._lock, self._get_connection() as conn:
+            # Serializes row allocation with writers in other processes
+            conn.execute("BEGIN IMMEDIATE")
+            if self.dim is None:
+                self._set_dim(vectors.shape[1])
+                self._set_meta(conn, 'dim', self.dim)
+            elif vectors.shape[1] != self.dim:
+                conn.rollback()
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection ({self.dim})")
+
+            start = int(self._get_meta(conn, 'next_row'))
+            for key, values in self._encode(vectors).items():
+                self._files[key].ensure_capacity(start + len(ids), self.GROWTH_ROWS)
+                self._files[key].write(start, values)
+
+            placeholders = ', '.join('?' for _ in ids)
+            conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", list(ids))
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (row, chunk_id, document, metadata) VALUES (?, ?, ?, ?)",
+                [(start + i, chunk_id, documents[i], json.dumps(metadatas[i] or {}))
+                 for i, chunk_id in enumerate(ids)]
+            )
+            self._set_meta(conn, 'next_row', start + len(ids))
+            self._bump_generation(conn)
+            conn.commit()
+
+    def add(self, ids: List[str], embeddings: list, documents: List[str] = None,
+            metadatas: List[dict] = None) -> None:
+        """Store chunks (an existing id is replaced rather than ignored)"""
+        self.upsert(ids, embeddings, documents, metadatas)
+
+    def delete(self, ids: List[str] = None, where: Optional[dict] = None) -> None:
+        condition, params = self._conditions(ids, where)
+        with self._lock, self._get_connection() as conn:
+            cursor = conn.execute(f"DELETE FROM chunks WHERE {condition}", params)
+            if cursor.rowcount:
+                self._bump_generation(conn)
+            conn.commit()
+            live = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            dead = int(self._get_meta(conn, 'next_row')) - live
+        if dead > max(live, self.GROWTH_ROWS):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the matrix files without deleted rows"""
+        with self._lock, self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = np.asarray([r[0] for r in conn.execute("SELECT row FROM chunks ORDER BY row")], dtype=np.int64)
+            file_id = self._get_meta(conn, 'file_id')
+            for matrix_file in self._files.values():
+                view = matrix_file.mapped(file_id)
+                matrix_file.rewrite(view[rows] if len(rows) else np.empty((0, matrix_file.width)))
+
+            conn.executemany("UPDATE chunks SET row = ? WHERE row = ?",
+                             [(new, int(old)) for new, old in enumerate(rows)])
+            self._set_meta(conn, 'next_row', len(rows))
+            self._set_meta(conn, 'file_id', int(file_id) + 1)
+            self._bump_generation(conn)
+            conn.commit()
+            self._generation = None
+        logger.info(f"Compacted vector collection '{self.name}' to {len(rows)} rows")
+
+    # --- Reads ---
+
+    @staticmethod
+    def _conditions(ids: Optional[List[str]], where: Optional[dict]):
+        conditions, params = [], []
+        if ids is not None:
+            conditions.append("chunk_id IN ({})".format(', '.join('?' for _ in ids)) if ids else '0')
+            params.extend(ids)
+        if where:
+            sql, where_params = where_to_sql(where)
+            conditions.append(sql)
+            params.extend(where_params)
+        return ' AND '.join(conditions) or '1', params
+
+    def _filter_rows(self, where: dict) -> np.ndarray:
+        """Matrix rows matching a where clause (cached until the next write)"""
+        key = json.dumps(where, sort_keys=True)
+        cached = self._filter_cache.get(key)
+        if cached is None:
+            sql, params = where_to_sql(where)
+            with self._get_connection() as conn:
+                matched = [r[0] for r in conn.execute(f"SELECT row FROM chunks WHERE {sql} ORDER BY row", params)]
+            cached = np.asarray(matched, dtype=np.int64)
+            if len(self._filter_cache) > 256:
+                self._filter_cache.clear()
+            self._filter_cache[key] = cached
+        return cached
+
+    def _fetch_rows(self, rows: List[int]) -> Dict[int, tuple]:
+        with self._get_connection() as conn:
+            placeholders = ', '.join('?' for _ in rows)
+            return {
+                r[0]: (r[1], r[2], json.loads(r[3]) if r[3] else {})
+                for r in conn.execute(
+                    f"SELECT row, chunk_id, document, metadata FROM chunks WHERE row IN ({placeholders})",
+                    [int(r) for r in rows]
+                )
+            }
+
+    def _scores(self, views: Dict[str, np.memmap], rows: np.ndarray, query_vector: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity from the scan matrix"""
+        scan, scale = views['scan'], views.get('scale')
+        # Without deletes or filters the rows are one contiguous range: slice instead of gather
+        contiguous = int(rows[-1]) - int(rows[0]) + 1 == len(rows)
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), self.SCORE_BLOCK_ROWS):
+            block = rows[start:start + self.SCORE_BLOCK_ROWS]
+            if contiguous:
+                block = slice(int(block[0]), int(block[-1]) + 1)
+            block_scores = np.asarray(scan[block], dtype=np.float32) @ query_vector
+            if scale is not None:
+                block_scores *= scale[block, 0]
+            scores[start:start + len(block_scores)] = block_scores
+        return scores
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind='stable')]
+
+    def search(self, query_vector, n_results: int, where: Optional[dict] = None,
+               rescore: bool = True) -> List[tuple]:
+        """Best (row, similarity) pairs for one query vector
+
+        Quantized stores scan the compact matrix, then rescore the best
+        rescore_candidates rows against the float32 copy.
+        """
+        views, rows = self._snapshot()
+        if where:
+            with self._lock:
+                rows = self._filter_rows(where)
+        if views.get('scan') is None or not len(rows):
+            return []
+
+        query_vector = self._normalize(query_vector)[0]
+        scores = self._scores(views, rows, query_vector)
+        full = views.get('full') if rescore else None
+        k = min(max(n_results, self.rescore_candidates) if full is not None else n_results, len(rows))
+        candidates = self._top(scores, k)
+
+        if full is not None:
+            candidate_rows = rows[candidates]
+            exact = np.asarray(full[candidate_rows], dtype=np.float32) @ query_vector
+            best = self._top(exact, min(n_results, len(exact)))
+            return [(int(candidate_rows[i]), float(exact[i])) for i in best]
+        return [(int(rows[i]), float(scores[i])) for i in candidates]
+
+    def query(self, query_embeddings: list, n_results: int = 10, where: Optional[dict] = None,
+              include: List[str] = None) -> dict:
+        include = include or DEFAULT_QUERY_INCLUDE
+        results = {'ids': []}
+        for field in ('documents', 'metadatas', 'distances', 'embeddings'):
+            results[field] = [] if field in include else None
+
+        for query_vector in self._normalize(query_embeddings):
+            matches = self.search(query_vector, n_results, where)
+            stored = self._fetch_rows([row for row, _ in matches]) if matches else {}
+            hits = [(stored[row], 1.0 - similarity, row) for row, similarity in matches if row in stored]
+
+            results['ids'].append([h[0][0] for h in hits])
+            if results['documents'] is not None:
+                results['documents'].append([h[0][1] for h in hits])
+            if results['metadatas'] is not None:
+                results['metadatas'].append([h[0][2] for h in hits])
+            if results['distances'] is not None:
+                results['distances'].append([h[1] for h in hits])
+            if results['embeddings'] is not None:
+                views, _ = self._snapshot()
+                matrix = views.get('full', views.get('scan'))
+                results['embeddings'].append([np.asarray(matrix[h[2]], dtype=np.float32).tolist() for h in hits])
+        return results
+
+    def get(self, ids: List[str] = None, where: Optional[dict] = None, limit: int = None,
+            offset: int = None, include: List[str] = None) -> dict:
+        include = DEFAULT_GET_INCLUDE if include is None else include
+        condition, params = self._conditions(ids, where)
+        sql = f"SELECT row, chunk_id, document, metadata FROM chunks WHERE {condition} ORDER BY row"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [-1 if limit is None else limit, offset or 0]
+        with self._get_connection() as conn:
+            stored = conn.execute(sql, params).fetchall()
+
+        results = {
+            'ids': [r[1] for r in stored],
+            'documents': [r[2] for r in stored] if 'documents' in include else None,
+            'metadatas': [json.loads(r[3]) if r[3] else {} for r in stored] if 'metadatas' in include else None,
+            'embeddings': None
+        }
+        if 'embeddings' in include:
+            views, _ = self._snapshot()
+            matrix = views.get('full', views.get('scan'))
+            results['embeddings'] = [np.asarray(matrix[r[0]], dtype=np.float32).tolist() for r in stored]
+        return results
+
+    def count(self) -> int:
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def storage_bytes(self) -> Dict[str, int]:
+        """On-disk size of each matrix file (the scan matrix is what stays resident)"""
+        return {key: matrix_file.size() for key, matrix_file in self._files.items()}
+
+
+class NumpyBackend(VectorBackend):
+    """One NumpyCollection per subdirectory of <db_path>/vectors"""
+
+    def __init__(self, db_path: Path, dtype: str = 'float32', rescore_candidates: int = 100):
+        self.root = Path(db_path) / "vectors"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.dtype = dtype
+        self.rescore_candidates = rescore_candidates
+        self._collections: Dict[str, NumpyCollection] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create_collection(self, name: str) -> VectorCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = NumpyCollection(name, self.root / name, self.dtype,
+                                                          self.rescore_candidates)
+            return self._collections[name]
+
+    def list_collection_names(self) -> List[str]:
+        return sorted(p.parent.name for p in self.root.glob("*/metadata.db"))
+
+    def delete_collection(self, name: str) -> None:
+        with self._lock:
+            self._collections.pop(name, None)
+        shutil.rmtree(self.root / name, ignore_errors=True)
+
+
+def copy_collections(source: VectorBackend, target: VectorBackend, batch_size: int = 500) -> int:
+    """Copy every collection with its stored embeddings (nothing is re-embedded)"""
+    copied = 0
+    for name in source.list_collection_names():
+        collection = source.get_or_create_collection(name)
+        destination = target.get_or_create_collection(name)
+        for offset in range(0, collection.count(), batch_size):
+            batch = collection.get(limit=batch_size, offset=offset,
+                                   include=['documents', 'metadatas', 'embeddings'])
+            destination.upsert(ids=batch['ids'], embeddings=batch['embeddings'],
+                               documents=batch['documents'], metadatas=batch['metadatas'])
+            copied += len(batch['ids'])
+    return copied
+
+
+def create_backend(kind: str, db_path: Path) -> VectorBackend:
+    """
+    Build the configured vector backend
+
+    Args:
+        kind: 'chroma', 'numpy' or 'auto'. 'auto' uses exact NumPy search while
+            the corpus is below Config.VECTOR_EXACT_SEARCH_MAX_CHUNKS, importing
+            a small existing Chroma store once, and keeps Chroma for larger ones.
+        db_path: Database directory
+
+    Returns:
+        VectorBackend instance
+    """
+    kind = (kind or 'chroma').lower()
+    db_path = Path(db_path)
+
+    if kind == 'chroma':
+        return ChromaBackend(db_path)
+    if kind not in ('numpy', 'auto'):
+        raise ValueError(f"Unknown vector backend: {kind}")
+
+    numpy_backend = NumpyBackend(db_path, Config.VECTOR_STORE_DTYPE, Config.VECTOR_RESCORE_CANDIDATES)
+    if kind == 'auto' and numpy_backend.total_count() == 0 and (db_path / "chroma.sqlite3").exists():
+        chroma_backend = ChromaBackend(db_path)
+        total = chroma_backend.total_count()
+        if total >= Config.VECTOR_EXACT_SEARCH_MAX_CHUNKS:
+            logger.info(f"Vector backend: chroma ({total} chunks)")
+            return chroma_backend
+        if total:
+            logger.info(f"Importing {total} chunks from ChromaDB for exact search...")
+            copy_collections(chroma_backend, numpy_backend)
+
+    total = numpy_backend.total_count()
+    if total > Config.VECTOR_EXACT_SEARCH_MAX_CHUNKS:
+        logger.warning(f"Exact search over {total} chunks; consider VECTOR_BACKEND=chroma")
+    logger.info(f"Vector backend: numpy ({total} chunks, {Config.VECTOR_STORE_DTYPE})")
+    return numpy_backend
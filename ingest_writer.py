@@ -0,0 +1,50 @@
+"""
+Universal RAG System - Ingest Writer
+The only process that writes to the vector store. Workers, the watcher and
+the web app queue adds/deletes in Redis (set INGEST_WRITER=true for all of
+them) and their DatabaseManager refuses direct writes. That refusal is an
+application-level guard: those processes still open the store files
+read-write, so any code that bypasses DatabaseManager could write. Re-index
+jobs queued by the worker run here as well, on a background thread.
+"""
+
+import logging
+import redis
+
+from core import DatabaseManager, FileProcessor
+from core.answer_cache import CorpusVersion
+from core.ingest_writer import IngestWriter, RedisWriteQueue
+from config import Config
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def start_writer():
+    """Apply queued writes in group commits until interrupted"""
+    logger.info("=" * 60)
+    logger.info("DocuMind AI - Ingest Writer Started")
+    logger.info("=" * 60)
+    
+    db_manager = DatabaseManager(Config.DB_DIR)
+    redis_client = redis.Redis.from_url(Config.CELERY_BROKER_URL, decode_responses=True)
+    processor = FileProcessor()
+    
+    def reindex(keep_old):
+        from worker import run_reindex
+        run_reindex(processor, backend=db_manager.backend, keep_old=keep_old)
+        CorpusVersion(redis_client).bump()  # Cached answers came from the old embeddings
+    
+    writer = IngestWriter(db_manager, RedisWriteQueue(redis_client), reindexer=reindex)
+    try:
+        writer.run_forever()
+    except KeyboardInterrupt:
+        logger.info(f"Ingest writer stopped: {writer.stats}")
+
+
+if __name__ == "__main__":
+    start_writer()
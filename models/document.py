@@ -1,5 +1,5 @@
 """Document data models"""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional, List
 from datetime import datetime
@@ -18,6 +18,9 @@ class Document:
     size_bytes: int
     created_at: datetime
     processed_at: Optional[datetime] = None
+    file_ext: str = ''  # Sorted extension folder (e.g. 'pdf')
+    date_folder: str = ''  # YYYY-MM ingest month
+    uploaded_by: str = ''  # Username of the uploader ('' for watched-folder files)
     
     def __post_init__(self):
         if isinstance(self.filepath, str):
@@ -35,14 +38,29 @@ class DocumentChunk:
     domain: str  # Added domain field
     category: str
     filepath: str
+    file_ext: str = ''
+    date_folder: str = ''
+    uploaded_by: str = ''
+    parent_id: str = ''  # Parent section this child passage expands to ('' = no parent)
+    parent_index: int = 0
+    parent_text: str = field(default='', repr=False)  # Stored in the parent store, not the vector store
     
     def to_metadata(self) -> dict:
         """Convert chunk to ChromaDB metadata format"""
-        return {
+        metadata = {
             'filename': self.filename,
             'domain': self.domain,  # Include domain in metadata
             'category': self.category,
             'filepath': self.filepath,
             'file_hash': self.document_hash,
-            'chunk_index': self.chunk_index
+            'chunk_index': self.chunk_index,
+            'file_ext': self.file_ext or Path(self.filename).suffix.lower().lstrip('.'),
+            'uploaded_by': self.uploaded_by
         }
+        if self.date_folder and self.date_folder.replace('-', '').isdigit():
+            # Numeric YYYYMM so date ranges can use $gte/$lte
+            metadata['date_folder'] = self.date_folder
+            metadata['date_month'] = int(self.date_folder.replace('-', ''))
+        if self.parent_id:
+            metadata['parent_id'] = self.parent_id
+        return metadata
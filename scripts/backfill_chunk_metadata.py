@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Backfill Chunk Metadata
+Adds the filterable fields (file_ext, date_folder/date_month, uploaded_by) to
+chunks ingested before they were stored. Values are derived from the sorted
+path (Domain/Category/ext/YYYY-MM/file) and the user_uploads table. Stored
+embeddings are reused, so nothing is re-embedded.
+
+Usage:
+    python scripts/backfill_chunk_metadata.py [--db PATH] [--batch-size 500] [--dry-run]
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.database import DatabaseManager
+from core.query_filters import month_number
+
+DATE_FOLDER_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+
+def load_uploaders() -> dict:
+    """Sorted path (relative to SORTED_DIR) -> uploader username"""
+    users_db_path = Config.DATA_DIR / 'users.db'
+    if not users_db_path.exists():
+        return {}
+    conn = sqlite3.connect(users_db_path)
+    try:
+        rows = conn.execute("""
+            SELECT up.sorted_path, u.username FROM user_uploads up
+            JOIN users u ON u.id = up.user_id
+            WHERE up.sorted_path IS NOT NULL AND up.sorted_path != ''
+        """).fetchall()
+    finally:
+        conn.close()
+    return {sorted_path: username for sorted_path, username in rows}
+
+
+def derive_fields(metadata: dict, uploaders: dict) -> dict:
+    """Filterable fields for one chunk"""
+    filepath = Path(metadata.get('filepath', ''))
+    fields = {
+        'file_ext': Path(metadata.get('filename', '')).suffix.lower().lstrip('.'),
+        'uploaded_by': metadata.get('uploaded_by', '')
+    }
+
+    date_folder = filepath.parent.name
+    if DATE_FOLDER_PATTERN.match(date_folder) and month_number(date_folder):
+        fields['date_folder'] = date_folder
+        fields['date_month'] = month_number(date_folder)
+
+    if not fields['uploaded_by']:
+        try:
+            rel_path = str(filepath.relative_to(Config.SORTED_DIR)).replace('\\', '/')
+            fields['uploaded_by'] = uploaders.get(rel_path, '')
+        except ValueError:
+            pass
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill filterable chunk metadata")
+    parser.add_argument('--db', default=str(Config.DB_DIR), help="Database directory")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true', help="Report changes without writing")
+    args = parser.parse_args()
+
+    db = DatabaseManager(Path(args.db))
+    uploaders = load_uploaders()
+    total = db.get_count()
+
+    print("=" * 60)
+    print(f"BACKFILL CHUNK METADATA ({total} chunks, {len(uploaders)} known uploads)")
+    print("=" * 60)
+
+    start = time.time()
+    updated = 0
+    # Collect first: rewriting a collection while paging through it would shift offsets
+    pending = []
+    for batch in db.iter_batches(args.batch_size, include=['metadatas']):
+        for chunk_id, metadata in zip(batch['ids'], batch['metadatas']):
+            metadata = metadata or {}
+            fields = derive_fields(metadata, uploaders)
+            if any(metadata.get(key) != value for key, value in fields.items()):
+                pending.append((chunk_id, {**metadata, **fields}))
+
+    print(f"   {len(pending)} chunks need new metadata")
+    if args.dry_run:
+        for chunk_id, metadata in pending[:10]:
+            print(f"   {chunk_id}: ext={metadata['file_ext']!r} date={metadata.get('date_folder')!r} "
+                  f"uploader={metadata['uploaded_by']!r}")
+        return
+
+    for offset in range(0, len(pending), args.batch_size):
+        batch_ids = [chunk_id for chunk_id, _ in pending[offset:offset + args.batch_size]]
+        new_metadata = dict(pending[offset:offset + args.batch_size])
+        for collection in db._collections():
+            stored = collection.get(ids=batch_ids, include=['documents', 'embeddings'])
+            if not stored['ids']:
+                continue
+            metadatas = [new_metadata[chunk_id] for chunk_id in stored['ids']]
+            collection.upsert(ids=stored['ids'], embeddings=stored['embeddings'],
+                              documents=stored['documents'], metadatas=metadatas)
+            if db.lexical_index:
+                db.lexical_index.add(stored['ids'], stored['documents'], metadatas)
+            updated += len(stored['ids'])
+        print(f"   ✓ {updated}/{len(pending)} chunks updated")
+
+    print("\n" + "=" * 60)
+    print(f"✅ DONE in {time.time() - start:.1f}s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
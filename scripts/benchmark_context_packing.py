@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark Context Packing
+Builds the /chat prompt for a set of questions twice - with the five reranked
+chunks concatenated as-is (previous behaviour) and through the ContextPacker -
+and reports prompt tokens, chunks kept and the num_predict left for the answer.
+
+Chunks come from --docs (text files, chunked like ingestion does) or, by
+default, from a generated handbook. With --ollama both prompts are also sent
+to the local Ollama server (num_predict=1) and the prefill time it reports
+(prompt_eval_duration) is compared.
+
+Usage:
+    python scripts/benchmark_context_packing.py [--docs file.txt ...] [--tokenizer tokenizer.json]
+                                                [--parents] [--ollama] [--repeat 3]
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.context_packer import ContextPacker, TokenCounter, query_terms
+from core.llm import LLMService
+from utils import TextUtils
+
+TOPICS = ["vacation", "invoice", "backup", "password", "travel", "laptop", "contract", "parking", "overtime", "audit"]
+QUESTIONS = [
+    "How many vacation days do employees get?",
+    "When are invoices paid?",
+    "How long are backups retained?",
+    "How often must passwords be changed?",
+    "What travel expenses are reimbursed?",
+]
+
+
+def generated_handbook() -> str:
+    """Policy handbook with one section per topic, long enough for 2000-character chunks"""
+    sections = []
+    for n, topic in enumerate(TOPICS):
+        sentences = [f"Section {n + 1}: {topic.title()} policy."]
+        for i in range(30):
+            sentences.append(f"Rule {n + 1}.{i + 1} of the {topic} policy states that requests concerning {topic} "
+                             f"item {i + 1} are handled by team {i % 4 + 1} within {i % 9 + 2} working days.")
+        sections.append(' '.join(sentences))
+    return '\n'.join(sections)
+
+
+def candidate_chunks(question: str, pieces: list, parents: bool) -> list:
+    """Top five chunks by query-term overlap, standing in for the reranker"""
+    terms = query_terms(question)
+    scored = sorted(range(len(pieces)), key=lambda i: -sum(pieces[i].lower().count(t) for t in terms))[:5]
+    chunks = []
+    for rank, i in enumerate(scored):
+        text = pieces[i]
+        if parents:
+            # Small-to-big: neighbouring chunks expand to the same surrounding section
+            text = ' '.join(pieces[max(0, i - 1):i + 2])
+        chunks.append({'chunk_id': f"doc_{i}", 'text': text, 'filename': f"handbook_{i // 4}.txt",
+                       'relevance_score': 5.0 - rank, 'similarity': 0.8, 'distance': 0.4})
+    return chunks
+
+
+def naive_prompt(service: LLMService, question: str, chunks: list) -> str:
+    context_text = "\n".join(f"{service._source_header(i, c)}\n{c['text']}\n" for i, c in enumerate(chunks, 1))
+    return service._render_prompt(context_text, question)
+
+
+def prefill_ms(system: str, prompt: str, repeat: int) -> float:
+    import ollama
+    times = []
+    for _ in range(repeat):
+        response = ollama.generate(model=Config.LLM_MODEL, system=system, prompt=prompt, stream=False,
+                                   options=dict(LLMService.GENERATION_OPTIONS, num_predict=1))
+        times.append(response.get('prompt_eval_duration', 0) / 1e6)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prompt size with and without context packing")
+    parser.add_argument('--docs', nargs='*', help="Text files to chunk (default: generated handbook)")
+    parser.add_argument('--tokenizer', default=Config.CONTEXT_TOKENIZER, help="Chat model tokenizer.json")
+    parser.add_argument('--parents', action='store_true', help="Expand chunks to overlapping parent sections")
+    parser.add_argument('--ollama', action='store_true', help="Measure prefill time on the local Ollama")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    text = '\n'.join(Path(p).read_text(errors='ignore') for p in args.docs) if args.docs else generated_handbook()
+    pieces = TextUtils.chunk_text(text, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
+
+    counter = TokenCounter(args.tokenizer)
+    service = LLMService.__new__(LLMService)
+    service.reranker = None
+    service.rerank_policy = None
+    service.context_packer = ContextPacker(counter)
+    service.language_prompts = {'en': "You are a helpful AI assistant that answers questions EXCLUSIVELY and "
+                                      "STRICTLY based on the provided documents."}
+    service.detect_query_language = lambda query: 'en'
+
+    print("=" * 70)
+    print("Context Packing Benchmark")
+    print(f"{len(pieces)} chunks of {Config.CHUNK_SIZE} chars, window {Config.CONTEXT_WINDOW_TOKENS} tokens, "
+          f"counts {'exact' if counter.exact else 'estimated'}{', parent sections' if args.parents else ''}")
+    print("=" * 70)
+    print(f"{'question':<44} {'before':>7} {'after':>7} {'chunks':>6} {'predict':>8}"
+          + (f" {'prefill before':>15} {'after':>7}" if args.ollama else ""))
+
+    before_total = after_total = 0
+    for question in QUESTIONS:
+        chunks = candidate_chunks(question, pieces, args.parents)
+        system = service._system_prompt('en')
+        before = counter.count(system) + counter.count(naive_prompt(service, question, chunks))
+        prepared = service._prepare_generation(question, [dict(c) for c in chunks])
+        after = counter.count(system) + counter.count(prepared['prompt'])
+        before_total += before
+        after_total += after
+        line = (f"{question[:43]:<44} {before:7d} {after:7d} {len(prepared['chunks']):4d}/5 "
+                f"{prepared['options']['num_predict']:8d}")
+        if args.ollama:
+            line += f" {prefill_ms(system, naive_prompt(service, question, chunks), args.repeat):13.0f}ms " \
+                    f"{prefill_ms(system, prepared['prompt'], args.repeat):5.0f}ms"
+        print(line)
+
+    print(f"\nPrompt tokens: {before_total} -> {after_total} "
+          f"({100 * (1 - after_total / before_total):.0f}% fewer)")
+    over = Config.CONTEXT_WINDOW_TOKENS - Config.CONTEXT_MAX_ANSWER_TOKENS
+    print(f"Unpacked prompts over {over} tokens did not leave num_predict={Config.CONTEXT_MAX_ANSWER_TOKENS} "
+          f"in the {Config.CONTEXT_WINDOW_TOKENS}-token window; over {Config.CONTEXT_WINDOW_TOKENS} Ollama truncates them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark Domain Shards
+Builds a synthetic corpus (default 100k chunks across all role domains) twice -
+once in a single collection, once sharded by domain - and compares query
+latency per role. Vectors are random, so no embedding model is needed.
+
+Usage:
+    python scripts/benchmark_domain_shards.py [--chunks 100000] [--dim 384] [--repeat 5]
+"""
+
+import argparse
+import hashlib
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.database import DatabaseManager
+from core.permissions import ROLE_FILE_ACCESS
+from core.vector_store import create_backend
+
+DOMAINS = sorted({d for cfg in ROLE_FILE_ACCESS.values() if cfg['allowed_domains'] != '*'
+                  for d in cfg['allowed_domains']})
+CATEGORIES = ['Invoice', 'Report', 'Policy', 'Clinical', 'Python', 'Syllabus', 'Payroll']
+
+
+class HashEmbedding:
+    """Deterministic pseudo-embedding so the benchmark runs offline"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            seed = int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+
+def populate(db: DatabaseManager, chunks: int, dim: int, batch_size: int = 5000) -> float:
+    """Insert synthetic chunks, return seconds taken"""
+    rng = np.random.default_rng(42)
+    start = time.time()
+    for offset in range(0, chunks, batch_size):
+        size = min(batch_size, chunks - offset)
+        vectors = rng.standard_normal((size, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        groups = {}
+        for i in range(size):
+            idx = offset + i
+            domain = DOMAINS[idx % len(DOMAINS)]
+            group = groups.setdefault(domain, {'ids': [], 'documents': [], 'metadatas': [], 'embeddings': []})
+            group['ids'].append(f"chunk_{idx}")
+            group['documents'].append(f"synthetic chunk {idx}")
+            group['metadatas'].append({
+                'domain': domain,
+                'category': CATEGORIES[idx % len(CATEGORIES)],
+                'filename': f"file_{idx // 10}.txt",
+                'filepath': f"/sorted/{domain}/file_{idx // 10}.txt",
+                'file_hash': f"h{idx // 10}",
+                'chunk_index': idx % 10
+            })
+            group['embeddings'].append(vectors[i].tolist())
+
+        for domain, group in groups.items():
+            db._collection_for_domain(domain).add(**group)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-collection and domain-sharded query latency")
+    parser.add_argument('--chunks', type=int, default=100_000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--n-results', type=int, default=15)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--backend', choices=['chroma', 'numpy'], default='chroma')
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="shard_bench_"))
+    embedding = HashEmbedding(args.dim)
+    try:
+        single = DatabaseManager(tmp_dir / "single", hybrid_search=False, embedding_function=embedding, sharded=False,
+                                 backend=create_backend(args.backend, tmp_dir / "single"))
+        sharded = DatabaseManager(tmp_dir / "sharded", hybrid_search=False, embedding_function=embedding, sharded=True,
+                                  backend=create_backend(args.backend, tmp_dir / "sharded"))
+
+        print("=" * 78)
+        print(f"DOMAIN SHARD BENCHMARK  (backend={args.backend}, chunks={args.chunks}, "
+              f"domains={len(DOMAINS)}, dim={args.dim})")
+        print("=" * 78)
+        print(f"   Single collection built in {populate(single, args.chunks, args.dim):.1f}s")
+        print(f"   Sharded collections built in {populate(sharded, args.chunks, args.dim):.1f}s")
+
+        print(f"\n{'Role':<12} {'Single ms':>10} {'Sharded ms':>11} {'Speedup':>8} {'Single hits':>12} {'Shard hits':>11}")
+        print("-" * 78)
+        queries = [f"benchmark query {i}" for i in range(args.repeat)]
+        for role in ROLE_FILE_ACCESS:
+            results = {}
+            for name, db in (('single', single), ('sharded', sharded)):
+                timings, hits = [], []
+                for query in queries:
+                    db.embed_query(query)  # exclude embedding time
+                    start = time.perf_counter()
+                    chunks, _ = db.query(query, n_results=args.n_results, user_role=role)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    hits.append(len(chunks))
+                results[name] = (statistics.median(timings), statistics.mean(hits))
+
+            single_ms, single_hits = results['single']
+            sharded_ms, sharded_hits = results['sharded']
+            speedup = single_ms / sharded_ms if sharded_ms else 0
+            print(f"{role:<12} {single_ms:>10.1f} {sharded_ms:>11.1f} {speedup:>7.2f}x "
+                  f"{single_hits:>12.1f} {sharded_hits:>11.1f}")
+
+        print("=" * 78)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark Ingest Writer
+Simulates a burst of uploads (default 1,000 files) written by several worker
+processes, once with every worker opening the store and calling add_chunks
+itself (as Celery workers do today) and once with the workers queueing their
+writes to a single ingest writer that group-commits them. Reports chunks per
+second and how many chunks actually landed in the store.
+
+Usage:
+    python scripts/benchmark_ingest_writer.py [--files 1000] [--chunks-per-file 6] [--workers 8]
+                                              [--backend chroma|numpy] [--embedding hash|default]
+"""
+
+import argparse
+import hashlib
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import redis
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.database import DatabaseManager
+from core.ingest_writer import IngestClient, IngestWriter, LocalWriteQueue, RedisWriteQueue
+from core.vector_store import ChromaBackend, NumpyBackend
+from models.document import DocumentChunk
+
+WORDS = ("invoice payment report patient policy parser budget audit schedule contract network "
+         "release summary revenue claim server training quarterly backup license").split()
+
+
+class HashEmbedding:
+    """Deterministic offline embedding so the benchmark measures the write path"""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            seed = int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).standard_normal(self.dim)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+
+def make_files(n_files, chunks_per_file):
+    rng = np.random.default_rng(7)
+    files = []
+    for f in range(n_files):
+        file_hash = hashlib.sha256(f"file-{f}".encode()).hexdigest()[:16]
+        domain = ['Finance', 'Healthcare', 'Technology', 'Legal'][f % 4]
+        chunks = []
+        for i in range(chunks_per_file):
+            text = ' '.join(rng.choice(WORDS, 60))
+            chunks.append(DocumentChunk(
+                chunk_id=f"{file_hash}_{i}", document_hash=file_hash, text=text, chunk_index=i,
+                filename=f"file_{f}.txt", domain=domain, category='General',
+                filepath=f"/sorted/{domain}/General/txt/2024-03/file_{f}.txt", date_folder='2024-03'
+            ))
+        files.append(chunks)
+    return files
+
+
+def open_db(directory, args):
+    backend = ChromaBackend(directory) if args.backend == 'chroma' else NumpyBackend(directory)
+    embedding = HashEmbedding() if args.embedding == 'hash' else None
+    return DatabaseManager(directory, embedding_function=embedding, backend=backend)
+
+
+def searchable_fraction(db, args, sample=200) -> float:
+    """Share of sampled chunks that their own vector finds at rank 1 (lost index updates show up here)"""
+    files = make_files(args.files, args.chunks_per_file)
+    rng = np.random.default_rng(11)
+    picks = rng.choice(args.files * args.chunks_per_file, size=min(sample, args.files * args.chunks_per_file),
+                       replace=False)
+    found = 0
+    for pick in picks:
+        chunk = files[pick // args.chunks_per_file][pick % args.chunks_per_file]
+        hits = db._vector_search(np.asarray(db.embedding_function([chunk.text])[0]), 1, None)
+        found += bool(hits) and hits[0][0] == chunk.chunk_id
+    return found / len(picks)
+
+
+def direct_worker(directory, args, worker_id):
+    """One worker process with its own client on the shared directory (today's layout)"""
+    db = open_db(directory, args)
+    failed = 0
+    for chunks in make_files(args.files, args.chunks_per_file)[worker_id::args.workers]:
+        try:
+            db.add_chunks(chunks)
+        except Exception:
+            failed += 1
+    return failed
+
+
+def queued_worker(redis_url, args, worker_id):
+    """One worker process that only queues its writes"""
+    client = IngestClient(RedisWriteQueue(redis.Redis.from_url(redis_url, decode_responses=True)))
+    failed = 0
+    for chunks in make_files(args.files, args.chunks_per_file)[worker_id::args.workers]:
+        try:
+            client.add_chunks(chunks)
+        except Exception:
+            failed += 1
+    return failed
+
+
+def run_direct(args):
+    """Every worker process writes its own files as soon as they are chunked"""
+    directory = Path(tempfile.mkdtemp())
+    try:
+        open_db(directory, args)  # Create the store up front so only the write path is compared
+        start = time.time()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            failed = sum(pool.map(direct_worker, [directory] * args.workers, [args] * args.workers,
+                                  range(args.workers)))
+        elapsed = time.time() - start
+        db = open_db(directory, args)
+        return elapsed, db.get_count(), searchable_fraction(db, args), f"{args.files} writes, {failed} failed"
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run_writer(args, redis_url):
+    """Worker processes queue their files; one writer commits them in batches"""
+    directory = Path(tempfile.mkdtemp())
+    try:
+        redis_client = redis.Redis.from_url(redis_url, decode_responses=True)
+        redis_client.delete(Config.INGEST_QUEUE_KEY)
+        writer = IngestWriter(open_db(directory, args), RedisWriteQueue(redis_client),
+                              commit_window=args.window / 1000.0)
+        stop = threading.Event()
+        thread = threading.Thread(target=writer.run_forever, args=(stop,), daemon=True)
+        thread.start()
+
+        start = time.time()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            failed = sum(pool.map(queued_worker, [redis_url] * args.workers, [args] * args.workers,
+                                  range(args.workers)))
+        elapsed = time.time() - start
+        stop.set()
+        thread.join()
+        db = open_db(directory, args)  # Fresh reader, as the web app would see it
+        return (elapsed, db.get_count(), searchable_fraction(db, args),
+                f"{writer.stats['commits']} group commits, {failed} failed")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def serve_fake_redis(port):
+    from fakeredis import TcpFakeServer
+    TcpFakeServer(('127.0.0.1', port), server_type='redis').serve_forever()
+
+
+def run_local_writer(args):
+    """Same writer with in-process threads and queue: group commit without the transport cost"""
+    directory = Path(tempfile.mkdtemp())
+    try:
+        write_queue = LocalWriteQueue()
+        writer = IngestWriter(open_db(directory, args), write_queue, commit_window=args.window / 1000.0)
+        stop = threading.Event()
+        thread = threading.Thread(target=writer.run_forever, args=(stop,), daemon=True)
+        thread.start()
+
+        client = IngestClient(write_queue)
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(client.add_chunks, make_files(args.files, args.chunks_per_file)))
+        elapsed = time.time() - start
+        stop.set()
+        thread.join()
+        return elapsed, writer.db.get_count(), searchable_fraction(writer.db, args), \
+            f"{writer.stats['commits']} group commits"
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def start_fake_redis() -> str:
+    """Redis stand-in in its own process when no --redis-url is given (needs fakeredis)"""
+    import multiprocessing
+    import socket
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    multiprocessing.Process(target=serve_fake_redis, args=(port,), daemon=True).start()
+    client = redis.Redis(port=port)
+    for _ in range(50):
+        try:
+            client.ping()
+            break
+        except redis.ConnectionError:
+            time.sleep(0.1)
+    return f"redis://127.0.0.1:{port}/0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Direct add_chunks vs. single writer with group commit")
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--chunks-per-file', type=int, default=6)
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent worker processes")
+    parser.add_argument('--window', type=float, default=200, help="Commit window in ms")
+    parser.add_argument('--backend', choices=['chroma', 'numpy'], default='chroma')
+    parser.add_argument('--embedding', choices=['hash', 'default'], default='hash',
+                        help="'default' uses the real MiniLM model (slower, includes embedding cost)")
+    parser.add_argument('--redis-url', help="Queue for the writer run (default: in-process fakeredis)")
+    args = parser.parse_args()
+
+    total = args.files * args.chunks_per_file
+
+    print("=" * 60)
+    print(f"INGEST BENCHMARK ({args.files} files, {total} chunks, {args.workers} workers, "
+          f"{args.backend}/{args.embedding})")
+    print("=" * 60)
+
+    elapsed, stored, searchable, detail = run_direct(args)
+    print(f"   Direct add_chunks:  {elapsed:7.2f}s  {total / elapsed:8.0f} chunks/s  ({detail})")
+    print(f"                       {stored} stored, {searchable:.0%} searchable")
+    direct = elapsed
+
+    elapsed, stored, searchable, detail = run_writer(args, args.redis_url or start_fake_redis())
+    print(f"   Ingest writer:      {elapsed:7.2f}s  {total / elapsed:8.0f} chunks/s  ({detail})")
+    print(f"                       {stored} stored, {searchable:.0%} searchable")
+
+    queued = elapsed
+
+    elapsed, stored, searchable, detail = run_local_writer(args)
+    print(f"   Writer in-process:  {elapsed:7.2f}s  {total / elapsed:8.0f} chunks/s  ({detail})")
+    print(f"                       {stored} stored, {searchable:.0%} searchable")
+
+    print("\n" + "=" * 60)
+    print(f"✅ Speed-up: {direct / queued:.2f}x via Redis, {direct / elapsed:.2f}x in-process")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark Ollama Pool
+Sends the same burst of concurrent generations to one Ollama host (as the
+module-level ollama.generate did) and to an OllamaPool across several hosts,
+and reports throughput and p50/p95 latency. With --dead-host one extra
+unreachable endpoint is added to the pool to show failover and the breaker.
+
+By default the hosts are fake Ollama servers (tests/fake_ollama.py) that run
+one generation at a time each, like CPU boxes with OLLAMA_NUM_PARALLEL=1;
+pass --hosts to measure real ones instead.
+
+Usage:
+    python scripts/benchmark_ollama_pool.py [--hosts http://a:11434,http://b:11434] [--fake-hosts 3]
+                                            [--requests 24] [--concurrency 6] [--async] [--dead-host]
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import ollama
+
+from config import Config
+from core.ollama_pool import OllamaPool
+from tests.fake_ollama import FakeOllamaServer
+
+PROMPT = "How many vacation days do employees get?"
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def run_sync(generate, requests, concurrency, model):
+    def one(_):
+        started = time.perf_counter()
+        generate(model=model, prompt=PROMPT, stream=False, options={"num_predict": 32})
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(one, range(requests)))
+    return latencies, time.perf_counter() - started
+
+
+def run_async(pool, requests, concurrency, model):
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with limit:
+                started = time.perf_counter()
+                await pool.agenerate(model=model, prompt=PROMPT, stream=False, options={"num_predict": 32})
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*[one() for _ in range(requests)])
+        return list(latencies), time.perf_counter() - started
+
+    return asyncio.run(main())
+
+
+def report(label, latencies, elapsed):
+    print(f"{label:<34} {len(latencies) / elapsed:7.2f} req/s   p50 {percentile(latencies, 0.5) * 1000:7.0f}ms   "
+          f"p95 {percentile(latencies, 0.95) * 1000:7.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single host vs pooled, load-balanced Ollama hosts")
+    parser.add_argument('--hosts', help="Comma-separated Ollama hosts (default: fake servers)")
+    parser.add_argument('--fake-hosts', type=int, default=3)
+    parser.add_argument('--prefill', type=float, default=0.3, help="Fake server seconds before the first token")
+    parser.add_argument('--requests', type=int, default=24)
+    parser.add_argument('--concurrency', type=int, default=6)
+    parser.add_argument('--model', default=Config.LLM_MODEL)
+    parser.add_argument('--async', dest='use_async', action='store_true', help="Drive the pool from asyncio")
+    parser.add_argument('--dead-host', action='store_true', help="Add an unreachable endpoint to the pool")
+    args = parser.parse_args()
+
+    servers = []
+    if args.hosts:
+        hosts = [h.strip() for h in args.hosts.split(',') if h.strip()]
+    else:
+        servers = [FakeOllamaServer(prefill=args.prefill, token_delay=0.005).start() for _ in range(args.fake_hosts)]
+        hosts = [s.url for s in servers]
+    pool_hosts = list(hosts)
+    if args.dead_host:
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            pool_hosts.insert(0, f"http://127.0.0.1:{sock.getsockname()[1]}")
+
+    print("=" * 70)
+    print("Ollama Pool Benchmark")
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {len(hosts)} hosts"
+          f"{' (fake, 1 generation at a time each)' if servers else ''}")
+    print("=" * 70)
+
+    try:
+        single = ollama.Client(host=hosts[0])
+        report("single host (ollama.Client)", *run_sync(single.generate, args.requests, args.concurrency, args.model))
+
+        pool = OllamaPool(pool_hosts, health_interval=0)
+        if args.use_async:
+            report(f"pool of {len(pool_hosts)} (asyncio)", *run_async(pool, args.requests, args.concurrency, args.model))
+        else:
+            report(f"pool of {len(pool_hosts)} (threads)", *run_sync(pool.generate, args.requests, args.concurrency,
+                                                                     args.model))
+
+        print("\nPer endpoint:")
+        for endpoint in pool.stats()['endpoints']:
+            print(f"  {endpoint['host']:<28} {endpoint['state']:<9} requests {endpoint['requests']:4d}   "
+                  f"failures {endpoint['failures']}")
+        if servers:
+            print(f"Fake servers handled {[s.requests for s in servers]} requests "
+                  f"(single-host run included in the first)")
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark ONNX Backends
+Compares the reranker and the embedder on PyTorch, ONNX (fp32) and ONNX int8:
+model size, p50/p95 latency per call and quality on a small built-in eval set
+(each question has one relevant passage and four distractors).
+
+Reranker quality is acc@1 and MRR over the five candidates plus agreement with
+the PyTorch scores (max abs difference, Spearman rank correlation). Embedder
+quality is recall@1 of the relevant passage by cosine similarity plus the
+minimum cosine between ONNX and PyTorch vectors.
+
+Models are exported/quantized into Config.ONNX_MODEL_DIR on first use, so the
+first run includes that one-time cost (reported separately as load time).
+
+Usage:
+    python scripts/benchmark_onnx_backends.py [--reranker cross-encoder/ms-marco-MiniLM-L-6-v2]
+                                              [--embedder all-MiniLM-L6-v2] [--runs 30] [--threads 0]
+                                              [--skip-reranker] [--skip-embedder]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.onnx_models import (BACKENDS, BACKEND_PYTORCH, BACKEND_ONNX_INT8, RERANKER_MODEL,
+                              OnnxCrossEncoder, OnnxEmbeddingFunction)
+
+# (question, relevant passage, distractors)
+EVAL_SET = [
+    ("When is the invoice payment due?", "Payment for invoice 1042 is due within thirty days of the invoice date.",
+     ["The invoice template uses the company logo in the header.", "Our office is closed on public holidays.",
+      "Quarterly revenue grew by four percent.", "The parser reads JSON and CSV files."]),
+    ("How many vacation days do employees get?", "Full-time employees receive twenty-five paid vacation days per year.",
+     ["Employees must wear badges inside the building.", "The cafeteria opens at eight in the morning.",
+      "Vacation photos can be shared in the social channel.", "The server rack is in room 204."]),
+    ("Who approves purchase orders above 10,000 euros?", "Purchase orders above 10,000 euros require approval by the CFO.",
+     ["Purchase orders are numbered sequentially.", "The CFO joined the company in 2019.",
+      "Office supplies are ordered every Monday.", "The warehouse has two loading docks."]),
+    ("What is the backup retention period?", "Nightly backups are retained for ninety days before deletion.",
+     ["Backups run at two in the morning.", "The retention of customers improved last year.",
+      "The backup generator is tested monthly.", "Passwords must be rotated every quarter."]),
+    ("Which port does the web server listen on?", "The Flask web server listens on port 5000 on all interfaces.",
+     ["The harbour port handles container ships.", "The web team meets on Thursdays.",
+      "Server logs are kept for two weeks.", "Port wine is served at the annual dinner."]),
+    ("How do I reset my password?", "To reset your password, open Settings, choose Security and click Reset password.",
+     ["Passwords must contain at least twelve characters.", "The security team is located on floor three.",
+      "Settings can be exported as JSON.", "Reset the router by holding the button for ten seconds."]),
+    ("What dosage of ibuprofen is recommended for adults?", "Adults may take 200 to 400 mg of ibuprofen every four to six hours.",
+     ["Ibuprofen was first marketed in the 1960s.", "Children should see a pediatrician for fever.",
+      "Store medication in a cool, dry place.", "The pharmacy opens at nine."]),
+    ("When does the software license expire?", "The enterprise software license expires on 31 December 2025.",
+     ["The license plate of the company car is on file.", "Software updates are installed on Fridays.",
+      "The enterprise plan includes priority support.", "Driving licenses must be renewed every ten years."]),
+    ("What is the maximum upload size?", "Uploaded files may not exceed 16 megabytes.",
+     ["Uploads are scanned for viruses.", "The maximum occupancy of the meeting room is twelve.",
+      "Large files should be compressed before sending by email.", "The upload page supports drag and drop."]),
+    ("Who is the contact for data protection questions?", "Data protection questions go to the data protection officer, Anna Weber.",
+     ["Data is stored in the Frankfurt region.", "Anna Weber presented the quarterly results.",
+      "Protection gear is required in the lab.", "Questions about payroll go to HR."]),
+    ("How long is the contract notice period?", "Either party may terminate the contract with three months' notice.",
+     ["The contract was signed in Berlin.", "Notice boards are located near the elevators.",
+      "The period of the pendulum depends on its length.", "Contract templates are stored in the legal folder."]),
+    ("What programming language is the parser written in?", "The document parser is written in Python and uses pdfminer.",
+     ["Programming workshops take place monthly.", "The parser supports PDF, DOCX and TXT files.",
+      "Python is also the name of a snake.", "Language courses are reimbursed by the company."]),
+    ("What was the revenue in the third quarter?", "Third-quarter revenue was 4.2 million euros.",
+     ["Revenue recognition follows IFRS 15.", "The third floor hosts the finance team.",
+      "Quarterly meetings are held in the main hall.", "The company has four hundred employees."]),
+    ("How often are security audits performed?", "External security audits are performed twice a year.",
+     ["The audit committee has five members.", "Security guards patrol the parking lot.",
+      "Audits of travel expenses happen annually.", "The firewall blocks outgoing SMTP traffic."]),
+    ("Where are the server logs stored?", "Server logs are written to /var/log/rag and rotated daily.",
+     ["The server was purchased in 2021.", "Logs from the forest are stored in the yard.",
+      "The log-in page supports single sign-on.", "Daily stand-ups start at nine thirty."]),
+    ("What is the refund policy?", "Customers can request a full refund within fourteen days of purchase.",
+     ["Refunds are processed by the finance team.", "The policy handbook is two hundred pages long.",
+      "Customers rated our support 4.6 out of 5.", "Purchases above 500 euros need a second signature."]),
+    ("Which model does the chatbot use?", "The chatbot generates answers with the llama3.2 model served by Ollama.",
+     ["The chatbot icon is blue.", "Model railway club meets on Saturdays.",
+      "Answers are shown with their source documents.", "Ollama runs in its own container."]),
+    ("How many chunks are retrieved per query?", "Ten chunks are retrieved per query before reranking.",
+     ["Chunks overlap by 150 characters.", "The query language is detected automatically.",
+      "Chocolate chunks are sold in the cafeteria.", "Reranking uses a cross-encoder."]),
+    ("What are the office opening hours?", "The office is open from 8:00 to 18:00, Monday to Friday.",
+     ["Office chairs can be adjusted in height.", "Opening ceremonies take place in the lobby.",
+      "The office moved to a new building last year.", "Hours worked are recorded in the time tracker."]),
+    ("Which regions does the delivery cover?", "Deliveries cover Germany, Austria and Switzerland.",
+     ["Delivery trucks are washed weekly.", "The regional manager lives in Munich.",
+      "Switzerland has four official languages.", "Coverage of the event was positive."]),
+]
+
+
+def model_size_mb(model) -> float:
+    if hasattr(model, 'path'):
+        return Path(model.path).stat().st_size / 1e6
+    parameters = model.model.parameters() if hasattr(model, 'model') else model.parameters()
+    return sum(p.numel() * p.element_size() for p in parameters) / 1e6
+
+
+def spearman(a, b) -> float:
+    ranks_a = np.argsort(np.argsort(a))
+    ranks_b = np.argsort(np.argsort(b))
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+def timed(fn, runs):
+    fn()  # warm-up
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[min(len(times) - 1, int(len(times) * 0.95))]
+
+
+def load_reranker(backend, model_name):
+    if backend == BACKEND_PYTORCH:
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(model_name, max_length=512)
+    return OnnxCrossEncoder(model_name, quantized=backend == BACKEND_ONNX_INT8)
+
+
+def load_embedder(backend, model_name):
+    if backend == BACKEND_PYTORCH:
+        from sentence_transformers import SentenceTransformer
+        encoder = SentenceTransformer(model_name, device='cpu')
+        encoder.path = None
+        return encoder
+    return OnnxEmbeddingFunction(model_name, quantized=backend == BACKEND_ONNX_INT8)
+
+
+def embed(model, texts):
+    if hasattr(model, 'encode'):
+        return np.asarray(model.encode(texts, normalize_embeddings=True))
+    vectors = np.asarray(model(texts))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def bench_reranker(model_name, runs):
+    print(f"\nReranker: {model_name}")
+    pairs = [(q, p) for q, relevant, distractors in EVAL_SET for p in [relevant] + distractors]
+    request = pairs[:10]  # one /chat request reranks about RERANK_CANDIDATES pairs
+    reference = None
+    print(f"{'backend':<10} {'size MB':>8} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'acc@1':>6} {'MRR':>6} {'max|d|':>8} {'rank rho':>8}")
+    for backend in BACKENDS:
+        try:
+            start = time.perf_counter()
+            model = load_reranker(backend, model_name)
+            load_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"{backend:<10} unavailable: {e}")
+            continue
+        scores = np.asarray(model.predict(pairs), dtype=np.float64).reshape(len(EVAL_SET), 5)
+        ranks = [int((row > row[0]).sum()) + 1 for row in scores]  # relevant passage is column 0
+        acc = sum(r == 1 for r in ranks) / len(ranks)
+        mrr = sum(1.0 / r for r in ranks) / len(ranks)
+        if reference is None and backend == BACKEND_PYTORCH:
+            reference = scores
+        diff = f"{np.abs(scores - reference).max():8.4f}" if reference is not None else f"{'-':>8}"
+        rho = f"{statistics.mean(spearman(a, b) for a, b in zip(scores, reference)):8.3f}" \
+            if reference is not None else f"{'-':>8}"
+        p50, p95 = timed(lambda: model.predict(request), runs)
+        print(f"{backend:<10} {model_size_mb(model):8.1f} {load_seconds:7.1f} {p50:8.1f} {p95:8.1f} "
+              f"{acc:6.2f} {mrr:6.3f} {diff} {rho}")
+
+
+def bench_embedder(model_name, runs):
+    print(f"\nEmbedder: {model_name}")
+    questions = [q for q, _, _ in EVAL_SET]
+    passages = [p for _, relevant, distractors in EVAL_SET for p in [relevant] + distractors]
+    reference = None
+    print(f"{'backend':<10} {'size MB':>8} {'load s':>7} {'q p50 ms':>9} {'32 p50 ms':>10} "
+          f"{'recall@1':>9} {'min cos':>8}")
+    for backend in BACKENDS:
+        try:
+            start = time.perf_counter()
+            model = load_embedder(backend, model_name)
+            load_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"{backend:<10} unavailable: {e}")
+            continue
+        q_vectors, p_vectors = embed(model, questions), embed(model, passages)
+        best = (q_vectors @ p_vectors.T).argmax(axis=1)
+        recall = sum(int(b) == i * 5 for i, b in enumerate(best)) / len(questions)
+        if reference is None and backend == BACKEND_PYTORCH:
+            reference = p_vectors
+        cosine = f"{(p_vectors * reference).sum(axis=1).min():8.4f}" if reference is not None else f"{'-':>8}"
+        query_p50, _ = timed(lambda: embed(model, questions[:1]), runs)
+        batch_p50, _ = timed(lambda: embed(model, passages[:32]), max(3, runs // 5))
+        size = model_size_mb(model) if model.path else model_size_mb(model[0].auto_model)
+        print(f"{backend:<10} {size:8.1f} {load_seconds:7.1f} {query_p50:9.1f} {batch_p50:10.1f} "
+              f"{recall:9.2f} {cosine}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PyTorch, ONNX and ONNX int8 inference")
+    parser.add_argument('--reranker', default=RERANKER_MODEL)
+    parser.add_argument('--embedder', default='sentence-transformers/all-MiniLM-L6-v2')
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--threads', type=int, default=0, help="ONNX intra-op threads (0 = all cores)")
+    parser.add_argument('--skip-reranker', action='store_true')
+    parser.add_argument('--skip-embedder', action='store_true')
+    args = parser.parse_args()
+
+    Config.ONNX_THREADS = args.threads
+    print("=" * 70)
+    print("ONNX Backend Benchmark")
+    print(f"Eval set: {len(EVAL_SET)} questions x 5 passages, {args.runs} timed runs")
+    print(f"Exported models: {Config.ONNX_MODEL_DIR}")
+    print("=" * 70)
+
+    if not args.skip_reranker:
+        bench_reranker(args.reranker, args.runs)
+    if not args.skip_embedder:
+        bench_embedder(args.embedder, args.runs)
+
+
+if __name__ == "__main__":
+    main()
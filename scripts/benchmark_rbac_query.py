@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+RBAC Query Benchmark
+Compares the legacy over-fetch + Python filtering path against the
+role filter pushed down into the ChromaDB query, per role.
+
+Usage:
+    python scripts/benchmark_rbac_query.py [--db PATH] [--n-results 25] [--repeat 3]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.database import DatabaseManager
+from core.permissions import ROLE_FILE_ACCESS, check_file_access
+
+QUERIES = [
+    "What is our leave policy?",
+    "patient lab report results",
+    "quarterly tax filing deadline",
+    "python function for parsing json",
+    "course syllabus and assignments",
+    "employee payroll summary",
+]
+
+
+def legacy_query(db: DatabaseManager, query_text: str, n_results: int, user_role: str):
+    """Previous implementation: fetch n_results * 4 and check each hit in Python"""
+    if db.collection.count() == 0:
+        return []
+
+    search_count = min(n_results * 4, db.collection.count())
+    results = db.collection.query(query_embeddings=[db.embed_query(query_text).tolist()], n_results=search_count)
+
+    chunks = []
+    for i, doc in enumerate(results['documents'][0]):
+        metadata = results['metadatas'][0][i] or {}
+        distance = results['distances'][0][i]
+        if distance >= DatabaseManager.MAX_DISTANCE:
+            continue
+        if user_role and not check_file_access(user_role, metadata.get('domain', 'Unknown'), metadata.get('category')):
+            continue
+        chunks.append(doc)
+    return chunks[:n_results]
+
+
+def timed(fn, repeat: int):
+    """Run fn `repeat` times, return (median_ms, last_result)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RBAC query paths per role")
+    parser.add_argument('--db', default=str(Config.DB_DIR), help="ChromaDB directory")
+    parser.add_argument('--n-results', type=int, default=25)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    db = DatabaseManager(Path(args.db), sharded=False)
+    print("=" * 78)
+    print(f"RBAC QUERY BENCHMARK  (chunks={db.get_count()}, n_results={args.n_results})")
+    print("=" * 78)
+    print(f"{'Role':<12} {'Legacy ms':>10} {'Filter ms':>10} {'Speedup':>8} {'Legacy hits':>12} {'Filter hits':>12}")
+    print("-" * 78)
+
+    for role in ROLE_FILE_ACCESS:
+        legacy_ms, filtered_ms = [], []
+        legacy_hits, filtered_hits = [], []
+
+        for query in QUERIES:
+            ms, chunks = timed(lambda: legacy_query(db, query, args.n_results, role), args.repeat)
+            legacy_ms.append(ms)
+            legacy_hits.append(len(chunks))
+
+            ms, (chunks, _) = timed(lambda: db.query(query, n_results=args.n_results, user_role=role), args.repeat)
+            filtered_ms.append(ms)
+            filtered_hits.append(len(chunks))
+
+        legacy_avg = statistics.mean(legacy_ms)
+        filtered_avg = statistics.mean(filtered_ms)
+        speedup = legacy_avg / filtered_avg if filtered_avg else 0
+        print(f"{role:<12} {legacy_avg:>10.1f} {filtered_avg:>10.1f} {speedup:>7.2f}x "
+              f"{statistics.mean(legacy_hits):>12.1f} {statistics.mean(filtered_hits):>12.1f}")
+
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
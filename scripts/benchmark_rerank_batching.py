@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark Rerank Batching
+Load-tests reranking at 1, 8 and 32 concurrent users, once with every request
+thread calling predict itself (as /chat did) and once through the shared
+RerankBatcher. Reports p50/p99 latency per request and requests per second.
+
+Without --model cross-encoder a simulated model is used: a small two-layer
+network over hashed token features, so batches behave like real matrix
+multiplies without a download. --call-overhead-ms adds a fixed, GIL-holding
+cost per predict call (framework dispatch, DataLoader and tokenizer setup).
+
+Usage:
+    python scripts/benchmark_rerank_batching.py [--users 1 8 32] [--requests 20] [--pairs 10]
+                                                [--model simulated|cross-encoder] [--call-overhead-ms 0]
+                                                [--wait-ms 5] [--max-pairs 32]
+"""
+
+import argparse
+import hashlib
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.rerank_batcher import RerankBatcher
+
+WORDS = ("invoice payment report patient policy parser budget audit schedule contract network "
+         "release summary revenue claim server training quarterly backup license").split()
+
+
+class SimulatedCrossEncoder:
+    """Stand-in with the cost shape of a MiniLM cross-encoder forward pass"""
+
+    def __init__(self, seq_len=128, hidden=384, call_overhead_ms=0.0):
+        rng = np.random.default_rng(0)
+        self.seq_len = seq_len
+        self.call_overhead = call_overhead_ms / 1000.0
+        self.w1 = rng.standard_normal((hidden, hidden * 4)).astype(np.float32) / hidden
+        self.w2 = rng.standard_normal((hidden * 4, hidden)).astype(np.float32) / hidden
+        self.vocab = rng.standard_normal((4096, hidden)).astype(np.float32)
+
+    def _tokenize(self, query, text):
+        ids = [int(hashlib.md5(w.encode()).hexdigest()[:4], 16) % 4096 for w in f"{query} {text}".split()]
+        return (ids + [0] * self.seq_len)[:self.seq_len]
+
+    def predict(self, pairs):
+        deadline = time.perf_counter() + self.call_overhead
+        while time.perf_counter() < deadline:
+            pass
+        tokens = np.array([self._tokenize(q, t) for q, t in pairs])
+        x = self.vocab[tokens]  # (pairs, seq, hidden)
+        h = np.maximum(x @ self.w1, 0) @ self.w2
+        return h.mean(axis=(1, 2))
+
+
+def load_model(args):
+    if args.model == 'cross-encoder':
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2', max_length=512)
+    return SimulatedCrossEncoder(call_overhead_ms=args.call_overhead_ms)
+
+
+def make_requests(n_requests, n_pairs, seed):
+    rng = np.random.default_rng(seed)
+    return [[(' '.join(rng.choice(WORDS, 6)), ' '.join(rng.choice(WORDS, 120))) for _ in range(n_pairs)]
+            for _ in range(n_requests)]
+
+
+def run_load(scorer, users, n_requests, n_pairs):
+    """Closed loop: each user sends its next request when the previous one returns"""
+    latencies = []
+    lock = threading.Lock()
+
+    def user(seed):
+        for pairs in make_requests(n_requests, n_pairs, seed):
+            start = time.perf_counter()
+            scorer(pairs)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=user, args=(seed,)) for seed in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    return {
+        'p50': statistics.median(ordered) * 1000,
+        'p99': ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1000,
+        'rps': len(ordered) / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request predict vs. shared micro-batching reranker")
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=20, help="Requests per user")
+    parser.add_argument('--pairs', type=int, default=10, help="Candidates reranked per request")
+    parser.add_argument('--model', choices=['simulated', 'cross-encoder'], default='simulated')
+    parser.add_argument('--call-overhead-ms', type=float, default=0, help="Simulated model only")
+    parser.add_argument('--wait-ms', type=float, default=5)
+    parser.add_argument('--max-pairs', type=int, default=32)
+    args = parser.parse_args()
+
+    model = load_model(args)
+    model.predict(make_requests(1, args.pairs, 99)[0])  # Warm-up
+
+    print("=" * 72)
+    model_name = args.model if args.model != 'simulated' else f"simulated +{args.call_overhead_ms:g}ms/call"
+    print(f"RERANK LOAD TEST ({model_name}, {args.pairs} pairs/request, {args.requests} requests/user, "
+          f"window {args.wait_ms:g}ms, max {args.max_pairs} pairs)")
+    print("=" * 72)
+    print(f"{'USERS':>5}  {'MODE':<10} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8}  {'batch (req/pairs)':>18}")
+
+    for users in args.users:
+        direct = run_load(model.predict, users, args.requests, args.pairs)
+        print(f"{users:>5}  {'direct':<10} {direct['p50']:>9.1f} {direct['p99']:>9.1f} {direct['rps']:>8.1f}")
+
+        batcher = RerankBatcher(model, max_batch_pairs=args.max_pairs, max_wait_ms=args.wait_ms)
+        batched = run_load(batcher.predict, users, args.requests, args.pairs)
+        stats = batcher.stats()
+        print(f"{users:>5}  {'batched':<10} {batched['p50']:>9.1f} {batched['p99']:>9.1f} {batched['rps']:>8.1f}  "
+              f"{stats['avg_batch_requests']:>8} / {stats['avg_batch_pairs']:<8}")
+        print(f"{'':>5}  {'':<10} {direct['p50'] / batched['p50']:>8.2f}x {direct['p99'] / batched['p99']:>8.2f}x "
+              f"{batched['rps'] / direct['rps']:>7.2f}x")
+
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
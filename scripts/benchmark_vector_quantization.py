@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark Vector Quantization
+Copies the stored chunk embeddings into float32, float16 and int8 NumPy stores
+and reports scan-matrix memory and recall@k against the float32 baseline,
+with and without float32 rescoring of the top candidates.
+
+Usage:
+    python scripts/benchmark_vector_quantization.py [--db PATH] [--queries 200] [--query-file FILE]
+    python scripts/benchmark_vector_quantization.py --synthetic 100000   # no corpus needed
+"""
+
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.database import DatabaseManager
+from core.vector_store import NumpyCollection
+
+
+def load_corpus(args):
+    """(ids, embeddings, query vectors) from the database or a synthetic set"""
+    rng = np.random.default_rng(7)
+    if args.synthetic:
+        vectors = rng.standard_normal((args.synthetic, args.dim)).astype(np.float32)
+        ids = [f"chunk_{i}" for i in range(args.synthetic)]
+        queries = vectors[rng.choice(len(ids), args.queries, replace=False)] + \
+            0.5 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+        return ids, vectors, queries
+
+    db = DatabaseManager(Path(args.db), hybrid_search=False)
+    ids, vectors = [], []
+    for batch in db.iter_batches(1000, include=['embeddings']):
+        ids.extend(batch['ids'])
+        vectors.extend(batch['embeddings'])
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if not ids:
+        print("❌ No embeddings stored - ingest documents or use --synthetic")
+        sys.exit(1)
+
+    if args.query_file:
+        texts = [line.strip() for line in Path(args.query_file).read_text(encoding='utf-8').splitlines() if line.strip()]
+        queries = np.asarray([db.embed_query(text) for text in texts], dtype=np.float32)
+    else:
+        # Stored chunks stand in for questions about them
+        queries = vectors[rng.choice(len(ids), min(args.queries, len(ids)), replace=False)]
+    return ids, vectors, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and recall of quantized embedding storage")
+    parser.add_argument('--db', default=str(Config.DB_DIR), help="Database directory")
+    parser.add_argument('--queries', type=int, default=200, help="Sampled query vectors")
+    parser.add_argument('--query-file', help="Text file with one query per line")
+    parser.add_argument('--n-results', type=int, default=10)
+    parser.add_argument('--rescore', type=int, default=Config.VECTOR_RESCORE_CANDIDATES)
+    parser.add_argument('--synthetic', type=int, default=0, help="Use N random vectors instead of the database")
+    parser.add_argument('--dim', type=int, default=384, help="Dimension for --synthetic")
+    args = parser.parse_args()
+
+    ids, vectors, queries = load_corpus(args)
+    k = args.n_results
+    tmp_dir = Path(tempfile.mkdtemp(prefix="quant_bench_"))
+    try:
+        stores = {}
+        for dtype in NumpyCollection.SCAN_DTYPES:
+            store = NumpyCollection("documents", tmp_dir / dtype, dtype=dtype, rescore_candidates=args.rescore)
+            for start in range(0, len(ids), 5000):
+                store.add(ids=ids[start:start + 5000], embeddings=vectors[start:start + 5000])
+            stores[dtype] = store
+
+        baseline = [[row for row, _ in stores['float32'].search(q, k)] for q in queries]
+
+        print("=" * 86)
+        print(f"VECTOR QUANTIZATION  (chunks={len(ids)}, dim={vectors.shape[1]}, queries={len(queries)}, "
+              f"k={k}, rescore={args.rescore})")
+        print("=" * 86)
+        print(f"{'dtype':<8} {'scan MB':>9} {'saved MB':>9} {'disk MB':>9} "
+              f"{'recall@k':>9} {'+rescore':>9} {'scan ms':>8} {'+rescore ms':>12}")
+        print("-" * 86)
+
+        float32_scan = stores['float32'].storage_bytes()['scan']
+        for dtype, store in stores.items():
+            sizes = store.storage_bytes()
+            recalls, rescored_recalls, scan_ms, rescore_ms = [], [], [], []
+            for query, expected in zip(queries, baseline):
+                start = time.perf_counter()
+                scanned = [row for row, _ in store.search(query, k, rescore=False)]
+                scan_ms.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                rescored = [row for row, _ in store.search(query, k)]
+                rescore_ms.append((time.perf_counter() - start) * 1000)
+
+                recalls.append(len(set(scanned) & set(expected)) / len(expected))
+                rescored_recalls.append(len(set(rescored) & set(expected)) / len(expected))
+
+            mb = 1024 * 1024
+            print(f"{dtype:<8} {sizes['scan'] / mb:>9.1f} {(float32_scan - sizes['scan']) / mb:>9.1f} "
+                  f"{sum(sizes.values()) / mb:>9.1f} {statistics.mean(recalls):>9.4f} "
+                  f"{statistics.mean(rescored_recalls):>9.4f} {statistics.median(scan_ms):>8.2f} "
+                  f"{statistics.median(rescore_ms):>12.2f}")
+
+        print("=" * 86)
+        print("scan MB is what each process keeps resident; it is mapped read-only and shared")
+        print("through the page cache. The float32 copy is read only for the rescored rows.")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
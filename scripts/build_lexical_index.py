@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Build Lexical Index
+Backfills the BM25 keyword index from chunks already stored in ChromaDB.
+New files are indexed automatically by the worker.
+
+Usage:
+    python scripts/build_lexical_index.py [--db PATH] [--batch-size 500]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.database import DatabaseManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the BM25 lexical index")
+    parser.add_argument('--db', default=str(Config.DB_DIR), help="ChromaDB directory")
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    db = DatabaseManager(Path(args.db), hybrid_search=True)
+    total = db.get_count()
+
+    print("=" * 60)
+    print(f"BUILD LEXICAL INDEX ({total} chunks)")
+    print("=" * 60)
+
+    start = time.time()
+    indexed = 0
+    for batch in db.iter_batches(args.batch_size, include=['documents', 'metadatas']):
+        db.lexical_index.add(batch['ids'], batch['documents'], batch['metadatas'])
+        indexed += len(batch['ids'])
+        print(f"   ✓ {indexed}/{total} chunks indexed")
+
+    print("\n" + "=" * 60)
+    print(f"✅ DONE in {time.time() - start:.1f}s - index holds {db.lexical_index.count()} chunks")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Migrate to Domain Shards
+Copies chunks from the active version's single collection (e.g. "documents")
+into one collection per domain (documents__<domain>). Stored embeddings are copied as-is, so nothing
+is re-embedded. Set ENABLE_DOMAIN_SHARDING=true once the copy is verified.
+
+Usage:
+    python scripts/migrate_to_domain_shards.py [--db PATH] [--batch-size 500] [--drop-source]
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.database import DatabaseManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split the documents collection into per-domain shards")
+    parser.add_argument('--db', default=str(Config.DB_DIR), help="ChromaDB directory")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--drop-source', action='store_true', help="Delete the unsharded collection afterwards")
+    args = parser.parse_args()
+
+    source = DatabaseManager(Path(args.db), sharded=False)
+    target = DatabaseManager(Path(args.db), sharded=True)
+    total = source.collection.count()
+
+    print("=" * 60)
+    print(f"MIGRATE TO DOMAIN SHARDS ({total} chunks)")
+    print("=" * 60)
+
+    start = time.time()
+    copied = 0
+    per_domain = defaultdict(int)
+    for offset in range(0, total, args.batch_size):
+        batch = source.collection.get(
+            limit=args.batch_size,
+            offset=offset,
+            include=['documents', 'metadatas', 'embeddings']
+        )
+
+        groups = defaultdict(lambda: {'ids': [], 'documents': [], 'metadatas': [], 'embeddings': []})
+        for i, chunk_id in enumerate(batch['ids']):
+            metadata = batch['metadatas'][i] or {}
+            group = groups[metadata.get('domain', 'Unknown')]
+            group['ids'].append(chunk_id)
+            group['documents'].append(batch['documents'][i])
+            group['metadatas'].append(metadata)
+            group['embeddings'].append(batch['embeddings'][i])
+
+        for domain, group in groups.items():
+            target._collection_for_domain(domain).upsert(**group)
+            per_domain[domain] += len(group['ids'])
+
+        copied += len(batch['ids'])
+        print(f"   ✓ {copied}/{total} chunks copied")
+
+    print("\nChunks per shard:")
+    for domain, count in sorted(per_domain.items()):
+        print(f"   {DatabaseManager.shard_name(domain, source.collection_name):<40} {count:>8}")
+
+    sharded_total = target.get_count()
+    if sharded_total < total:
+        print(f"\n❌ Shards hold {sharded_total} chunks, expected {total} - source kept")
+        sys.exit(1)
+
+    if args.drop_source:
+        source.backend.delete_collection(source.collection_name)
+        print(f"\n   Dropped '{source.collection_name}' collection")
+
+    print("\n" + "=" * 60)
+    print(f"✅ DONE in {time.time() - start:.1f}s - set ENABLE_DOMAIN_SHARDING=true to serve from shards")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Re-embed Index
+Builds a new index version with the configured EMBEDDING_MODEL and chunking
+settings while the active version keeps serving /chat, then swaps it in and
+deletes the old one. Replaces running rebuild_db.py against a live system.
+The same job runs in the worker when started from the admin dashboard.
+
+Usage:
+    python scripts/reembed_index.py [--db PATH] [--batch-files 20] [--grace 30] [--keep-old]
+    python scripts/reembed_index.py --status
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.database import DatabaseManager
+from core.index_versions import IndexRegistry, ReindexJob, make_embedding_function, target_spec, version_summary
+from core.processor import FileProcessor
+
+
+def print_status(registry: IndexRegistry):
+    summary = version_summary(registry)
+    print(f"Active: {summary['active']}  (configured model={summary['target']['embedding_model']}, "
+          f"chunking={summary['target']['chunking']}{', STALE' if summary['stale'] else ''})")
+    print(f"{'VERSION':<16} {'STATUS':<10} {'MODEL':<28} {'CHUNKING':<14} {'FILES':>12} {'CHUNKS':>8} {'CHUNKS/S':>9}")
+    for v in summary['versions']:
+        print(f"{v['name']:<16} {v['status']:<10} {v['embedding_model']:<28} {v['chunking']:<14} "
+              f"{v['files_done']:>5}/{v['files_total']:<6} {v['chunks_done']:>8} {v['chunks_per_second']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed into a new index version and swap it in")
+    parser.add_argument('--db', default=str(Config.DB_DIR), help="Database directory")
+    parser.add_argument('--batch-files', type=int, default=Config.REINDEX_BATCH_FILES)
+    parser.add_argument('--grace', type=float, default=Config.INDEX_VERSION_GRACE_SECONDS,
+                        help="Seconds between the swap and deleting the old version")
+    parser.add_argument('--keep-old', action='store_true', help="Keep the retired version on disk")
+    parser.add_argument('--status', action='store_true', help="Only list versions")
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+    registry = IndexRegistry(db_path / "index_versions.db")
+    if args.status:
+        print_status(registry)
+        return
+
+    spec = target_spec()
+    active = registry.ensure_active()
+    shadow = registry.start_build(spec)
+
+    print("=" * 60)
+    print(f"RE-EMBED {active['name']} -> {shadow['name']}")
+    print(f"   model: {active['embedding_model']} -> {spec['embedding_model']}")
+    print(f"   chunking: {active['chunking']} -> {spec['chunking']}")
+    print("=" * 60)
+
+    source = DatabaseManager(db_path, index_version=active['name'])
+    target = DatabaseManager(db_path, backend=source.backend, index_version=shadow['name'],
+                             embedding_function=make_embedding_function(spec['embedding_model']))
+    processor = FileProcessor()
+
+    def chunker(document):
+        size_mb = document.size_bytes / (1024 * 1024)
+        if size_mb > 10:
+            chunk_size = Config.CHUNK_SIZE_LARGE
+        elif size_mb > 1:
+            chunk_size = Config.CHUNK_SIZE_MEDIUM
+        else:
+            chunk_size = Config.CHUNK_SIZE_SMALL
+        return processor.create_chunks(document, chunk_size=chunk_size)
+
+    start = time.time()
+    result = ReindexJob(source, target, registry, chunker, batch_files=args.batch_files,
+                        grace_seconds=args.grace, keep_old=args.keep_old).run()
+    elapsed = time.time() - start
+
+    print("\n" + "=" * 60)
+    print(f"✅ DONE in {elapsed:.1f}s - {result['files']} files, {result['chunks']} chunks "
+          f"({result['chunks'] / elapsed if elapsed else 0:.1f} chunks/s)")
+    print(f"   Active version: {result['version']} (replaced {result['replaced']})")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
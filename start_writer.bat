@@ -0,0 +1,16 @@
+@echo off
+echo ========================================
+echo DocuMind AI - Ingest Writer
+echo ========================================
+echo.
+echo Activating virtual environment...
+call venv\Scripts\activate.bat
+
+echo.
+echo Starting single vector-store writer...
+echo Set INGEST_WRITER=true for the app, worker and watcher too.
+echo.
+
+set INGEST_WRITER=true
+python ingest_writer.py
+pause
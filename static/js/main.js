@@ -187,6 +187,55 @@ function addMessage(text, sender, citedFiles = [], confidenceScore = null, sourc
     chatContainer.scrollTop = chatContainer.scrollHeight;
 }
 
+// Read the /chat Server-Sent Events stream, showing tokens as they arrive.
+// Resolves with the final 'done' payload (same fields as the JSON reply).
+async function readChatStream(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let draft = null;
+    let final = null;
+
+    const showDraft = (text) => {
+        if (!draft) {
+            loading.classList.remove('active');
+            addMessage('', 'assistant');
+            draft = chatContainer.lastElementChild.querySelector('.message-content');
+        }
+        draft.textContent += text;
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            const payload = data ? JSON.parse(data) : {};
+
+            if (event === 'token') showDraft(payload.text);
+            else if (event === 'done') final = payload;
+            else if (event === 'error') showError(payload.error || 'Error occurred');
+        }
+    }
+
+    // The final frame replaces the draft (it adds the confidence/sources footer and buttons).
+    // A truncated final answer (long full-file replies) keeps the complete streamed text instead.
+    if (final && final.truncated && draft) final.answer = draft.textContent;
+    if (draft) draft.closest('.message').remove();
+    return final;
+}
+
 async function sendMessage() {
     const query = queryInput.value.trim();
     if (!query) return;
@@ -218,19 +267,22 @@ async function sendMessage() {
     try {
         const response = await authFetch('/chat', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ query, chat_id: currentChatId })
+            headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+            body: JSON.stringify({ query, chat_id: currentChatId, stream: true })
         });
 
-        const data = await response.json();
+        if (!response.ok) {
+            const data = await response.json();
+            showError(data.error || 'Error occurred');
+            return;
+        }
 
-        if (response.ok) {
+        const data = await readChatStream(response);
+        if (data) {
             addMessage(data.answer, 'assistant', data.cited_files, data.confidence_score, data.source_snippets);
             showToast('Response received', 'success');
             // Refresh sessions to update titles if first message
             loadChatSessions();
-        } else {
-            showError(data.error || 'Error occurred');
         }
     } catch (error) {
         showError('Failed to connect to server');
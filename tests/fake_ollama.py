@@ -0,0 +1,177 @@
+"""
+Fake Ollama server for tests and benchmarks.
+
+Speaks the parts of the Ollama HTTP API that DocuMind uses (/api/generate,
+streamed and not, /api/tags, /api/ps, /api/version). Each server runs at most
+`parallel` generations at once like OLLAMA_NUM_PARALLEL (the rest queue),
+waits `prefill` seconds before the first token and `token_delay` between
+tokens, and can be switched to answering every request with an HTTP error.
+
+Run standalone:
+    python -m tests.fake_ollama --port 11435 --prefill 0.5 --parallel 1
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllamaServer:
+    """In-process fake Ollama host (use as a context manager)"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, parallel: int = 1, prefill: float = 0.0,
+                 token_delay: float = 0.0, answer: str = "According to policy.txt employees get 25 vacation days."):
+        self.parallel = parallel
+        self.prefill = prefill
+        self.token_delay = token_delay
+        self.answer = answer
+        self.error_status = None  # e.g. 500: every request fails with this status
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._slots = threading.Semaphore(parallel)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeOllamaServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), name="fake-ollama",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeOllamaServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _generation(self, body: dict):
+        """Yield (text, done) pieces while holding one of the server's parallel slots"""
+        with self._slots:
+            with self._lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            try:
+                time.sleep(self.prefill)
+                words = self.answer.split(' ')
+                for i, word in enumerate(words):
+                    if i:
+                        time.sleep(self.token_delay)
+                    yield (word if i == 0 else ' ' + word), False
+                yield '', True
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+    def _final_fields(self, body: dict, started: float) -> dict:
+        prompt = (body.get('system') or '') + (body.get('prompt') or '')
+        return {
+            'done_reason': 'stop',
+            'total_duration': int((time.perf_counter() - started) * 1e9),
+            'load_duration': 0,
+            'prompt_eval_count': max(1, len(prompt) // 4),
+            'prompt_eval_duration': int(self.prefill * 1e9),
+            'eval_count': len(self.answer.split(' ')),
+            'eval_duration': int(self.token_delay * 1e9 * len(self.answer.split(' ')))
+        }
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, so pooled clients reuse connections
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, payload: dict, status: int = 200):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _chunk(self, payload: dict):
+                data = (json.dumps(payload) + '\n').encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _read_body(self) -> dict:
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length) or b'{}')
+
+            def do_GET(self):
+                if fake.error_status:
+                    return self._json({'error': 'fake failure'}, fake.error_status)
+                if self.path == '/api/version':
+                    return self._json({'version': '0.0.0-fake'})
+                if self.path == '/api/tags':
+                    return self._json({'models': [{'model': 'llama3.2:latest', 'name': 'llama3.2:latest'}]})
+                if self.path == '/api/ps':
+                    return self._json({'models': []})
+                self._json({'error': 'not found'}, 404)
+
+            def do_POST(self):
+                body = self._read_body()
+                with fake._lock:
+                    fake.requests += 1
+                if fake.error_status:
+                    return self._json({'error': 'fake failure'}, fake.error_status)
+                if self.path != '/api/generate':
+                    return self._json({'error': 'not found'}, 404)
+                started = time.perf_counter()
+                base = {'model': body.get('model', ''),
+                        'created_at': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')}
+                if body.get('stream', True):
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/x-ndjson')
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+                    for text, done in fake._generation(body):
+                        piece = dict(base, response=text, done=done)
+                        if done:
+                            piece.update(fake._final_fields(body, started))
+                        self._chunk(piece)
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                else:
+                    text = ''.join(text for text, _ in fake._generation(body))
+                    self._json(dict(base, response=text, done=True, **fake._final_fields(body, started)))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for tests and benchmarks")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--parallel', type=int, default=1, help="Generations at once (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument('--prefill', type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument('--token-delay', type=float, default=0.02, help="Seconds between tokens")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.host, args.port, args.parallel, args.prefill, args.token_delay)
+    print(f"Fake Ollama listening on {server.url} (parallel={args.parallel}, prefill={args.prefill}s)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Test cases for the semantic answer cache"""
+import time
+import unittest
+
+from core.answer_cache import AnswerCache
+
+ANSWER = {
+    'answer': 'Employees get 20 days of leave.',
+    'cited_files': ['leave_policy.pdf'],
+    'confidence_score': 80,
+    'source_snippets': [{'filename': 'leave_policy.pdf', 'text': '20 days'}],
+    'detected_language': 'en'
+}
+NO_RESULTS = {
+    'answer': 'No relevant documents found.',
+    'cited_files': [],
+    'confidence_score': 0,
+    'source_snippets': [],
+    'detected_language': 'en'
+}
+
+
+class TestAnswerCache(unittest.TestCase):
+    """Test similarity matching, RBAC isolation and invalidation"""
+
+    def setUp(self):
+        self.cache = AnswerCache(threshold=0.9, ttl=60, negative_ttl=1)
+
+    def test_near_duplicate_query_hits(self):
+        """Similar embeddings for the same role and version should hit"""
+        self.cache.store([1.0, 0.0, 0.1], 'HR', 3, ANSWER)
+        cached = self.cache.lookup([0.98, 0.02, 0.1], 'HR', 3)
+        self.assertEqual(cached['cited_files'], ['leave_policy.pdf'])
+
+    def test_dissimilar_query_misses(self):
+        """Unrelated embeddings should miss"""
+        self.cache.store([1.0, 0.0, 0.0], 'HR', 3, ANSWER)
+        self.assertIsNone(self.cache.lookup([0.0, 1.0, 0.0], 'HR', 3))
+
+    def test_role_isolation(self):
+        """Answers cached for one role must not leak to another"""
+        self.cache.store([1.0, 0.0, 0.0], 'Admin', 3, ANSWER)
+        self.assertIsNone(self.cache.lookup([1.0, 0.0, 0.0], 'Student', 3))
+
+    def test_filter_scope_isolation(self):
+        """Answers computed under metadata filters must not serve other filters"""
+        self.cache.store([1.0, 0.0, 0.0], 'HR', 3, ANSWER, scope='{"file_ext": ["pdf"]}')
+        self.assertIsNone(self.cache.lookup([1.0, 0.0, 0.0], 'HR', 3))
+        self.assertIsNotNone(self.cache.lookup([1.0, 0.0, 0.0], 'HR', 3, scope='{"file_ext": ["pdf"]}'))
+
+    def test_corpus_version_invalidates(self):
+        """A bumped corpus version should invalidate older answers"""
+        self.cache.store([1.0, 0.0, 0.0], 'HR', 3, ANSWER)
+        self.assertIsNone(self.cache.lookup([1.0, 0.0, 0.0], 'HR', 4))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_negative_ttl(self):
+        """Negative results should expire after their own TTL"""
+        self.cache.store([1.0, 0.0, 0.0], 'HR', 3, NO_RESULTS)
+        self.assertIsNotNone(self.cache.lookup([1.0, 0.0, 0.0], 'HR', 3))
+        time.sleep(1.1)
+        self.assertIsNone(self.cache.lookup([1.0, 0.0, 0.0], 'HR', 3))
+
+    def test_eviction_bound(self):
+        """Each role bucket should stay within max_entries_per_role"""
+        cache = AnswerCache(max_entries_per_role=2)
+        for i in range(4):
+            cache.store([float(i == j) for j in range(4)], 'HR', 1, ANSWER)
+        self.assertEqual(cache.stats()['entries'], 2)
+
+    def test_unknown_version_disables_cache(self):
+        """Without a corpus version (Redis down) nothing is cached"""
+        self.cache.store([1.0, 0.0, 0.0], 'HR', None, ANSWER)
+        self.assertIsNone(self.cache.lookup([1.0, 0.0, 0.0], 'HR', None))
+
+
+if __name__ == '__main__':
+    unittest.main()
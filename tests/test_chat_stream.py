@@ -0,0 +1,136 @@
+"""Test cases for streamed chat responses"""
+import json
+import unittest
+
+from core.chat_stream import FullFileAnswer, LatencyTracker, response_events, sse_event, stream_chat
+
+FINAL = {
+    'answer': 'Payment is due in 30 days.\n\n📄 Sources: invoice.pdf',
+    'cited_files': ['invoice.pdf'],
+    'confidence_score': 70,
+    'source_snippets': [{'id': 1, 'filename': 'invoice.pdf', 'text': 'due in 30 days'}],
+    'detected_language': 'en'
+}
+
+
+def llm_events():
+    yield 'sources', {'source_snippets': FINAL['source_snippets'], 'detected_language': 'en'}
+    for piece in ('Payment ', 'is due ', 'in 30 days.'):
+        yield 'token', {'text': piece}
+    yield 'done', FINAL
+
+
+def parse(frames):
+    events = []
+    for frame in frames:
+        event, data = frame.strip().split('\n')
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+class TestChatStream(unittest.TestCase):
+    """SSE framing, persistence at the end of the stream and latency tracking"""
+
+    def setUp(self):
+        self.saved = []
+        self.latency = LatencyTracker(window=10)
+
+    def test_frame_format(self):
+        self.assertEqual(sse_event('token', {'text': 'hé'}), 'event: token\ndata: {"text": "hé"}\n\n')
+
+    def test_sources_then_tokens_then_done(self):
+        events = parse(stream_chat(llm_events(), self.saved.append, latency=self.latency))
+        self.assertEqual([e for e, _ in events], ['sources', 'token', 'token', 'token', 'done'])
+        done = events[-1][1]
+        self.assertEqual(done['cited_files'], ['invoice.pdf'])
+        self.assertLessEqual(done['timings']['ttft_ms'], done['timings']['total_ms'])
+
+    def test_history_saved_when_stream_ends(self):
+        frames = stream_chat(llm_events(), self.saved.append, latency=self.latency)
+        next(frames)
+        self.assertEqual(self.saved, [])
+        list(frames)
+        self.assertEqual(self.saved[0]['answer'], FINAL['answer'])
+
+    def test_disconnect_saves_partial_answer(self):
+        frames = stream_chat(llm_events(), self.saved.append)
+        for _ in range(3):
+            next(frames)
+        frames.close()
+        self.assertEqual(self.saved[0]['answer'], 'Payment is due ')
+        self.assertTrue(self.saved[0]['interrupted'])
+
+    def test_generation_error_becomes_error_frame(self):
+        def failing():
+            yield 'token', {'text': 'Pay'}
+            raise RuntimeError("model crashed")
+
+        events = parse(stream_chat(failing(), self.saved.append))
+        self.assertEqual(events[-1], ('error', {'error': 'model crashed'}))
+        self.assertEqual(self.saved, [])
+
+    def test_complete_response_replayed(self):
+        events = parse(stream_chat(response_events(FINAL), self.saved.append))
+        self.assertEqual(events[1], ('token', {'text': FINAL['answer']}))
+        self.assertEqual(self.saved[0]['confidence_score'], 70)
+
+    def test_latency_summary(self):
+        list(stream_chat(llm_events(), self.saved.append, latency=self.latency))
+        for seconds in (0.1, 0.2, 0.3):
+            self.latency.record('chat_ttft', seconds)
+        summary = self.latency.summary()
+        self.assertEqual(summary['chat_ttft']['count'], 4)
+        self.assertEqual(summary['chat_ttft']['last_ms'], 300.0)
+        self.assertEqual(summary['chat_total']['count'], 1)
+
+
+
+class TestFullFileAnswer(unittest.TestCase):
+    """Retrieved files are streamed piece by piece; chat history keeps a capped copy"""
+
+    def pieces(self, consumed):
+        for i in range(10):
+            consumed.append(i)
+            yield f"line {i}\n" * 10
+
+    def test_pieces_read_lazily_and_streamed_as_tokens(self):
+        consumed = []
+        answer = FullFileAnswer('log.txt', self.pieces(consumed), preview_chars=100, history_chars=10000)
+        self.assertEqual(consumed, [0, 1])  # Just enough for the preview
+        self.assertTrue(answer.preview.endswith('...'))
+        events = list(answer.events())
+        self.assertEqual([e for e, _ in events].count('token'), 12)  # Header, 10 pieces, closing fence
+        self.assertEqual(''.join(d['text'] for e, d in events if e == 'token'), events[-1][1]['answer'])
+        self.assertFalse(events[-1][1]['truncated'])
+
+    def test_history_copy_capped(self):
+        answer = FullFileAnswer('log.txt', self.pieces([]), preview_chars=100, history_chars=200)
+        streamed = ''.join(d['text'] for e, d in answer.events() if e == 'token')
+        saved = answer.response()
+        self.assertTrue(saved['truncated'])
+        self.assertLess(len(saved['answer']), 300)
+        self.assertIn('line 9', streamed)
+        self.assertEqual(saved['source_snippets'][0]['category'], 'Full File')
+
+    def test_json_body(self):
+        answer = FullFileAnswer('a "quoted".txt', iter(['x = "1"\n', 'y = 2']), history_chars=5)
+        reply = json.loads(''.join(answer.json_chunks()))
+        self.assertEqual(reply['answer'], 'Here is the complete content of **a "quoted".txt**:\n\n```\nx = "1"\ny = 2\n```')
+        self.assertTrue(reply['full_file_retrieval'])
+        self.assertNotIn('truncated', reply)
+
+    def test_empty_file_is_falsy(self):
+        self.assertFalse(FullFileAnswer('empty.txt', iter([])))
+
+    def test_interrupted_stream_keeps_capped_partial(self):
+        saved = []
+        frames = stream_chat(((('token', {'text': 'x' * 50}),) * 10), saved.append, keep_chars=100)
+        next(frames)
+        next(frames)
+        next(frames)
+        frames.close()
+        self.assertEqual(len(saved[0]['answer']), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Test cases for the content-hash classification cache"""
+import unittest
+
+from core.category_manager import CategoryManager
+from core.classification_cache import ClassificationCache, classifier_version
+from core.classifier import DocumentClassifier
+
+FILE_HASH = "a" * 64
+
+
+def llm_result(domain="Finance", category="Tax"):
+    return {"domain": domain, "category": category, "file_extension": "pdf", "confidence": 0.85,
+            "domain_score": 80, "category_score": 80, "method": "llm"}
+
+
+class TestClassificationCache(unittest.TestCase):
+    """Lookups by content hash, versioned by classifier and custom categories"""
+
+    def setUp(self):
+        try:
+            import fakeredis
+        except ImportError:
+            self.skipTest("fakeredis not installed")
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.cache = ClassificationCache(self.redis, model="llama3.2", llm_threshold=0.45)
+        self.calls = []
+
+    def classify(self, result):
+        def classify_fn(text, filename):
+            self.calls.append(filename)
+            return dict(result)
+        return classify_fn
+
+    def test_llm_result_reused_for_same_content(self):
+        result, method = self.cache.classify(self.classify(llm_result()), "text", "report.pdf", FILE_HASH)
+        self.assertEqual((result['category'], method), ("Tax", "llm"))
+        result, method = self.cache.classify(self.classify(llm_result("Other")), "text", "Report.PDF", FILE_HASH)
+        self.assertEqual((result['category'], method), ("Tax", "cache"))
+        self.assertEqual(self.calls, ["report.pdf"])
+        stats = ClassificationCache.stats(self.redis)
+        self.assertEqual((stats['hits'], stats['misses'], stats['llm']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_other_filename_or_content_misses(self):
+        self.cache.classify(self.classify(llm_result()), "text", "report.pdf", FILE_HASH)
+        self.cache.classify(self.classify(llm_result()), "text", "copy.pdf", FILE_HASH)
+        self.cache.classify(self.classify(llm_result()), "text", "report.pdf", "b" * 64)
+        self.cache.classify(self.classify(llm_result()), "text", "report.pdf", None)
+        self.assertEqual(len(self.calls), 4)
+
+    def test_failed_llm_fallback_is_not_cached(self):
+        weak = {"domain": "Technology", "category": "Other", "file_extension": "txt", "confidence": 0.2,
+                "method": "rules"}
+        self.cache.classify(self.classify(weak), "text", "notes.txt", FILE_HASH)
+        self.cache.classify(self.classify(weak), "text", "notes.txt", FILE_HASH)
+        self.assertEqual(len(self.calls), 2)
+        strong = dict(weak, confidence=0.9)
+        self.cache.classify(self.classify(strong), "text", "notes.txt", FILE_HASH)
+        self.assertEqual(self.cache.classify(self.classify(weak), "text", "notes.txt", FILE_HASH)[1], 'cache')
+
+    def test_custom_category_change_invalidates(self):
+        self.cache.classify(self.classify(llm_result()), "text", "report.pdf", FILE_HASH)
+        CategoryManager(self.redis).add_category("Finance", "Payroll", ["salary"])
+        self.assertIsNone(self.cache.get(FILE_HASH, "report.pdf"))
+
+    def test_classifier_version_tracks_rules_and_model(self):
+        base = classifier_version("llama3.2", 0.45)
+        self.assertTrue(base.startswith(f"v{DocumentClassifier.VERSION}-"))
+        self.assertNotEqual(base, classifier_version("mistral", 0.45))
+        self.assertNotEqual(base, classifier_version("llama3.2", 0.5))
+        other = ClassificationCache(self.redis, model="mistral", llm_threshold=0.45)
+        self.cache.classify(self.classify(llm_result()), "text", "report.pdf", FILE_HASH)
+        self.assertIsNone(other.get(FILE_HASH, "report.pdf"))
+
+    def test_redis_unavailable_classifies_normally(self):
+        import fakeredis
+        server = fakeredis.FakeServer()
+        server.connected = False  # Every command raises ConnectionError
+        cache = ClassificationCache(fakeredis.FakeRedis(server=server), "llama3.2", 0.45)
+        result, method = cache.classify(self.classify(llm_result()), "text", "report.pdf", FILE_HASH)
+        self.assertEqual((result['category'], method), ("Tax", "llm"))
+        self.assertEqual(ClassificationCache.stats(cache.redis), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Test cases for token-budgeted context packing"""
+import unittest
+
+from core.context_packer import ContextPacker, TokenCounter, split_sentences
+from core.llm import LLMService
+from utils import TextUtils
+
+POLICY = ("Employees receive twenty-five paid vacation days per year. Unused vacation days expire on 31 March. "
+          "Requests are approved by the team lead. The office is closed between Christmas and New Year. "
+          "Sick leave requires a doctor's note from the third day. Parental leave follows the statutory rules. "
+          "Remote work is allowed two days per week. Equipment for home offices is reimbursed up to 300 euros.")
+
+
+def chunk(text, score, filename='policy.txt', **extra):
+    return dict({'chunk_id': f"{filename}_{score}", 'text': text, 'filename': filename,
+                 'relevance_score': score, 'similarity': 0.8, 'distance': 0.4}, **extra)
+
+
+class TestTokenCounter(unittest.TestCase):
+    """Estimated counts stay on the high side of real tokenizers"""
+
+    def test_estimate(self):
+        counter = TokenCounter(tokenizer="")
+        self.assertFalse(counter.exact)
+        self.assertEqual(counter.count(""), 0)
+        # At least one token per word, number group and punctuation mark
+        self.assertGreaterEqual(counter.count("Payment for invoice 1042 is due within thirty days, net."), 13)
+        self.assertEqual(counter.count("2024-03-15"), 6)  # 202|4|-|03|-|15
+
+
+class TestContextPacker(unittest.TestCase):
+    """Budget, de-duplication and trimming"""
+
+    def setUp(self):
+        self.counter = TokenCounter(tokenizer="")
+        self.packer = ContextPacker(self.counter, num_ctx=4096, reserve_answer=768,
+                                    max_chunk_tokens=600, min_chunk_tokens=8)
+
+    def test_everything_fits_unchanged(self):
+        chunks = [chunk("Line one.\nLine two.", 2.0), chunk("Other text here.", 1.0, 'b.txt')]
+        packed, stats = self.packer.pack("vacation days", chunks, budget=1000)
+        self.assertEqual([c['text'] for c in packed], ["Line one.\nLine two.", "Other text here."])
+        self.assertEqual(stats['trimmed_chunks'], 0)
+
+    def test_packs_by_reranker_score(self):
+        chunks = [chunk("Low scoring passage about parking.", -1.0, 'low.txt'),
+                  chunk("High scoring passage about vacation.", 3.0, 'high.txt')]
+        packed, _ = self.packer.pack("vacation", chunks, budget=1000)
+        self.assertEqual([c['filename'] for c in packed], ['high.txt', 'low.txt'])
+
+    def test_overlap_between_chunks_is_removed(self):
+        pieces = TextUtils.chunk_text(POLICY, chunk_size=200, overlap=60)
+        chunks = [chunk(piece, 10.0 - i) for i, piece in enumerate(pieces)]
+        packed, stats = self.packer.pack("vacation days", chunks, budget=2000)
+        self.assertGreater(stats['duplicate_sentences'], 0)
+        joined = ' '.join(c['text'] for c in packed)
+        for sentence in split_sentences(POLICY):
+            self.assertEqual(joined.count(sentence), 1, sentence)
+
+    def test_parent_sections_shared_by_children_are_sent_once(self):
+        chunks = [chunk(POLICY, 3.0, matched_text="Employees receive twenty-five paid vacation days per year."),
+                  chunk(POLICY, 2.0, matched_text="Remote work is allowed two days per week.")]
+        packed, stats = self.packer.pack("vacation days", chunks, budget=2000)
+        self.assertEqual(len(packed), 1)
+        self.assertEqual(stats['dropped_chunks'], 1)
+
+    def test_trims_to_query_relevant_sentences_within_budget(self):
+        packed, stats = self.packer.pack("How many vacation days do employees get?", [chunk(POLICY, 1.0)], budget=30)
+        self.assertEqual(stats['trimmed_chunks'], 1)
+        text = packed[0]['text']
+        self.assertIn("twenty-five paid vacation days", text)
+        self.assertNotIn("Equipment", text)
+        self.assertLessEqual(self.counter.count(text), 30)
+
+    def test_budget_is_respected(self):
+        chunks = [chunk(POLICY, 10.0 - i, f"file{i}.txt") for i in range(5)]
+        chunks = [dict(c, text=c['text'].replace('days', f'days ({i})')) for i, c in enumerate(chunks)]
+        header = lambda i, c: 10
+        packed, stats = self.packer.pack("vacation", chunks, budget=250, source_tokens=header)
+        used = sum(self.counter.count(c['text']) + 1 + 10 for c in packed)
+        self.assertLessEqual(used, 250 + len(packed))
+        self.assertGreater(stats['dropped_chunks'] + stats['trimmed_chunks'], 0)
+
+    def test_unpunctuated_text_is_cut(self):
+        long_text = ' '.join(['vacation'] * 500)
+        packed, _ = self.packer.pack("vacation", [chunk(long_text, 1.0)], budget=50)
+        self.assertLessEqual(self.counter.count(packed[0]['text']), 50)
+
+    def test_answer_tokens_follow_remaining_window(self):
+        self.assertEqual(self.packer.answer_tokens(1000), 1024)
+        self.assertEqual(self.packer.answer_tokens(3400), 4096 - 3400 - 128)
+
+
+class TestPromptWithinWindow(unittest.TestCase):
+    """LLMService prompts plus num_predict fit num_ctx"""
+
+    def setUp(self):
+        self.service = LLMService.__new__(LLMService)
+        self.service.reranker = None
+        self.service.rerank_policy = None
+        self.service.context_packer = ContextPacker(TokenCounter(tokenizer=""))
+        self.service.language_prompts = {'en': "You are a helpful AI assistant."}
+        self.service.detect_query_language = lambda query: 'en'
+
+    def test_prepared_prompt_fits(self):
+        chunks = [chunk(POLICY.replace('days', f'days {i}') * 6, 5.0 - i, f"file{i}.txt") for i in range(5)]
+        prepared = self.service._prepare_generation("How many vacation days do employees get?", chunks)
+        counter = self.service.context_packer.counter
+        prompt_tokens = counter.count(prepared['prompt'])
+        self.assertLessEqual(prompt_tokens + prepared['options']['num_predict'], 4096)
+        self.assertGreaterEqual(prepared['options']['num_predict'], 768)
+        self.assertEqual(len(prepared['source_snippets']), len(prepared['chunks']))
+
+
+if __name__ == '__main__':
+    unittest.main()
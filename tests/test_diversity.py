@@ -0,0 +1,106 @@
+"""Test cases for MMR diversification"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from core.database import DatabaseManager
+from core.diversity import mmr_select
+from core.vector_store import NumpyBackend
+from models.document import DocumentChunk
+from tests.test_domain_shards import HashEmbedding
+
+
+class TestMMRSelect(unittest.TestCase):
+    """Test relevance/novelty trade-off and the per-group cap"""
+
+    def setUp(self):
+        self.query = np.array([1.0, 0.0, 0.0])
+        # Two near-copies of the best hit, then a distinct but slightly weaker one
+        self.embeddings = np.array([
+            [0.95, 0.31, 0.0],
+            [0.95, 0.30, 0.0],
+            [0.94, 0.32, 0.0],
+            [0.90, 0.0, 0.43],
+        ])
+
+    def test_zero_diversity_keeps_relevance_order(self):
+        picks = mmr_select(self.query, self.embeddings, 4, diversity=0.0)
+        scores = (self.embeddings / np.linalg.norm(self.embeddings, axis=1, keepdims=True)) @ self.query
+        self.assertEqual(picks, list(np.argsort(-scores)))
+
+    def test_near_duplicates_are_pushed_down(self):
+        """The distinct chunk should be picked second"""
+        picks = mmr_select(self.query, self.embeddings, 2, diversity=0.3)
+        self.assertEqual(picks[1], 3)
+
+    def test_per_group_cap(self):
+        """No more than per_group_cap items from one file"""
+        groups = ['a.pdf', 'a.pdf', 'a.pdf', 'b.pdf']
+        picks = mmr_select(self.query, self.embeddings, 4, diversity=0.0, groups=groups, per_group_cap=2)
+        self.assertEqual(len(picks), 3)
+        self.assertEqual(sum(groups[i] == 'a.pdf' for i in picks), 2)
+
+    def test_explicit_relevance(self):
+        """Caller-supplied relevance (e.g. fused rank) should drive the first pick"""
+        picks = mmr_select(self.query, self.embeddings, 1, relevance=[0.1, 0.2, 0.3, 1.0])
+        self.assertEqual(picks, [3])
+
+    def test_empty(self):
+        self.assertEqual(mmr_select(self.query, np.empty((0, 3)), 5), [])
+
+
+
+class TestDiversifiedQuery(unittest.TestCase):
+    """MMR inside DatabaseManager.query"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db = DatabaseManager(self.tmp_dir, hybrid_search=True, embedding_function=HashEmbedding(),
+                                  backend=NumpyBackend(self.tmp_dir))
+        chunks = [
+            DocumentChunk(chunk_id=f"long_{i}", document_hash="long", text=f"annual report revenue section {i}",
+                          chunk_index=i, filename="long.pdf", domain="Finance", category="Report",
+                          filepath="/sorted/long.pdf")
+            for i in range(8)
+        ]
+        chunks.append(DocumentChunk(chunk_id="other_0", document_hash="other", text="annual report revenue",
+                                    chunk_index=0, filename="other.pdf", domain="Finance", category="Report",
+                                    filepath="/sorted/other.pdf"))
+        self.db.add_chunks(chunks)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_per_file_cap_applied(self):
+        chunks, _ = self.db.query("annual report revenue", n_results=6, diversify=True)
+        files = [c['filename'] for c in chunks]
+        self.assertLessEqual(files.count('long.pdf'), 3)
+        self.assertIn('other.pdf', files)
+
+    def test_near_duplicates_removed_at_max_rerank_depth(self):
+        """Asking for RERANK_MAX_DEPTH results still leaves MMR room to skip a long run of near-copies"""
+        from config import Config
+        copies = [DocumentChunk(chunk_id=f"copy_{i}", document_hash="copy", text="quarterly revenue",
+                                chunk_index=i, filename="copy.pdf", domain="Finance", category="Report",
+                                filepath="/sorted/copy.pdf")
+                  for i in range(Config.MMR_FETCH_K + 5)]
+        others = [DocumentChunk(chunk_id=f"memo{i}_0", document_hash=f"memo{i}", text=f"quarterly revenue memo {i}",
+                                chunk_index=0, filename=f"memo{i}.pdf", domain="Finance", category="Report",
+                                filepath=f"/sorted/memo{i}.pdf")
+                  for i in range(5)]
+        self.db.add_chunks(copies + others)
+        chunks, _ = self.db.query("quarterly revenue", n_results=Config.RERANK_MAX_DEPTH, diversify=True)
+        files = [c['filename'] for c in chunks]
+        self.assertLessEqual(files.count('copy.pdf'), Config.MMR_PER_FILE_CAP)
+        self.assertTrue(any(f.startswith('memo') for f in files))
+
+    def test_disabled(self):
+        chunks, _ = self.db.query("annual report revenue", n_results=6, diversify=False)
+        self.assertEqual(len(chunks), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
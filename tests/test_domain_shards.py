@@ -0,0 +1,105 @@
+"""Test cases for domain-sharded collections"""
+import hashlib
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from core.database import DatabaseManager
+from core.permissions import ROLE_FILE_ACCESS, clear_permission_cache
+from core.vector_store import ChromaBackend, NumpyBackend
+from models.document import DocumentChunk
+
+
+class HashEmbedding:
+    """Deterministic offline embedding: identical texts get identical vectors"""
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            seed = int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).standard_normal(16)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+
+def make_chunk(chunk_id, text, domain, category):
+    return DocumentChunk(
+        chunk_id=chunk_id,
+        document_hash=chunk_id,
+        text=text,
+        chunk_index=0,
+        filename=f"{chunk_id}.txt",
+        domain=domain,
+        category=category,
+        filepath=f"/sorted/{domain}/{chunk_id}.txt"
+    )
+
+
+class TestDomainShards(unittest.TestCase):
+    """Test routing, fan-out and deletes across shards"""
+
+    backend_class = ChromaBackend
+
+    def setUp(self):
+        clear_permission_cache()
+        self.patcher = patch('core.permissions.get_role_file_permissions',
+                             side_effect=lambda role: ROLE_FILE_ACCESS.get(role, {}))
+        self.patcher.start()
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db = DatabaseManager(self.tmp_dir, hybrid_search=False, embedding_function=HashEmbedding(),
+                                  sharded=True, backend=self.backend_class(self.tmp_dir))
+        self.db.add_chunks([
+            make_chunk('fin', "quarterly invoice totals", 'Finance', 'Invoice'),
+            make_chunk('hc', "patient lab report", 'Healthcare', 'Clinical'),
+            make_chunk('tech', "parse json helper", 'Technology', 'Python'),
+        ])
+
+    def tearDown(self):
+        self.patcher.stop()
+        clear_permission_cache()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_chunks_routed_to_domain_shards(self):
+        """Each domain should get its own collection"""
+        names = set(self.db.backend.list_collection_names())
+        self.assertEqual(names, {DatabaseManager.shard_name(d) for d in ('Finance', 'Healthcare', 'Technology')})
+        self.assertEqual(self.db.get_count(), 3)
+
+    def test_shard_name_is_valid_collection_name(self):
+        """Domain names should be slugged into valid collection names"""
+        self.assertEqual(DatabaseManager.shard_name('Human Resources'), 'documents__human_resources')
+
+    def test_query_only_searches_permitted_shards(self):
+        """A role should never see chunks from other domains"""
+        chunks, _ = self.db.query("patient lab report", n_results=5, user_role='Nurse')
+        self.assertTrue(chunks)
+        self.assertEqual({c['category'] for c in chunks}, {'Clinical'})
+
+        chunks, _ = self.db.query("patient lab report", n_results=5, user_role='Accountant')
+        self.assertNotIn('hc', [c['chunk_id'] for c in chunks])
+
+    def test_admin_fans_out_to_all_shards(self):
+        """Results from every shard should be merged by distance"""
+        chunks, _ = self.db.query("parse json helper", n_results=5, user_role='Admin')
+        self.assertEqual(chunks[0]['chunk_id'], 'tech')
+
+    def test_delete_and_full_file_across_shards(self):
+        """Deletes and reassembly should find chunks in any shard"""
+        self.assertEqual(self.db.get_full_file('fin.txt'), "quarterly invoice totals")
+        self.assertEqual(self.db.delete_by_filepath('/sorted/Healthcare/hc.txt'), 1)
+        self.assertEqual(self.db.get_count(), 2)
+        self.assertFalse(self.db.has_filepath('/sorted/Healthcare/hc.txt'))
+
+
+class TestDomainShardsNumpy(TestDomainShards):
+    """Same behaviour on the in-process NumPy backend"""
+
+    backend_class = NumpyBackend
+
+
+if __name__ == '__main__':
+    unittest.main()
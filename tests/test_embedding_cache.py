@@ -0,0 +1,83 @@
+"""Test cases for the query embedding cache"""
+import unittest
+from unittest.mock import patch
+
+from core.embedding_cache import EmbeddingCache, normalize_query
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Test normalization, LRU behaviour and stats"""
+
+    def setUp(self):
+        self.calls = []
+        self.cache = EmbeddingCache(max_entries=2)
+
+    def embed(self, text):
+        self.calls.append(text)
+        return [float(len(text)), 1.0, 0.0]
+
+    def test_normalization(self):
+        """Case, whitespace and typos should map to the same key"""
+        self.assertEqual(normalize_query("  What is   CIBER security? "), normalize_query("what is cyber security?"))
+
+    def test_identifiers_not_corrected(self):
+        """File names and codes stay literal, so they never share a key with plain words"""
+        self.assertNotEqual(normalize_query("system.py error"), normalize_query("system error"))
+        self.assertEqual(normalize_query("ERR_42 in sytem"), "err_42 in system")
+
+    def test_embeds_query_as_typed(self):
+        """Spell correction only affects the key; the model sees the user's words"""
+        self.cache.get_or_compute("  system.py   Error", self.embed)
+        self.cache.get_or_compute("ciber security", self.embed)
+        self.assertEqual(self.calls, ["system.py error", "ciber security"])
+
+    def test_spelling_variants_keep_their_own_vectors(self):
+        """A hit must return the vector of the text that was asked for, not of a corrected sibling"""
+        typo = self.cache.get_or_compute("ciber security", self.embed)
+        fixed = self.cache.get_or_compute("cyber security", self.embed)
+        self.assertEqual(self.calls, ["ciber security", "cyber security"])
+        self.assertEqual(self.cache.get_or_compute("Ciber  Security", self.embed).tolist(), typo.tolist())
+        self.assertEqual(self.cache.get_or_compute("cyber security", self.embed).tolist(), fixed.tolist())
+        self.assertEqual(len(self.calls), 2)
+
+    def test_repeated_query_hits_cache(self):
+        """Second lookup of an equivalent query should not re-embed"""
+        first = self.cache.get_or_compute("Leave policy", self.embed)
+        second = self.cache.get_or_compute("leave   POLICY", self.embed)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(first.tolist(), second.tolist())
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['hit_rate'], 0.5)
+
+    def test_lru_eviction(self):
+        """Oldest entry should be evicted once max_entries is exceeded"""
+        for query in ("alpha", "beta", "alpha", "gamma"):
+            self.cache.get_or_compute(query, self.embed)
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertGreater(stats['memory_bytes'], 0)
+        # 'beta' was least recently used
+        self.cache.get_or_compute("beta", self.embed)
+        self.assertEqual(self.calls.count("beta"), 2)
+
+    def test_redis_tier_shared_between_instances(self):
+        """A second process-local cache should reuse vectors stored in Redis"""
+        try:
+            import fakeredis
+        except ImportError:
+            self.skipTest("fakeredis not installed")
+
+        server = fakeredis.FakeServer()
+        with patch('redis.Redis.from_url', side_effect=lambda *a, **k: fakeredis.FakeRedis(server=server)):
+            replica_a = EmbeddingCache(redis_url="redis://fake")
+            replica_b = EmbeddingCache(redis_url="redis://fake")
+
+        replica_a.get_or_compute("invoice totals", self.embed)
+        vector = replica_b.get_or_compute("Invoice totals", self.embed)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(vector.tolist(), [14.0, 1.0, 0.0])
+        self.assertEqual(replica_b.stats()['redis_hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
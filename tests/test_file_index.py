@@ -0,0 +1,63 @@
+"""Test cases for the filename -> chunk index"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.file_index import FileIndex
+from models.document import DocumentChunk
+
+
+def make_chunks(filepath, file_hash, count):
+    return [
+        DocumentChunk(
+            chunk_id=f"{file_hash}_{i}",
+            document_hash=file_hash,
+            text=f"chunk {i}",
+            chunk_index=i,
+            filename=Path(filepath).name,
+            domain="Technology",
+            category="Python",
+            filepath=filepath
+        )
+        for i in range(count)
+    ]
+
+
+class TestFileIndex(unittest.TestCase):
+    """Test lookups and deletions"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.index = FileIndex(self.tmp_dir / "file_index.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_lookup_returns_ordered_chunk_ids(self):
+        """Chunk ids should come back in chunk_index order"""
+        chunks = make_chunks("/sorted/Technology/Python/py/Script.py", "h1", 12)
+        self.index.add_chunks(list(reversed(chunks)))
+
+        filepath, chunk_ids = self.index.lookup("Script.py")
+        self.assertEqual(filepath, "/sorted/Technology/Python/py/Script.py")
+        self.assertEqual(chunk_ids, [f"h1_{i}" for i in range(12)])
+
+    def test_lookup_is_case_insensitive(self):
+        """/chat lowercases queries before detecting filenames"""
+        self.index.add_chunks(make_chunks("/sorted/a/MyScript.py", "h1", 1))
+        self.assertIsNotNone(self.index.lookup("myscript.py"))
+
+    def test_unknown_file(self):
+        self.assertIsNone(self.index.lookup("missing.py"))
+
+    def test_delete_by_filepath(self):
+        """Deleted files should disappear from the index"""
+        self.index.add_chunks(make_chunks("/sorted/a/x.py", "h1", 3))
+        self.assertEqual(self.index.delete_by_filepath("/sorted/a/x.py"), 3)
+        self.assertIsNone(self.index.lookup("x.py"))
+        self.assertEqual(self.index.list_filepaths(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
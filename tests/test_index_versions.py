@@ -0,0 +1,151 @@
+"""Test cases for versioned collections and background re-embedding"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from config import Config
+from core.database import DatabaseManager
+from core.index_versions import (LEGACY_CHUNKING_PARAMS, LEGACY_VERSION, IndexRegistry, IndexVersionError,
+                                 ReindexJob, chunking_version, target_spec, version_summary)
+from core.vector_store import NumpyBackend
+from models.document import DocumentChunk
+from tests.test_domain_shards import HashEmbedding
+from utils import TextUtils
+
+FILES = {
+    '/sorted/Finance/Invoice/pdf/2024-03/invoice.pdf': "Invoice 1042 covers consulting hours. Payment is due in thirty days.",
+    '/sorted/Technology/Python/txt/2024-03/notes.txt': "The parser module reads json files. Errors are logged and skipped.",
+}
+
+
+def make_chunks(filepath, text, chunk_size):
+    file_hash = Path(filepath).stem
+    domain, category = Path(filepath).parts[2:4]
+    return [
+        DocumentChunk(chunk_id=f"{file_hash}_{i}", document_hash=file_hash, text=piece, chunk_index=i,
+                      filename=Path(filepath).name, domain=domain, category=category, filepath=filepath,
+                      date_folder='2024-03')
+        for i, piece in enumerate(TextUtils.chunk_text(text, chunk_size, overlap=0))
+    ]
+
+
+def small_chunker(document):
+    """Stand-in for FileProcessor.create_chunks under new chunking settings"""
+    return make_chunks(str(document.filepath), document.text_content, 20)
+
+
+class TestIndexRegistry(unittest.TestCase):
+    """Test version bookkeeping"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.registry = IndexRegistry(self.tmp_dir / "index_versions.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_legacy_collection_registered_as_stale(self):
+        """Data from before versions were tracked is tagged with the old pipeline, so it gets re-embedded"""
+        active = self.registry.ensure_active()
+        self.assertEqual(active['name'], LEGACY_VERSION)
+        self.assertEqual(active['embedding_model'], 'default')
+        self.assertEqual(active['chunking'], chunking_version(LEGACY_CHUNKING_PARAMS))
+        self.assertEqual(self.registry.version_dir(LEGACY_VERSION), self.tmp_dir)
+        self.assertTrue(version_summary(self.registry)['stale'])
+
+    def test_empty_store_starts_on_target_spec(self):
+        self.registry.ensure_active(has_legacy_data=False)
+        self.assertFalse(version_summary(self.registry)['stale'])
+
+    def test_pre_existing_collection_comes_up_stale(self):
+        backend = NumpyBackend(self.tmp_dir)
+        backend.get_or_create_collection(LEGACY_VERSION).add(ids=['old_0'], embeddings=[[1.0, 0.0]],
+                                                             documents=['old chunk'], metadatas=[{'filename': 'a'}])
+        db = DatabaseManager(self.tmp_dir, hybrid_search=False, embedding_function=HashEmbedding(), backend=backend)
+        self.assertEqual(db.collection_name, LEGACY_VERSION)
+        self.assertTrue(version_summary(db.registry)['stale'])
+
+    def test_fresh_store_is_current(self):
+        db = DatabaseManager(self.tmp_dir, hybrid_search=False, embedding_function=HashEmbedding(),
+                             backend=NumpyBackend(self.tmp_dir))
+        self.assertFalse(version_summary(db.registry)['stale'])
+
+    def test_build_resume_and_conflict(self):
+        self.registry.ensure_active()
+        shadow = self.registry.start_build(target_spec())
+        self.assertTrue(shadow['name'].startswith(f"{LEGACY_VERSION}_v"))
+        self.assertEqual(self.registry.start_build(target_spec())['name'], shadow['name'])
+        with self.assertRaises(IndexVersionError):
+            self.registry.start_build({'embedding_model': 'other', 'chunking': 'x'})
+
+    def test_activate_swaps_single_active(self):
+        self.registry.ensure_active()
+        shadow = self.registry.start_build(target_spec())
+        self.assertEqual(self.registry.activate(shadow['name']), LEGACY_VERSION)
+        statuses = {v['name']: v['status'] for v in self.registry.list_versions()}
+        self.assertEqual(statuses, {LEGACY_VERSION: 'retired', shadow['name']: 'active'})
+
+
+class TestReindexJob(unittest.TestCase):
+    """Re-embed into a shadow version while the active one serves"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.backend = NumpyBackend(self.tmp_dir)
+        self.source = DatabaseManager(self.tmp_dir, hybrid_search=False, embedding_function=HashEmbedding(),
+                                      backend=self.backend)
+        for filepath, text in FILES.items():
+            self.source.add_chunks(make_chunks(filepath, text, 1000))
+        self.registry = self.source.registry
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def run_job(self, prepare_target=None):
+        with patch.object(Config, 'EMBEDDING_MODEL', 'hash-v2'):
+            self.assertTrue(version_summary(self.registry)['stale'])
+            shadow = self.registry.start_build(target_spec())
+        target = DatabaseManager(self.tmp_dir, hybrid_search=False, embedding_function=HashEmbedding(),
+                                 backend=self.backend, index_version=shadow['name'])
+        if prepare_target:
+            prepare_target(target)
+        pinned_source = DatabaseManager(self.tmp_dir, hybrid_search=False, embedding_function=HashEmbedding(),
+                                        backend=self.backend, index_version=LEGACY_VERSION)
+        return ReindexJob(pinned_source, target, self.registry, small_chunker, batch_files=1,
+                          grace_seconds=0).run()
+
+    def test_reembed_and_swap(self):
+        result = self.run_job()
+        self.assertEqual((result['replaced'], result['files']), (LEGACY_VERSION, 2))
+        self.assertGreater(result['chunks'], 2)
+
+        version = self.registry.get(result['version'])
+        self.assertEqual((version['status'], version['embedding_model']), ('active', 'hash-v2'))
+        self.assertEqual(version['files_done'], 2)
+
+        # The old collection and its sidecars are garbage-collected
+        self.assertNotIn(LEGACY_VERSION, self.backend.list_collection_names())
+        self.assertFalse((self.tmp_dir / "file_index.db").exists())
+        self.assertEqual(self.registry.get(LEGACY_VERSION)['status'], 'deleted')
+
+    def test_readers_follow_swap(self):
+        result = self.run_job()
+        with patch.object(Config, 'VERSION_REFRESH_SECONDS', 0):
+            chunks, _ = self.source.query("Payment is due in thirty days.", n_results=3, diversify=False)
+        self.assertEqual(self.source.collection_name, result['version'])
+        self.assertTrue(chunks)
+        self.assertTrue(all(len(c['text']) <= 20 for c in chunks))
+
+    def test_catch_up_drops_stale_files(self):
+        """Files gone from the source are removed from the shadow before the swap"""
+        stale = '/sorted/Finance/Invoice/pdf/2024-02/old.pdf'
+        self.run_job(prepare_target=lambda target: target.add_chunks(make_chunks(stale, "old invoice", 1000)))
+        new = DatabaseManager(self.tmp_dir, hybrid_search=False, embedding_function=HashEmbedding(),
+                              backend=self.backend)
+        self.assertEqual(set(new.file_index.list_files()), set(FILES))
+
+
+if __name__ == '__main__':
+    unittest.main()
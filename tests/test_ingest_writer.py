@@ -0,0 +1,137 @@
+"""Test cases for the single-writer ingest service"""
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from core.database import DatabaseManager
+from core.ingest_writer import (IngestClient, IngestWriteError, IngestWriter, LocalWriteQueue, RedisWriteQueue,
+                                decode_chunks, encode_chunks)
+from core.vector_store import NumpyBackend
+from models.document import DocumentChunk
+from tests.test_domain_shards import HashEmbedding
+
+
+def make_file(name, n_chunks=3):
+    return [
+        DocumentChunk(chunk_id=f"{name}_{i}", document_hash=name, text=f"{name} section {i} quarterly totals",
+                      chunk_index=i, filename=f"{name}.txt", domain='Finance', category='Report',
+                      filepath=f"/sorted/{name}.txt", parent_id=f"{name}_p0", parent_text=f"{name} full section")
+        for i in range(n_chunks)
+    ]
+
+
+class TestIngestWriter(unittest.TestCase):
+    """Group commit, ordering and acknowledgements over the in-process queue"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db = DatabaseManager(self.tmp_dir, hybrid_search=True, embedding_function=HashEmbedding(),
+                                  backend=NumpyBackend(self.tmp_dir))
+        self.queue = LocalWriteQueue()
+        self.writer = IngestWriter(self.db, self.queue, commit_window=0.05, idle_flush=0.01)
+        self.client = IngestClient(self.queue, timeout=5)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_adds_coalesced_into_one_commit(self):
+        for name in ('a', 'b', 'c'):
+            self.client.add_chunks(make_file(name), wait=False)
+        self.assertEqual(self.writer.run_once(block_timeout=0.1), 3)
+        self.assertEqual(self.writer.stats['commits'], 1)
+        self.assertEqual(self.db.get_count(), 9)
+        self.assertEqual(self.db.parent_store.count(), 3)
+
+    def test_operations_apply_in_order(self):
+        """A delete between two adds of the same file only removes the first copy"""
+        self.client.add_chunks(make_file('a'), wait=False)
+        # Client deletes wait for their ack, so queue the raw operation
+        self.queue.push({'id': 'del', 'op': 'delete_filepath', 'filepath': '/sorted/a.txt'})
+        self.client.add_chunks(make_file('a', n_chunks=2), wait=False)
+        self.writer.run_once(block_timeout=0.1)
+        self.assertEqual(self.db.get_count(), 2)
+        self.assertEqual(self.queue.wait_ack('del', 1)['count'], 3)
+
+    def test_acknowledgement_reaches_sender(self):
+        stop = threading.Event()
+        thread = threading.Thread(target=self.writer.run_forever, args=(stop,), daemon=True)
+        thread.start()
+        try:
+            ack = self.client.add_chunks(make_file('a'))
+            self.assertEqual((ack['ok'], ack['count']), (True, 3))
+            self.assertEqual(self.client.delete_by_hash('a'), 3)
+        finally:
+            stop.set()
+            thread.join()
+
+    def test_failed_add_only_fails_its_sender(self):
+        self.client.add_chunks(make_file('good'), wait=False)
+        self.queue.push({'id': 'bad', 'op': 'add', 'chunks': [{'chunk_id': 'x'}]})
+        self.writer.run_once(block_timeout=0.1)
+        self.assertFalse(self.queue.wait_ack('bad', 1)['ok'])
+        self.assertEqual(self.db.get_count(), 3)
+
+    def test_missing_ack_raises(self):
+        client = IngestClient(LocalWriteQueue(), timeout=0.05)
+        with self.assertRaises(IngestWriteError):
+            client.add_chunks(make_file('a'))
+
+    def test_parents_sent_once(self):
+        payload = encode_chunks(make_file('a'))
+        self.assertEqual(payload['parents'], {'a_p0': 'a full section'})
+        self.assertNotIn('parent_text', payload['chunks'][0])
+        self.assertEqual(decode_chunks(payload)[2].parent_text, 'a full section')
+
+    def test_reindex_runs_in_writer_process(self):
+        """Re-index requests start the writer's own job; writes keep flowing meanwhile"""
+        release = threading.Event()
+        calls = []
+        self.writer.reindexer = lambda keep_old: (calls.append(keep_old), release.wait(5))
+        self.queue.push({'id': 'r1', 'op': 'reindex', 'keep_old': True})
+        self.queue.push({'id': 'r2', 'op': 'reindex', 'keep_old': False})
+        self.client.add_chunks(make_file('a'), wait=False)
+        self.writer.run_once(block_timeout=0.1)
+        self.assertEqual(self.queue.wait_ack('r1', 1), {'ok': True, 'started': True})
+        self.assertFalse(self.queue.wait_ack('r2', 1)['ok'])  # One job at a time
+        self.assertEqual(self.db.get_count(), 3)
+        release.set()
+        self.writer._reindex_thread.join(1)
+        self.assertEqual(calls, [True])
+
+    def test_reindex_refused_without_runner(self):
+        self.queue.push({'id': 'r', 'op': 'reindex', 'keep_old': False})
+        self.writer.run_once(block_timeout=0.1)
+        self.assertFalse(self.queue.wait_ack('r', 1)['ok'])
+
+    def test_read_only_manager_refuses_writes(self):
+        reader = DatabaseManager(self.tmp_dir, embedding_function=HashEmbedding(), backend=self.db.backend,
+                                 read_only=True)
+        with self.assertRaises(PermissionError):
+            reader.add_chunks(make_file('a'))
+        with self.assertRaises(PermissionError):
+            reader.delete_by_filepath('/sorted/a.txt')
+
+
+class TestRedisWriteQueue(unittest.TestCase):
+    """Same flow through Redis lists"""
+
+    def test_round_trip(self):
+        try:
+            import fakeredis
+        except ImportError:
+            self.skipTest("fakeredis not installed")
+
+        write_queue = RedisWriteQueue(fakeredis.FakeRedis(decode_responses=True), key='test:ops')
+        write_queue.push({'id': '1', 'op': 'delete_ids', 'ids': ['a']})
+        write_queue.push({'id': '2', 'op': 'delete_ids', 'ids': ['b']})
+        self.assertEqual(write_queue.pop(0.1)['id'], '1')
+        self.assertEqual([op['id'] for op in write_queue.pop_many(10)], ['2'])
+        write_queue.ack_many({'1': {'ok': True, 'count': 1}, '2': {'ok': True, 'count': 0}})
+        self.assertEqual(write_queue.wait_ack('2', 0.1), {'ok': True, 'count': 0})
+        self.assertIsNone(write_queue.pop(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Test cases for query language detection"""
+import unittest
+
+from utils.language_detector import LanguageDetector
+
+
+class TestLanguageDetector(unittest.TestCase):
+    """Fast path, seeded model fallback, cache and timing"""
+
+    def setUp(self):
+        self.detector = LanguageDetector(cache_size=100, seed=0)
+
+    def test_short_english_queries(self):
+        # langdetect alone answers it, ca and fr for these
+        for query in ["invoice 1042", "ML models", "list all pdf files", "python parser", "Q3 revenue?"]:
+            self.assertEqual(self.detector.detect_timed(query)[:2], ('en', 'fast'), query)
+
+    def test_stopword_languages(self):
+        cases = {
+            "¿Cuál es el total de la factura?": 'es',
+            "quel est le délai de paiement": 'fr',
+            "Wie viele Urlaubstage gibt es?": 'de',
+            "what was the total in March": 'en',
+            "was ist das Budget": 'de',
+        }
+        for query, language in cases.items():
+            self.assertEqual(self.detector.detect(query), language, query)
+
+    def test_devanagari(self):
+        self.assertEqual(self.detector.detect_timed("छुट्टी के कितने दिन मिलते हैं")[:2], ('hi', 'fast'))
+
+    def test_other_scripts_use_seeded_model(self):
+        language, method, _ = self.detector.detect_timed("Сколько дней отпуска?")
+        self.assertEqual((language, method), ('ru', 'model'))
+        # Deterministic across detector instances
+        self.assertEqual(LanguageDetector(seed=0).detect("Сколько дней отпуска?"), 'ru')
+
+    def test_cache_by_normalized_query(self):
+        self.detector.detect("Wie viele Urlaubstage gibt es?")
+        language, method, seconds = self.detector.detect_timed("wie viele  urlaubstage gibt es?")
+        self.assertEqual((language, method), ('de', 'cache'))
+        self.assertLess(seconds, 0.01)
+        stats = self.detector.stats()
+        self.assertEqual(stats['methods']['cache']['calls'], 1)
+        self.assertEqual(stats['cache_entries'], 1)
+
+    def test_cache_is_bounded(self):
+        detector = LanguageDetector(cache_size=3)
+        for n in range(10):
+            detector.detect(f"invoice {n}")
+        self.assertEqual(detector.stats()['cache_entries'], 3)
+
+    def test_empty_and_symbols(self):
+        self.assertEqual(self.detector.detect(""), 'en')
+        self.assertEqual(self.detector.detect("1042 / 2024-03"), 'en')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Test cases for the BM25 lexical index"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.lexical_index import LexicalIndex
+from models.document import DocumentChunk
+
+
+def make_chunk(chunk_id, text, domain='Finance', category='Invoice', file_hash='h1', filepath='/sorted/a.txt'):
+    return DocumentChunk(
+        chunk_id=chunk_id,
+        document_hash=file_hash,
+        text=text,
+        chunk_index=0,
+        filename=Path(filepath).name,
+        domain=domain,
+        category=category,
+        filepath=filepath
+    )
+
+
+class TestLexicalIndex(unittest.TestCase):
+    """Test keyword indexing, filtering and deletion"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.index = LexicalIndex(self.tmp_dir / "lexical.db")
+        self.index.add_chunks([
+            make_chunk('a_0', "Invoice INV-2024-001 for consulting services"),
+            make_chunk('b_0', "def parse_json(payload): raise ValueError('E1042')", domain='Technology',
+                       category='Python', file_hash='h2', filepath='/sorted/b.py'),
+            make_chunk('c_0', "Invoice INV-2023-777 for hardware", category='Tax', file_hash='h3',
+                       filepath='/sorted/c.txt'),
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_exact_identifier_ranks_first(self):
+        """Hyphenated ids should match as a phrase"""
+        hits = self.index.search("find INV-2024-001", n_results=5)
+        self.assertEqual(hits[0]['chunk_id'], 'a_0')
+
+    def test_snake_case_identifier(self):
+        """Function names should be matched as single tokens"""
+        hits = self.index.search("where is parse_json defined", n_results=5)
+        self.assertEqual([h['chunk_id'] for h in hits], ['b_0'])
+
+    def test_where_filter(self):
+        """Metadata filters should restrict hits"""
+        hits = self.index.search("invoice", n_results=5, where={'category': {'$nin': ['Tax']}})
+        self.assertEqual([h['chunk_id'] for h in hits], ['a_0'])
+
+        hits = self.index.search("invoice", n_results=5, where={'$and': [
+            {'domain': {'$in': ['Finance']}},
+            {'category': {'$in': ['Tax']}},
+        ]})
+        self.assertEqual([h['chunk_id'] for h in hits], ['c_0'])
+
+    def test_delete_keeps_index_in_sync(self):
+        """Deleted chunks should no longer be returned"""
+        self.assertEqual(self.index.delete_by_filepath('/sorted/b.py'), 1)
+        self.assertEqual(self.index.search("parse_json", n_results=5), [])
+        self.assertEqual(self.index.delete_by_hash('h1'), 1)
+        self.assertEqual(self.index.count(), 1)
+
+    def test_reindex_replaces_chunk(self):
+        """Adding an existing chunk_id should replace it"""
+        self.index.add_chunks([make_chunk('a_0', "Updated receipt RCPT-9")])
+        self.assertEqual(self.index.count(), 3)
+        self.assertEqual(self.index.search("INV-2024-001", n_results=5), [])
+
+    def test_punctuation_only_query(self):
+        """Queries without terms should not raise"""
+        self.assertEqual(self.index.search("?? !", n_results=5), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
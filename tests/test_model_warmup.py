@@ -0,0 +1,107 @@
+"""Test cases for Ollama warm-up, keep_alive and cold/warm latency"""
+import unittest
+from unittest.mock import patch
+
+from core.context_packer import ContextPacker, TokenCounter
+from core.llm import LLMService
+from core.model_warmup import ModelLatency, keep_alive_value
+from core.ollama_pool import OllamaPool
+
+SECOND = 1_000_000_000  # Ollama reports durations in nanoseconds
+
+
+def ollama_response(load_s=0.0, prefill_s=0.05, prompt_tokens=40, text="Answer from policy.txt"):
+    return {'response': text, 'done': True, 'load_duration': int(load_s * SECOND),
+            'prompt_eval_duration': int(prefill_s * SECOND), 'prompt_eval_count': prompt_tokens}
+
+
+def make_service():
+    service = LLMService.__new__(LLMService)
+    service.model = "llama3.2"
+    service.reranker = None
+    service.rerank_policy = None
+    service.context_packer = ContextPacker(TokenCounter(tokenizer=""))
+    service.language_prompts = {'en': "You are a helpful AI assistant."}
+    service.detect_query_language = lambda query: 'en'
+    service.keep_alive = "30m"
+    service.model_latency = ModelLatency(window=50, cold_load_ms=500)
+    service.scheduler = None
+    service.client = OllamaPool(["http://127.0.0.1:11434"], health_interval=0)
+    return service
+
+
+class TestModelLatency(unittest.TestCase):
+    """Cold/warm classification from Ollama's load_duration"""
+
+    def test_keep_alive_value(self):
+        self.assertEqual(keep_alive_value("30m"), "30m")
+        self.assertEqual(keep_alive_value("-1"), -1)
+        self.assertEqual(keep_alive_value("600"), 600)
+
+    def test_cold_and_warm(self):
+        latency = ModelLatency(window=50, cold_load_ms=500)
+        self.assertTrue(latency.record(ollama_response(load_s=4.0), 6.0))
+        self.assertFalse(latency.record(ollama_response(load_s=0.01, prompt_tokens=20), 1.2))
+        summary = latency.summary()
+        self.assertEqual((summary['cold_requests'], summary['warm_requests']), (1, 1))
+        self.assertEqual(summary['latency']['cold_total']['last_ms'], 6000.0)
+        self.assertEqual(summary['latency']['warm_total']['last_ms'], 1200.0)
+        self.assertEqual(summary['latency']['model_load']['last_ms'], 4000.0)
+        self.assertEqual(summary['avg_prompt_tokens_evaluated'], 30.0)
+
+
+class TestWarmUpAndPrefix(unittest.TestCase):
+    """Requests keep the model loaded and share a static system prefix"""
+
+    def setUp(self):
+        self.service = make_service()
+        self.calls = []
+
+    def fake_generate(self, **kwargs):
+        self.calls.append(kwargs)
+        return ollama_response()
+
+    def test_warm_up_uses_chat_options(self):
+        with patch.object(self.service.client, 'generate', side_effect=self.fake_generate):
+            self.assertTrue(self.service.warm_up())
+        call = self.calls[0]
+        self.assertEqual(call['keep_alive'], "30m")
+        self.assertEqual(call['options']['num_ctx'], LLMService.GENERATION_OPTIONS['num_ctx'])
+        self.assertEqual(call['options']['num_predict'], 1)
+        self.assertEqual(call['system'], self.service._system_prompt('en'))
+        self.assertTrue(self.service.model_latency.summary()['warmup']['ok'])
+
+    def test_warm_up_failure_is_reported(self):
+        with patch.object(self.service.client, 'generate', side_effect=ConnectionError("connection refused")):
+            self.assertFalse(self.service.warm_up())
+        warmup = self.service.model_latency.summary()['warmup']
+        self.assertFalse(warmup['ok'])
+        self.assertIn("connection refused", warmup['error'])
+
+    def test_static_system_prefix(self):
+        chunks = lambda text: [{'chunk_id': 'a_0', 'text': text, 'filename': 'policy.txt', 'similarity': 0.8,
+                                'distance': 0.4, 'relevance_score': 2.0}]
+        with patch.object(self.service.client, 'generate', side_effect=self.fake_generate):
+            self.service.generate_response("How many vacation days?", chunks("Employees get 25 vacation days."))
+            self.service.generate_response("Who approves leave?", chunks("The team lead approves leave."))
+        first, second = self.calls
+        self.assertEqual(first['system'], second['system'])
+        self.assertIn("CRITICAL RULES", first['system'])
+        self.assertNotIn("CRITICAL RULES", first['prompt'])
+        self.assertTrue(first['prompt'].startswith("Documents:"))
+        self.assertEqual(first['keep_alive'], "30m")
+        self.assertEqual(self.service.model_latency.summary()['warm_requests'], 2)
+
+    def test_stream_records_final_timings(self):
+        pieces = [{'response': "Twenty", 'done': False}, {'response': "-five", 'done': False},
+                  dict(ollama_response(load_s=3.0), response="")]
+        with patch.object(self.service.client, 'generate', return_value=iter(pieces)):
+            events = list(self.service.stream_response("How many vacation days?", [
+                {'chunk_id': 'a_0', 'text': "Employees get 25 vacation days.", 'filename': 'policy.txt',
+                 'similarity': 0.8, 'distance': 0.4}]))
+        self.assertEqual(events[-1][0], 'done')
+        self.assertEqual(self.service.model_latency.summary()['cold_requests'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
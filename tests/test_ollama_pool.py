@@ -0,0 +1,114 @@
+"""Test cases for the pooled, load-balanced Ollama client (against fake Ollama servers)"""
+import asyncio
+import socket
+import threading
+import time
+import unittest
+
+from core.ollama_pool import CLOSED, OPEN, OllamaPool, OllamaUnavailable
+from tests.fake_ollama import FakeOllamaServer
+
+
+def unused_url() -> str:
+    """Address nothing listens on (connection refused)"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+class TestOllamaPool(unittest.TestCase):
+    """Routing, failover, circuit breaking and the sync/async APIs"""
+
+    def setUp(self):
+        self.servers = [FakeOllamaServer(prefill=0.05, answer="Twenty five days.").start() for _ in range(2)]
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+
+    def pool(self, urls=None, **kwargs):
+        options = dict(timeout=5, failure_threshold=2, cooldown=60, health_interval=0)
+        options.update(kwargs)
+        return OllamaPool(urls or [s.url for s in self.servers], **options)
+
+    def test_generate_and_stream(self):
+        pool = self.pool()
+        response = pool.generate(model="llama3.2", prompt="How many vacation days?", stream=False)
+        self.assertEqual(response['response'], "Twenty five days.")
+        self.assertGreater(response.get('prompt_eval_count'), 0)
+        pieces = list(pool.generate(model="llama3.2", prompt="How many vacation days?", stream=True))
+        self.assertEqual(''.join(p['response'] for p in pieces), "Twenty five days.")
+        self.assertTrue(pieces[-1]['done'])
+        self.assertEqual(sum(e['outstanding'] for e in pool.stats()['endpoints']), 0)
+
+    def test_least_outstanding_spreads_concurrent_calls(self):
+        pool = self.pool()
+        threads = [threading.Thread(target=pool.generate, kwargs=dict(model="m", prompt="q", stream=False))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([s.requests for s in self.servers], [2, 2])
+        self.assertEqual([s.max_active for s in self.servers], [1, 1])
+
+    def test_failover_and_breaker(self):
+        dead = unused_url()
+        pool = self.pool([dead, self.servers[0].url])
+        for _ in range(3):
+            self.assertEqual(pool.generate(model="m", prompt="q", stream=False)['response'], "Twenty five days.")
+        endpoints = {e['host']: e for e in pool.stats()['endpoints']}
+        self.assertEqual(endpoints[dead]['state'], OPEN)
+        self.assertEqual(endpoints[dead]['failures'], 2)  # Skipped once the breaker opened
+        self.assertEqual(self.servers[0].requests, 3)
+
+    def test_server_errors_open_breaker_and_half_open_recovers(self):
+        broken = self.servers[0]
+        broken.error_status = 500
+        pool = self.pool([broken.url], failure_threshold=1, cooldown=0.05)
+        with self.assertRaises(Exception):
+            pool.generate(model="m", prompt="q", stream=False)
+        with self.assertRaises(OllamaUnavailable):
+            pool.generate(model="m", prompt="q", stream=False)
+        broken.error_status = None
+        time.sleep(0.06)
+        self.assertEqual(pool.generate(model="m", prompt="q", stream=False)['response'], "Twenty five days.")
+        self.assertEqual(pool.stats()['endpoints'][0]['state'], CLOSED)
+
+    def test_client_errors_do_not_count_against_endpoint(self):
+        self.servers[0].error_status = 404  # e.g. model not pulled
+        pool = self.pool([self.servers[0].url], failure_threshold=1)
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                pool.generate(model="m", prompt="q", stream=False)
+        self.assertEqual(pool.stats()['endpoints'][0]['state'], CLOSED)
+
+    def test_health_check_closes_breaker(self):
+        pool = self.pool(failure_threshold=1)
+        self.servers[0].error_status = 503
+        self.assertEqual(list(pool.check_health().values()), [False, True])
+        self.assertEqual(pool.stats()['available'], 1)
+        self.servers[0].error_status = None
+        pool.check_health()
+        self.assertEqual(pool.stats()['available'], 2)
+
+    def test_async_callers(self):
+        pool = self.pool()
+
+        async def run():
+            responses = await asyncio.gather(*[pool.agenerate(model="m", prompt="q", stream=False) for _ in range(4)])
+            stream = await pool.agenerate(model="m", prompt="q", stream=True)
+            pieces = [piece async for piece in stream]
+            return responses, pieces
+
+        responses, pieces = asyncio.run(run())
+        self.assertEqual({r['response'] for r in responses}, {"Twenty five days."})
+        self.assertEqual(''.join(p['response'] for p in pieces), "Twenty five days.")
+        self.assertEqual(sorted(s.requests for s in self.servers), [2, 3])
+
+    def test_list(self):
+        self.assertTrue(self.pool().list()['models'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""Test cases for Ollama admission control and priority scheduling"""
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from core.ollama_pool import OllamaPool
+from core.ollama_scheduler import BACKGROUND, INTERACTIVE, OllamaBusy, OllamaScheduler
+
+
+class TestOllamaScheduler(unittest.TestCase):
+    """Concurrency limit, priorities, timeouts and metrics over (fake) Redis"""
+
+    def setUp(self):
+        try:
+            import fakeredis
+        except ImportError:
+            self.skipTest("fakeredis not installed")
+        self.server = fakeredis.FakeServer()
+        self.client = lambda: fakeredis.FakeRedis(server=self.server, decode_responses=True)
+
+    def scheduler(self, **kwargs):
+        options = dict(max_concurrency=2, background_slots=1, timeouts={INTERACTIVE: 1, BACKGROUND: 1},
+                       max_queued={INTERACTIVE: 4, BACKGROUND: 4}, lease=60, poll_interval=0.005)
+        options.update(kwargs)
+        return OllamaScheduler(self.client(), **options)
+
+    def test_concurrency_limit_and_release(self):
+        scheduler = self.scheduler()
+        first, second = scheduler.acquire(INTERACTIVE), scheduler.acquire(INTERACTIVE)
+        with self.assertRaises(OllamaBusy) as busy:
+            scheduler.acquire(INTERACTIVE, timeout=0.05)
+        self.assertEqual(busy.exception.reason, "wait timeout")
+        scheduler.release(first)
+        with scheduler.slot(INTERACTIVE) as token:
+            self.assertIsNotNone(token)
+        scheduler.release(second)
+        self.assertEqual(scheduler.stats()['classes'][INTERACTIVE]['running'], 0)
+
+    def test_interactive_admitted_before_background(self):
+        holder = self.scheduler(max_concurrency=1)
+        token = holder.acquire(INTERACTIVE)
+        admitted = []
+
+        def wait(priority):
+            with self.scheduler(max_concurrency=1).slot(priority):
+                admitted.append(priority)
+
+        threads = [threading.Thread(target=wait, args=(BACKGROUND,))]
+        threads[0].start()
+        time.sleep(0.05)  # The background call queues first
+        threads.append(threading.Thread(target=wait, args=(INTERACTIVE,)))
+        threads[1].start()
+        time.sleep(0.05)
+        self.assertEqual(holder.stats()['classes'][BACKGROUND]['queue_depth'], 1)
+        holder.release(token)
+        for thread in threads:
+            thread.join(timeout=2)
+        self.assertEqual(admitted, [INTERACTIVE, BACKGROUND])
+
+    def test_background_cannot_take_every_slot(self):
+        scheduler = self.scheduler()
+        scheduler.acquire(BACKGROUND)
+        with self.assertRaises(OllamaBusy):
+            scheduler.acquire(BACKGROUND, timeout=0.05)
+        self.assertIsNotNone(scheduler.acquire(INTERACTIVE, timeout=0.05))
+
+    def test_full_queue_is_turned_away_at_once(self):
+        scheduler = self.scheduler(max_concurrency=1, max_queued={INTERACTIVE: 1, BACKGROUND: 1})
+        scheduler.acquire(INTERACTIVE)
+        waiter = threading.Thread(target=lambda: self.assertRaises(OllamaBusy, scheduler.acquire, INTERACTIVE, 0.3))
+        waiter.start()
+        time.sleep(0.05)
+        started = time.perf_counter()
+        with self.assertRaises(OllamaBusy) as busy:
+            scheduler.precheck(INTERACTIVE)
+        self.assertEqual(busy.exception.reason, "queue full")
+        self.assertLess(time.perf_counter() - started, 0.05)
+        waiter.join()
+        stats = scheduler.stats()['classes'][INTERACTIVE]
+        self.assertEqual((stats['rejected'], stats['timeouts'], stats['queue_depth']), (1, 1, 0))
+
+    def test_expired_lease_frees_slot(self):
+        scheduler = self.scheduler(max_concurrency=1, lease=0.05)
+        scheduler.acquire(INTERACTIVE)  # Never released, as if the caller crashed
+        self.assertIsNotNone(scheduler.acquire(INTERACTIVE, timeout=0.5))
+
+    def test_wait_histogram(self):
+        scheduler = self.scheduler()
+        for _ in range(3):
+            scheduler.release(scheduler.acquire(INTERACTIVE))
+        stats = scheduler.stats()['classes'][INTERACTIVE]
+        self.assertEqual(stats['admitted'], 3)
+        self.assertEqual(stats['wait_histogram']['le_inf'], 3)
+        counts = list(stats['wait_histogram'].values())
+        self.assertEqual(counts, sorted(counts))  # Cumulative buckets
+
+    def test_redis_unavailable_runs_unscheduled(self):
+        self.server.connected = False
+        scheduler = self.scheduler()
+        with scheduler.slot(INTERACTIVE) as token:
+            self.assertIsNone(token)
+        scheduler.precheck(INTERACTIVE)  # No exception
+        self.assertEqual(scheduler.stats(), {})
+
+
+class TestLLMServiceAdmission(unittest.TestCase):
+    """Busy chat generations surface as OllamaBusy; busy classification falls back to rules"""
+
+    def setUp(self):
+        try:
+            import fakeredis
+        except ImportError:
+            self.skipTest("fakeredis not installed")
+        from core.classifier import DocumentClassifier
+        from core.llm import LLMService
+        self.service = LLMService.__new__(LLMService)
+        self.service.model = "llama3.2"
+        self.service.keep_alive = "30m"
+        self.service.classifier = DocumentClassifier()
+        self.service.reranker = None
+        self.service.rerank_policy = None
+        self.service.context_packer = None
+        self.service.language_prompts = {'en': "You are a helpful AI assistant."}
+        self.service.detect_query_language = lambda query: 'en'
+        self.service.client = OllamaPool(["http://127.0.0.1:11434"], health_interval=0)
+        self.service.scheduler = OllamaScheduler(fakeredis.FakeRedis(decode_responses=True), max_concurrency=1,
+                                                 background_slots=1, timeouts={INTERACTIVE: 0.05, BACKGROUND: 0.05},
+                                                 poll_interval=0.005)
+        self.service.scheduler.acquire(INTERACTIVE)  # Ollama fully booked
+
+    def test_chat_generation_raises_busy(self):
+        chunks = [{'chunk_id': 'a_0', 'text': "Employees get 25 vacation days.", 'filename': 'policy.txt',
+                   'similarity': 0.8, 'distance': 0.4}]
+        with patch.object(self.service.client, 'generate') as generate:
+            with self.assertRaises(OllamaBusy):
+                self.service.generate_response("How many vacation days?", chunks)
+            events = self.service.stream_response("How many vacation days?", chunks)
+            self.assertRaises(OllamaBusy, next, events)
+        generate.assert_not_called()
+
+    def test_classification_skipped_when_busy(self):
+        with patch.object(self.service.client, 'generate') as generate:
+            self.assertIsNone(self.service._classify_with_llm("quarterly tax report", "report.txt"))
+        generate.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Test cases for the ONNX Runtime backends"""
+import json
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from config import Config
+from core import index_versions, onnx_models
+from core.index_versions import embedding_model_id, make_embedding_function
+from core.onnx_models import (BACKEND_ONNX, BACKEND_ONNX_INT8, BACKEND_PYTORCH, INT8_MODEL_FILE, MODEL_FILE,
+                              PIPELINE_FILE, ensure_model, load_reranker, model_dir, quantize_model)
+
+
+def write_matmul_model(path: Path, size: int = 64) -> np.ndarray:
+    """Tiny y = x @ W graph, big enough for the quantizer to touch"""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+    weights = np.random.default_rng(0).standard_normal((size, size)).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node('MatMul', ['x', 'W'], ['y'])], 'matmul',
+        [helper.make_tensor_value_info('x', TensorProto.FLOAT, ['batch', size])],
+        [helper.make_tensor_value_info('y', TensorProto.FLOAT, ['batch', size])],
+        initializer=[numpy_helper.from_array(weights, 'W')])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 14)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return weights
+
+
+class TestEmbeddingModelId(unittest.TestCase):
+    """The backend is part of the index version's model id"""
+
+    def test_pytorch_keeps_plain_name(self):
+        self.assertEqual(embedding_model_id('all-MiniLM-L6-v2', BACKEND_PYTORCH), 'all-MiniLM-L6-v2')
+
+    def test_onnx_suffix(self):
+        self.assertEqual(embedding_model_id('all-MiniLM-L6-v2', BACKEND_ONNX), 'all-MiniLM-L6-v2@onnx')
+        self.assertEqual(embedding_model_id('all-MiniLM-L6-v2', BACKEND_ONNX_INT8), 'all-MiniLM-L6-v2@onnx-int8')
+
+    def test_default_model_is_already_onnx(self):
+        self.assertEqual(embedding_model_id('default', BACKEND_ONNX), 'default')
+        self.assertEqual(embedding_model_id('default', BACKEND_ONNX_INT8), 'default@onnx-int8')
+
+    def test_backend_change_makes_index_stale(self):
+        with patch.object(Config, 'EMBEDDING_MODEL', 'default'), \
+                patch.object(Config, 'INFERENCE_BACKEND', BACKEND_ONNX_INT8):
+            self.assertEqual(index_versions.target_spec()['embedding_model'], 'default@onnx-int8')
+
+    def test_embedding_function_falls_back(self):
+        with patch.object(index_versions, 'OnnxEmbeddingFunction', side_effect=RuntimeError("no export")):
+            function = make_embedding_function('default@onnx-int8')
+        self.assertIsInstance(function, index_versions.embedding_functions.ONNXMiniLM_L6_V2)
+
+
+class TestLoadReranker(unittest.TestCase):
+    """Backend selection and PyTorch fallback"""
+
+    def setUp(self):
+        self.fake_st = types.ModuleType('sentence_transformers')
+        self.fake_st.CrossEncoder = lambda name, max_length: ('pytorch', name)
+
+    def test_onnx_backend(self):
+        with patch.object(onnx_models, 'OnnxCrossEncoder') as onnx_cls:
+            reranker = load_reranker('some/model', BACKEND_ONNX_INT8)
+        onnx_cls.assert_called_once_with('some/model', quantized=True)
+        self.assertIs(reranker, onnx_cls.return_value)
+
+    def test_falls_back_to_pytorch(self):
+        with patch.object(onnx_models, 'OnnxCrossEncoder', side_effect=RuntimeError("no export")), \
+                patch.dict(sys.modules, {'sentence_transformers': self.fake_st}):
+            self.assertEqual(load_reranker('some/model', BACKEND_ONNX), ('pytorch', 'some/model'))
+
+    def test_pytorch_backend_skips_onnx(self):
+        with patch.object(onnx_models, 'OnnxCrossEncoder') as onnx_cls, \
+                patch.dict(sys.modules, {'sentence_transformers': self.fake_st}):
+            self.assertEqual(load_reranker('some/model', BACKEND_PYTORCH), ('pytorch', 'some/model'))
+        onnx_cls.assert_not_called()
+
+
+class TestQuantization(unittest.TestCase):
+    """int8 export of an already exported model"""
+
+    def setUp(self):
+        try:
+            import onnx  # noqa: F401
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            self.skipTest("onnx / onnxruntime not installed")
+        self.tmp = Path(tempfile.mkdtemp())
+        self.original_dir = Config.ONNX_MODEL_DIR
+        Config.ONNX_MODEL_DIR = self.tmp
+
+    def tearDown(self):
+        Config.ONNX_MODEL_DIR = self.original_dir
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_quantized_model_is_smaller_and_close(self):
+        import onnxruntime as ort
+        weights = write_matmul_model(self.tmp / MODEL_FILE)
+        quantize_model(self.tmp / MODEL_FILE, self.tmp / INT8_MODEL_FILE)
+        self.assertLess((self.tmp / INT8_MODEL_FILE).stat().st_size, (self.tmp / MODEL_FILE).stat().st_size)
+
+        x = np.random.default_rng(1).standard_normal((4, weights.shape[0])).astype(np.float32)
+        session = ort.InferenceSession(str(self.tmp / INT8_MODEL_FILE), sess_options=onnx_models.session_options(),
+                                       providers=['CPUExecutionProvider'])
+        result = session.run(None, {'x': x})[0]
+        expected = x @ weights
+        self.assertLess(np.abs(result - expected).max() / np.abs(expected).max(), 0.05)
+
+    def test_ensure_model_reuses_export(self):
+        target = model_dir('reranker', 'org/model')
+        target.mkdir(parents=True)
+        write_matmul_model(target / MODEL_FILE)
+        (target / PIPELINE_FILE).write_text(json.dumps({'kind': 'reranker'}))
+
+        with patch.object(onnx_models, '_export_cross_encoder') as export:
+            self.assertEqual(ensure_model('reranker', 'org/model', quantized=False), target / MODEL_FILE)
+            self.assertEqual(ensure_model('reranker', 'org/model', quantized=True), target / INT8_MODEL_FILE)
+        export.assert_not_called()
+        self.assertTrue((target / INT8_MODEL_FILE).exists())
+        self.assertEqual(target.name, 'reranker--org--model')
+
+    def test_failed_export_leaves_nothing_behind(self):
+        with patch.object(onnx_models, '_export_cross_encoder', side_effect=onnx_models.OnnxExportError("boom")):
+            with self.assertRaises(onnx_models.OnnxExportError):
+                ensure_model('reranker', 'org/model', quantized=True)
+        self.assertEqual(list(self.tmp.iterdir()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
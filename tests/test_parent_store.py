@@ -0,0 +1,128 @@
+"""Test cases for small-to-big (parent document) retrieval"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.database import DatabaseManager
+from core.parent_store import ParentStore
+from core.vector_store import NumpyBackend
+from models.document import DocumentChunk
+from tests.test_domain_shards import HashEmbedding
+
+SECTIONS = [
+    "Quarterly revenue grew in every region. The board approved the new budget for the coming year.",
+    "Employee onboarding covers laptop setup. Badge access and the security training schedule follow.",
+]
+
+
+def make_children(file_hash='abc', filepath='/sorted/report.pdf'):
+    """Two parent sections, each split into two child passages"""
+    chunks = []
+    for parent_index, section in enumerate(SECTIONS):
+        cut = section.index('. ') + 1
+        for text in (section[:cut], section[cut:].strip()):
+            i = len(chunks)
+            chunks.append(DocumentChunk(
+                chunk_id=f"{file_hash}_{i}", document_hash=file_hash, text=text, chunk_index=i,
+                filename=Path(filepath).name, domain='Finance', category='Report', filepath=filepath,
+                parent_id=f"{file_hash}_p{parent_index}", parent_index=parent_index, parent_text=section
+            ))
+    return chunks
+
+
+class TestParentStore(unittest.TestCase):
+    """Test the parent sidecar table"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.store = ParentStore(self.tmp_dir / "parent_store.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_parents_stored_once(self):
+        self.assertEqual(self.store.add_chunks(make_children()), 2)
+        self.assertEqual(self.store.count(), 2)
+        self.assertEqual(self.store.get_many(['abc_p1']), {'abc_p1': SECTIONS[1]})
+        self.assertEqual(list(self.store.iter_file('/sorted/report.pdf')), SECTIONS)
+
+    def test_delete(self):
+        self.store.add_chunks(make_children())
+        self.store.add_chunks(make_children('def', '/sorted/other.pdf'))
+        self.assertEqual(self.store.delete_by_hash('abc'), 2)
+        self.assertFalse(self.store.has_file('/sorted/report.pdf'))
+        self.assertEqual(self.store.delete_by_filepath('/sorted/other.pdf'), 2)
+        self.assertEqual(self.store.count(), 0)
+
+    def test_chunks_without_parents_ignored(self):
+        chunk = DocumentChunk(chunk_id='x_0', document_hash='x', text='t', chunk_index=0, filename='x.txt',
+                              domain='D', category='C', filepath='/x.txt')
+        self.assertEqual(self.store.add_chunks([chunk]), 0)
+        self.assertNotIn('parent_id', chunk.to_metadata())
+
+
+class TestParentExpansion(unittest.TestCase):
+    """Children are searched, parents are handed to the LLM"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db = DatabaseManager(self.tmp_dir, hybrid_search=False, embedding_function=HashEmbedding(),
+                                  backend=NumpyBackend(self.tmp_dir))
+        self.db.add_chunks(make_children())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_search_returns_children(self):
+        chunks, _ = self.db.query("badge access security training", n_results=4, diversify=False)
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(all(c['parent_id'] for c in chunks))
+        self.assertNotIn(chunks[0]['text'], SECTIONS)
+
+    def test_expand_collapses_siblings(self):
+        chunks, _ = self.db.query("badge access security training", n_results=4, diversify=False)
+        expanded = self.db.expand_to_parents(chunks)
+        self.assertEqual(sorted(c['text'] for c in expanded), sorted(SECTIONS))
+        self.assertEqual(expanded[0]['matched_text'], chunks[0]['text'])
+        self.assertEqual(expanded[0]['chunk_id'], chunks[0]['chunk_id'])
+
+    def test_full_file_from_parents(self):
+        self.assertEqual(self.db.get_full_file('report.pdf'), '\n'.join(SECTIONS))
+
+    def test_delete_removes_parents(self):
+        self.db.delete_by_filepath('/sorted/report.pdf')
+        self.assertEqual(self.db.parent_store.count(), 0)
+
+    def test_delete_by_ids_removes_childless_parents(self):
+        """A parent goes once its last child is deleted, not before"""
+        self.db.delete_by_ids(['abc_0'])
+        self.assertEqual(self.db.parent_store.count(), 2)
+        self.db.delete_by_ids(['abc_1'])
+        self.assertEqual(list(self.db.parent_store.get_many(['abc_p0', 'abc_p1'])), ['abc_p1'])
+        self.db.delete_by_ids(['abc_2', 'abc_3'])
+        self.assertEqual(self.db.parent_store.count(), 0)
+        self.assertFalse(self.db.parent_store.has_file('/sorted/report.pdf'))
+
+    def test_delete_by_ids_counts_only_existing_chunks(self):
+        self.assertEqual(self.db.delete_by_ids(['abc_0', 'abc_0', 'missing']), 1)
+        self.assertEqual(self.db.delete_by_ids(['missing']), 0)
+        self.assertEqual(self.db.get_count(), 3)
+
+    def test_sidecars_purged_without_vectors(self):
+        """Rows left behind by an earlier partial delete are removed on the next delete"""
+        for collection in self.db._collections():
+            collection.delete(where={"filepath": "/sorted/report.pdf"})  # Vectors gone, sidecars not
+        self.assertEqual(self.db.delete_by_filepath('/sorted/report.pdf'), 0)
+        self.assertEqual(self.db.parent_store.count(), 0)
+        self.assertIsNone(self.db.file_index.lookup('report.pdf'))
+        self.db.add_chunks(make_children())
+        for collection in self.db._collections():
+            collection.delete(where={"file_hash": "abc"})
+        self.assertEqual(self.db.delete_by_hash('abc'), 0)
+        self.assertEqual(self.db.parent_store.count(), 0)
+        self.assertEqual(self.db.file_index.count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Test cases for RBAC role filter compilation"""
+import unittest
+from unittest.mock import patch
+
+from core import permissions
+from core.permissions import ROLE_FILE_ACCESS, ROLE_FILTER_DENY_ALL, build_role_filter, clear_permission_cache
+
+
+class TestBuildRoleFilter(unittest.TestCase):
+    """Role permissions should compile into equivalent ChromaDB where clauses"""
+
+    def setUp(self):
+        # Use the hardcoded defaults instead of data/users.db
+        patcher = patch.object(permissions, 'get_role_file_permissions', side_effect=lambda r: ROLE_FILE_ACCESS.get(r, {}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clear_permission_cache)
+        permissions._compile_role_filter.cache_clear()
+
+    def test_admin_has_no_filter(self):
+        """Wildcard domains should not produce a filter"""
+        self.assertIsNone(build_role_filter('Admin'))
+
+    def test_unknown_role_denied(self):
+        """Unknown roles should match nothing"""
+        self.assertEqual(build_role_filter('Ghost'), ROLE_FILTER_DENY_ALL)
+
+    def test_domain_and_denied_categories(self):
+        """Roles with only a deny-list should use $nin"""
+        where = build_role_filter('Doctor')
+        self.assertEqual(where, {'domain': {'$in': ['Healthcare', 'ResearchPaper']}})
+
+        where = build_role_filter('Developer')
+        self.assertEqual(where, {'$and': [
+            {'domain': {'$in': ['Technology', 'Code', 'Documentation']}},
+            {'category': {'$nin': ['Finance', 'HR', 'Personal']}},
+        ]})
+
+    def test_allowed_categories_minus_denied(self):
+        """An allow-list should drop categories that are also denied"""
+        where = build_role_filter('HR')
+        self.assertEqual(where, {'$and': [
+            {'domain': {'$in': ['Company']}},
+            {'category': {'$in': ['HR', 'Payroll']}},
+        ]})
+
+    def test_returned_filter_is_a_copy(self):
+        """Mutating a returned filter must not corrupt the cache"""
+        where = build_role_filter('Nurse')
+        where['$and'].append({'filename': 'x'})
+        self.assertEqual(len(build_role_filter('Nurse')['$and']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Test cases for structured query filters"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from core.database import DatabaseManager
+from core.permissions import ROLE_FILE_ACCESS, clear_permission_cache
+from core.query_filters import (QueryFilterError, build_filter_clause, combine_where,
+                                filters_cache_key, parse_query_filters)
+from core.vector_store import NumpyBackend
+from models.document import DocumentChunk
+from tests.test_domain_shards import HashEmbedding
+
+
+def make_chunk(chunk_id, domain, category, ext, date_folder, uploader=''):
+    return DocumentChunk(
+        chunk_id=chunk_id,
+        document_hash=chunk_id,
+        text="invoice payment summary",
+        chunk_index=0,
+        filename=f"{chunk_id}.{ext}",
+        domain=domain,
+        category=category,
+        filepath=f"/sorted/{domain}/{category}/{ext}/{date_folder}/{chunk_id}.{ext}",
+        file_ext=ext,
+        date_folder=date_folder,
+        uploaded_by=uploader
+    )
+
+
+class TestParseQueryFilters(unittest.TestCase):
+    """Test validation and compilation"""
+
+    def test_normalization(self):
+        """Scalars become lists and extensions are lowercased without dots"""
+        filters = parse_query_filters({'domain': 'Finance', 'file_ext': ['.PDF', 'docx'], 'date_from': '2024-03'})
+        self.assertEqual(filters, {'domain': ['Finance'], 'file_ext': ['pdf', 'docx'], 'date_from': '2024-03'})
+
+    def test_empty_filters(self):
+        self.assertEqual(parse_query_filters(None), {})
+        self.assertEqual(parse_query_filters({'domain': '', 'category': []}), {})
+        self.assertIsNone(build_filter_clause({}))
+
+    def test_invalid_filters_rejected(self):
+        """Unknown keys and malformed values should raise"""
+        for raw in ({'owner': 'bob'}, {'date_from': 'March'}, {'date_to': '2024-13'},
+                    {'file_ext': 'p.d.f'}, {'domain': ['x'] * 21}, {'category': 5},
+                    {'date_from': '2024-05', 'date_to': '2024-01'}, ['domain']):
+            with self.assertRaises(QueryFilterError, msg=raw):
+                parse_query_filters(raw)
+
+    def test_clause(self):
+        """Filters should compile to one flat $and"""
+        clause = build_filter_clause(parse_query_filters({'category': 'Invoice', 'date_from': '2024-03',
+                                                          'date_to': '2024-03'}))
+        self.assertEqual(clause, {'$and': [
+            {'category': {'$in': ['Invoice']}},
+            {'date_month': {'$gte': 202403}},
+            {'date_month': {'$lte': 202403}},
+        ]})
+        self.assertEqual(combine_where({'domain': 'x'}, None), {'domain': 'x'})
+        self.assertEqual(len(combine_where({'$and': [{'a': 1}, {'b': 2}]}, clause)['$and']), 5)
+
+    def test_cache_key_is_order_independent(self):
+        self.assertEqual(filters_cache_key({'domain': ['A'], 'file_ext': ['pdf']}),
+                         filters_cache_key({'file_ext': ['pdf'], 'domain': ['A']}))
+        self.assertEqual(filters_cache_key({}), '')
+
+
+class TestFilteredQuery(unittest.TestCase):
+    """Filters combined with RBAC in DatabaseManager.query"""
+
+    def setUp(self):
+        clear_permission_cache()
+        self.patcher = patch('core.permissions.get_role_file_permissions',
+                             side_effect=lambda role: ROLE_FILE_ACCESS.get(role, {}))
+        self.patcher.start()
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db = DatabaseManager(self.tmp_dir, embedding_function=HashEmbedding(),
+                                  backend=NumpyBackend(self.tmp_dir))
+        self.db.add_chunks([
+            make_chunk('mar_pdf', 'Finance', 'Invoice', 'pdf', '2024-03', 'alice'),
+            make_chunk('mar_xlsx', 'Finance', 'Invoice', 'xlsx', '2024-03'),
+            make_chunk('jan_pdf', 'Finance', 'Invoice', 'pdf', '2024-01'),
+            make_chunk('hc_pdf', 'Healthcare', 'Clinical', 'pdf', '2024-03'),
+        ])
+
+    def tearDown(self):
+        self.patcher.stop()
+        clear_permission_cache()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def ids(self, filters, role='Admin'):
+        chunks, _ = self.db.query("invoice payment summary", n_results=10, user_role=role,
+                                  filters=parse_query_filters(filters))
+        return sorted(c['chunk_id'] for c in chunks)
+
+    def test_metadata_stored(self):
+        metadata = self.db.backend.get_or_create_collection('documents').get(ids=['mar_pdf'])['metadatas'][0]
+        self.assertEqual((metadata['file_ext'], metadata['date_month'], metadata['uploaded_by']),
+                         ('pdf', 202403, 'alice'))
+
+    def test_filters_narrow_results(self):
+        self.assertEqual(self.ids({'domain': 'Finance', 'file_ext': 'pdf'}), ['jan_pdf', 'mar_pdf'])
+        self.assertEqual(self.ids({'category': 'Invoice', 'date_from': '2024-03', 'date_to': '2024-03'}),
+                         ['mar_pdf', 'mar_xlsx'])
+        self.assertEqual(self.ids({'uploaded_by': 'alice'}), ['mar_pdf'])
+
+    def test_filters_cannot_widen_rbac(self):
+        """Filtering on a forbidden domain should return nothing"""
+        self.assertEqual(self.ids({'domain': 'Healthcare'}, role='Accountant'), [])
+        chunks, rbac_filtered = self.db.query("invoice payment summary", n_results=10, user_role='Accountant',
+                                              filters=parse_query_filters({'domain': 'Healthcare'}))
+        self.assertTrue(rbac_filtered)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Test cases for the micro-batching reranker"""
+import threading
+import unittest
+
+from core.rerank_batcher import RerankBatcher
+
+
+class LengthModel:
+    """Scores a pair by text length and records every predict call"""
+
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+
+    def predict(self, pairs):
+        if self.gate:
+            self.gate.wait()
+        self.calls.append(len(pairs))
+        return [float(len(text)) for _, text in pairs]
+
+
+class TestRerankBatcher(unittest.TestCase):
+    """Batching, per-request results and error propagation"""
+
+    def test_scores_match_direct_predict(self):
+        batcher = RerankBatcher(LengthModel(), max_batch_pairs=64, max_wait_ms=1)
+        pairs = [('q', 'a'), ('q', 'abc'), ('q', 'ab')]
+        self.assertEqual(batcher.predict(pairs, timeout=5), [1.0, 3.0, 2.0])
+
+    def test_concurrent_requests_share_a_batch(self):
+        model = LengthModel()
+        batcher = RerankBatcher(model, max_batch_pairs=64, max_wait_ms=200)
+        futures = [batcher.submit([('q', 'y' * i)] * 3) for i in range(1, 5)]
+        self.assertEqual([f.result(timeout=5) for f in futures], [[float(i)] * 3 for i in range(1, 5)])
+        self.assertEqual(model.calls, [12])
+        self.assertEqual(batcher.stats()['avg_batch_requests'], 4)
+
+    def test_requests_not_split_over_max_batch(self):
+        gate = threading.Event()
+        model = LengthModel(gate)
+        batcher = RerankBatcher(model, max_batch_pairs=10, max_wait_ms=50)
+        futures = [batcher.submit([('q', 'z')] * 4) for _ in range(5)]
+        gate.set()
+        for future in futures:
+            self.assertEqual(future.result(timeout=5), [1.0] * 4)
+        self.assertTrue(all(n % 4 == 0 and n <= 10 for n in model.calls))
+        self.assertEqual(sum(model.calls), 20)
+
+    def test_model_error_reaches_every_caller(self):
+        class Broken:
+            def predict(self, pairs):
+                raise RuntimeError("out of memory")
+
+        batcher = RerankBatcher(Broken(), max_batch_pairs=64, max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.predict([('q', 'a')], timeout=5)
+        # The batcher thread survives the failure
+        batcher.model = LengthModel()
+        self.assertEqual(batcher.predict([('q', 'ab')], timeout=5), [2.0])
+
+    def test_empty_request(self):
+        batcher = RerankBatcher(LengthModel())
+        self.assertEqual(batcher.predict([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Test cases for the rerank score cache"""
+import unittest
+
+from core.rerank_cache import RerankScoreCache, query_fingerprint
+
+CHUNKS = [
+    {'chunk_id': 'abc_0', 'text': 'Invoice 1042 covers consulting hours.'},
+    {'chunk_id': 'abc_1', 'text': 'Payment is due in thirty days.'},
+    {'chunk_id': 'def_0', 'text': 'The parser module reads json files.'},
+]
+
+
+class TestRerankScoreCache(unittest.TestCase):
+    """Lookups, text-change misses, invalidation and LRU bound"""
+
+    def setUp(self):
+        self.cache = RerankScoreCache(max_entries=10)
+        self.fingerprint = query_fingerprint("When is payment due?")
+
+    def fill(self, chunks=CHUNKS):
+        _, digests = self.cache.lookup(self.fingerprint, chunks)
+        self.cache.store(self.fingerprint, [c['chunk_id'] for c in chunks], digests,
+                         [float(i) for i in range(len(chunks))])
+
+    def test_normalized_query_shares_fingerprint(self):
+        self.assertEqual(query_fingerprint("When is  payment due?"), query_fingerprint("when is payment due?"))
+        self.assertNotEqual(self.fingerprint, query_fingerprint("Who wrote the parser?"))
+
+    def test_hit_after_store(self):
+        self.fill()
+        scores, _ = self.cache.lookup(self.fingerprint, CHUNKS)
+        self.assertEqual(scores, [0.0, 1.0, 2.0])
+        self.assertEqual(self.cache.stats()['hits'], 3)
+
+    def test_partial_overlap_only_misses_new_chunks(self):
+        self.fill(CHUNKS[:2])
+        scores, _ = self.cache.lookup(self.fingerprint, CHUNKS)
+        self.assertEqual(scores, [0.0, 1.0, None])
+
+    def test_changed_text_is_rescored(self):
+        self.fill()
+        reingested = [dict(CHUNKS[1], text='Payment is due in sixty days.')]
+        scores, _ = self.cache.lookup(self.fingerprint, reingested)
+        self.assertEqual(scores, [None])
+
+    def test_invalidate_chunks_and_document(self):
+        self.fill()
+        self.assertEqual(self.cache.invalidate_chunks(['def_0']), 1)
+        self.assertEqual(self.cache.invalidate_document('abc'), 2)
+        scores, _ = self.cache.lookup(self.fingerprint, CHUNKS)
+        self.assertEqual(scores, [None, None, None])
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_bounded(self):
+        for n in range(5):
+            fingerprint = query_fingerprint(f"question {n}")
+            _, digests = self.cache.lookup(fingerprint, CHUNKS)
+            self.cache.store(fingerprint, [c['chunk_id'] for c in CHUNKS], digests, [1.0, 2.0, 3.0])
+        self.assertEqual(self.cache.stats()['entries'], 10)
+        # The oldest question was evicted first
+        scores, _ = self.cache.lookup(query_fingerprint("question 0"), CHUNKS)
+        self.assertEqual(scores, [None, None, None])
+        self.assertEqual(self.cache.invalidate_document('abc'), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Test cases for the adaptive rerank depth policy"""
+import unittest
+
+from core.llm import LLMService
+from core.rerank_policy import EXPAND, RERANK, SKIP, AdaptiveRerankPolicy
+
+
+def make_chunks(distances):
+    return [{'chunk_id': f"doc_{i}", 'text': f"passage {i}", 'filename': f"file{i}.txt", 'distance': d}
+            for i, d in enumerate(distances)]
+
+
+class CountingReranker:
+    """Scores passages in reverse retrieval order and remembers how many it saw"""
+
+    def __init__(self):
+        self.pairs = 0
+
+    def predict(self, pairs):
+        self.pairs += len(pairs)
+        return [-float(text.split()[-1]) for _, text in pairs]
+
+
+class TestAdaptiveRerankPolicy(unittest.TestCase):
+    """Skip, default and expanded depth decisions"""
+
+    def setUp(self):
+        self.policy = AdaptiveRerankPolicy(min_depth=10, max_depth=25, skip_margin=0.15,
+                                           skip_max_distance=0.5, ambiguity_band=0.05)
+
+    def test_clear_top_hit_is_skipped(self):
+        decision = self.policy.decide(make_chunks([0.2] + [0.6 + i * 0.01 for i in range(24)]))
+        self.assertEqual((decision.action, decision.depth), (SKIP, 0))
+
+    def test_distant_top_hit_is_not_skipped(self):
+        # Leads clearly, but is a weak match in absolute terms
+        decision = self.policy.decide(make_chunks([0.7] + [0.9 + i * 0.01 for i in range(24)]))
+        self.assertEqual((decision.action, decision.depth), (RERANK, 10))
+
+    def test_top_hit_not_first_in_fused_order_is_not_skipped(self):
+        decision = self.policy.decide(make_chunks([0.6, 0.2] + [0.7] * 23))
+        self.assertNotEqual(decision.action, SKIP)
+
+    def test_near_ties_expand_depth(self):
+        decision = self.policy.decide(make_chunks([0.40 + i * 0.004 for i in range(25)]))
+        self.assertEqual(decision.action, EXPAND)
+        self.assertEqual(decision.tied, 13)
+        self.assertEqual(decision.depth, 18)
+
+    def test_depth_is_capped(self):
+        decision = self.policy.decide(make_chunks([0.4] * 40))
+        self.assertEqual((decision.action, decision.depth), (EXPAND, 25))
+        small_pool = self.policy.decide(make_chunks([0.4] * 6))
+        self.assertEqual((small_pool.action, small_pool.depth), (RERANK, 6))
+
+    def test_stats_track_latency_effect(self):
+        self.policy.record(self.policy.decide(make_chunks([0.40 + i * 0.03 for i in range(25)])), 20.0, 10)
+        self.policy.record(self.policy.decide(make_chunks([0.2] + [0.6] * 24)), 0.0, 0)
+        stats = self.policy.stats()
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['actions'][SKIP]['requests'], 1)
+        self.assertEqual(stats['ms_per_pair'], 2.0)
+        # The skip avoided ten pairs at ~2ms each
+        self.assertEqual(stats['estimated_delta_ms'], -20.0)
+
+
+class TestRerankChunksWithPolicy(unittest.TestCase):
+    """LLMService only sends the chosen depth to the CrossEncoder"""
+
+    def setUp(self):
+        self.service = LLMService.__new__(LLMService)
+        self.service.reranker = CountingReranker()
+        self.service.rerank_cache = None
+        self.service.rerank_batcher = None
+        self.service.rerank_policy = AdaptiveRerankPolicy(min_depth=10, max_depth=25, skip_margin=0.15,
+                                                          skip_max_distance=0.5, ambiguity_band=0.05)
+
+    def test_skip_keeps_retrieval_order(self):
+        chunks = make_chunks([0.2] + [0.6] * 24)
+        result = self.service._rerank_chunks("question", chunks, top_k=5)
+        self.assertEqual([c['chunk_id'] for c in result], [f"doc_{i}" for i in range(5)])
+        self.assertEqual(self.service.reranker.pairs, 0)
+
+    def test_default_depth_reranks_head_of_pool(self):
+        chunks = make_chunks([0.4 + i * 0.03 for i in range(25)])
+        result = self.service._rerank_chunks("question", chunks, top_k=5)
+        self.assertEqual(self.service.reranker.pairs, 10)
+        self.assertEqual(result[0]['chunk_id'], 'doc_0')  # CountingReranker prefers earlier passages
+        self.assertEqual(self.service.rerank_policy.stats()['actions'][RERANK]['requests'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
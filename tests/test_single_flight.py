@@ -0,0 +1,143 @@
+"""Test cases for single-flight coalescing of identical chat requests"""
+import threading
+import time
+import unittest
+
+from core.single_flight import SingleFlight, flight_key
+
+ANSWER = {'answer': "25 days", 'cited_files': ['policy.txt'], 'confidence_score': 80,
+          'source_snippets': [], 'detected_language': 'en'}
+
+
+class TestFlightKey(unittest.TestCase):
+    """Normalized query, role, corpus version and filter scope"""
+
+    def test_key(self):
+        base = flight_key("How many vacation days?", "Employee", 3)
+        self.assertEqual(base, flight_key("  how many   Vacation days?", "Employee", 3))
+        self.assertNotEqual(base, flight_key("How many vacation days?", "Admin", 3))
+        self.assertNotEqual(base, flight_key("How many vacation days?", "Employee", 4))
+        self.assertNotEqual(base, flight_key("How many vacation days?", "Employee", 3, scope="domain=HR"))
+
+
+class TestSingleFlightInProcess(unittest.TestCase):
+    """Concurrent duplicates across threads share one computation"""
+
+    def setUp(self):
+        self.flights = SingleFlight(enabled=True, wait_timeout=2)
+        self.computations = 0
+
+    def ask(self, results, delay=0.1, fail=False):
+        flight, response = self.flights.join("key")
+        if response is None:
+            try:
+                self.computations += 1
+                time.sleep(delay)
+                if fail:
+                    raise RuntimeError("generation failed")
+                response = dict(ANSWER)
+            except RuntimeError:
+                flight.fail()
+                return
+            flight.complete(response)
+        results.append(response)
+
+    def test_duplicates_share_result(self):
+        results = []
+        threads = [threading.Thread(target=self.ask, args=(results,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.computations, 1)
+        self.assertEqual([r['answer'] for r in results], ["25 days"] * 5)
+        stats = self.flights.stats()
+        self.assertEqual((stats['leaders'], stats['shared_local'], stats['in_flight']), (1, 4, 0))
+
+    def test_failed_leader_lets_duplicates_compute(self):
+        results = []
+        leader = threading.Thread(target=self.ask, args=(results, 0.1, True))
+        leader.start()
+        time.sleep(0.02)
+        self.ask(results, delay=0)
+        leader.join()
+        self.assertEqual(self.computations, 2)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(self.flights.stats()['fallbacks'], 1)
+
+    def test_sequential_requests_are_not_coalesced(self):
+        results = []
+        self.ask(results, delay=0)
+        self.ask(results, delay=0)
+        self.assertEqual(self.computations, 2)
+
+    def test_streamed_leader_shares_final_answer(self):
+        flight, _ = self.flights.join("key")
+        events = flight.events(iter([('sources', {}), ('token', {'text': "25 days"}), ('done', dict(ANSWER))]))
+        next(events)
+        waiter_results = []
+        waiter = threading.Thread(target=lambda: waiter_results.append(self.flights.join("key")[1]))
+        waiter.start()
+        list(events)
+        waiter.join()
+        self.assertEqual(waiter_results[0]['answer'], "25 days")
+
+    def test_abandoned_stream_releases_waiters(self):
+        flight, _ = self.flights.join("key")
+        events = flight.events(iter([('sources', {}), ('token', {'text': "25"})]))
+        next(events)
+        events.close()  # Client disconnected before 'done'
+        self.assertEqual(self.flights.stats()['in_flight'], 0)
+
+    def test_disabled(self):
+        flights = SingleFlight(enabled=False)
+        flight, response = flights.join("key")
+        self.assertIsNone(response)
+        flight.complete(ANSWER)
+        self.assertIsNone(flights.join("key")[1])
+
+
+class TestSingleFlightAcrossReplicas(unittest.TestCase):
+    """Two SingleFlight instances (replicas) coordinate through Redis"""
+
+    def setUp(self):
+        try:
+            import fakeredis
+        except ImportError:
+            self.skipTest("fakeredis not installed")
+        server = fakeredis.FakeServer()
+        make = lambda: SingleFlight(fakeredis.FakeRedis(server=server, decode_responses=True), enabled=True,
+                                    wait_timeout=2, poll_interval=0.01)
+        self.replica_a, self.replica_b = make(), make()
+
+    def test_remote_duplicate_waits_for_leader(self):
+        flight, _ = self.replica_a.join("key")
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(self.replica_b.join("key")))
+        waiter.start()
+        time.sleep(0.05)
+        flight.complete(dict(ANSWER))
+        waiter.join()
+        remote_flight, response = results[0]
+        self.assertEqual(response['answer'], "25 days")
+        self.assertEqual(self.replica_b.stats()['shared_remote'], 1)
+        # Lock released: the next question after the answer is computed again
+        self.assertIsNone(self.replica_b.join("key")[1])
+
+    def test_remote_leader_failure(self):
+        flight, _ = self.replica_a.join("key")
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(self.replica_b.join("key")))
+        waiter.start()
+        time.sleep(0.05)
+        flight.fail()
+        waiter.join()
+        remote_flight, response = results[0]
+        self.assertIsNone(response)
+        self.assertFalse(remote_flight.finished)  # Its own computation, shared with local duplicates
+        remote_flight.complete(dict(ANSWER))
+        self.assertEqual(self.replica_b.stats()['fallbacks'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
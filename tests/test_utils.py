@@ -29,6 +29,24 @@ class TestTextUtils(unittest.TestCase):
         chunks = TextUtils.chunk_text("", chunk_size=500)
         self.assertEqual(len(chunks), 0)
     
+    def test_merge_overlap_reassembles_text(self):
+        """Merging overlapping chunks should reproduce the original text"""
+        text = " ".join(f"line {i}: value={i * 7}" for i in range(400))
+        chunks = TextUtils.chunk_text(text, chunk_size=500, overlap=150)
+        
+        rebuilt = ""
+        previous = ""
+        for chunk in chunks:
+            rebuilt += TextUtils.merge_overlap(previous, chunk, max_overlap=150)
+            previous = chunk
+        
+        self.assertEqual(rebuilt, text)
+    
+    def test_merge_overlap_without_overlap(self):
+        """Unrelated chunks should be joined with a newline"""
+        self.assertEqual(TextUtils.merge_overlap("abc", "xyz"), "\nxyz")
+        self.assertEqual(TextUtils.merge_overlap("", "xyz"), "xyz")
+    
     def test_clean_text_whitespace(self):
         """Should normalize whitespace"""
         text = "Multiple    spaces\n\n\nand    newlines"
@@ -0,0 +1,161 @@
+"""Test cases for the in-process NumPy vector backend"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from core.vector_store import NumpyBackend, NumpyCollection, copy_collections
+
+
+def metadata(i):
+    return {'domain': 'Finance' if i % 2 else 'Healthcare', 'filepath': f'/sorted/{i // 10}.txt', 'chunk_index': i}
+
+
+class TestNumpyCollection(unittest.TestCase):
+    """Test exact search, filtering, deletes and persistence"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.vectors = np.random.default_rng(0).standard_normal((200, 8)).astype(np.float32)
+        self.ids = [f"c{i}" for i in range(200)]
+        self.collection = NumpyCollection("documents", self.tmp_dir / "documents")
+        self.collection.add(
+            ids=self.ids,
+            embeddings=self.vectors.tolist(),
+            documents=[f"text {i}" for i in range(200)],
+            metadatas=[metadata(i) for i in range(200)]
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def expected_top(self, query, k, rows=None):
+        normalized = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        scores = normalized @ (query / np.linalg.norm(query))
+        rows = np.arange(len(self.ids)) if rows is None else np.asarray(rows)
+        order = rows[np.argsort(-scores[rows])][:k]
+        return [self.ids[i] for i in order]
+
+    def test_query_matches_brute_force(self):
+        """Top-k should equal exact cosine ranking"""
+        query = self.vectors[17] + 0.1
+        results = self.collection.query(query_embeddings=[query.tolist()], n_results=10)
+        self.assertEqual(results['ids'][0], self.expected_top(query, 10))
+        self.assertEqual(results['distances'][0], sorted(results['distances'][0]))
+        self.assertEqual(results['documents'][0][0], f"text {self.ids.index(results['ids'][0][0])}")
+
+    def test_where_filter(self):
+        """Only matching metadata should be searched"""
+        query = self.vectors[3]
+        results = self.collection.query(query_embeddings=[query.tolist()], n_results=5,
+                                        where={'domain': {'$in': ['Finance']}})
+        odd_rows = [i for i in range(200) if i % 2]
+        self.assertEqual(results['ids'][0], self.expected_top(query, 5, odd_rows))
+        self.assertTrue(all(m['domain'] == 'Finance' for m in results['metadatas'][0]))
+
+    def test_get_by_metadata_with_paging(self):
+        """get() should support where, limit and offset like Chroma"""
+        page = self.collection.get(where={'filepath': '/sorted/1.txt'}, limit=4, offset=2, include=[])
+        self.assertEqual(page['ids'], ['c12', 'c13', 'c14', 'c15'])
+        self.assertIsNone(page['documents'])
+
+        fetched = self.collection.get(ids=['c5'], include=['embeddings'])
+        normalized = self.vectors[5] / np.linalg.norm(self.vectors[5])
+        np.testing.assert_allclose(fetched['embeddings'][0], normalized, rtol=1e-5)
+
+    def test_delete_and_upsert(self):
+        """Deleted chunks disappear; upserts replace the stored vector"""
+        self.collection.delete(where={'domain': 'Healthcare'})
+        self.assertEqual(self.collection.count(), 100)
+
+        self.collection.upsert(ids=['c1'], embeddings=[[1.0] + [0.0] * 7], documents=['moved'],
+                               metadatas=[metadata(1)])
+        results = self.collection.query(query_embeddings=[[1.0] + [0.0] * 7], n_results=1)
+        self.assertEqual(results['ids'][0], ['c1'])
+        self.assertAlmostEqual(results['distances'][0][0], 0.0, places=5)
+        self.assertEqual(self.collection.count(), 100)
+
+    def test_compaction_keeps_results(self):
+        """Rewriting the matrix should not change search results"""
+        keep = [i for i in range(200) if i % 2]
+        self.collection.delete(ids=[self.ids[i] for i in range(200) if i % 2 == 0])
+        self.collection.compact()
+        query = self.vectors[42]
+        results = self.collection.query(query_embeddings=[query.tolist()], n_results=5)
+        self.assertEqual(results['ids'][0], self.expected_top(query, 5, keep))
+
+    def test_second_instance_sees_writes(self):
+        """A reader opened separately (e.g. another process) should see new chunks"""
+        reader = NumpyCollection("documents", self.tmp_dir / "documents")
+        self.assertEqual(reader.count(), 200)
+        self.collection.add(ids=['new'], embeddings=[[0.0] * 7 + [1.0]], documents=['new'], metadatas=[{}])
+        results = reader.query(query_embeddings=[[0.0] * 7 + [1.0]], n_results=1)
+        self.assertEqual(results['ids'][0], ['new'])
+
+    def test_dimension_mismatch(self):
+        """Vectors of the wrong size should be rejected"""
+        with self.assertRaises(ValueError):
+            self.collection.add(ids=['bad'], embeddings=[[1.0, 2.0]])
+
+    def test_float16_storage(self):
+        """Half-precision stores should rank like float32"""
+        half = NumpyBackend(self.tmp_dir / "half", dtype='float16').get_or_create_collection("documents")
+        half.add(ids=self.ids, embeddings=self.vectors.tolist())
+        self.assertEqual(half.dtype, np.float16)
+        query = self.vectors[7]
+        results = half.query(query_embeddings=[query.tolist()], n_results=3)
+        self.assertEqual(results['ids'][0][0], 'c7')
+
+    def test_int8_rescoring_matches_float32(self):
+        """int8 scan plus float32 rescoring should return the exact top-k"""
+        quantized = NumpyCollection("documents", self.tmp_dir / "int8", dtype='int8', rescore_candidates=50)
+        quantized.add(ids=self.ids, embeddings=self.vectors.tolist())
+        for i in (3, 50, 120):
+            query = self.vectors[i] + 0.2
+            results = quantized.query(query_embeddings=[query.tolist()], n_results=10)
+            self.assertEqual(results['ids'][0], self.expected_top(query, 10))
+
+        sizes = quantized.storage_bytes()
+        self.assertEqual(set(sizes), {'scan', 'full', 'scale'})
+        self.assertEqual(sizes['scan'] * 4, sizes['full'])
+
+    def test_search_maps_read_only(self):
+        """Readers should never hold a writable mapping"""
+        self.collection.query(query_embeddings=[self.vectors[0].tolist()], n_results=1)
+        views, _ = self.collection._snapshot()
+        self.assertFalse(views['scan'].flags.writeable)
+
+
+class TestNumpyBackend(unittest.TestCase):
+    """Test collection management"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.backend = NumpyBackend(self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_list_and_delete_collections(self):
+        self.backend.get_or_create_collection("documents__finance").add(ids=['a'], embeddings=[[1.0, 0.0]])
+        self.backend.get_or_create_collection("documents__hr")
+        self.assertEqual(self.backend.list_collection_names(), ['documents__finance', 'documents__hr'])
+        self.assertEqual(self.backend.total_count(), 1)
+        self.backend.delete_collection("documents__hr")
+        self.assertEqual(self.backend.list_collection_names(), ['documents__finance'])
+
+    def test_copy_collections(self):
+        """Stored embeddings should be copied without re-embedding"""
+        self.backend.get_or_create_collection("documents").add(
+            ids=['a', 'b'], embeddings=[[1.0, 0.0], [0.0, 1.0]], documents=['x', 'y'], metadatas=[{'n': 1}, {'n': 2}]
+        )
+        target = NumpyBackend(self.tmp_dir / "copy")
+        self.assertEqual(copy_collections(self.backend, target), 2)
+        copied = target.get_or_create_collection("documents").get(where={'n': 2})
+        self.assertEqual((copied['ids'], copied['documents']), (['b'], ['y']))
+
+
+if __name__ == '__main__':
+    unittest.main()
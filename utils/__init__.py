@@ -1,5 +1,6 @@
 """Utility functions"""
 from .file_utils import FileUtils
 from .text_utils import TextUtils
+from .language_detector import LanguageDetector
 
-__all__ = ['FileUtils', 'TextUtils']
+__all__ = ['FileUtils', 'TextUtils', 'LanguageDetector']
@@ -0,0 +1,162 @@
+"""
+Language Detector Module
+Identifies the language of user queries for picking the answer language.
+Script and stopword checks settle almost every query in microseconds; only
+the rest go to langdetect, seeded so the same text always gets the same
+answer. Results are cached per normalized query.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = 'en'
+
+# Function words that rarely occur in queries written in another language
+STOPWORDS = {
+    'en': set("the a an is are was were what which who whom whose how why when where does do did can could "
+              "should would will of in on for to from with about and or not all any list show find give tell "
+              "me my our your their this that these those there many much".split()),
+    'es': set("el la los las un una unos unas es son qué que cuál cuáles quién cómo cuándo dónde por para con "
+              "del al de en y o no mi mis su sus hay cuántos cuántas muestra dame este esta estos".split()),
+    'fr': set("le la les un une des est sont quel quelle quels quelles qui comment quand où pourquoi pour avec "
+              "du au aux de en et ou ne pas mon mes son ses il y combien montre donne ce cette ces".split()),
+    'de': set("der die das den dem des ein eine einen ist sind was wer wie wann wo warum welche welcher für "
+              "mit von zu im in und oder nicht mein meine sein seine es gibt viele wieviel zeige gib dieser".split()),
+}
+# Letters specific to one of the Latin-script languages above
+LETTER_HINTS = {'es': set('ñ¿¡'), 'fr': set('çèêëâîïôûœ'), 'de': set('äöüß')}
+
+WORDS = re.compile(r'[^\W\d_]+')
+
+
+def _is_devanagari(char: str) -> bool:
+    return 'ऀ' <= char <= 'ॿ'
+
+
+def _is_latin(char: str) -> bool:
+    return char < 'ɐ'
+
+
+class LanguageDetector:
+    """Thread-safe, cached query language identification
+
+    detect_timed returns (language, method, seconds) where method is
+    'cache', 'fast' (script/stopword rules) or 'model' (seeded langdetect).
+    Per-method counts and timings are available from stats().
+    """
+
+    def __init__(self, cache_size: int = 4096, seed: int = 0):
+        self.cache_size = cache_size
+        self.seed = seed
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._factory = None
+        self._factory_lock = threading.Lock()
+        self._timings = {method: {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+                         for method in ('cache', 'fast', 'model')}
+
+    def detect(self, text: str) -> str:
+        return self.detect_timed(text)[0]
+
+    def detect_timed(self, text: str) -> Tuple[str, str, float]:
+        started = time.perf_counter()
+        normalized = ' '.join((text or '').lower().split())
+        with self._lock:
+            language = self._cache.get(normalized)
+            if language is not None:
+                self._cache.move_to_end(normalized)
+        method = 'cache'
+        if language is None:
+            language = self._fast_path(normalized)
+            method = 'fast'
+            if language is None:
+                language = self._model_detect(normalized)
+                method = 'model'
+            with self._lock:
+                self._cache[normalized] = language
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        seconds = time.perf_counter() - started
+        self._record(method, seconds)
+        return language, method, seconds
+
+    def _fast_path(self, text: str) -> Optional[str]:
+        """Script and stopword rules; None when they cannot decide"""
+        letters = [c for c in text if c.isalpha()]
+        if not letters:
+            return DEFAULT_LANGUAGE  # numbers, codes, symbols
+        if sum(_is_devanagari(c) for c in letters) * 2 >= len(letters):
+            return 'hi'
+        if not all(_is_latin(c) for c in letters):
+            return None  # other scripts: leave it to the model
+
+        words = WORDS.findall(text)
+        scores = {lang: sum(word in stopwords for word in words) for lang, stopwords in STOPWORDS.items()}
+        for lang, hints in LETTER_HINTS.items():
+            if any(c in hints for c in letters):
+                scores[lang] += 1
+        best = max(scores.values())
+        leaders = [lang for lang, score in scores.items() if score == best]
+        if best > 0:
+            if len(leaders) == 1:
+                return leaders[0]
+            # Shared words ("in", "die", "was"): plain ASCII text stays English
+            return DEFAULT_LANGUAGE if DEFAULT_LANGUAGE in leaders and text.isascii() else None
+        # No function words at all: keyword queries ("invoice 1042", "ML models") are English
+        # unless they carry accented letters
+        return DEFAULT_LANGUAGE if text.isascii() else None
+
+    def _get_factory(self):
+        if self._factory is None:
+            with self._factory_lock:
+                if self._factory is None:
+                    from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+                    factory = DetectorFactory()
+                    factory.load_profile(PROFILES_DIRECTORY)
+                    factory.set_seed(self.seed)
+                    self._factory = factory
+        return self._factory
+
+    def warm_up(self) -> None:
+        """Load the langdetect profiles now rather than on the first ambiguous query"""
+        self._get_factory()
+
+    def _model_detect(self, text: str) -> str:
+        try:
+            detector = self._get_factory().create()
+            detector.append(text)
+            return detector.detect()
+        except Exception as e:
+            logger.warning(f"Could not detect language for query: '{text[:50]}...' ({e}), defaulting to English")
+            return DEFAULT_LANGUAGE
+
+    def _record(self, method: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings[method]
+            timing['calls'] += 1
+            timing['seconds'] += seconds
+            timing['max_seconds'] = max(timing['max_seconds'], seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            calls = sum(t['calls'] for t in self._timings.values())
+            return {
+                'calls': calls,
+                'cache_entries': len(self._cache),
+                'model_loaded': self._factory is not None,
+                'methods': {
+                    method: {
+                        'calls': t['calls'],
+                        'share': round(t['calls'] / calls, 4) if calls else 0.0,
+                        'avg_us': round(t['seconds'] / t['calls'] * 1e6, 1) if t['calls'] else 0.0,
+                        'max_us': round(t['max_seconds'] * 1e6, 1)
+                    }
+                    for method, t in self._timings.items()
+                }
+            }
@@ -31,6 +31,24 @@ class TextUtils:
         
         return chunks
     
+    @staticmethod
+    def merge_overlap(previous: str, current: str, max_overlap: int = 150) -> str:
+        """Return the part of `current` not already covered by the end of `previous`
+        
+        Undoes the overlap added by chunk_text: finds the longest suffix of the
+        previous chunk (up to max_overlap chars) that is a prefix of the current one.
+        Falls back to a newline separator when no overlap is found.
+        """
+        if not previous:
+            return current
+        
+        limit = min(max_overlap, len(previous), len(current))
+        for size in range(limit, 0, -1):
+            if previous.endswith(current[:size]):
+                return current[size:]
+        
+        return '\n' + current
+    
     @staticmethod
     def clean_text(text: str) -> str:
         """Clean and normalize text"""
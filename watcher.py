@@ -5,11 +5,14 @@ Dispatches tasks to Celery worker for processing.
 
 import time
 import logging
+import redis
 from pathlib import Path
 from watchdog.observers.polling import PollingObserver as Observer
 from watchdog.events import FileSystemEventHandler
 
 from core import DatabaseManager
+from core.answer_cache import CorpusVersion
+from core.ingest_writer import IngestClient
 from config import Config
 from worker import process_file_task
 
@@ -48,7 +51,11 @@ SORTED_DIR.mkdir(parents=True, exist_ok=True)
 DB_DIR.mkdir(parents=True, exist_ok=True)
 
 # Initialize only DB Manager for cleanup/sync (Processing is done by Worker)
-db_manager = DatabaseManager(DB_DIR)
+redis_client = redis.Redis.from_url(Config.CELERY_BROKER_URL, decode_responses=True)
+db_manager = DatabaseManager(DB_DIR, read_only=Config.INGEST_WRITER_ENABLED)
+# Deletes go through the ingest writer when it owns the store
+db_writer = IngestClient.from_config(redis_client) if Config.INGEST_WRITER_ENABLED else db_manager
+corpus_version = CorpusVersion(redis_client)
 
 def process_file(filepath):
     """Dispatch file processing task to Celery worker"""
@@ -74,7 +81,9 @@ def remove_file_from_db(filepath):
     filepath = Path(filepath)
     try:
         # Remove by filepath from DB
-        deleted_count = db_manager.delete_by_filepath(str(filepath))
+        deleted_count = db_writer.delete_by_filepath(str(filepath))
+        if deleted_count:
+            corpus_version.bump()
         logger.info(f"Removed {deleted_count} chunks from database for {filepath.name}")
     except Exception as e:
         logger.error(f"Error removing file from database: {e}")
@@ -119,17 +128,14 @@ def process_existing_files():
 def sync_sorted_with_db():
     """Clean up dangling DB entries"""
     try:
-        results = db_manager.collection.get()
-        ids = results.get('ids', [])
-        metadatas = results.get('metadatas', [])
-        to_delete = []
-        for i, meta in enumerate(metadatas):
-            fp = meta.get('filepath')
+        # The file index lists every stored filepath without scanning the vector store
+        pruned = 0
+        for fp in db_manager.file_index.list_filepaths():
             if fp and not Path(fp).exists():
-                to_delete.append(ids[i])
-        if to_delete:
-            db_manager.collection.delete(ids=to_delete)
-            logger.info(f"Pruned {len(to_delete)} dangling chunks")
+                pruned += db_writer.delete_by_filepath(fp)
+        if pruned:
+            corpus_version.bump()
+            logger.info(f"Pruned {pruned} dangling chunks")
     except Exception as e:
         logger.error(f"Error during sync: {e}")
 
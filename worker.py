@@ -18,6 +18,9 @@ logger = logging.getLogger(__name__)
 from config import Config
 from core import DatabaseManager, LLMService, FileProcessor
 from models import Document
+from core.answer_cache import CorpusVersion
+from core.ingest_writer import IngestClient, IngestWriteError
+from core.classification_cache import ClassificationCache
 
 # Initialize Celery
 celery_app = Celery('documind_worker', broker=Config.CELERY_BROKER_URL)
@@ -35,12 +38,14 @@ db_manager = None
 llm_service = None
 file_processor = None
 redis_client = None
+classification_cache = None
 
 def get_services():
     """Lazy load services to ensure connection safety in workers"""
     global db_manager, llm_service, file_processor, redis_client
     if db_manager is None:
-        db_manager = DatabaseManager(Config.DB_DIR)
+        # With the ingest writer, workers queue their writes and never open the vector store
+        db_manager = IngestClient.from_config() if Config.INGEST_WRITER_ENABLED else DatabaseManager(Config.DB_DIR)
     if llm_service is None:
         llm_service = LLMService(model=Config.LLM_MODEL)
     if file_processor is None:
@@ -49,6 +54,13 @@ def get_services():
         redis_client = redis.Redis.from_url(Config.CELERY_BROKER_URL, decode_responses=True)
     return db_manager, llm_service, file_processor, redis_client
 
+def get_classification_cache(llm, redis_conn):
+    """Shared classification cache (None when disabled)"""
+    global classification_cache
+    if classification_cache is None and Config.ENABLE_CLASSIFICATION_CACHE:
+        classification_cache = ClassificationCache(redis_conn, llm.model, llm.CLASSIFY_LLM_THRESHOLD)
+    return classification_cache
+
 def get_adaptive_chunk_size(file_size_mb):
     """Calculate optimal chunk size based on file size"""
     if file_size_mb > 10:
@@ -83,6 +95,28 @@ def store_file_hash(redis_client, file_hash, filepath):
     if file_hash:
         redis_client.hset(Config.REDIS_FILE_HASHES, file_hash, str(filepath))
 
+def get_uploader(filename):
+    """Username of the pending web upload for this file ('' for watched-folder drops)"""
+    try:
+        import sqlite3
+        users_db_path = Config.DATA_DIR / 'users.db'
+        if not users_db_path.exists():
+            return ''
+        conn = sqlite3.connect(users_db_path)
+        try:
+            row = conn.execute("""
+                SELECT u.username FROM user_uploads up
+                JOIN users u ON u.id = up.user_id
+                WHERE up.filename = ? AND (up.sorted_path IS NULL OR up.sorted_path = '')
+                ORDER BY up.id DESC LIMIT 1
+            """, (filename,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else ''
+    except Exception as e:
+        logger.warning(f"Could not look up uploader for {filename}: {e}")
+        return ''
+
 def get_date_folder():
     """Get current date folder in YYYY-MM format"""
     if Config.ENABLE_TIME_BASED_SORTING:
@@ -128,8 +162,13 @@ def process_file_task(self, filepath_str):
         if not text:
             text = f"File: {filepath.name}"
         
-        # 2. Classify
-        hierarchy = llm.classify_hierarchical(text, filepath.name)
+        # 2. Classify (known content reuses its cached result, LLM fallback included)
+        cache = get_classification_cache(llm, redis_conn)
+        if cache:
+            hierarchy, classified_by = cache.classify(llm.classify_hierarchical, text, filepath.name, file_hash)
+        else:
+            hierarchy = llm.classify_hierarchical(text, filepath.name)
+            classified_by = hierarchy.get('method', 'rules')
         domain = hierarchy["domain"]
         category = hierarchy["category"]
         file_ext = hierarchy["file_extension"]
@@ -139,6 +178,11 @@ def process_file_task(self, filepath_str):
         
         # 4. Build sorting path with time-based folder
         date_folder = get_date_folder()
+        
+        # Filterable metadata stored on every chunk
+        document.file_ext = file_ext.lower()
+        document.date_folder = date_folder or datetime.now().strftime(Config.DATE_FORMAT)
+        document.uploaded_by = get_uploader(filepath.name)
         if date_folder:
             category_dir = Config.SORTED_DIR / domain / category / file_ext / date_folder
         else:
@@ -151,7 +195,8 @@ def process_file_task(self, filepath_str):
         if dest_path.exists():
             logger.info(f"🔄 [Worker] File exists. Overwriting: {dest_path.name}")
             # 1. Remove old data from DB
-            db.delete_by_filepath(str(dest_path))
+            if db.delete_by_filepath(str(dest_path)):
+                CorpusVersion(redis_conn).bump()
             # 2. Remove old file
             try:
                 os.remove(dest_path)
@@ -172,12 +217,14 @@ def process_file_task(self, filepath_str):
         chunk_size = get_adaptive_chunk_size(file_size_mb)
         logger.info(f"📏 [Worker] File size: {file_size_mb:.2f}MB, Chunk size: {chunk_size}")
         
-        # 6. Create Chunks with adaptive sizing
+        # 6. Create Chunks with adaptive sizing (parent sections of chunk_size, small child passages)
         chunks = processor.create_chunks(document, chunk_size=chunk_size)
+        parents_count = len({chunk.parent_id for chunk in chunks if chunk.parent_id})
         
         # 7. Store in Database
         if chunks:
-            db.add_chunks(chunks)
+            ack = db.add_chunks(chunks)  # Acknowledged after the writer's group commit (None when writing directly)
+            CorpusVersion(redis_conn).bump()  # Invalidate cached answers
             
             # Store file hash and metadata in Redis
             store_file_hash(redis_conn, file_hash, dest_path)
@@ -187,6 +234,7 @@ def process_file_task(self, filepath_str):
                 "size_mb": round(file_size_mb, 2),
                 "chunk_size": chunk_size,
                 "chunks_count": len(chunks),
+                "parents_count": parents_count,
                 "domain": domain,
                 "category": category,
                 "uploaded_at": datetime.now().isoformat(),
@@ -238,7 +286,9 @@ def process_file_task(self, filepath_str):
                 "chunk_size": chunk_size,
                 "file_size_mb": round(file_size_mb, 2),
                 "destination": str(dest_path),
-                "is_duplicate": duplicate_path is not None
+                "is_duplicate": duplicate_path is not None,
+                "classified_by": classified_by,
+                "batch_chunks": ack.get('batch_chunks') if ack else len(chunks)
             }
         
     except Exception as e:
@@ -246,3 +296,60 @@ def process_file_task(self, filepath_str):
         return {"status": "error", "error": str(e)}
 
     return {"status": "success", "message": "Processed but no chunks created"}
+
+
+def run_reindex(processor, backend=None, keep_old=False):
+    """Re-embed the active index version into a shadow one and swap it in
+    
+    Only the process that owns the vector store may run this: the shadow
+    writes, the swap and dropping the old version are all store writes.
+    Raises IndexVersionError when a build is already in progress.
+    """
+    from core.index_versions import IndexRegistry, ReindexJob, make_embedding_function, target_spec
+    
+    registry = IndexRegistry(Config.DB_DIR / "index_versions.db")
+    spec = target_spec()
+    shadow = registry.start_build(spec)
+    
+    logger.info(f"🔁 Re-embedding into '{shadow['name']}' (model={spec['embedding_model']}, "
+                f"chunking={spec['chunking']})")
+    source = DatabaseManager(Config.DB_DIR, backend=backend, index_version=registry.ensure_active()['name'])
+    target = DatabaseManager(Config.DB_DIR, backend=source.backend, index_version=shadow['name'],
+                             embedding_function=make_embedding_function(spec['embedding_model']))
+    
+    def chunker(document):
+        size_mb = document.size_bytes / (1024 * 1024)
+        return processor.create_chunks(document, chunk_size=get_adaptive_chunk_size(size_mb))
+    
+    result = ReindexJob(source, target, registry, chunker, keep_old=keep_old).run()
+    logger.info(f"✅ Re-index done: {result['files']} files, {result['chunks']} chunks")
+    return result
+
+
+@celery_app.task(bind=True, name='worker.reindex_task')
+def reindex_task(self, keep_old=False):
+    """Re-embed the active index version with the configured model/chunking, then swap"""
+    from core.index_versions import IndexVersionError
+    
+    db, _, processor, redis_conn = get_services()
+    if isinstance(db, IngestClient):
+        # The ingest writer owns the store, so the job runs there (see ingest_writer.py)
+        try:
+            db.reindex(keep_old=keep_old)
+        except IngestWriteError as e:
+            logger.warning(f"⚠️ [Worker] Re-index not started: {e}")
+            return {"status": "error", "error": str(e)}
+        logger.info("🔁 [Worker] Re-index handed to the ingest writer")
+        return {"status": "started", "runner": "ingest_writer"}
+    
+    try:
+        result = run_reindex(processor, backend=db.backend, keep_old=keep_old)
+    except IndexVersionError as e:
+        logger.warning(f"⚠️ [Worker] Re-index not started: {e}")
+        return {"status": "error", "error": str(e)}
+    except Exception as e:
+        logger.error(f"❌ [Worker] Re-index failed: {e}", exc_info=True)
+        return {"status": "error", "error": str(e)}
+    
+    CorpusVersion(redis_conn).bump()  # Cached answers came from the old embeddings
+    return {"status": "success", **result}